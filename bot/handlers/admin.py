@@ -1,12 +1,19 @@
 from aiogram import Router, F
+from aiogram.filters import Command, CommandObject
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 from aiogram.utils.keyboard import InlineKeyboardBuilder, ReplyKeyboardMarkup, KeyboardButton
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from database import crud
 from config.config import settings
 from bot.states import SendMessage, AddCourse, AddCompetition
+from bot.utils.okved import okved_index
+from database.database import json_to_dict
+from database.duplicates import format_duplicates
+from bot.utils.competitions import parse_deadline, schedule_competition, TIMESTAMP_FORMAT
+from bot.utils.org_documents import format_documents_block, send_document_bundle
+from bot.keyboards.documents import AdminDocumentsCallback
 
 router = Router()
 
@@ -47,6 +54,8 @@ async def view_pending_verifications(message: Message):
         card += f"Организация: <b>{org['name']}</b>\n"
         card += f"ИНН: {org['inn']}\n"
         card += f"Юр. форма: {org['legal_form']}\n"
+        if org.get('okved'):
+            card += f"ОКВЭД: {okved_index.describe(org['okved'])}\n"
         card += f"Телефон: {org['phone']}\n"
         card += f"Email: {org['email']}\n"
         card += f"Telegram: {org['telegram']}\n\n"
@@ -55,13 +64,20 @@ async def view_pending_verifications(message: Message):
         if org.get('city'):
             card += f"Город: {org['city']}\n"
         card += f"\nОписание: {org['description']}"
+        card += format_duplicates(json_to_dict(row['duplicates']) or [])
+        # Только метаданные файлов — сами файлы по кнопке, из Telegram по file_id
+        documents, _ = await crud.get_org_documents(org['id'], limit=settings.DOCUMENTS_CARD_PREVIEW)
+        documents_total = await crud.count_org_documents(org['id']) if documents else 0
+        card += format_documents_block(documents, documents_total)
 
         builder = InlineKeyboardBuilder()
         builder.button(text="✅ Одобрить", callback_data=f"verify:approve:{verification_id}")
         builder.button(text="✅ Одобрить + Сообщение", callback_data=f"verify:approve_msg:{verification_id}")
         builder.button(text="❌ Отклонить", callback_data=f"verify:reject:{verification_id}")
         builder.button(text="❌ Отклонить + Сообщение", callback_data=f"verify:reject_msg:{verification_id}")
-        builder.adjust(2)
+        if documents_total:
+            builder.button(text="📎 Документы организации", callback_data=AdminDocumentsCallback(org_id=org['id']))
+        builder.adjust(2, 2, 1)
 
         await message.answer(card, reply_markup=builder.as_markup())
 
@@ -300,6 +316,7 @@ async def verify_approve(callback: CallbackQuery):
 
     # Одобряем заявку
     await crud.approve_verification(org_id, user['id'])
+    await crud.create_log(user['id'], "verification_approve", {"organization_id": org_id})
 
     # Получаем информацию об организации
     org = await crud.get_organization_by_id(org_id)
@@ -346,6 +363,7 @@ async def verify_reject(callback: CallbackQuery):
 
     # Отклоняем заявку
     await crud.reject_verification(org_id, user['id'], "Отклонено администратором")
+    await crud.create_log(user['id'], "verification_reject", {"organization_id": org_id})
 
     # Получаем информацию об организации
     org = await crud.get_organization_by_id(org_id)
@@ -513,7 +531,18 @@ async def add_competition_deadline(message: Message, state: FSMContext):
         await message.answer("Добавление конкурса отменено")
         return
 
-    await state.update_data(deadline=message.text)
+    deadline_at = parse_deadline(message.text)
+    if deadline_at is None:
+        await message.answer(
+            "Не удалось распознать дату. Введите дедлайн в формате 2025-12-31 или 31.12.2025 "
+            "(можно со временем: 31.12.2025 18:00):"
+        )
+        return
+    if deadline_at <= datetime.utcnow().strftime(TIMESTAMP_FORMAT):
+        await message.answer("Дедлайн уже прошёл. Введите будущую дату:")
+        return
+
+    await state.update_data(deadline=message.text, deadline_at=deadline_at)
     await message.answer("Введите ссылку на конкурс (или 'нет', если ссылки нет):")
     await state.set_state(AddCompetition.link)
 
@@ -538,8 +567,10 @@ async def add_competition_link(message: Message, state: FSMContext):
         resource_type='competition',
         title=data['title'],
         content=data['content'],
-        additional_data=additional_data
+        additional_data=additional_data,
+        deadline_at=data['deadline_at']
     )
+    schedule_competition(message.bot, {'id': competition_id, 'deadline_at': data['deadline_at']})
 
     # Логируем действие
     user = await crud.get_user_by_telegram_id(message.from_user.id)
@@ -558,22 +589,9 @@ async def add_competition_link(message: Message, state: FSMContext):
 
 # ========== ЛОГИ ==========
 
-@router.message(F.text == "Логи")
-async def view_logs(message: Message):
-    """Просмотр логов"""
-    user = await crud.get_user_by_telegram_id(message.from_user.id)
-
-    if not user or not is_admin(user['role']):
-        await message.answer("У вас нет прав администратора!")
-        return
-
-    logs = await crud.get_logs(limit=20)
-
-    if not logs:
-        await message.answer("Логов пока нет.")
-        return
-
-    text = "<b>📋 Последние 20 логов:</b>\n\n"
+def format_logs(logs: list, title: str) -> str:
+    """Форматирование списка логов"""
+    text = f"<b>{title}</b>\n\n"
     for log in logs:
         # Форматируем дату
         created_at = log['created_at'][:16] if log['created_at'] else ''
@@ -597,7 +615,11 @@ async def view_logs(message: Message):
             text += f"ℹ️ {details_text}\n"
 
         text += "\n"
+    return text
 
+
+async def send_long_text(message: Message, text: str):
+    """Отправка текста частями по 4000 символов"""
     # Разбиваем на части, если текст слишком длинный
     if len(text) > 4000:
         parts = [text[i:i+4000] for i in range(0, len(text), 4000)]
@@ -605,3 +627,112 @@ async def view_logs(message: Message):
             await message.answer(part, parse_mode='HTML')
     else:
         await message.answer(text, parse_mode='HTML')
+
+
+@router.message(F.text == "Логи")
+async def view_logs(message: Message):
+    """Просмотр логов"""
+    user = await crud.get_user_by_telegram_id(message.from_user.id)
+
+    if not user or not is_admin(user['role']):
+        await message.answer("У вас нет прав администратора!")
+        return
+
+    logs = await crud.get_logs(limit=20)
+
+    if not logs:
+        await message.answer("Логов пока нет.")
+        return
+
+    await send_long_text(message, format_logs(logs, "📋 Последние 20 логов:"))
+
+
+@router.message(Command("logs"))
+async def view_logs_by_period(message: Message, command: CommandObject):
+    """Просмотр логов за период: /logs 2025-01-01 [2025-01-31]"""
+    user = await crud.get_user_by_telegram_id(message.from_user.id)
+
+    if not user or not is_admin(user['role']):
+        await message.answer("У вас нет прав администратора!")
+        return
+
+    args = (command.args or "").split()
+    try:
+        date_from = datetime.strptime(args[0], "%Y-%m-%d")
+        date_to = datetime.strptime(args[1], "%Y-%m-%d") if len(args) > 1 else date_from
+    except (IndexError, ValueError):
+        await message.answer("Формат: /logs ГГГГ-ММ-ДД [ГГГГ-ММ-ДД]")
+        return
+
+    # Конец периода включительно
+    date_to += timedelta(days=1)
+    logs = await crud.get_logs(
+        limit=50,
+        date_from=date_from.strftime("%Y-%m-%d"),
+        date_to=date_to.strftime("%Y-%m-%d")
+    )
+
+    if not logs:
+        await message.answer("За указанный период логов нет.")
+        return
+
+    await send_long_text(message, format_logs(logs, f"📋 Логи за период ({len(logs)}):"))
+
+
+async def send_org_documents(message: Message, org: dict):
+    """Пакет документов организации медиагруппами"""
+    documents, has_more = await crud.get_org_documents(org['id'], limit=settings.DOCUMENT_BUNDLE_LIMIT)
+    if not documents:
+        await message.answer(f"У организации «{org['name']}» нет документов.")
+        return
+
+    text = f"📎 Документы организации «{org['name']}»: {len(documents)}"
+    if has_more:
+        text += f" (последние {settings.DOCUMENT_BUNDLE_LIMIT})"
+    await message.answer(text)
+    await send_document_bundle(message.bot, message.chat.id, documents)
+
+
+@router.callback_query(AdminDocumentsCallback.filter())
+async def admin_documents_button(callback: CallbackQuery, callback_data: AdminDocumentsCallback):
+    """Документы организации из карточки заявки"""
+    user = await crud.get_user_by_telegram_id(callback.from_user.id)
+
+    if not user or not is_admin(user['role']):
+        await callback.answer("У вас нет прав администратора!", show_alert=True)
+        return
+
+    org = await crud.get_organization_by_id(callback_data.org_id)
+    if not org:
+        await callback.answer("Организация не найдена", show_alert=True)
+        return
+
+    await callback.answer()
+    await send_org_documents(callback.message, org)
+
+
+@router.message(Command("docs"))
+async def admin_documents_command(message: Message, command: CommandObject):
+    """Документы организации: /docs <id организации или ИНН>"""
+    user = await crud.get_user_by_telegram_id(message.from_user.id)
+
+    if not user or not is_admin(user['role']):
+        await message.answer("У вас нет прав администратора!")
+        return
+
+    query = (command.args or "").strip()
+    if not (query.isascii() and query.isdigit()):
+        await message.answer("Формат: /docs <id организации или ИНН>")
+        return
+
+    # ИНН — 10 или 12 цифр, id организации короче
+    if len(query) in (10, 12):
+        org = await crud.get_organization_by_inn(query)
+    else:
+        org = await crud.get_organization_by_id(int(query))
+
+    if not org:
+        await message.answer("Организация не найдена.")
+        return
+
+    await send_org_documents(message, org)
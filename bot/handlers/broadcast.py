@@ -0,0 +1,216 @@
+"""Хендлеры рассылок администратора"""
+from aiogram import Router, F
+from aiogram.types import Message, CallbackQuery, ReplyKeyboardRemove
+from aiogram.fsm.context import FSMContext
+from aiogram.utils.keyboard import InlineKeyboardBuilder, ReplyKeyboardMarkup, KeyboardButton
+
+from database import crud
+from config.config import settings
+from bot.states import Broadcast
+from bot.keyboards.main_menu import get_admin_menu_keyboard
+from bot.utils.broadcast import start_broadcast, cancel_broadcast, format_progress, get_progress_keyboard
+from bot.utils.cities import city_index
+
+router = Router()
+
+AUDIENCES = {
+    'all': ("👥 Все пользователи", {}),
+    'org': ("🏢 Все организации", {'role': 'organization'}),
+    'verified': ("✅ Верифицированные организации", {'role': 'organization', 'verified': True}),
+    'mentor': ("🎓 Наставники", {'role': 'mentor'}),
+}
+
+
+def is_admin(user_role: str) -> bool:
+    """Проверка прав администратора"""
+    return user_role in ["admin", "owner"]
+
+
+def describe_filters(filters: dict) -> str:
+    """Описание аудитории рассылки"""
+    parts = []
+    for title, audience_filters in AUDIENCES.values():
+        if audience_filters == {k: v for k, v in filters.items() if k in ('role', 'verified')}:
+            parts.append(title)
+            break
+    if filters.get('turnover'):
+        parts.append(f"оборот: {filters['turnover']}")
+    if filters.get('city'):
+        parts.append(f"город: {filters['city']}")
+    return ", ".join(parts)
+
+
+async def show_confirmation(message: Message, state: FSMContext):
+    """Показать итоговую аудиторию и кнопку запуска"""
+    data = await state.get_data()
+    total = await crud.count_broadcast_recipients(data['filters'])
+
+    builder = InlineKeyboardBuilder()
+    if total:
+        builder.button(text="🚀 Запустить", callback_data="broadcast_start")
+    builder.button(text="❌ Отмена", callback_data="broadcast_abort")
+    builder.adjust(1)
+
+    await message.answer(
+        f"<b>📣 Рассылка</b>\n\n"
+        f"<b>Аудитория:</b> {describe_filters(data['filters'])}\n"
+        f"<b>Получателей:</b> {total}\n\n"
+        f"<b>Текст:</b>\n{data['text']}",
+        reply_markup=builder.as_markup()
+    )
+    await state.set_state(Broadcast.confirm)
+
+
+@router.message(F.text == "Рассылка")
+async def broadcast_start(message: Message, state: FSMContext):
+    """Начало создания рассылки"""
+    user = await crud.get_user_by_telegram_id(message.from_user.id)
+
+    if not user or not is_admin(user['role']):
+        await message.answer("У вас нет прав администратора!")
+        return
+
+    await message.answer(
+        "Введите текст рассылки:",
+        reply_markup=ReplyKeyboardMarkup(
+            keyboard=[[KeyboardButton(text="Отмена")]],
+            resize_keyboard=True
+        )
+    )
+    await state.set_state(Broadcast.text)
+
+
+@router.message(Broadcast.text)
+async def broadcast_text(message: Message, state: FSMContext):
+    """Получение текста рассылки"""
+    if message.text == "Отмена":
+        await state.clear()
+        await message.answer("Рассылка отменена", reply_markup=get_admin_menu_keyboard())
+        return
+
+    if not message.text:
+        await message.answer("Рассылка поддерживает только текст. Попробуйте еще раз:")
+        return
+
+    await state.update_data(text=message.html_text)
+
+    builder = InlineKeyboardBuilder()
+    for key, (title, _) in AUDIENCES.items():
+        builder.button(text=title, callback_data=f"broadcast_aud:{key}")
+    builder.adjust(1)
+
+    await message.answer("Текст сохранён.", reply_markup=ReplyKeyboardRemove())
+    await message.answer("Выберите аудиторию:", reply_markup=builder.as_markup())
+    await state.set_state(Broadcast.audience)
+
+
+@router.callback_query(Broadcast.audience, F.data.startswith("broadcast_aud:"))
+async def broadcast_audience(callback: CallbackQuery, state: FSMContext):
+    """Выбор аудитории"""
+    key = callback.data.split(":")[1]
+    filters = dict(AUDIENCES[key][1])
+    await state.update_data(filters=filters)
+
+    # Фильтры по обороту и городу есть только у организаций
+    if filters.get('role') != 'organization':
+        await callback.message.edit_text(f"Аудитория: {AUDIENCES[key][0]}")
+        await show_confirmation(callback.message, state)
+        await callback.answer()
+        return
+
+    builder = InlineKeyboardBuilder()
+    for i, turnover in enumerate(settings.TURNOVER_RANGES):
+        builder.button(text=turnover, callback_data=f"broadcast_turnover:{i}")
+    builder.button(text="Любой оборот", callback_data="broadcast_turnover:any")
+    builder.adjust(2)
+
+    await callback.message.edit_text("Фильтр по обороту:", reply_markup=builder.as_markup())
+    await state.set_state(Broadcast.turnover)
+    await callback.answer()
+
+
+@router.callback_query(Broadcast.turnover, F.data.startswith("broadcast_turnover:"))
+async def broadcast_turnover(callback: CallbackQuery, state: FSMContext):
+    """Выбор оборота"""
+    value = callback.data.split(":")[1]
+    data = await state.get_data()
+    filters = data['filters']
+    if value != "any":
+        filters['turnover'] = settings.TURNOVER_RANGES[int(value)]
+    await state.update_data(filters=filters)
+
+    await callback.message.edit_text(
+        "Введите город для фильтрации или «-», чтобы отправить во все города:"
+    )
+    await state.set_state(Broadcast.city)
+    await callback.answer()
+
+
+@router.message(Broadcast.city)
+async def broadcast_city(message: Message, state: FSMContext):
+    """Фильтр по городу"""
+    data = await state.get_data()
+    filters = data['filters']
+    city = (message.text or "").strip()
+    if city and city != "-":
+        known = city_index.lookup(city)
+        if known:
+            filters['city'] = known.name
+            filters['city_id'] = known.id
+        else:
+            filters['city'] = city
+    await state.update_data(filters=filters)
+    await show_confirmation(message, state)
+
+
+@router.callback_query(Broadcast.confirm, F.data == "broadcast_abort")
+async def broadcast_abort(callback: CallbackQuery, state: FSMContext):
+    """Отмена рассылки до запуска"""
+    await state.clear()
+    await callback.message.edit_text("Рассылка отменена.")
+    await callback.answer()
+
+
+@router.callback_query(Broadcast.confirm, F.data == "broadcast_start")
+async def broadcast_launch(callback: CallbackQuery, state: FSMContext):
+    """Запуск рассылки"""
+    user = await crud.get_user_by_telegram_id(callback.from_user.id)
+    if not user or not is_admin(user['role']):
+        await callback.answer("У вас нет прав!", show_alert=True)
+        return
+
+    data = await state.get_data()
+    await state.clear()
+
+    total = await crud.count_broadcast_recipients(data['filters'])
+    broadcast_id = await crud.create_broadcast(user['id'], data['text'], data['filters'], total)
+    broadcast = await crud.get_broadcast(broadcast_id)
+
+    await callback.message.edit_text(f"Рассылка #{broadcast_id} запущена.")
+    progress = await callback.message.answer(
+        format_progress(broadcast, 0, 0, 0, 'running'),
+        reply_markup=get_progress_keyboard(broadcast_id)
+    )
+    await crud.set_broadcast_progress_message(broadcast_id, progress.chat.id, progress.message_id)
+
+    await crud.create_log(
+        user['id'], 'broadcast_start',
+        {'broadcast_id': broadcast_id, 'recipients': total}
+    )
+
+    start_broadcast(callback.bot, broadcast_id)
+    await callback.answer("Рассылка запущена")
+
+
+@router.callback_query(F.data.startswith("broadcast_cancel:"))
+async def broadcast_cancel(callback: CallbackQuery):
+    """Остановка идущей рассылки"""
+    broadcast_id = int(callback.data.split(":")[1])
+
+    user = await crud.get_user_by_telegram_id(callback.from_user.id)
+    if not user or not is_admin(user['role']):
+        await callback.answer("У вас нет прав!", show_alert=True)
+        return
+
+    await cancel_broadcast(callback.bot, broadcast_id)
+    await callback.answer("Рассылка остановлена")
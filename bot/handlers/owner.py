@@ -4,10 +4,10 @@ from aiogram.filters import Command
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from aiogram.utils.keyboard import InlineKeyboardBuilder
 
-from database import crud
+from database import crud, analytics
 from config.config import settings
+from bot.utils.admin_roster import admin_roster
 
 router = Router()
 
@@ -29,27 +29,9 @@ async def cmd_admin(message: Message):
         await message.answer("❌ Эта команда доступна только владельцу!")
         return
 
-    # Получаем список всех админов
-    admins = await crud.get_admins()
-    admin_list = []
-    for admin in admins:
-        if admin['role'] == 'owner':
-            admin_list.append(f"👑 {admin['full_name']} (@{admin['username'] or 'нет'}) - OWNER")
-        else:
-            admin_list.append(f"👨‍💼 {admin['full_name']} (@{admin['username'] or 'нет'}) - Админ")
-
-    admin_text = "\n".join(admin_list) if admin_list else "Нет администраторов"
-
-    builder = InlineKeyboardBuilder()
-    builder.button(text="➕ Добавить оператора", callback_data="admin:add")
-    builder.button(text="➖ Удалить оператора", callback_data="admin:remove")
-    builder.button(text="📋 Список всех админов", callback_data="admin:list")
-    builder.adjust(1)
-
     await message.answer(
-        f"<b>🔧 Панель управления операторами</b>\n\n"
-        f"<b>Текущие операторы:</b>\n{admin_text}",
-        reply_markup=builder.as_markup()
+        admin_roster.panel_text,
+        reply_markup=admin_roster.panel_keyboard
     )
 
 
@@ -99,6 +81,7 @@ async def admin_add_process(message: Message, state: FSMContext):
 
     # Обновляем роль на admin
     await crud.update_user_role(telegram_id, 'admin')
+    await admin_roster.refresh()
 
     # Уведомляем нового админа
     from aiogram import Bot
@@ -133,26 +116,13 @@ async def admin_remove(callback: CallbackQuery):
         await callback.answer("Недостаточно прав!", show_alert=True)
         return
 
-    # Получаем всех админов (кроме owner)
-    admins = await crud.get_admins()
-    non_owner_admins = [a for a in admins if a['role'] == 'admin']
-
-    if not non_owner_admins:
+    if not admin_roster.remove_keyboard:
         await callback.answer("Нет администраторов для удаления", show_alert=True)
         return
 
-    builder = InlineKeyboardBuilder()
-    for admin in non_owner_admins:
-        builder.button(
-            text=f"❌ {admin['full_name']} (@{admin['username'] or 'нет'})",
-            callback_data=f"remove_admin:{admin['telegram_id']}"
-        )
-    builder.button(text="« Назад", callback_data="admin:back")
-    builder.adjust(1)
-
     await callback.message.edit_text(
         "<b>Выберите администратора для удаления:</b>",
-        reply_markup=builder.as_markup()
+        reply_markup=admin_roster.remove_keyboard
     )
     await callback.answer()
 
@@ -170,6 +140,7 @@ async def admin_remove_confirm(callback: CallbackQuery):
 
     # Обновляем роль обратно на organization
     await crud.update_user_role(telegram_id, 'organization')
+    await admin_roster.refresh()
 
     # Уведомляем бывшего админа
     from aiogram import Bot
@@ -196,27 +167,9 @@ async def admin_list(callback: CallbackQuery):
         await callback.answer("Недостаточно прав!", show_alert=True)
         return
 
-    admins = await crud.get_admins()
-    admin_text = []
-
-    for admin in admins:
-        role_emoji = "👑" if admin['role'] == 'owner' else "👨‍💼"
-        role_text = "OWNER" if admin['role'] == 'owner' else "Админ"
-        admin_text.append(
-            f"{role_emoji} <b>{admin['full_name']}</b>\n"
-            f"   @{admin['username'] or 'нет'} | ID: {admin['telegram_id']}\n"
-            f"   Роль: {role_text}"
-        )
-
-    text = "\n\n".join(admin_text) if admin_text else "Нет администраторов"
-
-    builder = InlineKeyboardBuilder()
-    builder.button(text="« Назад", callback_data="admin:back")
-    builder.adjust(1)
-
     await callback.message.edit_text(
-        f"<b>📋 Список всех операторов:</b>\n\n{text}",
-        reply_markup=builder.as_markup()
+        admin_roster.list_text,
+        reply_markup=admin_roster.back_keyboard
     )
     await callback.answer()
 
@@ -228,26 +181,53 @@ async def admin_back(callback: CallbackQuery):
         await callback.answer("Недостаточно прав!", show_alert=True)
         return
 
-    # Получаем список всех админов
-    admins = await crud.get_admins()
-    admin_list = []
-    for admin in admins:
-        if admin['role'] == 'owner':
-            admin_list.append(f"👑 {admin['full_name']} (@{admin['username'] or 'нет'}) - OWNER")
-        else:
-            admin_list.append(f"👨‍💼 {admin['full_name']} (@{admin['username'] or 'нет'}) - Админ")
+    await callback.message.edit_text(
+        admin_roster.panel_text,
+        reply_markup=admin_roster.panel_keyboard
+    )
+    await callback.answer()
 
-    admin_text = "\n".join(admin_list) if admin_list else "Нет администраторов"
 
-    builder = InlineKeyboardBuilder()
-    builder.button(text="➕ Добавить оператора", callback_data="admin:add")
-    builder.button(text="➖ Удалить оператора", callback_data="admin:remove")
-    builder.button(text="📋 Список всех админов", callback_data="admin:list")
-    builder.adjust(1)
+def format_analytics_report(funnel: dict, cohorts: list) -> str:
+    """Компактный отчёт: воронка и недельные когорты"""
+    stages = [
+        ('registered', "📝 Регистрация"),
+        ('verified', "✅ Верификация"),
+        ('liked', "❤️ Первый лайк"),
+        ('matched', "🤝 Первый матч"),
+        ('contracted', "📄 Договор"),
+    ]
+    registered = funnel['registered'] or 1
+
+    text = "<b>📊 Воронка организаций</b>\n\n"
+    for key, title in stages:
+        text += f"{title}: {funnel[key]} ({funnel[key] * 100 // registered}%)\n"
+
+    if cohorts:
+        text += "\n<b>Когорты по неделям</b>\n"
+        text += "<code>Неделя     Рег Вер Лайк Матч Дог</code>\n"
+        for c in cohorts:
+            text += (
+                f"<code>{c['week']} {c['registered']:>3} {c['verified']:>3} "
+                f"{c['liked']:>4} {c['matched']:>4} {c['contracted']:>3}</code>\n"
+            )
+    return text
+
+
+@router.callback_query(F.data == "admin:analytics")
+async def admin_analytics(callback: CallbackQuery):
+    """Аналитика: воронка и когорты"""
+    if not is_owner(callback.from_user.id):
+        await callback.answer("Недостаточно прав!", show_alert=True)
+        return
+
+    # Обновление инкрементальное: обрабатываются только новые строки
+    await analytics.refresh_analytics()
+    funnel = await analytics.get_funnel()
+    cohorts = await analytics.get_cohorts()
 
     await callback.message.edit_text(
-        f"<b>🔧 Панель управления операторами</b>\n\n"
-        f"<b>Текущие операторы:</b>\n{admin_text}",
-        reply_markup=builder.as_markup()
+        format_analytics_report(funnel, cohorts),
+        reply_markup=admin_roster.back_keyboard
     )
     await callback.answer()
@@ -3,6 +3,8 @@ from aiogram.types import Message, CallbackQuery
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 from database import crud
+from bot.utils.okved import okved_index
+from bot.keyboards.relay import get_relay_open_keyboard
 
 router = Router()
 
@@ -14,6 +16,8 @@ def format_organization_card(org: dict) -> str:
 
     card = f"<b>{org['name']}</b>\n\n"
     card += f"📋 Юр. форма: {org['legal_form']}\n"
+    if org.get('okved'):
+        card += f"🏷 ОКВЭД: {okved_index.describe(org['okved'])}\n"
     card += f"💰 Оборот: {org['turnover']}\n"
     card += f"📍 Формат: {org['interaction_format']}"
 
@@ -87,6 +91,7 @@ async def process_like(callback: CallbackQuery):
     if mutual:
         # Создаем матч
         await crud.create_match(org['id'], partner_id)
+        match_id = await crud.get_match_id(org['id'], partner_id)
 
         # Логируем матч
         user = await crud.get_user_by_telegram_id(callback.from_user.id)
@@ -102,7 +107,8 @@ async def process_like(callback: CallbackQuery):
             f"📞 Телефон: {partner_org['phone']}\n"
             f"📧 Email: {partner_org['email']}\n"
             f"💬 Telegram: {partner_org['telegram']}\n\n"
-            "Свяжитесь с ними для обсуждения сотрудничества!"
+            "Свяжитесь с ними для обсуждения сотрудничества или напишите через бота!",
+            reply_markup=get_relay_open_keyboard(match_id)
         )
 
         # Уведомляем партнера
@@ -120,7 +126,8 @@ async def process_like(callback: CallbackQuery):
                 "Контакты партнера:\n"
                 f"📞 Телефон: {org['phone']}\n"
                 f"📧 Email: {org['email']}\n"
-                f"💬 Telegram: {org['telegram']}"
+                f"💬 Telegram: {org['telegram']}",
+                reply_markup=get_relay_open_keyboard(match_id)
             )
         except:
             pass
@@ -1,3 +1,5 @@
+import logging
+
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
@@ -8,16 +10,105 @@ from bot.states import RegistrationOrg, RegistrationMentor
 from bot.keyboards.registration import (
     get_legal_form_keyboard, get_turnover_keyboard,
     get_partnership_options_keyboard, get_interaction_format_keyboard,
-    get_partnership_type_keyboard, get_gdpr_keyboard
+    get_partnership_type_keyboard, get_gdpr_keyboard, get_city_suggestions_keyboard,
+    ChoiceCallback, CityCallback, OptionCallback, CHOICES, PARTNERSHIP_OPTIONS, options_mask, options_from_mask
 )
 from bot.keyboards.main_menu import get_main_menu_keyboard
+from bot.utils.admin_roster import admin_roster
+from bot.utils.screening import screener
+from bot.utils.okved import okved_index
+from bot.utils.cities import city_index
+from bot.utils.inn import is_inn_format, is_valid_inn
+from bot.utils.egrul_snapshot import lookup_inn
+from bot.utils.egrul_client import egrul_client
+from bot.middlewares.registration_draft import RegistrationDraftMiddleware
+from database.drafts import draft_store
+from database.duplicates import format_duplicates
 from config.config import settings
 
 router = Router()
+router.message.middleware(RegistrationDraftMiddleware())
+router.callback_query.middleware(RegistrationDraftMiddleware())
+logger = logging.getLogger(__name__)
 
 
 # ============= РЕГИСТРАЦИЯ ОРГАНИЗАЦИИ =============
 
+def get_step_prompt(state_name: str, data: dict):
+    """Вопрос и клавиатура шага анкеты (для продолжения по черновику); None для неизвестного шага"""
+    step = state_name.split(":", 1)[1]
+    prompts = {
+        "name": ("Пожалуйста, введите <b>название вашей организации</b>:", None),
+        "legal_form": ("Выберите юридическую форму:", get_legal_form_keyboard()),
+        "activity_field_or_okved": (
+            "Введите сферу вашей деятельности:" if data.get("is_self_employed")
+            else "Введите ОКВЭД вашей организации:",
+            None
+        ),
+        "inn": ("Введите ИНН вашей организации (10 или 12 цифр):", None),
+        "phone": ("Введите контактный телефон (в формате +7XXXXXXXXXX):", None),
+        "email": ("Введите email для связи:", None),
+        "telegram": ("Введите Telegram для связи (например, @username):", None),
+        "description": ("Введите описание деятельности вашей организации:", None),
+        "turnover": ("Выберите годовой оборот вашей компании:", get_turnover_keyboard()),
+        "can_give": (
+            "Что ваша организация <b>МОЖЕТ ДАТЬ</b> партнёру?\n"
+            "Выберите все подходящие варианты:",
+            get_partnership_options_keyboard("can_give", options_mask("can_give", data.get("can_give_list", [])))
+        ),
+        "can_give_other": ("Введите свой вариант того, что вы можете дать:", None),
+        "need": (
+            "Что вашей организации <b>НУЖНО</b> от партнёра?\n"
+            "Выберите все подходящие варианты:",
+            get_partnership_options_keyboard("need", options_mask("need", data.get("need_list", [])))
+        ),
+        "need_other": ("Введите свой вариант того, что вам нужно:", None),
+        "interaction_format": ("Выберите формат взаимодействия:", get_interaction_format_keyboard()),
+        "city": ("Укажите город, в котором находится ваша организация:", None),
+        "partnership_type": ("Выберите тип партнёрства:", get_partnership_type_keyboard()),
+        "gdpr_consent": (
+            "Подтвердите согласие на обработку персональных данных\n"
+            "в соответствии с ФЗ-152:",
+            get_gdpr_keyboard()
+        ),
+    }
+    return prompts.get(step)
+
+
+@router.callback_query(F.data == "draft:resume")
+async def resume_org_registration(callback: CallbackQuery, state: FSMContext):
+    """Продолжить регистрацию с сохранённого шага"""
+    draft = await draft_store.get(callback.from_user.id)
+    if not draft:
+        await callback.answer("Черновик не найден, начните регистрацию заново", show_alert=True)
+        return
+
+    prompt = get_step_prompt(draft['state'], draft['data'])
+    if prompt is None:
+        # Шаг из старой версии анкеты
+        draft_store.delete(callback.from_user.id)
+        await callback.answer("Черновик устарел, начните регистрацию заново", show_alert=True)
+        return
+
+    await state.set_state(draft['state'])
+    await state.set_data(draft['data'])
+
+    text, markup = prompt
+    await callback.message.edit_text(
+        "<b>Продолжаем регистрацию</b>\n\n" + text,
+        reply_markup=markup
+    )
+    await callback.answer()
+
+
+@router.callback_query(F.data == "draft:discard")
+async def discard_org_registration(callback: CallbackQuery, state: FSMContext):
+    """Удалить черновик и начать регистрацию заново"""
+    draft_store.delete(callback.from_user.id)
+    await state.clear()
+    await start_org_registration(callback, state)
+
+
 @router.callback_query(F.data == "register_org")
 async def start_org_registration(callback: CallbackQuery, state: FSMContext):
     """Начало регистрации организации"""
@@ -41,10 +132,10 @@ async def process_org_name(message: Message, state: FSMContext):
     await state.set_state(RegistrationOrg.legal_form)
 
 
-@router.callback_query(RegistrationOrg.legal_form, F.data.startswith("legal_form:"))
-async def process_legal_form(callback: CallbackQuery, state: FSMContext):
+@router.callback_query(RegistrationOrg.legal_form, ChoiceCallback.filter(F.field == "legal_form"))
+async def process_legal_form(callback: CallbackQuery, callback_data: ChoiceCallback, state: FSMContext):
     """Обработка юридической формы"""
-    legal_form = callback.data.split(":")[1]
+    legal_form = CHOICES["legal_form"][callback_data.index]
     await state.update_data(legal_form=legal_form)
 
     if legal_form == "Самозанятость":
@@ -72,10 +163,26 @@ async def process_activity_or_okved(message: Message, state: FSMContext):
     is_self_employed = data.get("is_self_employed", False)
 
     # Проверка на заблокированные типы бизнеса
-    text_lower = message.text.lower()
-    is_blocked = any(keyword in text_lower for keyword in settings.BLOCKED_KEYWORDS)
+    blocked_categories = screener.blocked_categories(message.text)
+
+    entry = None
+    if not is_self_employed:
+        entry = okved_index.lookup(message.text)
+        if entry is None:
+            await message.answer(
+                "Такого кода нет в классификаторе ОКВЭД 2.\n"
+                "Введите код в формате 62.01 или 62.01.1 "
+                "(если подвида нет в списке — четыре цифры подгруппы):"
+            )
+            return
+        if entry.blocked:
+            blocked_categories.add(entry.blocked)
 
-    if is_blocked:
+    if blocked_categories:
+        logger.info(
+            f"Регистрация {message.from_user.id} отклонена на шаге деятельности: "
+            f"{', '.join(sorted(blocked_categories))}"
+        )
         await message.answer(
             "К сожалению, ваша деятельность относится к категории, "
             "которая не может быть зарегистрирована в системе.\n\n"
@@ -91,11 +198,13 @@ async def process_activity_or_okved(message: Message, state: FSMContext):
 
     if is_self_employed:
         await state.update_data(activity_field=message.text)
+        summary = f"Сфера деятельности: <b>{message.text}</b>"
     else:
-        await state.update_data(okved=message.text)
+        await state.update_data(okved=entry.code)
+        summary = f"ОКВЭД: <b>{entry.code}</b> — {entry.name}"
 
     await message.answer(
-        f"{'Сфера деятельности' if is_self_employed else 'ОКВЭД'}: <b>{message.text}</b>\n\n"
+        f"{summary}\n\n"
         "Введите ИНН вашей организации (10 или 12 цифр):"
     )
     await state.set_state(RegistrationOrg.inn)
@@ -107,12 +216,28 @@ async def process_inn(message: Message, state: FSMContext):
     inn = message.text.strip()
 
     # Проверка формата ИНН
-    if not inn.isdigit() or len(inn) not in [10, 12]:
+    if not is_inn_format(inn):
         await message.answer(
             "ИНН должен содержать 10 или 12 цифр. Попробуйте еще раз:"
         )
         return
 
+    if not is_valid_inn(inn):
+        await message.answer(
+            "ИНН не прошёл проверку контрольного числа. "
+            "Проверьте цифры и попробуйте еще раз:"
+        )
+        return
+
+    # Сверка с локальным снимком ЕГРЮЛ/ЕГРИП (если он скачан), иначе с онлайн-сервисом
+    record = lookup_inn(inn) or await egrul_client.lookup(inn)
+    if record and record.liquidated:
+        await message.answer(
+            f"По данным ЕГРЮЛ организация с ИНН {inn} ликвидирована. "
+            "Введите ИНН действующей организации:"
+        )
+        return
+
     # Проверка уникальности ИНН
     existing_org = await crud.get_organization_by_inn(inn)
     if existing_org:
@@ -122,9 +247,34 @@ async def process_inn(message: Message, state: FSMContext):
         await state.clear()
         return
 
-    await state.update_data(inn=inn)
+    registry_text = ""
+    if record:
+        # Данные реестра точнее введённых вручную
+        updates = {'inn': inn, 'name': record.name}
+        entry = okved_index.lookup(record.okved, exact=False) if record.okved else None
+        if entry and entry.blocked:
+            logger.info(f"Регистрация {message.from_user.id} отклонена по ОКВЭД из ЕГРЮЛ: {entry.code}")
+            await message.answer(
+                "К сожалению, основной вид деятельности организации по ЕГРЮЛ "
+                "не может быть зарегистрирован в системе.\n\n"
+                "Для разблокировки обратитесь к администратору."
+            )
+            await state.clear()
+            return
+        if entry:
+            updates['okved'] = entry.code
+        await state.update_data(**updates)
+        registry_text = (
+            f"\n\n📄 <b>Найдено в ЕГРЮЛ:</b>\n"
+            f"{record.name}\n"
+            f"{record.legal_form}"
+            + (f"\nОКВЭД: {okved_index.describe(entry.code)}" if entry else "")
+        )
+    else:
+        await state.update_data(inn=inn)
+
     await message.answer(
-        f"ИНН: <b>{inn}</b>\n\n"
+        f"ИНН: <b>{inn}</b>{registry_text}\n\n"
         "Введите контактный телефон (в формате +7XXXXXXXXXX):"
     )
     await state.set_state(RegistrationOrg.phone)
@@ -166,17 +316,14 @@ async def process_telegram(message: Message, state: FSMContext):
 @router.message(RegistrationOrg.description)
 async def process_description(message: Message, state: FSMContext):
     """Обработка описания"""
-    from config.config import settings
-
-    # Проверка на запрещенные ключевые слова
-    description_lower = message.text.lower()
-    blocked = False
-    for keyword in settings.BLOCKED_KEYWORDS:
-        if keyword in description_lower:
-            blocked = True
-            break
+    # Проверка на запрещенные категории деятельности
+    blocked_categories = screener.blocked_categories(message.text)
 
-    if blocked:
+    if blocked_categories:
+        logger.info(
+            f"Регистрация {message.from_user.id} отклонена на шаге описания: "
+            f"{', '.join(sorted(blocked_categories))}"
+        )
         await message.answer(
             "❌ <b>Регистрация отклонена</b>\n\n"
             "Ваша организация осуществляет деятельность, которая не подлежит регистрации "
@@ -200,10 +347,10 @@ async def process_description(message: Message, state: FSMContext):
     await state.set_state(RegistrationOrg.turnover)
 
 
-@router.callback_query(RegistrationOrg.turnover, F.data.startswith("turnover:"))
-async def process_turnover(callback: CallbackQuery, state: FSMContext):
+@router.callback_query(RegistrationOrg.turnover, ChoiceCallback.filter(F.field == "turnover"))
+async def process_turnover(callback: CallbackQuery, callback_data: ChoiceCallback, state: FSMContext):
     """Обработка оборотов"""
-    turnover = callback.data.split(":")[1]
+    turnover = CHOICES["turnover"][callback_data.index]
     await state.update_data(turnover=turnover)
     await state.update_data(can_give_list=[])
 
@@ -211,18 +358,35 @@ async def process_turnover(callback: CallbackQuery, state: FSMContext):
         f"Оборот: <b>{turnover}</b>\n\n"
         "Что ваша организация <b>МОЖЕТ ДАТЬ</b> партнёру?\n"
         "Выберите все подходящие варианты:",
-        reply_markup=get_partnership_options_keyboard("can_give", [])
+        reply_markup=get_partnership_options_keyboard("can_give")
     )
     await state.set_state(RegistrationOrg.can_give)
     await callback.answer()
 
 
-@router.callback_query(RegistrationOrg.can_give, F.data.startswith("can_give:"))
-async def process_can_give(callback: CallbackQuery, state: FSMContext):
-    """Обработка опций 'может дать'"""
-    option = callback.data.split(":")[1]
+async def toggle_option(callback: CallbackQuery, callback_data: OptionCallback, state: FSMContext):
+    """Отметить/снять опцию множественного выбора и обновить клавиатуру"""
+    list_key = f"{callback_data.kind}_list"
+    data = await state.get_data()
+    selected = data.get(list_key, [])
+
+    mask = options_mask(callback_data.kind, selected) ^ (1 << callback_data.index)
+    option = PARTNERSHIP_OPTIONS[callback_data.kind][callback_data.index]
+    await state.update_data(**{list_key: options_from_mask(callback_data.kind, mask, selected)})
+
+    await callback.answer(f"✅ {option}" if mask >> callback_data.index & 1 else f"❌ {option}")
+
+    # Клавиатура на экране уже в нужном состоянии (повторное нажатие) — не редактируем
+    if mask != callback_data.mask:
+        await callback.message.edit_reply_markup(
+            reply_markup=get_partnership_options_keyboard(callback_data.kind, mask)
+        )
+
 
-    if option == "done":
+@router.callback_query(RegistrationOrg.can_give, OptionCallback.filter(F.kind == "can_give"))
+async def process_can_give(callback: CallbackQuery, callback_data: OptionCallback, state: FSMContext):
+    """Обработка опций 'может дать'"""
+    if callback_data.action == "done":
         data = await state.get_data()
         can_give_list = data.get("can_give_list", [])
 
@@ -234,35 +398,20 @@ async def process_can_give(callback: CallbackQuery, state: FSMContext):
         await callback.message.edit_text(
             "Что вашей организации <b>НУЖНО</b> от партнёра?\n"
             "Выберите все подходящие варианты:",
-            reply_markup=get_partnership_options_keyboard("need", [])
+            reply_markup=get_partnership_options_keyboard("need")
         )
         await state.set_state(RegistrationOrg.need)
+        await callback.answer()
 
-    elif option == "other":
+    elif callback_data.action == "other":
         await callback.message.edit_text(
             "Введите свой вариант того, что вы можете дать:"
         )
         await state.set_state(RegistrationOrg.can_give_other)
+        await callback.answer()
 
     else:
-        data = await state.get_data()
-        can_give_list = data.get("can_give_list", [])
-
-        if option in can_give_list:
-            can_give_list.remove(option)
-            await callback.answer(f"❌ {option}", show_alert=False)
-        else:
-            can_give_list.append(option)
-            await callback.answer(f"✅ {option}", show_alert=False)
-
-        await state.update_data(can_give_list=can_give_list)
-
-        # Обновляем клавиатуру с галочками
-        await callback.message.edit_reply_markup(
-            reply_markup=get_partnership_options_keyboard("can_give", can_give_list)
-        )
-
-    await callback.answer()
+        await toggle_option(callback, callback_data, state)
 
 
 @router.message(RegistrationOrg.can_give_other)
@@ -276,17 +425,15 @@ async def process_can_give_other(message: Message, state: FSMContext):
     await message.answer(
         f"Добавлено: <b>{message.text}</b>\n\n"
         "Продолжайте выбирать или нажмите 'Готово':",
-        reply_markup=get_partnership_options_keyboard("can_give", can_give_list)
+        reply_markup=get_partnership_options_keyboard("can_give", options_mask("can_give", can_give_list))
     )
     await state.set_state(RegistrationOrg.can_give)
 
 
-@router.callback_query(RegistrationOrg.need, F.data.startswith("need:"))
-async def process_need(callback: CallbackQuery, state: FSMContext):
+@router.callback_query(RegistrationOrg.need, OptionCallback.filter(F.kind == "need"))
+async def process_need(callback: CallbackQuery, callback_data: OptionCallback, state: FSMContext):
     """Обработка опций 'что нужно'"""
-    option = callback.data.split(":")[1]
-
-    if option == "done":
+    if callback_data.action == "done":
         data = await state.get_data()
         need_list = data.get("need_list", [])
 
@@ -299,32 +446,17 @@ async def process_need(callback: CallbackQuery, state: FSMContext):
             reply_markup=get_interaction_format_keyboard()
         )
         await state.set_state(RegistrationOrg.interaction_format)
+        await callback.answer()
 
-    elif option == "other":
+    elif callback_data.action == "other":
         await callback.message.edit_text(
             "Введите свой вариант того, что вам нужно:"
         )
         await state.set_state(RegistrationOrg.need_other)
+        await callback.answer()
 
     else:
-        data = await state.get_data()
-        need_list = data.get("need_list", [])
-
-        if option in need_list:
-            need_list.remove(option)
-            await callback.answer(f"❌ {option}", show_alert=False)
-        else:
-            need_list.append(option)
-            await callback.answer(f"✅ {option}", show_alert=False)
-
-        await state.update_data(need_list=need_list)
-
-        # Обновляем клавиатуру с галочками
-        await callback.message.edit_reply_markup(
-            reply_markup=get_partnership_options_keyboard("need", need_list)
-        )
-
-    await callback.answer()
+        await toggle_option(callback, callback_data, state)
 
 
 @router.message(RegistrationOrg.need_other)
@@ -338,15 +470,15 @@ async def process_need_other(message: Message, state: FSMContext):
     await message.answer(
         f"Добавлено: <b>{message.text}</b>\n\n"
         "Продолжайте выбирать или нажмите 'Готово':",
-        reply_markup=get_partnership_options_keyboard("need", need_list)
+        reply_markup=get_partnership_options_keyboard("need", options_mask("need", need_list))
     )
     await state.set_state(RegistrationOrg.need)
 
 
-@router.callback_query(RegistrationOrg.interaction_format, F.data.startswith("interaction:"))
-async def process_interaction_format(callback: CallbackQuery, state: FSMContext):
+@router.callback_query(RegistrationOrg.interaction_format, ChoiceCallback.filter(F.field == "interaction"))
+async def process_interaction_format(callback: CallbackQuery, callback_data: ChoiceCallback, state: FSMContext):
     """Обработка формата взаимодействия"""
-    format_type = callback.data.split(":")[1]
+    format_type = CHOICES["interaction"][callback_data.index]
     await state.update_data(interaction_format=format_type)
 
     # Всегда спрашиваем город, независимо от формата
@@ -358,22 +490,66 @@ async def process_interaction_format(callback: CallbackQuery, state: FSMContext)
     await callback.answer()
 
 
+CITY_MAX_LENGTH = 100
+
+
 @router.message(RegistrationOrg.city)
 async def process_city(message: Message, state: FSMContext):
-    """Обработка города"""
-    await state.update_data(city=message.text)
+    """Обработка города: город из справочника или подсказки по началу названия"""
+    text = (message.text or "").strip()[:CITY_MAX_LENGTH]
+    if not text:
+        await message.answer("Введите название города текстом:")
+        return
+
+    city = city_index.lookup(text)
+    if city:
+        await state.update_data(city=city.name, city_id=city.id)
+        await message.answer(
+            f"Город: <b>{city.name}</b>\n\n"
+            "Выберите тип партнёрства:",
+            reply_markup=get_partnership_type_keyboard()
+        )
+        await state.set_state(RegistrationOrg.partnership_type)
+        return
+
+    await state.update_data(city_input=text)
+    suggestions = city_index.suggest(text)
     await message.answer(
-        f"Город: <b>{message.text}</b>\n\n"
+        ("Возможно, вы имели в виду один из этих городов?\n" if suggestions
+         else "Не нашли такой город в справочнике.\n")
+        + "Выберите вариант, введите название ещё раз или оставьте как есть:",
+        reply_markup=get_city_suggestions_keyboard(suggestions, custom=text)
+    )
+
+
+@router.callback_query(RegistrationOrg.city, CityCallback.filter())
+async def process_city_choice(callback: CallbackQuery, callback_data: CityCallback, state: FSMContext):
+    """Выбор города из подсказок"""
+    city = city_index.get(callback_data.city_id)
+    if city:
+        await state.update_data(city=city.name, city_id=city.id)
+        city_name = city.name
+    else:
+        data = await state.get_data()
+        city_name = data.get('city_input')
+        if not city_name:
+            await callback.answer("Введите название города", show_alert=True)
+            return
+        await state.update_data(city=city_name, city_id=None)
+
+    await callback.message.edit_text(
+        f"Город: <b>{city_name}</b>\n\n"
         "Выберите тип партнёрства:",
         reply_markup=get_partnership_type_keyboard()
     )
     await state.set_state(RegistrationOrg.partnership_type)
+    await callback.answer()
 
 
-@router.callback_query(RegistrationOrg.partnership_type, F.data.startswith("partnership_type:"))
-async def process_partnership_type(callback: CallbackQuery, state: FSMContext):
+@router.callback_query(RegistrationOrg.partnership_type, ChoiceCallback.filter(F.field == "partnership_type"))
+async def process_partnership_type(callback: CallbackQuery, callback_data: ChoiceCallback, state: FSMContext):
     """Обработка типа партнёрства"""
-    p_type = callback.data.split(":")[1]
+    p_type = CHOICES["partnership_type"][callback_data.index]
     await state.update_data(partnership_type=p_type)
 
     await callback.message.edit_text(
@@ -402,22 +578,29 @@ async def process_gdpr(callback: CallbackQuery, state: FSMContext):
     # Сохранение организации в базу данных
     data = await state.get_data()
 
-    # Создаем пользователя
-    user_id = await crud.create_user(
+    # Пользователь, организация, заявка и лог создаются одной транзакцией
+    result = await crud.register_organization(
         telegram_id=callback.from_user.id,
         username=callback.from_user.username,
         full_name=callback.from_user.full_name,
-        role="organization"
+        data=data
     )
 
-    # Создаем организацию
-    org_id = await crud.create_organization(user_id, data)
+    if result is None:
+        await callback.message.edit_text(
+            "Организация с таким ИНН уже зарегистрирована в системе!"
+        )
+        await state.clear()
+        await callback.answer()
+        return
 
-    # Создаем запись верификации
-    await crud.create_verification(org_id)
+    if not result['created']:
+        # Повторное нажатие: заявка уже отправлена
+        await state.clear()
+        await callback.answer("Заявка уже отправлена на модерацию")
+        return
 
-    # Логируем регистрацию
-    await crud.create_log(user_id, "registration", {"type": "organization", "inn": data["inn"]})
+    org_id = result['organization_id']
 
     await callback.message.edit_text(
         "✅ <b>Регистрация завершена!</b>\n\n"
@@ -436,9 +619,10 @@ async def process_gdpr(callback: CallbackQuery, state: FSMContext):
     # Подготавливаем строки для уведомлений
     can_give_str = ", ".join(data['can_give_list'])
     need_str = ", ".join(data['need_list'])
+    duplicates_text = format_duplicates(result['duplicates'])
 
     # Подробное уведомление owner'у
-    owner = await crud.get_owner()
+    owner = admin_roster.owner
     if owner:
 
         owner_msg = (
@@ -463,6 +647,7 @@ async def process_gdpr(callback: CallbackQuery, state: FSMContext):
             f"<b>Нужно:</b>\n{need_str}\n\n"
             f"<b>Описание:</b>\n{data['description']}"
         )
+        owner_msg += duplicates_text
 
         # Создаем инлайн-кнопки для модерации
         builder = InlineKeyboardBuilder()
@@ -481,7 +666,7 @@ async def process_gdpr(callback: CallbackQuery, state: FSMContext):
             pass
 
     # Подробное уведомление всем админам
-    admins = await crud.get_admins()
+    admins = admin_roster.admins
     for admin in admins:
         if admin['role'] != 'owner':  # owner уже получил подробное уведомление
             # Формируем подробное сообщение для админа (такое же как для owner)
@@ -507,6 +692,7 @@ async def process_gdpr(callback: CallbackQuery, state: FSMContext):
                 f"<b>Нужно:</b>\n{need_str}\n\n"
                 f"<b>Описание:</b>\n{data['description']}"
             )
+            admin_msg += duplicates_text
 
             # Создаем кнопки для админов
             admin_builder = InlineKeyboardBuilder()
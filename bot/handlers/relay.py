@@ -0,0 +1,85 @@
+"""Handlers переписки с партнёрами через бота.
+
+Роутер подключается последним: пересылаются только сообщения, которые не
+разобрал ни один другой сценарий (меню, FSM-состояния, команды).
+"""
+from aiogram import Router, F
+from aiogram.filters import Command
+from aiogram.types import Message, CallbackQuery
+
+from database import crud
+from bot.keyboards.relay import RelayCallback, get_partners_keyboard, get_relay_close_keyboard
+from bot.utils.chat_relay import chat_relay
+from bot.utils.news_feed import clip
+
+router = Router()
+
+
+@router.message(F.text == "Мои партнёры")
+async def partners_menu(message: Message):
+    """Партнёры по матчам с кнопками чата"""
+    org = await crud.get_organization_by_telegram_id(message.from_user.id)
+
+    if not org:
+        await message.answer("У вас нет организации!")
+        return
+
+    partners = await crud.get_partner_orgs(org['id'])
+
+    if not partners:
+        await message.answer(
+            "У вас пока нет подтверждённых партнёров (матчей). "
+            "Найдите партнёров через поиск!"
+        )
+        return
+
+    await message.answer(
+        "<b>🤝 Ваши партнёры</b>\n\n"
+        "Выберите партнёра, чтобы открыть чат. Сообщения и файлы пересылаются через бота.",
+        reply_markup=get_partners_keyboard([(partner['match_id'], partner['name'][:40]) for partner in partners])
+    )
+
+
+@router.callback_query(RelayCallback.filter(F.action == "open"))
+async def open_chat(callback: CallbackQuery, callback_data: RelayCallback):
+    """Открыть чат с партнёром по матчу"""
+    partner = await chat_relay.open(callback.from_user.id, callback_data.id)
+
+    if partner is None:
+        await callback.answer("Этот чат недоступен", show_alert=True)
+        return
+
+    await callback.answer()
+    await callback.message.answer(
+        f"💬 Открыт чат с <b>{clip(partner.org_name, 100)}</b>.\n\n"
+        "Всё, что вы отправите боту, будет переслано партнёру. "
+        "Кнопки меню работают как обычно.\n"
+        "Завершить чат — /stop",
+        reply_markup=get_relay_close_keyboard(callback_data.id)
+    )
+
+
+@router.callback_query(RelayCallback.filter(F.action == "close"))
+async def close_chat_button(callback: CallbackQuery, callback_data: RelayCallback):
+    """Завершить чат кнопкой"""
+    if chat_relay.conversation(callback.from_user.id) == callback_data.id:
+        await chat_relay.close(callback.from_user.id)
+    await callback.answer("Чат завершён")
+    await callback.message.edit_reply_markup(reply_markup=None)
+
+
+@router.message(Command("stop"))
+async def close_chat(message: Message):
+    """Завершить чат командой"""
+    if await chat_relay.close(message.from_user.id):
+        await message.answer("Чат завершён.")
+    else:
+        await message.answer("Открытого чата нет.")
+
+
+@router.message()
+async def relay_message(message: Message):
+    """Переслать сообщение партнёру, если у пользователя открыт чат"""
+    if message.chat.type != "private" or (message.text or "").startswith("/"):
+        return
+    chat_relay.submit(message.bot, message)
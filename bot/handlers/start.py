@@ -3,7 +3,9 @@ from aiogram.filters import CommandStart, Command
 from aiogram.types import Message, CallbackQuery
 
 from database import crud
+from database.drafts import draft_store
 from bot.keyboards.main_menu import get_start_keyboard, get_main_menu_keyboard, get_admin_menu_keyboard
+from bot.keyboards.registration import get_draft_resume_keyboard
 
 router = Router()
 
@@ -14,6 +16,10 @@ async def cmd_start(message: Message):
     user = await crud.get_user_by_telegram_id(message.from_user.id)
 
     if user:
+        # Пользователь вернулся после блокировки бота — снова получает рассылки
+        if not user['is_active']:
+            await crud.set_user_active(user['id'], True)
+
         # Пользователь уже зарегистрирован
         if user['role'] in ['admin', 'owner']:
             await message.answer(
@@ -26,6 +32,16 @@ async def cmd_start(message: Message):
                 reply_markup=get_main_menu_keyboard()
             )
     else:
+        # Незавершённая регистрация - предлагаем продолжить
+        draft = await draft_store.get(message.from_user.id)
+        if draft:
+            await message.answer(
+                "У вас есть незавершённая регистрация организации.\n"
+                "Продолжить с того места, где вы остановились?",
+                reply_markup=get_draft_resume_keyboard()
+            )
+            return
+
         # Новый пользователь - предлагаем регистрацию
         await message.answer(
             "<b>Добро пожаловать в Партнёрский Центр Организаций!</b>\n\n"
@@ -1,13 +1,39 @@
 """Handlers для пользователей (организаций)"""
+from typing import Dict, List, Optional
+
 from aiogram import Router, F
+from aiogram.exceptions import TelegramAPIError
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 from aiogram.utils.keyboard import InlineKeyboardBuilder, ReplyKeyboardMarkup, KeyboardButton
 
 from database import crud
-from bot.states import CreateNews, CreateContract, ResourceCenterQuestion
+from bot.states import CreateNews, CreateContract, ResourceCenterQuestion, UploadDocument
+from bot.utils.admin_roster import admin_roster
+from bot.utils.okved import okved_index
+from bot.utils.news_feed import news_feed
+from database.news_views import news_views
+from bot.utils.news_media import extract_media, send_news_media
+from bot.keyboards.news import NewsPageCallback, NewsMediaCallback
+from bot.utils.resource_catalog import resource_catalog, CATALOGS
+from bot.keyboards.resources import ResourcePageCallback, CompetitionReminderCallback
+from bot.utils.mentor_matching import mentor_matcher
+from bot.utils.news_feed import clip
+from bot.keyboards.mentors import (
+    MentorCallback, get_mentor_matches_keyboard, get_mentor_request_keyboard, get_mentor_finish_keyboard
+)
+from bot.utils.contracts import CONTRACT_TYPES, contract_renderer, party_snapshot
+from bot.keyboards.contracts import ContractFileCallback, get_contract_files_keyboard
+from bot.utils.org_documents import DOCUMENT_TYPES, extract_files, format_document, send_document_bundle
+from bot.keyboards.documents import (
+    OrgDocumentCallback, DocumentTypeCallback,
+    get_documents_menu_keyboard, get_document_types_keyboard, get_documents_page_keyboard
+)
+from bot.middlewares.media_group import MediaGroupMiddleware
+from config.config import settings
 
 router = Router()
+router.message.middleware(MediaGroupMiddleware(latency=settings.NEWS_MEDIA_GROUP_LATENCY_MS / 1000))
 
 
 # ========== РЕСУРСНЫЙ ЦЕНТР ==========
@@ -61,7 +87,7 @@ async def rc_question_received(message: Message, state: FSMContext):
     )
 
     # Отправляем администраторам
-    admins = await crud.get_admins()
+    admins = admin_roster.admins
     from aiogram import Bot
     from config.config import settings
 
@@ -106,32 +132,197 @@ async def rc_contacts(callback: CallbackQuery):
 
 @router.message(F.text == "Наставник")
 async def mentors_list(message: Message):
-    """Список доступных наставников"""
+    """Наставники, подобранные под потребности организации"""
     user = await crud.get_user_by_telegram_id(message.from_user.id)
 
     if not user:
         await message.answer("Вы не зарегистрированы!")
         return
 
-    mentors = await crud.get_all_mentors(is_available=True)
+    text, keyboard = await render_mentor_matches(user, 0)
+    await message.answer(text, reply_markup=keyboard, parse_mode='HTML')
 
-    if not mentors:
-        await message.answer(
-            "К сожалению, сейчас нет доступных наставников. "
+
+async def render_mentor_matches(user: Dict, page: int):
+    """Текст и клавиатура страницы подборки наставников"""
+    org = await crud.get_organization_by_user_id(user['id'])
+    matches = await mentor_matcher.match(org, settings.MENTOR_MATCH_LIMIT)
+    matches = [(mentor, score) for mentor, score in matches if mentor.user_id != user['id']]
+
+    size = settings.MENTOR_PAGE_SIZE
+    current = matches[page * size:(page + 1) * size]
+    if not current:
+        return (
+            "К сожалению, сейчас нет наставников со свободными местами. "
             "Попробуйте позже!"
+        ), None
+
+    title = "<b>👥 Наставники для вас</b>" if org else "<b>👥 Доступные наставники</b>"
+    text = f"{title} (стр. {page + 1})\n\n"
+    for mentor, _ in current:
+        text += f"<b>{clip(mentor.name, 100)}</b>\n"
+        text += f"Экспертиза: {clip(mentor.expertise, 300)}\n"
+        text += f"Опыт: {clip(mentor.experience, 300)}\n\n"
+        text += "➖➖➖➖➖➖➖➖➖➖\n\n"
+    text += "Нажмите на имя наставника, чтобы отправить заявку. Контакты придут, когда наставник её примет."
+
+    next_page = page + 1 if len(matches) > (page + 1) * size else None
+    keyboard = get_mentor_matches_keyboard([(mentor.id, mentor.name[:40]) for mentor, _ in current], next_page)
+    return text, keyboard
+
+
+def format_mentor_request(request: Dict) -> str:
+    """Заявка глазами наставника"""
+    text = "<b>📨 Заявка на наставничество</b>\n\n"
+    text += f"От: {clip(request['requester_name'] or '', 100)}\n"
+    if request['org_name']:
+        text += f"Организация: {clip(request['org_name'], 100)}\n"
+        text += f"{clip(request['org_description'] or '', 500)}\n"
+    return text
+
+
+async def send_next_mentor_request(bot, mentor_id: int):
+    """Показать наставнику следующую заявку из очереди"""
+    request = await crud.get_next_mentor_request(mentor_id)
+    if request is None:
+        return
+    queued = await crud.count_pending_mentor_requests(mentor_id)
+    text = format_mentor_request(request)
+    if queued > 1:
+        text += f"\nВ очереди ещё заявок: {queued - 1}"
+    try:
+        await bot.send_message(
+            request['mentor_telegram_id'], text,
+            reply_markup=get_mentor_request_keyboard(request['id']), parse_mode='HTML'
         )
+    except TelegramAPIError:
+        pass
+
+
+async def notify_requester(bot, request: Dict, text: str):
+    try:
+        await bot.send_message(request['requester_telegram_id'], text, parse_mode='HTML')
+    except TelegramAPIError:
+        pass
+
+
+@router.callback_query(MentorCallback.filter(F.action == "page"))
+async def mentors_page(callback: CallbackQuery, callback_data: MentorCallback):
+    """Следующая страница подборки наставников"""
+    user = await crud.get_user_by_telegram_id(callback.from_user.id)
+    if not user:
+        await callback.answer("Вы не зарегистрированы!", show_alert=True)
         return
 
-    text = "<b>👥 Доступные наставники</b>\n\n"
+    text, keyboard = await render_mentor_matches(user, callback_data.id)
+    await callback.message.edit_text(text, reply_markup=keyboard, parse_mode='HTML')
+    await callback.answer()
 
-    for mentor in mentors:
-        text += f"<b>{mentor['name']}</b>\n"
-        text += f"Экспертиза: {mentor['expertise']}\n"
-        text += f"Опыт: {mentor['experience']}\n"
-        text += f"Контакт: {mentor['contact_info']}\n\n"
-        text += "➖➖➖➖➖➖➖➖➖➖\n\n"
 
-    await message.answer(text, parse_mode='HTML')
+@router.callback_query(MentorCallback.filter(F.action == "ask"))
+async def ask_mentor(callback: CallbackQuery, callback_data: MentorCallback):
+    """Заявка наставнику: встаёт в его очередь"""
+    user = await crud.get_user_by_telegram_id(callback.from_user.id)
+    if not user:
+        await callback.answer("Вы не зарегистрированы!", show_alert=True)
+        return
+
+    index = await mentor_matcher.index()
+    mentor = index.mentors.get(callback_data.id)
+    if mentor is None or mentor.user_id == user['id'] or not index.has_room(mentor.id):
+        await callback.answer("У наставника сейчас нет свободных мест.", show_alert=True)
+        return
+
+    request_id = await crud.create_mentor_request(mentor.id, user['id'])
+    if request_id is None:
+        await callback.answer("Вы уже отправили заявку этому наставнику.", show_alert=True)
+        return
+
+    await crud.create_log(user['id'], 'mentor_request', {'mentor_id': mentor.id, 'request_id': request_id})
+    queued = await crud.count_pending_mentor_requests(mentor.id)
+    if queued == 1:
+        # Очередь была пуста — наставник видит заявку сразу, иначе после решения по предыдущим
+        await send_next_mentor_request(callback.bot, mentor.id)
+    await callback.answer(
+        f"✅ Заявка отправлена наставнику {mentor.name}. Место в очереди: {queued}", show_alert=True
+    )
+
+
+async def _own_request(callback: CallbackQuery, request_id: int) -> Optional[Dict]:
+    """Заявка, если нажал её наставник"""
+    request = await crud.get_mentor_request(request_id)
+    if request is None or request['mentor_telegram_id'] != callback.from_user.id:
+        await callback.answer("Заявка не найдена.", show_alert=True)
+        return None
+    return request
+
+
+@router.callback_query(MentorCallback.filter(F.action == "accept"))
+async def accept_mentor_request(callback: CallbackQuery, callback_data: MentorCallback):
+    """Наставник принимает заявку"""
+    request = await _own_request(callback, callback_data.id)
+    if request is None:
+        return
+
+    if not await crud.accept_mentor_request(request['id']):
+        if request['status'] != 'pending':
+            await callback.answer("Заявка уже обработана.", show_alert=True)
+        else:
+            await callback.answer(
+                f"Все места заняты ({request['capacity']}). Завершите одно из наставничеств "
+                "или отклоните заявку.", show_alert=True
+            )
+        return
+
+    mentor_matcher.set_load(request['mentor_id'], +1)
+    await callback.message.edit_text(
+        format_mentor_request(request) + "\n✅ Заявка принята",
+        reply_markup=get_mentor_finish_keyboard(request['id']), parse_mode='HTML'
+    )
+    await notify_requester(
+        callback.bot, request,
+        f"✅ Наставник <b>{clip(request['mentor_name'], 100)}</b> принял вашу заявку!\n\n"
+        f"Контакт: {clip(request['mentor_contact'], 300)}"
+    )
+    await callback.answer()
+    await send_next_mentor_request(callback.bot, request['mentor_id'])
+
+
+@router.callback_query(MentorCallback.filter(F.action == "decline"))
+async def decline_mentor_request(callback: CallbackQuery, callback_data: MentorCallback):
+    """Наставник отклоняет заявку"""
+    request = await _own_request(callback, callback_data.id)
+    if request is None:
+        return
+
+    if not await crud.set_mentor_request_status(request['id'], 'pending', 'declined'):
+        await callback.answer("Заявка уже обработана.", show_alert=True)
+        return
+
+    await callback.message.edit_text(format_mentor_request(request) + "\n❌ Заявка отклонена", parse_mode='HTML')
+    await notify_requester(
+        callback.bot, request,
+        f"Наставник <b>{clip(request['mentor_name'], 100)}</b> не может взять вашу заявку. "
+        "Попробуйте выбрать другого наставника."
+    )
+    await callback.answer()
+    await send_next_mentor_request(callback.bot, request['mentor_id'])
+
+
+@router.callback_query(MentorCallback.filter(F.action == "finish"))
+async def finish_mentorship(callback: CallbackQuery, callback_data: MentorCallback):
+    """Наставник завершает наставничество — место освобождается"""
+    request = await _own_request(callback, callback_data.id)
+    if request is None:
+        return
+
+    if not await crud.set_mentor_request_status(request['id'], 'accepted', 'finished'):
+        await callback.answer("Наставничество уже завершено.", show_alert=True)
+        return
+
+    mentor_matcher.set_load(request['mentor_id'], -1)
+    await callback.message.edit_text(format_mentor_request(request) + "\n🏁 Наставничество завершено", parse_mode='HTML')
+    await callback.answer()
 
 
 # ========== НОВОСТИ ==========
@@ -160,36 +351,44 @@ async def news_menu(message: Message):
 
 @router.callback_query(F.data == "news_all")
 async def show_all_news(callback: CallbackQuery):
-    """Показать все новости"""
-    news_list = await crud.get_all_news(limit=10)
-
-    if not news_list:
+    """Показать ленту новостей (первая страница)"""
+    page = await news_feed.page()
+    if page is None:
         await callback.message.edit_text("Новостей пока нет.")
         await callback.answer()
         return
 
-    text = "<b>📰 Последние новости</b>\n\n"
+    text, keyboard, news_ids = page
+    news_views.record(news_ids, callback.from_user.id)
+    await callback.message.edit_text(text, reply_markup=keyboard, parse_mode='HTML')
+    await callback.answer()
 
-    for news in news_list:
-        text += f"<b>{news['title']}</b>\n"
-        text += f"От: {news['org_name']}\n"
-        text += f"{news['content'][:150]}...\n"
-        text += f"👁 Просмотров: {news['views_count']}\n"
-        text += f"📅 {news['created_at'][:10]}\n\n"
-        text += "➖➖➖➖➖➖➖➖➖➖\n\n"
 
-    # Разбиваем на части, если текст слишком длинный
-    if len(text) > 4000:
-        parts = [text[i:i+4000] for i in range(0, len(text), 4000)]
-        for i, part in enumerate(parts):
-            if i == 0:
-                await callback.message.edit_text(part, parse_mode='HTML')
-            else:
-                await callback.message.answer(part, parse_mode='HTML')
-    else:
-        await callback.message.edit_text(text, parse_mode='HTML')
+@router.callback_query(NewsPageCallback.filter())
+async def show_news_page(callback: CallbackQuery, callback_data: NewsPageCallback):
+    """Листание ленты новостей в том же сообщении"""
+    page = await news_feed.page(callback_data)
+    if page is None:
+        await callback.answer("Новостей пока нет.", show_alert=True)
+        return
+
+    text, keyboard, news_ids = page
+    news_views.record(news_ids, callback.from_user.id)
+    if text != callback.message.html_text or keyboard != callback.message.reply_markup:
+        await callback.message.edit_text(text, reply_markup=keyboard, parse_mode='HTML')
+    await callback.answer()
+
+
+@router.callback_query(NewsMediaCallback.filter())
+async def show_news_media(callback: CallbackQuery, callback_data: NewsMediaCallback):
+    """Отправить вложения новости альбомом"""
+    media = await crud.get_news_media(callback_data.id)
+    if not media:
+        await callback.answer("У этой новости нет вложений.", show_alert=True)
+        return
 
     await callback.answer()
+    await send_news_media(callback.bot, callback.message.chat.id, media)
 
 
 @router.callback_query(F.data == "news_create")
@@ -215,14 +414,22 @@ async def create_news_content(message: Message, state: FSMContext):
     """Получение текста новости"""
     await state.update_data(content=message.text)
     await message.answer(
-        "Отправьте медиа-файлы (фото/видео) или напишите 'нет', если медиа не нужно:"
+        "Отправьте фото, видео или документы (можно альбомом до 10 файлов) "
+        "или напишите 'нет', если медиа не нужно:"
     )
     await state.set_state(CreateNews.media)
 
 
 @router.message(CreateNews.media)
-async def create_news_media(message: Message, state: FSMContext):
-    """Получение медиа и создание новости"""
+async def create_news_media(message: Message, state: FSMContext, album: Optional[List[Message]] = None):
+    """Получение медиа (одного файла или альбома) и создание новости"""
+    media = extract_media(album or [message])
+    if not media and (message.text or "").strip().lower() != 'нет':
+        await message.answer(
+            "Отправьте фото, видео или документы (можно альбомом) или напишите 'нет':"
+        )
+        return
+
     user = await crud.get_user_by_telegram_id(message.from_user.id)
     org = await crud.get_organization_by_user_id(user['id'])
 
@@ -234,19 +441,11 @@ async def create_news_media(message: Message, state: FSMContext):
     data = await state.get_data()
 
     # Создаем новость
-    media_ids = None
-    if message.text and message.text.lower() != 'нет':
-        # Если это не текст, а медиа
-        if message.photo:
-            media_ids = [message.photo[-1].file_id]
-        elif message.video:
-            media_ids = [message.video.file_id]
-
     news_id = await crud.create_news(
         organization_id=org['id'],
         title=data['title'],
         content=data['content'],
-        media_ids=media_ids
+        media=media
     )
 
     # Логируем действие
@@ -286,7 +485,7 @@ async def show_my_news(callback: CallbackQuery):
     for news in news_list:
         text += f"<b>{news['title']}</b>\n"
         text += f"{news['content'][:150]}...\n"
-        text += f"👁 Просмотров: {news['views_count']}\n"
+        text += f"👁 Просмотров: {news['views_count']} · зрителей: {news['unique_views']}\n"
         text += f"📅 {news['created_at'][:10]}\n\n"
         text += "➖➖➖➖➖➖➖➖➖➖\n\n"
 
@@ -299,39 +498,31 @@ async def show_my_news(callback: CallbackQuery):
 @router.message(F.text == "Конкурсы")
 async def competitions_list(message: Message):
     """Список активных конкурсов"""
-    user = await crud.get_user_by_telegram_id(message.from_user.id)
+    await send_resource_catalog(message, 'competition')
 
+
+@router.callback_query(CompetitionReminderCallback.filter())
+async def toggle_competition_reminder(callback: CallbackQuery, callback_data: CompetitionReminderCallback):
+    """Подписка на напоминание о дедлайне конкурса и отписка"""
+    user = await crud.get_user_by_telegram_id(callback.from_user.id)
     if not user:
-        await message.answer("Вы не зарегистрированы!")
+        await callback.answer("Вы не зарегистрированы!", show_alert=True)
         return
 
-    competitions = await crud.get_resources_by_type('competition', is_active=True)
-
-    if not competitions:
-        await message.answer("Активных конкурсов пока нет.")
+    competition = await crud.get_resource_by_id(callback_data.id)
+    if not competition or not competition['is_active'] or not competition['deadline_at']:
+        await callback.answer("Конкурс уже завершён.", show_alert=True)
+        return
+    if competition['reminded_at']:
+        await callback.answer("Напоминание об этом конкурсе уже разослано.", show_alert=True)
         return
 
-    text = "<b>🏆 Активные конкурсы</b>\n\n"
-
-    for comp in competitions:
-        text += f"<b>{comp['title']}</b>\n"
-        text += f"{comp['content']}\n"
-
-        if comp['additional_data']:
-            if comp['additional_data'].get('deadline'):
-                text += f"📅 Дедлайн: {comp['additional_data']['deadline']}\n"
-            if comp['additional_data'].get('link'):
-                text += f"🔗 Ссылка: {comp['additional_data']['link']}\n"
-
-        text += "\n➖➖➖➖➖➖➖➖➖➖\n\n"
-
-    # Разбиваем на части, если текст слишком длинный
-    if len(text) > 4000:
-        parts = [text[i:i+4000] for i in range(0, len(text), 4000)]
-        for part in parts:
-            await message.answer(part, parse_mode='HTML')
+    if await crud.toggle_competition_reminder(competition['id'], user['id']):
+        await callback.answer(
+            f"🔔 Напомним за {settings.COMPETITION_REMINDER_DAYS} дн. до дедлайна", show_alert=True
+        )
     else:
-        await message.answer(text, parse_mode='HTML')
+        await callback.answer("🔕 Напоминание отключено", show_alert=True)
 
 
 # ========== ОБУЧЕНИЕ ==========
@@ -339,36 +530,43 @@ async def competitions_list(message: Message):
 @router.message(F.text == "Обучение")
 async def courses_list(message: Message):
     """Список доступных курсов"""
+    await send_resource_catalog(message, 'course')
+
+
+async def send_resource_catalog(message: Message, resource_type: str):
+    """Первая страница каталога ресурсов из памяти"""
     user = await crud.get_user_by_telegram_id(message.from_user.id)
 
     if not user:
         await message.answer("Вы не зарегистрированы!")
         return
 
-    courses = await crud.get_resources_by_type('course', is_active=True)
-
-    if not courses:
-        await message.answer("Доступных курсов пока нет.")
+    page = await resource_catalog.page(resource_type)
+    if page is None:
+        await message.answer(CATALOGS[resource_type][1])
         return
 
-    text = "<b>📚 Доступные курсы</b>\n\n"
+    text, keyboard = page
+    await message.answer(text, reply_markup=keyboard, parse_mode='HTML')
 
-    for course in courses:
-        text += f"<b>{course['title']}</b>\n"
-        text += f"{course['content']}\n"
 
-        if course['additional_data'] and course['additional_data'].get('link'):
-            text += f"🔗 Ссылка: {course['additional_data']['link']}\n"
+@router.callback_query(ResourcePageCallback.filter())
+async def show_resource_page(callback: CallbackQuery, callback_data: ResourcePageCallback):
+    """Листание каталога ресурсов в том же сообщении"""
+    if callback_data.type not in CATALOGS:
+        await callback.answer()
+        return
 
-        text += "\n➖➖➖➖➖➖➖➖➖➖\n\n"
+    page = await resource_catalog.page(callback_data.type, callback_data.page)
+    if page is None:
+        await callback.message.edit_text(CATALOGS[callback_data.type][1])
+        await callback.answer()
+        return
 
-    # Разбиваем на части, если текст слишком длинный
-    if len(text) > 4000:
-        parts = [text[i:i+4000] for i in range(0, len(text), 4000)]
-        for part in parts:
-            await message.answer(part, parse_mode='HTML')
-    else:
-        await message.answer(text, parse_mode='HTML')
+    text, keyboard = page
+    if text != callback.message.html_text or keyboard != callback.message.reply_markup:
+        await callback.message.edit_text(text, reply_markup=keyboard, parse_mode='HTML')
+    await callback.answer()
 
 
 # ========== ПРОФИЛЬ ==========
@@ -391,6 +589,8 @@ async def show_profile(message: Message):
     text = f"<b>🏢 Профиль организации</b>\n\n"
     text += f"Название: <b>{org['name']}</b>\n"
     text += f"Юридическая форма: {org['legal_form']}\n"
+    if org.get('okved'):
+        text += f"ОКВЭД: {okved_index.describe(org['okved'])}\n"
     text += f"ИНН: {org['inn']}\n"
     text += f"Телефон: {org['phone']}\n"
     text += f"Email: {org['email']}\n"
@@ -429,6 +629,14 @@ async def documents_menu(message: Message):
         await message.answer("У вас нет организации!")
         return
 
+    documents_total = await crud.count_org_documents(org['id'])
+    await message.answer(
+        "<b>📎 Сертификаты и лицензии</b>\n\n"
+        f"Загружено документов: {documents_total}",
+        reply_markup=get_documents_menu_keyboard(documents_total),
+        parse_mode='HTML'
+    )
+
     contracts = await crud.get_contracts_by_org(org['id'])
 
     if not contracts:
@@ -436,17 +644,148 @@ async def documents_menu(message: Message):
         return
 
     text = "<b>📄 Ваши договоры</b>\n\n"
+    files = []
 
     for contract in contracts:
         is_creator = contract['creator_org_id'] == org['id']
         other_party = contract['recipient_name'] if is_creator else contract['creator_name']
 
         text += f"<b>Договор #{contract['id']}</b>\n"
-        text += f"С: {other_party}\n"
+        text += f"Тип: {CONTRACT_TYPES.get(contract['contract_data'].get('type'), '—')}\n"
+        text += f"С: {clip(other_party, 100)}\n"
         text += f"Дата: {contract['created_at'][:10]}\n\n"
         text += "➖➖➖➖➖➖➖➖➖➖\n\n"
+        files.append((contract['id'], other_party[:40]))
 
-    await message.answer(text, parse_mode='HTML')
+    await message.answer(text, reply_markup=get_contract_files_keyboard(files), parse_mode='HTML')
+
+
+@router.callback_query(ContractFileCallback.filter())
+async def send_contract_file(callback: CallbackQuery, callback_data: ContractFileCallback):
+    """PDF договора — только сторонам договора"""
+    user = await crud.get_user_by_telegram_id(callback.from_user.id)
+    org = await crud.get_organization_by_user_id(user['id']) if user else None
+    contract = await crud.get_contract_by_id(callback_data.id)
+
+    if not org or not contract or org['id'] not in (contract['creator_org_id'], contract['recipient_org_id']):
+        await callback.answer("Договор не найден", show_alert=True)
+        return
+
+    await callback.answer()
+    await contract_renderer.send(callback.bot, callback.from_user.id, contract, caption=f"Договор #{contract['id']}")
+
+
+async def render_documents_page(org_id: int, before_id: int):
+    """Текст и клавиатура страницы документов организации"""
+    documents, has_more = await crud.get_org_documents(org_id, before_id or None, settings.DOCUMENTS_PAGE_SIZE)
+    if not documents:
+        return "Документов пока нет.", get_documents_page_keyboard([], 0, first_page=not before_id)
+
+    text = "<b>📎 Документы организации</b>\n\n"
+    text += "\n".join(f"• {format_document(document)}" for document in documents)
+    keyboard = get_documents_page_keyboard(
+        [(document['id'], (document['file_name'] or DOCUMENT_TYPES.get(document['doc_type'], ""))[:40])
+         for document in documents],
+        documents[-1]['id'] if has_more else 0,
+        first_page=not before_id
+    )
+    return text, keyboard
+
+
+@router.callback_query(OrgDocumentCallback.filter(F.action == "page"))
+async def show_documents_page(callback: CallbackQuery, callback_data: OrgDocumentCallback):
+    """Страница документов организации"""
+    org = await crud.get_organization_by_telegram_id(callback.from_user.id)
+    if not org:
+        await callback.answer("У вас нет организации!", show_alert=True)
+        return
+
+    text, keyboard = await render_documents_page(org['id'], callback_data.id)
+    await callback.message.edit_text(text, reply_markup=keyboard, parse_mode='HTML')
+    await callback.answer()
+
+
+@router.callback_query(OrgDocumentCallback.filter(F.action == "get"))
+async def send_org_document(callback: CallbackQuery, callback_data: OrgDocumentCallback):
+    """Прислать файл документа"""
+    org = await crud.get_organization_by_telegram_id(callback.from_user.id)
+    document = await crud.get_org_document(org['id'], callback_data.id) if org else None
+    if not document:
+        await callback.answer("Документ не найден", show_alert=True)
+        return
+
+    await callback.answer()
+    await send_document_bundle(callback.bot, callback.message.chat.id, [document])
+
+
+@router.callback_query(OrgDocumentCallback.filter(F.action == "delete"))
+async def delete_org_document(callback: CallbackQuery, callback_data: OrgDocumentCallback):
+    """Удалить документ и показать первую страницу"""
+    org = await crud.get_organization_by_telegram_id(callback.from_user.id)
+    if not org or not await crud.delete_org_document(org['id'], callback_data.id):
+        await callback.answer("Документ не найден", show_alert=True)
+        return
+
+    user = await crud.get_user_by_telegram_id(callback.from_user.id)
+    await crud.create_log(user['id'], 'delete_document', {'document_id': callback_data.id})
+
+    text, keyboard = await render_documents_page(org['id'], 0)
+    await callback.message.edit_text(text, reply_markup=keyboard, parse_mode='HTML')
+    await callback.answer("Документ удалён")
+
+
+@router.callback_query(OrgDocumentCallback.filter(F.action == "add"))
+async def upload_document_start(callback: CallbackQuery, state: FSMContext):
+    """Начало загрузки документа: выбор типа"""
+    await callback.message.answer(
+        "Выберите тип документа:",
+        reply_markup=get_document_types_keyboard(list(DOCUMENT_TYPES.items()))
+    )
+    await state.set_state(UploadDocument.doc_type)
+    await callback.answer()
+
+
+@router.callback_query(UploadDocument.doc_type, DocumentTypeCallback.filter())
+async def upload_document_type(callback: CallbackQuery, callback_data: DocumentTypeCallback, state: FSMContext):
+    """Тип выбран — ждём файлы"""
+    await state.update_data(doc_type=callback_data.type)
+    await callback.message.edit_text(
+        f"{DOCUMENT_TYPES.get(callback_data.type, 'Документ')}: отправьте файл или фото "
+        "(можно альбомом до 10 файлов) или напишите 'отмена':"
+    )
+    await state.set_state(UploadDocument.file)
+    await callback.answer()
+
+
+@router.message(UploadDocument.file)
+async def upload_document_file(message: Message, state: FSMContext, album: Optional[List[Message]] = None):
+    """Сохранение файлов документа (одного или альбома)"""
+    files = extract_files(album or [message])
+    if not files:
+        if (message.text or "").strip().lower() == 'отмена':
+            await state.clear()
+            await message.answer("Загрузка отменена.")
+            return
+        await message.answer("Отправьте файл или фото (можно альбомом) или напишите 'отмена':")
+        return
+
+    user = await crud.get_user_by_telegram_id(message.from_user.id)
+    org = await crud.get_organization_by_user_id(user['id']) if user else None
+
+    if not org:
+        await message.answer("У вас нет организации!")
+        await state.clear()
+        return
+
+    data = await state.get_data()
+    added = await crud.add_org_documents(org['id'], data['doc_type'], files)
+    await crud.create_log(user['id'], 'upload_document', {'doc_type': data['doc_type'], 'added': added})
+
+    await state.clear()
+    text = f"✅ Загружено документов: {added}"
+    if added < len(files):
+        text += f"\nУже были загружены ранее: {len(files) - added}"
+    await message.answer(text)
 
 
 # ========== СОЗДАТЬ ДОГОВОР ==========
@@ -466,25 +805,9 @@ async def create_contract_start(message: Message, state: FSMContext):
         await message.answer("У вас нет организации!")
         return
 
-    # Получаем матчи
-    from database.crud import get_db
-
-    db = await get_db()
-    async with db.execute("""
-        SELECT DISTINCT o.id, o.name
-        FROM matches m
-        JOIN organizations o ON (
-            CASE
-                WHEN m.org1_id = ? THEN m.org2_id = o.id
-                WHEN m.org2_id = ? THEN m.org1_id = o.id
-            END
-        )
-        WHERE m.is_active = 1 AND (m.org1_id = ? OR m.org2_id = ?)
-    """, (org['id'], org['id'], org['id'], org['id'])) as cursor:
-        rows = await cursor.fetchall()
-    await db.close()
+    partners = await crud.get_partner_orgs(org['id'])
 
-    if not rows:
+    if not partners:
         await message.answer(
             "У вас пока нет подтверждённых партнёров (матчей). "
             "Найдите партнёров через поиск!"
@@ -493,10 +816,10 @@ async def create_contract_start(message: Message, state: FSMContext):
 
     # Формируем кнопки с партнёрами
     builder = InlineKeyboardBuilder()
-    for row in rows:
+    for partner in partners:
         builder.button(
-            text=row[1],  # name
-            callback_data=f"contract_partner:{row[0]}"  # id
+            text=partner['name'],
+            callback_data=f"contract_partner:{partner['id']}"
         )
     builder.adjust(1)
 
@@ -512,6 +835,10 @@ async def create_contract_start(message: Message, state: FSMContext):
 async def contract_select_partner(callback: CallbackQuery, state: FSMContext):
     """Выбор партнёра для договора"""
     partner_id = int(callback.data.split(":")[1])
+    org = await crud.get_organization_by_telegram_id(callback.from_user.id)
+    if not org or not await crud.is_partner(org['id'], partner_id):
+        await callback.answer("Эта организация не в числе ваших партнёров", show_alert=True)
+        return
     await state.update_data(partner_id=partner_id)
 
     builder = InlineKeyboardBuilder()
@@ -547,12 +874,16 @@ async def contract_create_final(message: Message, state: FSMContext):
     org = await crud.get_organization_by_user_id(user['id'])
 
     data = await state.get_data()
+    partner_org = await crud.get_organization_by_id(data['partner_id'])
 
-    # Создаем договор
+    # Создаем договор; реквизиты сторон фиксируются на момент создания,
+    # чтобы повторная вёрстка PDF давала тот же документ
     contract_data = {
         'type': data['contract_type'],
         'details': message.text,
-        'created_by': org['name']
+        'created_by': org['name'],
+        'creator': party_snapshot(org),
+        'recipient': party_snapshot(partner_org),
     }
 
     contract_id = await crud.create_contract(
@@ -567,30 +898,29 @@ async def contract_create_final(message: Message, state: FSMContext):
         'create_contract',
         {'contract_id': contract_id, 'type': data['contract_type']}
     )
+    await state.clear()
+
+    # PDF верстается и загружается один раз — партнёру уходит тот же file_id
+    contract = await crud.get_contract_by_id(contract_id)
+    type_title = CONTRACT_TYPES.get(data['contract_type'], data['contract_type'])
+    await message.answer("✅ Договор успешно создан!")
+    await contract_renderer.send(message.bot, message.chat.id, contract, caption=f"{type_title} #{contract_id}")
 
     # Уведомляем партнёра
-    partner_org = await crud.get_organization_by_id(data['partner_id'])
     partner_user = await crud.get_user_by_id(partner_org['user_id'])
-
-    from aiogram import Bot
-    from config.config import settings
-
-    bot = Bot(token=settings.BOT_TOKEN)
     try:
-        await bot.send_message(
+        await message.bot.send_message(
             partner_user['telegram_id'],
             f"<b>📄 Новый договор</b>\n\n"
-            f"Организация <b>{org['name']}</b> создала с вами договор.\n\n"
-            f"Тип: {contract_data['type']}\n"
-            f"Детали: {message.text}\n\n"
-            f"Проверьте в разделе 'Документы'",
+            f"Организация <b>{clip(org['name'], 100)}</b> создала с вами договор.\n\n"
+            f"Тип: {type_title}\n"
+            f"Детали: {clip(message.text, 1000)}\n\n"
+            f"Договор также доступен в разделе 'Документы'",
             parse_mode='HTML'
         )
-    except:
-        pass
-    await bot.session.close()
-
-    await state.clear()
-    await message.answer(
-        "✅ Договор успешно создан! Партнёр получил уведомление."
-    )
+        await contract_renderer.send(message.bot, partner_user['telegram_id'], contract,
+                                     caption=f"{type_title} #{contract_id}")
+    except TelegramAPIError:
+        await message.answer("Партнёр не получил уведомление: бот недоступен для него.")
+        return
+    await message.answer("Партнёр получил уведомление.")
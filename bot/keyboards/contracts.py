@@ -0,0 +1,21 @@
+from typing import List, Optional, Tuple
+
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import InlineKeyboardMarkup
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+
+class ContractFileCallback(CallbackData, prefix="ctrf"):
+    """Прислать PDF договора"""
+    id: int
+
+
+def get_contract_files_keyboard(contracts: List[Tuple[int, str]]) -> Optional[InlineKeyboardMarkup]:
+    """Кнопки PDF для списка договоров (id, подпись)"""
+    if not contracts:
+        return None
+    builder = InlineKeyboardBuilder()
+    for contract_id, label in contracts:
+        builder.button(text=f"📄 #{contract_id} · {label}", callback_data=ContractFileCallback(id=contract_id))
+    builder.adjust(1)
+    return builder.as_markup()
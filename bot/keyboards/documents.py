@@ -0,0 +1,64 @@
+from typing import List, Tuple
+
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import InlineKeyboardMarkup
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+
+class OrgDocumentCallback(CallbackData, prefix="odoc"):
+    """Документы своей организации.
+
+    action: page (id — id последнего документа предыдущей страницы, 0 — первая),
+    add (загрузить), get / delete (id — документ).
+    """
+    action: str
+    id: int
+
+
+class DocumentTypeCallback(CallbackData, prefix="odtype"):
+    """Тип загружаемого документа"""
+    type: str
+
+
+class AdminDocumentsCallback(CallbackData, prefix="adocs"):
+    """Пакет документов организации для администратора"""
+    org_id: int
+
+
+def get_documents_menu_keyboard(total: int) -> InlineKeyboardMarkup:
+    """Кнопки раздела документов организации"""
+    builder = InlineKeyboardBuilder()
+    if total:
+        builder.button(text=f"📎 Мои документы ({total})", callback_data=OrgDocumentCallback(action="page", id=0))
+    builder.button(text="➕ Загрузить сертификат или лицензию", callback_data=OrgDocumentCallback(action="add", id=0))
+    builder.adjust(1)
+    return builder.as_markup()
+
+
+def get_document_types_keyboard(types: List[Tuple[str, str]]) -> InlineKeyboardMarkup:
+    """Выбор типа документа (ключ, подпись)"""
+    builder = InlineKeyboardBuilder()
+    for key, label in types:
+        builder.button(text=label, callback_data=DocumentTypeCallback(type=key))
+    builder.adjust(1)
+    return builder.as_markup()
+
+
+def get_documents_page_keyboard(documents: List[Tuple[int, str]], next_before: int,
+                                first_page: bool) -> InlineKeyboardMarkup:
+    """Кнопки документов страницы (id, подпись): открыть и удалить; листание вперёд и в начало"""
+    builder = InlineKeyboardBuilder()
+    for document_id, label in documents:
+        builder.button(text=f"📄 {label}", callback_data=OrgDocumentCallback(action="get", id=document_id))
+        builder.button(text="🗑", callback_data=OrgDocumentCallback(action="delete", id=document_id))
+    navigation = 0
+    if not first_page:
+        builder.button(text="⏮ В начало", callback_data=OrgDocumentCallback(action="page", id=0))
+        navigation += 1
+    if next_before:
+        builder.button(text="Дальше ➡️", callback_data=OrgDocumentCallback(action="page", id=next_before))
+        navigation += 1
+    builder.button(text="➕ Загрузить", callback_data=OrgDocumentCallback(action="add", id=0))
+    builder.adjust(*([2] * len(documents)), *([navigation] if navigation else []), 1)
+    return builder.as_markup()
+
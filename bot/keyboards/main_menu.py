@@ -23,7 +23,8 @@ def get_main_menu_keyboard() -> ReplyKeyboardMarkup:
     builder.button(text="Наставник")
     builder.button(text="Профиль")
     builder.button(text="Документы")
-    builder.adjust(2, 2, 2, 2, 1)
+    builder.button(text="Мои партнёры")
+    builder.adjust(2, 2, 2, 2, 2)
     return builder.as_markup(resize_keyboard=True)
 
 
@@ -35,8 +36,9 @@ def get_admin_menu_keyboard() -> ReplyKeyboardMarkup:
     builder.button(text="Добавить конкурс")
     builder.button(text="Логи")
     builder.button(text="Статистика")
+    builder.button(text="Рассылка")
     builder.button(text="Главное меню")
-    builder.adjust(2, 2, 2)
+    builder.adjust(2, 2, 2, 1)
     return builder.as_markup(resize_keyboard=True)
 
 
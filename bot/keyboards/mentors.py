@@ -0,0 +1,42 @@
+from typing import List, Optional, Tuple
+
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import InlineKeyboardMarkup
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+
+class MentorCallback(CallbackData, prefix="mnt"):
+    """Действия с наставниками.
+
+    action: page (id — номер страницы подбора), ask (id — наставник),
+    accept / decline / finish (id — заявка).
+    """
+    action: str
+    id: int
+
+
+def get_mentor_matches_keyboard(mentors: List[Tuple[int, str]], next_page: Optional[int]) -> InlineKeyboardMarkup:
+    """Кнопки заявки каждому наставнику страницы (id, имя) и «ещё»"""
+    builder = InlineKeyboardBuilder()
+    for mentor_id, name in mentors:
+        builder.button(text=f"📨 {name}", callback_data=MentorCallback(action="ask", id=mentor_id))
+    if next_page is not None:
+        builder.button(text="Ещё ➡️", callback_data=MentorCallback(action="page", id=next_page))
+    builder.adjust(1)
+    return builder.as_markup()
+
+
+def get_mentor_request_keyboard(request_id: int) -> InlineKeyboardMarkup:
+    """Принять или отклонить заявку"""
+    builder = InlineKeyboardBuilder()
+    builder.button(text="✅ Принять", callback_data=MentorCallback(action="accept", id=request_id))
+    builder.button(text="❌ Отклонить", callback_data=MentorCallback(action="decline", id=request_id))
+    builder.adjust(2)
+    return builder.as_markup()
+
+
+def get_mentor_finish_keyboard(request_id: int) -> InlineKeyboardMarkup:
+    """Завершить наставничество и освободить место"""
+    builder = InlineKeyboardBuilder()
+    builder.button(text="🏁 Завершить наставничество", callback_data=MentorCallback(action="finish", id=request_id))
+    return builder.as_markup()
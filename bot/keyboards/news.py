@@ -0,0 +1,38 @@
+from typing import List, Optional, Tuple
+
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import InlineKeyboardMarkup
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+
+class NewsPageCallback(CallbackData, prefix="newsp"):
+    """Листание ленты: newer — направление, stamp/id — ключ крайней новости страницы.
+
+    stamp — created_at без разделителей (YYYYMMDDHHMMSS): двоеточие в
+    callback_data зарезервировано под разделитель полей.
+    """
+    newer: bool
+    stamp: str
+    id: int
+
+
+class NewsMediaCallback(CallbackData, prefix="newsm"):
+    """Показать вложения новости"""
+    id: int
+
+
+def get_news_page_keyboard(newer: Optional[NewsPageCallback],
+                           older: Optional[NewsPageCallback],
+                           with_media: List[Tuple[int, str]] = ()) -> Optional[InlineKeyboardMarkup]:
+    """Кнопки вложений (id, подпись) и «новее»/«старее» для страницы ленты"""
+    if newer is None and older is None and not with_media:
+        return None
+    builder = InlineKeyboardBuilder()
+    for news_id, label in with_media:
+        builder.button(text=f"📎 {label}", callback_data=NewsMediaCallback(id=news_id))
+    if newer is not None:
+        builder.button(text="⬅️ Новее", callback_data=newer)
+    if older is not None:
+        builder.button(text="Старее ➡️", callback_data=older)
+    builder.adjust(*([1] * len(with_media)), 2)
+    return builder.as_markup()
@@ -1,57 +1,120 @@
+from functools import lru_cache
+
+from aiogram.filters.callback_data import CallbackData
 from aiogram.types import InlineKeyboardMarkup, ReplyKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder, ReplyKeyboardBuilder
 from config.config import settings
 
 
-def get_legal_form_keyboard() -> InlineKeyboardMarkup:
-    """Клавиатура выбора юридической формы"""
+class ChoiceCallback(CallbackData, prefix="choice"):
+    """Выбор одного значения из списка настроек: field — поле анкеты, index — позиция в списке"""
+    field: str
+    index: int
+
+
+class OptionCallback(CallbackData, prefix="opt"):
+    """Кнопка множественного выбора: action = toggle/other/done,
+    mask — выбранные опции в момент построения клавиатуры (бит i — опция i)"""
+    kind: str
+    action: str
+    index: int = 0
+    mask: int = 0
+
+
+class CityCallback(CallbackData, prefix="city"):
+    """Выбор города из подсказок; city_id = 0 — оставить введённое название"""
+    city_id: int
+
+
+# Поле анкеты -> список значений в настройках
+CHOICES = {
+    "legal_form": settings.LEGAL_FORMS,
+    "turnover": settings.TURNOVER_RANGES,
+    "interaction": settings.INTERACTION_FORMATS,
+    "partnership_type": settings.PARTNERSHIP_TYPES,
+}
+
+PARTNERSHIP_OPTIONS = {
+    "can_give": settings.CAN_GIVE_OPTIONS,
+    "need": settings.NEED_OPTIONS,
+}
+
+
+@lru_cache(maxsize=None)
+def _choice_keyboard(field: str) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
-    for form in settings.LEGAL_FORMS:
-        builder.button(text=form, callback_data=f"legal_form:{form}")
+    for i, value in enumerate(CHOICES[field]):
+        builder.button(text=value, callback_data=ChoiceCallback(field=field, index=i))
     builder.adjust(2)
     return builder.as_markup()
 
 
+def get_legal_form_keyboard() -> InlineKeyboardMarkup:
+    """Клавиатура выбора юридической формы"""
+    return _choice_keyboard("legal_form")
+
+
 def get_turnover_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура выбора оборотов"""
-    builder = InlineKeyboardBuilder()
-    for turnover in settings.TURNOVER_RANGES:
-        builder.button(text=turnover, callback_data=f"turnover:{turnover}")
-    builder.adjust(2)
-    return builder.as_markup()
+    return _choice_keyboard("turnover")
 
 
-def get_partnership_options_keyboard(option_type: str, selected: list = None) -> InlineKeyboardMarkup:
-    """Клавиатура выбора опций партнерства (что может дать/что нужно)"""
-    builder = InlineKeyboardBuilder()
-    options = settings.CAN_GIVE_OPTIONS if option_type == "can_give" else settings.NEED_OPTIONS
-    selected = selected or []
+def options_mask(option_type: str, selected: list) -> int:
+    """Битовая маска выбранных стандартных опций (свои варианты в маску не входят)"""
+    mask = 0
+    for i, option in enumerate(PARTNERSHIP_OPTIONS[option_type]):
+        if option in selected:
+            mask |= 1 << i
+    return mask
+
+
+def options_from_mask(option_type: str, mask: int, selected: list) -> list:
+    """Список опций по маске; свои варианты из selected сохраняются в конце"""
+    options = PARTNERSHIP_OPTIONS[option_type]
+    standard = [option for i, option in enumerate(options) if mask >> i & 1]
+    custom = [option for option in selected if option not in options]
+    return standard + custom
 
-    for option in options:
-        # Добавляем галочку если опция выбрана
-        text = f"✅ {option}" if option in selected else option
-        builder.button(text=text, callback_data=f"{option_type}:{option}")
 
-    builder.button(text="Иное (ручной ввод)", callback_data=f"{option_type}:other")
-    builder.button(text="✔️ Готово", callback_data=f"{option_type}:done")
+@lru_cache(maxsize=4096)
+def get_partnership_options_keyboard(option_type: str, mask: int = 0) -> InlineKeyboardMarkup:
+    """Клавиатура выбора опций партнерства (что может дать/что нужно).
+
+    Готовые клавиатуры кэшируются по маске выбора: 2 списка по 11 опций
+    дают не больше 4096 вариантов.
+    """
+    builder = InlineKeyboardBuilder()
+    for i, option in enumerate(PARTNERSHIP_OPTIONS[option_type]):
+        # Добавляем галочку если опция выбрана
+        text = f"✅ {option}" if mask >> i & 1 else option
+        builder.button(
+            text=text,
+            callback_data=OptionCallback(kind=option_type, action="toggle", index=i, mask=mask)
+        )
+
+    builder.button(text="Иное (ручной ввод)", callback_data=OptionCallback(kind=option_type, action="other", mask=mask))
+    builder.button(text="✔️ Готово", callback_data=OptionCallback(kind=option_type, action="done", mask=mask))
     builder.adjust(2)
     return builder.as_markup()
 
 
 def get_interaction_format_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура выбора формата взаимодействия"""
-    builder = InlineKeyboardBuilder()
-    for format_type in settings.INTERACTION_FORMATS:
-        builder.button(text=format_type, callback_data=f"interaction:{format_type}")
-    builder.adjust(2)
-    return builder.as_markup()
+    return _choice_keyboard("interaction")
 
 
 def get_partnership_type_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура выбора типа партнерства"""
+    return _choice_keyboard("partnership_type")
+
+
+def get_city_suggestions_keyboard(cities: list, custom: str = "") -> InlineKeyboardMarkup:
+    """Подсказки городов из справочника; custom — кнопка «оставить как есть»"""
     builder = InlineKeyboardBuilder()
-    for p_type in settings.PARTNERSHIP_TYPES:
-        builder.button(text=p_type, callback_data=f"partnership_type:{p_type}")
+    for city in cities:
+        builder.button(text=city.name, callback_data=CityCallback(city_id=city.id))
+    if custom:
+        builder.button(text=f"Оставить «{custom[:40]}»", callback_data=CityCallback(city_id=0))
     builder.adjust(2)
     return builder.as_markup()
 
@@ -65,6 +128,15 @@ def get_gdpr_keyboard() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+def get_draft_resume_keyboard() -> InlineKeyboardMarkup:
+    """Клавиатура продолжения незавершённой регистрации"""
+    builder = InlineKeyboardBuilder()
+    builder.button(text="▶️ Продолжить регистрацию", callback_data="draft:resume")
+    builder.button(text="🔄 Начать заново", callback_data="draft:discard")
+    builder.adjust(1)
+    return builder.as_markup()
+
+
 def get_yes_no_keyboard() -> InlineKeyboardMarkup:
     """Простая клавиатура Да/Нет"""
     builder = InlineKeyboardBuilder()
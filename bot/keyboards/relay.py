@@ -0,0 +1,34 @@
+from typing import List, Tuple
+
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import InlineKeyboardMarkup
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+
+class RelayCallback(CallbackData, prefix="rly"):
+    """Чат с партнёром: action open / close, id — матч"""
+    action: str
+    id: int
+
+
+def get_partners_keyboard(partners: List[Tuple[int, str]]) -> InlineKeyboardMarkup:
+    """Кнопки чата с каждым партнёром (match_id, название)"""
+    builder = InlineKeyboardBuilder()
+    for match_id, name in partners:
+        builder.button(text=f"💬 {name}", callback_data=RelayCallback(action="open", id=match_id))
+    builder.adjust(1)
+    return builder.as_markup()
+
+
+def get_relay_open_keyboard(match_id: int, label: str = "💬 Написать") -> InlineKeyboardMarkup:
+    """Открыть чат с партнёром по матчу (под уведомлением о матче и заголовком пересланных сообщений)"""
+    builder = InlineKeyboardBuilder()
+    builder.button(text=label, callback_data=RelayCallback(action="open", id=match_id))
+    return builder.as_markup()
+
+
+def get_relay_close_keyboard(match_id: int) -> InlineKeyboardMarkup:
+    """Завершить чат"""
+    builder = InlineKeyboardBuilder()
+    builder.button(text="✖️ Завершить чат", callback_data=RelayCallback(action="close", id=match_id))
+    return builder.as_markup()
@@ -0,0 +1,32 @@
+from typing import List, Optional, Tuple
+
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import InlineKeyboardMarkup
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+
+class ResourcePageCallback(CallbackData, prefix="resp"):
+    """Листание каталога ресурсов: type — тип ресурса, page — номер страницы с нуля"""
+    type: str
+    page: int
+
+
+class CompetitionReminderCallback(CallbackData, prefix="remind"):
+    """Подписка на напоминание о дедлайне конкурса (повторное нажатие — отписка)"""
+    id: int
+
+
+def get_resource_page_keyboard(resource_type: str, page: int, total: int,
+                               reminders: List[Tuple[int, str]] = ()) -> Optional[InlineKeyboardMarkup]:
+    """Кнопки напоминаний (id, подпись) и «назад»/«вперёд» для страницы каталога"""
+    if total <= 1 and not reminders:
+        return None
+    builder = InlineKeyboardBuilder()
+    for resource_id, label in reminders:
+        builder.button(text=f"🔔 {label}", callback_data=CompetitionReminderCallback(id=resource_id))
+    if page > 0:
+        builder.button(text="⬅️ Назад", callback_data=ResourcePageCallback(type=resource_type, page=page - 1))
+    if page < total - 1:
+        builder.button(text="Вперёд ➡️", callback_data=ResourcePageCallback(type=resource_type, page=page + 1))
+    builder.adjust(*([1] * len(reminders)), 2)
+    return builder.as_markup()
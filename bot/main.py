@@ -12,10 +12,24 @@ from aiogram.client.default import DefaultBotProperties
 from aiogram.fsm.storage.memory import MemoryStorage
 
 from config.config import settings
-from database import init_db
+from database import init_db, crud
+from database.retention import run_log_retention
+from database.analytics import run_analytics_refresh
+from database.write_buffer import log_buffer
+from database.drafts import draft_store, run_draft_cleanup
+from database.news_views import news_views
 
 # Импорт хэндлеров
-from bot.handlers import start, registration, partner_search, admin, owner, user
+from bot.handlers import start, registration, partner_search, admin, owner, user, broadcast, relay
+from bot.utils.broadcast import resume_broadcasts
+from bot.utils.admin_roster import admin_roster, run_roster_sync
+from bot.utils.egrul_client import egrul_client
+from bot.utils.cities import city_index
+from bot.utils.resource_catalog import resource_catalog
+from bot.utils.scheduler import scheduler
+from bot.utils.competitions import parse_deadline, load_competition_jobs
+from bot.utils.contracts import contract_renderer
+from bot.utils.chat_relay import chat_relay
 
 # Настройка логирования
 logging.basicConfig(
@@ -35,6 +49,20 @@ async def main():
     # Инициализация базы данных
     logger.info("Инициализация базы данных...")
     await init_db()
+    normalized = await crud.normalize_organization_cities(city_index.lookup)
+    if normalized:
+        logger.info(f"Города приведены к справочнику у {normalized} организаций")
+    backfilled = await crud.backfill_competition_deadlines(parse_deadline)
+    if backfilled:
+        logger.info(f"Дедлайн распознан у {backfilled} конкурсов")
+    log_buffer.start()
+    draft_store.start()
+    news_views.start()
+    await resource_catalog.warm_up()
+    await admin_roster.refresh()
+    await egrul_client.start()
+    contract_renderer.start()
+    await chat_relay.load()
 
     # Создание бота и диспетчера
     bot = Bot(
@@ -51,13 +79,38 @@ async def main():
     dp.include_router(registration.router)
     dp.include_router(partner_search.router)
     dp.include_router(admin.router)
+    dp.include_router(broadcast.router)
     dp.include_router(user.router)
+    # Пересылка в чат партнёра — только то, что не разобрали роутеры выше
+    dp.include_router(relay.router)
+
+    # Фоновые задачи
+    retention_task = asyncio.create_task(run_log_retention())
+    analytics_task = asyncio.create_task(run_analytics_refresh())
+    roster_task = asyncio.create_task(run_roster_sync())
+    drafts_task = asyncio.create_task(run_draft_cleanup())
+    await resume_broadcasts(bot)
+    jobs = await load_competition_jobs(bot)
+    logger.info(f"Запланированы дедлайны {jobs} конкурсов")
+    scheduler.start()
 
     # Запуск бота
     logger.info("Бот запускается...")
     try:
         await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
     finally:
+        retention_task.cancel()
+        analytics_task.cancel()
+        roster_task.cancel()
+        drafts_task.cancel()
+        await scheduler.stop()
+        await chat_relay.stop()
+        # Дописываем накопленные логи перед выходом
+        await log_buffer.stop()
+        await draft_store.stop()
+        await news_views.stop()
+        await egrul_client.close()
+        contract_renderer.stop()
         await bot.session.close()
 
 
@@ -0,0 +1,43 @@
+"""Сборка альбомов: сообщения одной медиагруппы передаются обработчику разом"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List
+
+from aiogram import BaseMiddleware
+from aiogram.types import Message, TelegramObject
+
+
+class MediaGroupMiddleware(BaseMiddleware):
+    """Telegram присылает альбом отдельными сообщениями с общим media_group_id.
+
+    Первое сообщение группы ждёт latency секунд, пока придут остальные, и
+    вызывает обработчик один раз: с первым сообщением и списком всех
+    сообщений альбома в data["album"]. Остальные сообщения группы
+    обработчик не видят. Сообщения вне альбомов проходят как есть.
+    """
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self._albums: Dict[str, List[Message]] = {}
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if not isinstance(event, Message) or not event.media_group_id:
+            return await handler(event, data)
+
+        album = self._albums.get(event.media_group_id)
+        if album is not None:
+            album.append(event)
+            return None
+
+        album = self._albums[event.media_group_id] = [event]
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            del self._albums[event.media_group_id]
+        album.sort(key=lambda message: message.message_id)
+        data["album"] = album
+        return await handler(album[0], data)
@@ -0,0 +1,38 @@
+"""Сохранение черновика анкеты организации после каждого шага регистрации"""
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.fsm.context import FSMContext
+from aiogram.types import TelegramObject
+
+from bot.states import RegistrationOrg
+from database.drafts import draft_store
+
+
+class RegistrationDraftMiddleware(BaseMiddleware):
+    """После обработчика сохраняет текущий шаг и данные анкеты в черновик.
+
+    Если обработчик вывел пользователя из регистрации (завершение, отказ,
+    блокировка), черновик удаляется.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        result = await handler(event, data)
+
+        state: FSMContext = data.get("state")
+        user = data.get("event_from_user")
+        if state is None or user is None:
+            return result
+
+        prefix = f"{RegistrationOrg.__full_group_name__}:"
+        current = await state.get_state()
+        if current and current.startswith(prefix):
+            draft_store.save(user.id, current, await state.get_data())
+        elif (data.get("raw_state") or "").startswith(prefix):
+            draft_store.delete(user.id)
+        return result
@@ -1,4 +1,9 @@
 from .registration import RegistrationOrg, RegistrationMentor
-from .admin import SendMessage
+from .admin import SendMessage, AddCourse, AddCompetition, Broadcast
+from .user import CreateNews, CreateContract, ResourceCenterQuestion, UploadDocument
 
-__all__ = ['RegistrationOrg', 'RegistrationMentor', 'SendMessage']
+__all__ = [
+    'RegistrationOrg', 'RegistrationMentor',
+    'SendMessage', 'AddCourse', 'AddCompetition', 'Broadcast',
+    'CreateNews', 'CreateContract', 'ResourceCenterQuestion', 'UploadDocument'
+]
@@ -6,3 +6,27 @@ class SendMessage(StatesGroup):
     message_text = State()
     verification_id = State()
     action = State()  # approve или reject
+
+
+class AddCourse(StatesGroup):
+    """Состояния для добавления курса"""
+    title = State()
+    content = State()
+    link = State()
+
+
+class AddCompetition(StatesGroup):
+    """Состояния для добавления конкурса"""
+    title = State()
+    content = State()
+    deadline = State()
+    link = State()
+
+
+class Broadcast(StatesGroup):
+    """Состояния для создания рассылки"""
+    text = State()
+    audience = State()
+    turnover = State()
+    city = State()
+    confirm = State()
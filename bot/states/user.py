@@ -1,27 +1,6 @@
-"""FSM States для бота"""
 from aiogram.fsm.state import State, StatesGroup
 
 
-class SendMessage(StatesGroup):
-    """Состояния для отправки сообщения"""
-    message_text = State()
-
-
-class AddCourse(StatesGroup):
-    """Состояния для добавления курса"""
-    title = State()
-    content = State()
-    link = State()
-
-
-class AddCompetition(StatesGroup):
-    """Состояния для добавления конкурса"""
-    title = State()
-    content = State()
-    deadline = State()
-    link = State()
-
-
 class CreateNews(StatesGroup):
     """Состояния для создания новости"""
     title = State()
@@ -39,3 +18,9 @@ class CreateContract(StatesGroup):
 class ResourceCenterQuestion(StatesGroup):
     """Состояния для вопроса в ресурсный центр"""
     question = State()
+
+
+class UploadDocument(StatesGroup):
+    """Состояния для загрузки документа организации"""
+    doc_type = State()
+    file = State()
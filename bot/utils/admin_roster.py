@@ -0,0 +1,123 @@
+"""Кэш состава администраторов с готовыми текстами и клавиатурами"""
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from aiogram.types import InlineKeyboardMarkup
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+from config.config import settings
+from database import crud
+
+logger = logging.getLogger(__name__)
+
+
+def _build_panel_keyboard() -> InlineKeyboardMarkup:
+    """Клавиатура панели управления операторами"""
+    builder = InlineKeyboardBuilder()
+    builder.button(text="➕ Добавить оператора", callback_data="admin:add")
+    builder.button(text="➖ Удалить оператора", callback_data="admin:remove")
+    builder.button(text="📋 Список всех админов", callback_data="admin:list")
+    builder.button(text="📊 Аналитика", callback_data="admin:analytics")
+    builder.adjust(1)
+    return builder.as_markup()
+
+
+def _build_back_keyboard() -> InlineKeyboardMarkup:
+    """Кнопка возврата к панели"""
+    builder = InlineKeyboardBuilder()
+    builder.button(text="« Назад", callback_data="admin:back")
+    builder.adjust(1)
+    return builder.as_markup()
+
+
+class AdminRoster:
+    """Состав администраторов в памяти.
+
+    Обновляется после изменения ролей в этом процессе (refresh) и при появлении
+    новых записей в ленте role_changes от других реплик (sync).
+    """
+
+    panel_keyboard = _build_panel_keyboard()
+    back_keyboard = _build_back_keyboard()
+
+    def __init__(self):
+        self.admins: List[Dict] = []
+        self.owner: Optional[Dict] = None
+        self.last_change_id = 0
+        self.panel_text = ""
+        self.list_text = ""
+        self.remove_keyboard: Optional[InlineKeyboardMarkup] = None
+        self._lock = asyncio.Lock()
+
+    async def refresh(self):
+        """Перечитать состав администраторов из базы"""
+        async with self._lock:
+            # ID изменения читаем до списка: пропущенное изменение подхватит следующий sync
+            last_change_id = await crud.get_last_role_change_id()
+            admins = await crud.get_admins()
+            self._build(admins)
+            self.last_change_id = last_change_id
+
+    async def sync(self):
+        """Проверить ленту изменений ролей и обновиться, если есть новые записи"""
+        if await crud.get_last_role_change_id() != self.last_change_id:
+            await self.refresh()
+
+    def _build(self, admins: List[Dict]):
+        """Подготовить тексты и клавиатуры для owner.py"""
+        self.admins = admins
+        self.owner = next((a for a in admins if a['role'] == 'owner'), None)
+
+        panel_lines = []
+        list_blocks = []
+        remove_builder = InlineKeyboardBuilder()
+        has_removable = False
+        for admin in admins:
+            username = admin['username'] or 'нет'
+            if admin['role'] == 'owner':
+                panel_lines.append(f"👑 {admin['full_name']} (@{username}) - OWNER")
+            else:
+                panel_lines.append(f"👨‍💼 {admin['full_name']} (@{username}) - Админ")
+                remove_builder.button(
+                    text=f"❌ {admin['full_name']} (@{username})",
+                    callback_data=f"remove_admin:{admin['telegram_id']}"
+                )
+                has_removable = True
+
+            role_emoji = "👑" if admin['role'] == 'owner' else "👨‍💼"
+            role_text = "OWNER" if admin['role'] == 'owner' else "Админ"
+            list_blocks.append(
+                f"{role_emoji} <b>{admin['full_name']}</b>\n"
+                f"   @{username} | ID: {admin['telegram_id']}\n"
+                f"   Роль: {role_text}"
+            )
+
+        admin_text = "\n".join(panel_lines) if panel_lines else "Нет администраторов"
+        self.panel_text = (
+            f"<b>🔧 Панель управления операторами</b>\n\n"
+            f"<b>Текущие операторы:</b>\n{admin_text}"
+        )
+
+        text = "\n\n".join(list_blocks) if list_blocks else "Нет администраторов"
+        self.list_text = f"<b>📋 Список всех операторов:</b>\n\n{text}"
+
+        if has_removable:
+            remove_builder.button(text="« Назад", callback_data="admin:back")
+            remove_builder.adjust(1)
+            self.remove_keyboard = remove_builder.as_markup()
+        else:
+            self.remove_keyboard = None
+
+
+admin_roster = AdminRoster()
+
+
+async def run_roster_sync():
+    """Фоновая задача: опрос ленты изменений ролей"""
+    while True:
+        await asyncio.sleep(settings.ROSTER_SYNC_INTERVAL)
+        try:
+            await admin_roster.sync()
+        except Exception:
+            logger.exception("Ошибка синхронизации списка администраторов")
@@ -0,0 +1,147 @@
+"""Рассылки администраторов по всем или отфильтрованным пользователям"""
+import asyncio
+import logging
+from typing import Dict
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+from config.config import settings
+from database import crud
+from bot.utils.sender import RateLimiter, send_with_retry, SENT, BLOCKED
+
+logger = logging.getLogger(__name__)
+
+# Запущенные рассылки: broadcast_id -> задача
+_tasks: Dict[int, asyncio.Task] = {}
+
+
+def format_progress(broadcast: Dict, sent: int, failed: int, blocked: int, status: str) -> str:
+    """Текст сообщения о прогрессе рассылки"""
+    processed = sent + failed + blocked
+    status_text = {
+        'running': '⏳ Идёт рассылка',
+        'done': '✅ Рассылка завершена',
+        'cancelled': '⏹ Рассылка остановлена',
+    }.get(status, status)
+    return (
+        f"<b>📣 Рассылка #{broadcast['id']}</b>\n\n"
+        f"{status_text}\n\n"
+        f"Обработано: {processed} из {broadcast['total_count']}\n"
+        f"✅ Доставлено: {sent}\n"
+        f"🚫 Заблокировали бота: {blocked}\n"
+        f"⚠️ Ошибок: {failed}"
+    )
+
+
+def get_progress_keyboard(broadcast_id: int):
+    """Кнопка остановки рассылки"""
+    builder = InlineKeyboardBuilder()
+    builder.button(text="⏹ Остановить", callback_data=f"broadcast_cancel:{broadcast_id}")
+    return builder.as_markup()
+
+
+async def _update_progress(bot: Bot, broadcast: Dict, sent: int, failed: int, blocked: int, status: str):
+    """Обновить сообщение с прогрессом у администратора"""
+    if not broadcast['progress_chat_id']:
+        return
+    try:
+        await bot.edit_message_text(
+            format_progress(broadcast, sent, failed, blocked, status),
+            chat_id=broadcast['progress_chat_id'],
+            message_id=broadcast['progress_message_id'],
+            reply_markup=get_progress_keyboard(broadcast['id']) if status == 'running' else None
+        )
+    except TelegramAPIError:
+        pass
+
+
+async def _run_broadcast(bot: Bot, broadcast_id: int):
+    """Рассылка: читает получателей порциями и отправляет через лимитер.
+
+    Прогресс (курсор last_user_id и счётчики) сохраняется после каждой порции,
+    поэтому после перезапуска рассылка продолжается с места остановки.
+    """
+    broadcast = await crud.get_broadcast(broadcast_id)
+    limiter = RateLimiter(settings.BROADCAST_RATE)
+    loop = asyncio.get_running_loop()
+
+    last_user_id = broadcast['last_user_id']
+    sent = broadcast['sent_count']
+    failed = broadcast['failed_count']
+    blocked = broadcast['blocked_count']
+    last_report = 0.0
+
+    async def deliver(recipient: Dict) -> str:
+        result = await send_with_retry(
+            limiter,
+            lambda: bot.send_message(recipient['telegram_id'], broadcast['text'])
+        )
+        if result == BLOCKED:
+            await crud.set_user_active(recipient['id'], False)
+        return result
+
+    while True:
+        recipients = await crud.get_broadcast_recipients(
+            broadcast['filters'], last_user_id, settings.BROADCAST_BATCH_SIZE
+        )
+        if not recipients:
+            break
+
+        results = await asyncio.gather(*(deliver(recipient) for recipient in recipients))
+        sent += results.count(SENT)
+        blocked += results.count(BLOCKED)
+        failed += len(results) - results.count(SENT) - results.count(BLOCKED)
+        last_user_id = recipients[-1]['id']
+
+        await crud.update_broadcast_progress(broadcast_id, last_user_id, sent, failed, blocked)
+
+        if loop.time() - last_report >= settings.BROADCAST_PROGRESS_INTERVAL:
+            last_report = loop.time()
+            await _update_progress(bot, broadcast, sent, failed, blocked, 'running')
+
+    await crud.set_broadcast_status(broadcast_id, 'done')
+    await _update_progress(bot, broadcast, sent, failed, blocked, 'done')
+    await crud.create_log(
+        broadcast['admin_id'], 'broadcast_done',
+        {'broadcast_id': broadcast_id, 'sent': sent, 'blocked': blocked, 'failed': failed}
+    )
+
+
+def start_broadcast(bot: Bot, broadcast_id: int):
+    """Запустить рассылку в фоне"""
+    if broadcast_id in _tasks:
+        return
+    task = asyncio.create_task(_run_broadcast(bot, broadcast_id))
+    _tasks[broadcast_id] = task
+
+    def _done(t: asyncio.Task):
+        _tasks.pop(broadcast_id, None)
+        if not t.cancelled() and t.exception():
+            logger.error(f"Рассылка #{broadcast_id} завершилась с ошибкой", exc_info=t.exception())
+
+    task.add_done_callback(_done)
+
+
+async def cancel_broadcast(bot: Bot, broadcast_id: int):
+    """Остановить рассылку"""
+    task = _tasks.pop(broadcast_id, None)
+    if task:
+        task.cancel()
+
+    broadcast = await crud.get_broadcast(broadcast_id)
+    if not broadcast or broadcast['status'] != 'running':
+        return
+    await crud.set_broadcast_status(broadcast_id, 'cancelled')
+    await _update_progress(
+        bot, broadcast, broadcast['sent_count'], broadcast['failed_count'],
+        broadcast['blocked_count'], 'cancelled'
+    )
+
+
+async def resume_broadcasts(bot: Bot):
+    """Продолжить рассылки, прерванные перезапуском бота"""
+    for broadcast_id in await crud.get_running_broadcast_ids():
+        logger.info(f"Возобновление рассылки #{broadcast_id}")
+        start_broadcast(bot, broadcast_id)
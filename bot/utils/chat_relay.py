@@ -0,0 +1,248 @@
+"""Переписка партнёров через бота: пересылка сообщений между сторонами матча.
+
+У пользователя открыт не больше одного чата — указатель telegram_id -> match_id
+(таблица relay_conversations, рабочая копия в памяти). Всё, что он пишет
+боту вне других сценариев, уходит второй стороне матча через copyMessages:
+файлы не скачиваются и не загружаются заново, а подряд идущие сообщения
+(в том числе альбом) пересылаются одним запросом с сохранением группировки.
+
+Порядок: у каждого отправителя своя очередь и один обработчик, пачка
+сортируется по message_id. Вызовы Bot API идут через общий RateLimiter;
+ответ 429 приостанавливает отправку на retry_after, после чего повторяется
+та же пачка, поэтому порядок сообщений не нарушается.
+
+Стороны матча (маршруты) кэшируются в памяти; журнал пересланных сообщений
+пишется в match_messages через буфер отложенной записи.
+"""
+import asyncio
+import logging
+from collections import OrderedDict
+from itertools import groupby
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramForbiddenError, TelegramRetryAfter
+from aiogram.types import Message
+
+from config.config import settings
+from database import crud
+from bot.keyboards.relay import get_relay_open_keyboard
+from bot.utils.news_feed import clip
+from bot.utils.sender import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Лимит copyMessages на один запрос
+COPY_LIMIT = 100
+
+
+class Side(NamedTuple):
+    org_id: int
+    org_name: str
+    partner_chat_id: int
+
+
+class Route(NamedTuple):
+    match_id: int
+    sides: Dict[int, Side]  # telegram_id отправителя -> его сторона
+
+
+class ChatRelay:
+    """Открытые чаты, кэш маршрутов и очереди пересылки по отправителям"""
+
+    def __init__(self, rate: float, route_cache_size: int, idle_timeout: float,
+                 album_wait: float, header_gap: float, attempts: int):
+        self.route_cache_size = route_cache_size
+        self.idle_timeout = idle_timeout
+        self.album_wait = album_wait
+        self.header_gap = header_gap
+        self.attempts = attempts
+        self._limiter = RateLimiter(rate)
+        self._conversations: Dict[int, int] = {}
+        self._routes: "OrderedDict[int, Route]" = OrderedDict()
+        self._queues: Dict[int, asyncio.Queue] = {}
+        self._workers: Dict[int, asyncio.Task] = {}
+        # Получатель -> (матч, время) последней пересылки: по ним решается, нужен ли заголовок
+        self._last_delivery: Dict[int, Tuple[int, float]] = {}
+
+    async def load(self):
+        """Прочитать открытые чаты из базы"""
+        self._conversations = await crud.get_relay_conversations()
+
+    def conversation(self, telegram_id: int) -> Optional[int]:
+        """match_id открытого чата пользователя"""
+        return self._conversations.get(telegram_id)
+
+    async def route(self, match_id: int) -> Optional[Route]:
+        """Стороны активного матча; None, если матча нет или он неактивен"""
+        route = self._routes.get(match_id)
+        if route is not None:
+            self._routes.move_to_end(match_id)
+            return route
+
+        row = await crud.get_match_route(match_id)
+        if not row or not row['is_active']:
+            return None
+        route = Route(match_id, {
+            row['chat1_id']: Side(row['org1_id'], row['org1_name'], row['chat2_id']),
+            row['chat2_id']: Side(row['org2_id'], row['org2_name'], row['chat1_id']),
+        })
+        self._routes[match_id] = route
+        while len(self._routes) > self.route_cache_size:
+            self._routes.popitem(last=False)
+        return route
+
+    async def open(self, telegram_id: int, match_id: int) -> Optional[Side]:
+        """Открыть пользователю чат по матчу; None, если он не сторона активного матча.
+
+        Возвращает сторону собеседника.
+        """
+        route = await self.route(match_id)
+        if route is None or telegram_id not in route.sides:
+            return None
+        self._conversations[telegram_id] = match_id
+        await crud.set_relay_conversation(telegram_id, match_id)
+        return route.sides[route.sides[telegram_id].partner_chat_id]
+
+    async def close(self, telegram_id: int) -> bool:
+        """Закрыть чат пользователя; False, если открытого чата не было"""
+        if self._conversations.pop(telegram_id, None) is None:
+            return False
+        await crud.set_relay_conversation(telegram_id, None)
+        return True
+
+    def submit(self, bot: Bot, message: Message) -> bool:
+        """Поставить сообщение в очередь пересылки; False, если чат не открыт.
+
+        Вызывается без ожиданий до постановки в очередь, чтобы сообщения
+        отправителя попадали в неё в порядке обработки.
+        """
+        telegram_id = message.chat.id
+        match_id = self._conversations.get(telegram_id)
+        if match_id is None:
+            return False
+        queue = self._queues.get(telegram_id)
+        if queue is None:
+            queue = self._queues[telegram_id] = asyncio.Queue()
+            self._workers[telegram_id] = asyncio.create_task(self._work(bot, telegram_id, queue))
+        queue.put_nowait((match_id, message))
+        return True
+
+    async def stop(self, timeout: float = 10):
+        """Дождаться пересылки поставленного в очередь и остановить обработчики"""
+        workers = list(self._workers.values())
+        if not workers:
+            return
+        try:
+            await asyncio.wait_for(asyncio.gather(*(queue.join() for queue in self._queues.values())), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Не все сообщения чатов успели переслаться до остановки")
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _work(self, bot: Bot, telegram_id: int, queue: asyncio.Queue):
+        """Обработчик очереди одного отправителя; завершается после idle_timeout без сообщений"""
+        while True:
+            try:
+                first = await asyncio.wait_for(queue.get(), self.idle_timeout)
+            except asyncio.TimeoutError:
+                if queue.empty():
+                    del self._queues[telegram_id]
+                    del self._workers[telegram_id]
+                    return
+                continue
+
+            batch = [first]
+            while True:
+                while not queue.empty():
+                    batch.append(queue.get_nowait())
+                # Остальные сообщения альбома приходят отдельными апдейтами следом
+                if not batch[-1][1].media_group_id:
+                    break
+                await asyncio.sleep(self.album_wait)
+                if queue.empty():
+                    break
+
+            try:
+                # Пользователь мог переключить чат посреди серии — шлём по матчам в исходном порядке
+                for match_id, items in groupby(batch, key=lambda item: item[0]):
+                    messages = sorted((message for _, message in items), key=lambda message: message.message_id)
+                    await self._deliver(bot, telegram_id, match_id, messages)
+            except Exception:
+                logger.exception(f"Не удалось переслать {len(batch)} сообщений от {telegram_id}")
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def _deliver(self, bot: Bot, telegram_id: int, match_id: int, messages: List[Message]):
+        route = await self.route(match_id)
+        if route is None or telegram_id not in route.sides:
+            await self.close(telegram_id)
+            await self._notify(bot, telegram_id, "Чат с этим партнёром больше недоступен, сообщения не отправлены.")
+            return
+
+        side = route.sides[telegram_id]
+        partner_chat_id = side.partner_chat_id
+        loop = asyncio.get_running_loop()
+        try:
+            last = self._last_delivery.get(partner_chat_id)
+            if last is None or last[0] != match_id or loop.time() - last[1] > self.header_gap:
+                await self._call(lambda: bot.send_message(
+                    partner_chat_id,
+                    f"💬 <b>{clip(side.org_name, 100)}</b>",
+                    reply_markup=get_relay_open_keyboard(match_id, "↩️ Ответить")
+                ))
+
+            rows = []
+            for start in range(0, len(messages), COPY_LIMIT):
+                ids = [message.message_id for message in messages[start:start + COPY_LIMIT]]
+                copied = await self._call(lambda: bot.copy_messages(partner_chat_id, telegram_id, ids))
+                if copied is None:
+                    await self._notify(bot, telegram_id, "Не удалось переслать часть сообщений, попробуйте позже.")
+                    break
+                # Сообщения, которые нельзя скопировать (служебные), Telegram пропускает
+                relayed = [item.message_id for item in copied] if len(copied) == len(ids) else [None] * len(ids)
+                rows.extend((match_id, side.org_id, source, target) for source, target in zip(ids, relayed))
+        except TelegramForbiddenError:
+            await self._notify(bot, telegram_id, "Партнёр ограничил сообщения от бота — пересылка невозможна.")
+            return
+
+        self._last_delivery[partner_chat_id] = (match_id, loop.time())
+        if rows:
+            await crud.log_match_messages(rows)
+
+    async def _call(self, send: Callable[[], Awaitable]):
+        """Вызов Bot API через лимитер с ожиданием при flood control.
+
+        Возвращает результат или None после attempts неудачных попыток;
+        TelegramForbiddenError пробрасывается.
+        """
+        for _ in range(self.attempts):
+            await self._limiter.wait()
+            try:
+                return await send()
+            except TelegramRetryAfter as e:
+                self._limiter.pause(e.retry_after)
+            except TelegramForbiddenError:
+                raise
+            except TelegramAPIError as e:
+                logger.warning(f"Ошибка пересылки: {e}")
+                return None
+        return None
+
+    async def _notify(self, bot: Bot, telegram_id: int, text: str):
+        try:
+            await bot.send_message(telegram_id, text)
+        except TelegramAPIError:
+            pass
+
+
+chat_relay = ChatRelay(
+    rate=settings.RELAY_RATE,
+    route_cache_size=settings.RELAY_ROUTE_CACHE_SIZE,
+    idle_timeout=settings.RELAY_IDLE_TIMEOUT,
+    album_wait=settings.RELAY_ALBUM_WAIT_MS / 1000,
+    header_gap=settings.RELAY_HEADER_GAP,
+    attempts=settings.RELAY_RETRY_ATTEMPTS,
+)
@@ -0,0 +1,169 @@
+"""Справочник городов России для шага «Город» в регистрации.
+
+Города из bot/utils/data/cities.csv (id;name;region;population;aliases)
+загружаются при старте в префиксное дерево по нормализованным названиям и
+синонимам («г. Москва», «мск», «Moskva» → Москва). В каждом узле заранее
+сохранены SUGGEST_LIMIT самых крупных городов поддерева, поэтому и точный
+поиск, и подсказки по началу названия занимают O(len(text)).
+Id города — стабильный ключ, он хранится в organizations.city_id.
+"""
+import csv
+import logging
+import os
+import re
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from config.config import settings
+
+logger = logging.getLogger(__name__)
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "data", "cities.csv")
+
+SUGGEST_LIMIT = 6
+
+_PREFIX_RE = re.compile(r"^(?:г|гор|город)\.?\s+|^г\.")
+_SEPARATOR_RE = re.compile(r"[\s\-–—_.,]+")
+_LATIN_RE = re.compile(r"[a-z]")
+
+# Латиница → кириллица для названий, набранных транслитом
+_TRANSLIT = [
+    ("shch", "щ"), ("sch", "щ"), ("zh", "ж"), ("kh", "х"), ("ts", "ц"), ("ch", "ч"),
+    ("sh", "ш"), ("yu", "ю"), ("ya", "я"), ("yo", "е"), ("ye", "е"), ("iy", "ий"),
+    ("a", "а"), ("b", "б"), ("c", "к"), ("d", "д"), ("e", "е"), ("f", "ф"), ("g", "г"),
+    ("h", "х"), ("i", "и"), ("j", "й"), ("k", "к"), ("l", "л"), ("m", "м"), ("n", "н"),
+    ("o", "о"), ("p", "п"), ("q", "к"), ("r", "р"), ("s", "с"), ("t", "т"), ("u", "у"),
+    ("v", "в"), ("w", "в"), ("x", "кс"), ("y", "ы"), ("z", "з"),
+]
+_TRANSLIT_RE = re.compile("|".join(latin for latin, _ in _TRANSLIT))
+_TRANSLIT_MAP = dict(_TRANSLIT)
+
+
+class City(NamedTuple):
+    id: int
+    name: str
+    region: str
+    population: int
+
+
+class _Node:
+    __slots__ = ("children", "city_id", "top")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.city_id: Optional[int] = None
+        self.top: Tuple[int, ...] = ()
+
+
+def normalize_city(text: str) -> str:
+    """Ключ поиска: нижний регистр, ё → е, без «г.», дефисы и точки → пробел"""
+    text = (text or "").strip().casefold().replace("ё", "е")
+    text = _PREFIX_RE.sub("", text)
+    text = _SEPARATOR_RE.sub(" ", text).strip()
+    if _LATIN_RE.search(text):
+        text = _TRANSLIT_RE.sub(lambda m: _TRANSLIT_MAP[m.group(0)], text)
+    return text
+
+
+class CityIndex:
+    """Префиксное дерево названий и синонимов городов"""
+
+    def __init__(self, cities: List[City], aliases: Dict[int, List[str]]):
+        self._root = _Node()
+        self._cities: Dict[int, City] = {city.id: city for city in cities}
+        for city in cities:
+            for key in {normalize_city(city.name), *(normalize_city(a) for a in aliases.get(city.id, []))}:
+                if key:
+                    self._insert(key).city_id = city.id
+        self._fill_top(self._root)
+
+    @property
+    def size(self) -> int:
+        return len(self._cities)
+
+    @classmethod
+    def load(cls, path: str = DATA_PATH) -> "CityIndex":
+        """Загрузить справочник из CSV"""
+        cities = []
+        aliases = {}
+        with open(path, encoding="utf-8", newline="") as f:
+            reader = csv.reader(f, delimiter=";")
+            next(reader, None)
+            for row in reader:
+                if not row:
+                    continue
+                city = City(int(row[0]), row[1], row[2], int(row[3]))
+                cities.append(city)
+                aliases[city.id] = [alias for alias in row[4].split("|") if alias]
+        return cls(cities, aliases)
+
+    def _insert(self, key: str) -> _Node:
+        node = self._root
+        for ch in key:
+            child = node.children.get(ch)
+            if child is None:
+                child = node.children[ch] = _Node()
+            node = child
+        return node
+
+    def _fill_top(self, node: _Node) -> Tuple[int, ...]:
+        # Лучшие города поддерева — среди лучших городов поддеревьев детей
+        ids = {node.city_id} if node.city_id is not None else set()
+        for child in node.children.values():
+            ids.update(self._fill_top(child))
+        node.top = tuple(sorted(ids, key=lambda i: -self._cities[i].population)[:SUGGEST_LIMIT])
+        return node.top
+
+    def _walk(self, key: str) -> Tuple[Optional[_Node], int]:
+        """Узел для key и длина совпавшего префикса"""
+        node = self._root
+        for depth, ch in enumerate(key):
+            child = node.children.get(ch)
+            if child is None:
+                return None, depth
+            node = child
+        return node, len(key)
+
+    def get(self, city_id: Optional[int]) -> Optional[City]:
+        return self._cities.get(city_id)
+
+    def lookup(self, text: str) -> Optional[City]:
+        """Город по точному названию или синониму"""
+        node, _ = self._walk(normalize_city(text))
+        if node is None or node.city_id is None:
+            return None
+        return self._cities[node.city_id]
+
+    def suggest(self, text: str, limit: int = SUGGEST_LIMIT) -> List[City]:
+        """Крупнейшие города, название которых начинается с text.
+
+        Если такого начала нет (опечатка, транслит), подсказки строятся по
+        самому длинному совпавшему префиксу, но не короче трёх символов.
+        """
+        key = normalize_city(text)
+        if not key:
+            return []
+        node, depth = self._walk(key)
+        if node is None:
+            if depth < 3:
+                return []
+            node, _ = self._walk(key[:depth])
+        return [self._cities[city_id] for city_id in node.top[:limit]]
+
+
+def _load_index() -> CityIndex:
+    started = time.perf_counter()
+    index = CityIndex.load()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if elapsed_ms > settings.CITIES_LOAD_BUDGET_MS:
+        logger.warning(
+            f"Справочник городов загружался {elapsed_ms:.1f} мс "
+            f"(бюджет {settings.CITIES_LOAD_BUDGET_MS} мс)"
+        )
+    else:
+        logger.info(f"Справочник городов: {index.size} городов за {elapsed_ms:.1f} мс")
+    return index
+
+
+# Загружается один раз при импорте (старте бота)
+city_index = _load_index()
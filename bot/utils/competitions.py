@@ -0,0 +1,118 @@
+"""Дедлайны конкурсов: разбор даты, снятие с публикации и напоминания.
+
+Для каждого активного конкурса с дедлайном в планировщике две задачи:
+напоминание подписчикам за COMPETITION_REMINDER_DAYS дней и снятие
+конкурса в момент дедлайна. Задачи ставятся при создании конкурса и
+заново при старте бота по индексу idx_resources_deadline. Перед
+выполнением задача перечитывает конкурс, поэтому удалённый или
+перенесённый конкурс обрабатывается корректно.
+"""
+import html
+import logging
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from aiogram import Bot
+
+from config.config import settings
+from database import crud
+from bot.utils.scheduler import scheduler
+from bot.utils.sender import RateLimiter, send_with_retry, SENT
+
+logger = logging.getLogger(__name__)
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Дедлайны вводятся по местному времени бота
+LOCAL_TZ = timezone(timedelta(hours=settings.TIMEZONE_OFFSET_HOURS))
+
+# Общий для всех напоминаний: несколько конкурсов с одним дедлайном не превышают лимит вместе
+_limiter = RateLimiter(settings.BROADCAST_RATE)
+
+_DATE_RE = re.compile(
+    r"^\s*(?:(?P<y1>\d{4})-(?P<m1>\d{1,2})-(?P<d1>\d{1,2})"
+    r"|(?P<d2>\d{1,2})[./](?P<m2>\d{1,2})[./](?P<y2>\d{2}|\d{4}))"
+    r"(?:[\sT,]+(?P<hh>\d{1,2})[:.](?P<mm>\d{2}))?\s*$"
+)
+
+
+def parse_deadline(text: str) -> Optional[str]:
+    """Дедлайн в UTC («YYYY-MM-DD HH:MM:SS») из «2025-12-31», «31.12.2025 18:00» и т.п.
+
+    Дата без времени означает конец дня по местному времени. None, если
+    текст не похож на дату.
+    """
+    match = _DATE_RE.match(text or "")
+    if not match:
+        return None
+    year = int(match["y1"] or match["y2"])
+    if year < 100:
+        year += 2000
+    month = int(match["m1"] or match["m2"])
+    day = int(match["d1"] or match["d2"])
+    try:
+        if match["hh"] is not None:
+            local = datetime(year, month, day, int(match["hh"]), int(match["mm"]), tzinfo=LOCAL_TZ)
+        else:
+            local = datetime(year, month, day, 23, 59, 59, tzinfo=LOCAL_TZ)
+    except ValueError:
+        return None
+    return local.astimezone(timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+
+def _timestamp(deadline_at: str) -> float:
+    return datetime.strptime(deadline_at, TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc).timestamp()
+
+
+def schedule_competition(bot: Bot, competition: Dict):
+    """Поставить задачи конкурса (id, deadline_at, reminded_at) в планировщик"""
+    resource_id = competition['id']
+    deadline_at = competition['deadline_at']
+    deadline = _timestamp(deadline_at)
+
+    scheduler.schedule(('expire', resource_id), deadline, lambda: _expire(resource_id, deadline_at))
+    if not competition.get('reminded_at'):
+        remind_at = deadline - settings.COMPETITION_REMINDER_DAYS * 86400
+        scheduler.schedule(('remind', resource_id), remind_at, lambda: _remind(bot, resource_id, deadline_at))
+
+
+async def load_competition_jobs(bot: Bot) -> int:
+    """Поставить задачи всех активных конкурсов с дедлайном (при старте)"""
+    competitions = await crud.get_active_deadlines()
+    for competition in competitions:
+        schedule_competition(bot, competition)
+    return len(competitions)
+
+
+async def _current(resource_id: int, deadline_at: str) -> Optional[Dict]:
+    """Конкурс, если он ещё активен и дедлайн не переносили"""
+    resource = await crud.get_resource_by_id(resource_id)
+    if not resource or not resource['is_active'] or resource['deadline_at'] != deadline_at:
+        return None
+    return resource
+
+
+async def _expire(resource_id: int, deadline_at: str):
+    if await _current(resource_id, deadline_at) is None:
+        return
+    await crud.delete_resource(resource_id)
+    logger.info(f"Конкурс {resource_id} снят с публикации: дедлайн {deadline_at} UTC")
+
+
+async def _remind(bot: Bot, resource_id: int, deadline_at: str):
+    competition = await _current(resource_id, deadline_at)
+    if competition is None or competition['reminded_at']:
+        return
+
+    deadline_text = (competition['additional_data'] or {}).get('deadline') or deadline_at
+    text = (
+        f"⏰ Скоро дедлайн конкурса <b>{html.escape(competition['title'], quote=False)}</b>\n\n"
+        f"📅 Дедлайн: {html.escape(str(deadline_text), quote=False)}"
+    )
+    sent = 0
+    for telegram_id in await crud.get_reminder_recipients(resource_id):
+        result = await send_with_retry(_limiter, lambda: bot.send_message(telegram_id, text))
+        sent += result == SENT
+    await crud.mark_resource_reminded(resource_id)
+    logger.info(f"Напоминание о конкурсе {resource_id} отправлено {sent} подписчикам")
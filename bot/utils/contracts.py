@@ -0,0 +1,255 @@
+"""PDF договоров: шаблоны по типу договора, рендер в пуле процессов, file_id.
+
+Шаблон — список блоков (стиль, текст с полями {name}). В каждом процессе
+пула шаблоны компилируются один раз (_compiled): стили reportlab
+создаются заранее, а тексты превращаются в готовые к format_map строки.
+Вёрстка PDF — чистая работа CPU, поэтому она идёт в ProcessPoolExecutor
+и не держит цикл событий.
+
+Шрифт с кириллицей обязателен: DejaVu Serif лежит в bot/utils/data/fonts,
+а без подходящего шрифта вёрстка падает, а не выдаёт PDF из пустых
+квадратов. Готовый PDF загружается в Telegram один раз; полученный file_id хранится в
+contracts.file_id, и все повторные отправки (партнёру, из «Документов»)
+идут по нему без новой вёрстки и загрузки.
+"""
+import asyncio
+import io
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from aiogram import Bot
+from aiogram.types import BufferedInputFile
+from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_RIGHT
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import mm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import Paragraph, SimpleDocTemplate
+
+from config.config import settings
+from database import crud
+
+logger = logging.getLogger(__name__)
+
+BUNDLED_FONTS = (
+    os.path.join(os.path.dirname(__file__), "data", "fonts", "DejaVuSerif.ttf"),
+    os.path.join(os.path.dirname(__file__), "data", "fonts", "DejaVuSerif-Bold.ttf"),
+)
+
+CONTRACT_TYPES = {
+    'partnership': "Договор о партнёрстве",
+    'cooperation': "Договор о сотрудничестве",
+    'services': "Договор о предоставлении услуг",
+}
+
+_HEADER = [
+    ("title", "{type_title} № {number}"),
+    ("meta", "г. {city}&nbsp;&nbsp;&nbsp;&nbsp;{date}"),
+    ("body", "{creator_name} ({creator_legal_form}, ИНН {creator_inn}), именуемая в дальнейшем "
+             "«Сторона 1», и {recipient_name} ({recipient_legal_form}, ИНН {recipient_inn}), "
+             "именуемая в дальнейшем «Сторона 2», заключили настоящий договор о нижеследующем."),
+]
+
+_FOOTER = [
+    ("heading", "Срок действия и порядок расторжения"),
+    ("body", "Договор вступает в силу с даты подписания и действует до исполнения Сторонами "
+             "обязательств. Каждая Сторона вправе расторгнуть договор, письменно уведомив другую "
+             "Сторону не позднее чем за 30 календарных дней."),
+    ("heading", "Реквизиты и подписи Сторон"),
+    ("body", "<b>Сторона 1:</b> {creator_name}, ИНН {creator_inn}, тел. {creator_phone}, {creator_email}"),
+    ("body", "<b>Сторона 2:</b> {recipient_name}, ИНН {recipient_inn}, тел. {recipient_phone}, {recipient_email}"),
+    ("sign", "Сторона 1 ____________________&nbsp;&nbsp;&nbsp;&nbsp;Сторона 2 ____________________"),
+]
+
+TEMPLATES: Dict[str, List[Tuple[str, str]]] = {
+    'partnership': _HEADER + [
+        ("heading", "1. Предмет договора"),
+        ("body", "Стороны объединяют усилия для достижения общих целей: совместного продвижения, "
+                 "обмена ресурсами и реализации совместных проектов на условиях настоящего договора."),
+        ("heading", "2. Условия партнёрства"),
+        ("body", "{details}"),
+        ("heading", "3. Обязательства Сторон"),
+        ("body", "Стороны добросовестно исполняют принятые на себя обязательства, своевременно "
+                 "информируют друг друга об изменениях и не разглашают конфиденциальную информацию."),
+    ] + _FOOTER,
+    'cooperation': _HEADER + [
+        ("heading", "1. Предмет договора"),
+        ("body", "Стороны сотрудничают в сферах, представляющих взаимный интерес, на условиях, "
+                 "изложенных в настоящем договоре."),
+        ("heading", "2. Условия сотрудничества"),
+        ("body", "{details}"),
+        ("heading", "3. Порядок взаимодействия"),
+        ("body", "Стороны согласуют совместные действия в рабочем порядке и назначают "
+                 "ответственных за взаимодействие лиц."),
+    ] + _FOOTER,
+    'services': _HEADER + [
+        ("heading", "1. Предмет договора"),
+        ("body", "Сторона 1 оказывает Стороне 2 услуги, а Сторона 2 принимает и оплачивает их "
+                 "в порядке и на условиях настоящего договора."),
+        ("heading", "2. Состав, стоимость и сроки услуг"),
+        ("body", "{details}"),
+        ("heading", "3. Порядок приёмки"),
+        ("body", "Услуги считаются оказанными после подписания Сторонами акта. Мотивированные "
+                 "возражения направляются в течение 5 рабочих дней."),
+    ] + _FOOTER,
+}
+
+
+def contract_context(contract: Dict) -> Dict[str, str]:
+    """Поля шаблона из договора и снимка реквизитов сторон в contract_data"""
+    data = contract['contract_data']
+    context = {
+        'number': str(contract['id']),
+        'type_title': CONTRACT_TYPES.get(data.get('type'), "Договор").upper(),
+        'city': (data.get('creator') or {}).get('city') or "—",
+        'date': (contract.get('created_at') or "")[:10],
+        'details': data.get('details') or "",
+    }
+    for side in ('creator', 'recipient'):
+        party = data.get(side) or {}
+        for field in ('name', 'legal_form', 'inn', 'phone', 'email'):
+            context[f"{side}_{field}"] = party.get(field) or "—"
+    # Значения подставляются в разметку Paragraph — экранируем, переносы строк сохраняем
+    return {key: escape(value).replace("\n", "<br/>") for key, value in context.items()}
+
+
+def party_snapshot(org: Dict) -> Dict[str, str]:
+    """Реквизиты организации на момент создания договора"""
+    return {
+        'name': org['name'],
+        'legal_form': org['legal_form'],
+        'inn': org['inn'],
+        'phone': org['phone'],
+        'email': org['email'],
+        'city': org['city'],
+    }
+
+
+class ContractFontError(RuntimeError):
+    """Нет TTF-шрифта с кириллицей — договор сверстать нельзя"""
+
+
+def _has_cyrillic(font: TTFont) -> bool:
+    return all(ord(ch) in font.face.charToGlyph for ch in "АЯаяЁё№")
+
+
+def find_fonts() -> Tuple[TTFont, TTFont]:
+    """Первая пара шрифтов с кириллицей: из CONTRACT_FONT_PATHS, затем встроенная DejaVu"""
+    for regular, bold in [*settings.CONTRACT_FONT_PATHS, BUNDLED_FONTS]:
+        if not (os.path.exists(regular) and os.path.exists(bold)):
+            continue
+        fonts = TTFont("ContractFont", regular), TTFont("ContractFont-Bold", bold)
+        if all(map(_has_cyrillic, fonts)):
+            return fonts
+        logger.warning(f"В шрифте {regular} нет кириллицы, пропускаем")
+    raise ContractFontError("Не найден TTF-шрифт с кириллицей (CONTRACT_FONT_PATHS, bot/utils/data/fonts)")
+
+
+# ---------- Код, выполняемый в процессах пула ----------
+
+@lru_cache(maxsize=None)
+def _fonts() -> Tuple[str, str]:
+    """Зарегистрировать шрифт договоров в процессе; ContractFontError, если его нет"""
+    regular, bold = find_fonts()
+    pdfmetrics.registerFont(regular)
+    pdfmetrics.registerFont(bold)
+    return regular.fontName, bold.fontName
+
+
+@lru_cache(maxsize=None)
+def _compiled(contract_type: str):
+    """Стили и блоки шаблона, готовые к подстановке (один раз на процесс)"""
+    font, bold = _fonts()
+    styles = {
+        'title': ParagraphStyle("title", fontName=bold, fontSize=14, leading=18, alignment=TA_CENTER, spaceAfter=8),
+        'meta': ParagraphStyle("meta", fontName=font, fontSize=10, leading=14, alignment=TA_RIGHT, spaceAfter=10),
+        'heading': ParagraphStyle("heading", fontName=bold, fontSize=11, leading=15, spaceBefore=8, spaceAfter=4),
+        'body': ParagraphStyle("body", fontName=font, fontSize=10, leading=14, alignment=TA_JUSTIFY, spaceAfter=4),
+        'sign': ParagraphStyle("sign", fontName=font, fontSize=10, leading=14, spaceBefore=24),
+    }
+    template = TEMPLATES.get(contract_type, TEMPLATES['cooperation'])
+    return [(styles[style], text) for style, text in template]
+
+
+def _warm_up():
+    """Инициализатор процесса пула: шрифты и все шаблоны заранее"""
+    for contract_type in TEMPLATES:
+        _compiled(contract_type)
+
+
+def render_contract_pdf(contract_type: str, context: Dict[str, str]) -> bytes:
+    """Сверстать PDF договора (выполняется в процессе пула)"""
+    buffer = io.BytesIO()
+    document = SimpleDocTemplate(
+        buffer, pagesize=A4, leftMargin=20 * mm, rightMargin=15 * mm, topMargin=20 * mm, bottomMargin=20 * mm,
+        title=f"Договор № {context['number']}",
+    )
+    document.build([Paragraph(text.format_map(context), style) for style, text in _compiled(contract_type)])
+    return buffer.getvalue()
+
+
+# ---------- Сторона бота ----------
+
+class ContractRenderer:
+    """Пул процессов вёрстки и отправка PDF договоров по file_id"""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._locks: Dict[int, asyncio.Lock] = {}
+
+    def start(self):
+        """Запустить процессы вёрстки.
+
+        spawn, а не fork: к этому моменту в процессе бота уже работают потоки
+        aiosqlite, а fork копирует их блокировки в неизвестном состоянии.
+        Без шрифта с кириллицей бот не стартует (ContractFontError).
+        """
+        find_fonts()
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"), initializer=_warm_up
+        )
+        # Процессы поднимаются по требованию — запускаем их сразу, а не на первом договоре
+        for _ in range(self.workers):
+            self._pool.submit(os.getpid)
+
+    def stop(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    async def render(self, contract: Dict) -> bytes:
+        """PDF договора; без запущенного пула вёрстка идёт в потоке"""
+        contract_type = contract['contract_data'].get('type')
+        context = contract_context(contract)
+        if self._pool is None:
+            return await asyncio.to_thread(render_contract_pdf, contract_type, context)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, render_contract_pdf, contract_type, context)
+
+    async def send(self, bot: Bot, chat_id: int, contract: Dict, caption: Optional[str] = None):
+        """Отправить PDF договора: по сохранённому file_id или сверстать и загрузить один раз"""
+        lock = self._locks.setdefault(contract['id'], asyncio.Lock())
+        async with lock:
+            # Пока ждали, договор мог загрузить параллельный вызов
+            file_id = contract.get('file_id') or (await crud.get_contract_by_id(contract['id']) or {}).get('file_id')
+            if file_id:
+                await bot.send_document(chat_id, file_id, caption=caption)
+                return
+            pdf = await self.render(contract)
+            message = await bot.send_document(
+                chat_id, BufferedInputFile(pdf, filename=f"contract_{contract['id']}.pdf"), caption=caption
+            )
+            await crud.set_contract_file_id(contract['id'], message.document.file_id)
+            contract['file_id'] = message.document.file_id
+        if not lock.locked():
+            self._locks.pop(contract['id'], None)
+
+
+contract_renderer = ContractRenderer(workers=settings.CONTRACT_PDF_WORKERS or os.cpu_count() or 1)
@@ -0,0 +1,175 @@
+"""Онлайн-проверка ИНН по ЕГРЮЛ/ЕГРИП.
+
+Запрос идёт в API, совместимый с DaData findById/party. Регистрацию он не
+задерживает дольше EGRUL_API_TIMEOUT: при ошибке или таймауте проверка
+просто пропускается. Ответы (включая «не найдено») кэшируются в SQLite,
+одновременные запросы одного ИНН объединяются, а при серии ошибок
+автомат-предохранитель на время перестаёт обращаться к сервису.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+import aiohttp
+
+from config.config import settings
+from database import crud
+from bot.utils.egrul_snapshot import EgrulRecord
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Предохранитель: после failures ошибок подряд пропускает вызовы reset_seconds секунд,
+    затем пропускает один пробный вызов"""
+
+    def __init__(self, failures: int, reset_seconds: float):
+        self.max_failures = failures
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probe = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._probe:
+            self._probe = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._probe = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probe = False
+        if self.opened_at is not None or self.failures >= self.max_failures:
+            if self.opened_at is None:
+                logger.warning("Сервис проверки ИНН отключён после серии ошибок")
+            self.opened_at = time.monotonic()
+
+
+class EgrulUnavailable(Exception):
+    """Сервис не ответил вовремя или вернул ошибку"""
+
+
+def parse_party(inn: str, payload: Dict) -> Optional[Dict]:
+    """Данные организации из ответа findById/party (None — не найдена)"""
+    suggestions = payload.get("suggestions") or []
+    if not suggestions:
+        return None
+    data = suggestions[0].get("data") or {}
+    name = data.get("name") or {}
+    opf = data.get("opf") or {}
+    state = data.get("state") or {}
+    return {
+        'inn': inn,
+        'name': name.get("short_with_opf") or suggestions[0].get("value") or "",
+        'legal_form': opf.get("full") or "",
+        'okved': data.get("okved") or "",
+        'liquidated': state.get("status") in ("LIQUIDATING", "LIQUIDATED", "BANKRUPT"),
+    }
+
+
+class EgrulClient:
+    """Клиент онлайн-проверки с общим пулом соединений"""
+
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.breaker = CircuitBreaker(settings.EGRUL_BREAKER_FAILURES, settings.EGRUL_BREAKER_RESET_SECONDS)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(settings.EGRUL_API_URL)
+
+    async def start(self):
+        if not self.enabled or self._session is not None:
+            return
+        headers = {"Content-Type": "application/json", "Accept": "application/json"}
+        if settings.EGRUL_API_TOKEN:
+            headers["Authorization"] = f"Token {settings.EGRUL_API_TOKEN}"
+        self._session = aiohttp.ClientSession(
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=settings.EGRUL_API_TIMEOUT),
+            connector=aiohttp.TCPConnector(limit=20, ttl_dns_cache=300),
+        )
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def lookup(self, inn: str) -> Optional[EgrulRecord]:
+        """Данные по ИНН или None, если ИНН не найден либо сервис недоступен"""
+        if not self.enabled:
+            return None
+
+        try:
+            cached = await crud.get_egrul_cache(
+                inn, settings.EGRUL_CACHE_TTL_HOURS, settings.EGRUL_NEGATIVE_TTL_HOURS
+            )
+        except Exception:
+            logger.exception(f"Не удалось прочитать кэш проверки ИНН {inn}")
+            cached = None
+        if cached is not None:
+            return EgrulRecord(**cached['data']) if cached['data'] else None
+
+        future = self._inflight.get(inn)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch_and_cache(inn))
+            self._inflight[inn] = future
+            future.add_done_callback(lambda f: self._forget(inn, f))
+        try:
+            # shield: отмена одного ожидающего не отменяет запрос для остальных
+            data = await asyncio.shield(future)
+        except EgrulUnavailable:
+            return None
+        return EgrulRecord(**data) if data else None
+
+    def _forget(self, inn: str, future: asyncio.Future):
+        self._inflight.pop(inn, None)
+        # Ошибку забираем здесь, даже если все ожидающие отменены
+        if not future.cancelled():
+            future.exception()
+
+    async def _fetch_and_cache(self, inn: str) -> Optional[Dict]:
+        data = await self._fetch(inn)
+        try:
+            await crud.set_egrul_cache(inn, data)
+        except Exception:
+            # Ответ сервиса уже есть — без кэша он просто запросится заново в следующий раз
+            logger.exception(f"Не удалось сохранить проверку ИНН {inn} в кэш")
+        return data
+
+    async def _fetch(self, inn: str) -> Optional[Dict]:
+        if self._session is None or not self.breaker.allow():
+            raise EgrulUnavailable()
+        try:
+            async with self._session.post(settings.EGRUL_API_URL, json={"query": inn}) as response:
+                if response.status >= 500 or response.status == 429:
+                    raise EgrulUnavailable(f"HTTP {response.status}")
+                response.raise_for_status()
+                payload = await response.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, EgrulUnavailable) as e:
+            self.breaker.record_failure()
+            logger.warning(f"Проверка ИНН {inn} не удалась: {e!r}")
+            raise EgrulUnavailable() from e
+        self.breaker.record_success()
+        return parse_party(inn, payload)
+
+
+egrul_client = EgrulClient()
@@ -0,0 +1,220 @@
+"""Локальный снимок ЕГРЮЛ/ЕГРИП для проверки ИНН без обращения к сети.
+
+Снимок — файл с записями фиксированной длины, отсортированными по ИНН.
+Файл отображается в память (mmap) и ищется двоичным поиском: в память
+попадают только прочитанные страницы, поиск по десяткам миллионов
+записей занимает ~25 сравнений.
+
+Конвертация выгрузки в снимок (CSV с колонками inn;name;legal_form;okved;liquidated):
+
+    python -m bot.utils.egrul_snapshot egrul.csv egrul.bin
+"""
+import argparse
+import csv
+import heapq
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import time
+from itertools import islice
+from typing import Iterator, List, NamedTuple, Optional
+
+from config.config import settings
+from bot.utils.inn import is_inn_format
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"EGRULv1\0"
+_HEADER = struct.Struct("<8sII")  # magic, размер записи, число записей
+_RECORD = struct.Struct("12s256s96s8s1s")  # inn, name, legal_form, okved, status
+_KEY_SIZE = 12
+
+
+class EgrulRecord(NamedTuple):
+    inn: str
+    name: str
+    legal_form: str
+    okved: str
+    liquidated: bool
+
+
+def _key(inn: str) -> bytes:
+    return inn.encode("ascii").ljust(_KEY_SIZE)
+
+
+def _fit(value: str, size: int) -> bytes:
+    """Обрезать UTF-8 строку до size байт, не разрывая символ"""
+    data = (value or "").strip().encode("utf-8")[:size]
+    return data.decode("utf-8", errors="ignore").encode("utf-8")
+
+
+def pack_record(inn: str, name: str, legal_form: str, okved: str, liquidated: bool) -> bytes:
+    """Запись снимка фиксированной длины"""
+    return _RECORD.pack(
+        _key(inn), _fit(name, 256), _fit(legal_form, 96),
+        _fit(okved, 8), b"L" if liquidated else b"A"
+    )
+
+
+def unpack_record(data: bytes) -> EgrulRecord:
+    inn, name, legal_form, okved, status = _RECORD.unpack(data)
+    return EgrulRecord(
+        inn.decode("ascii").strip(),
+        name.rstrip(b"\0").decode("utf-8"),
+        legal_form.rstrip(b"\0").decode("utf-8"),
+        okved.rstrip(b"\0").decode("ascii"),
+        status == b"L",
+    )
+
+
+class EgrulSnapshot:
+    """Снимок, открытый через mmap"""
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, record_size, count = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or record_size != _RECORD.size:
+            self.close()
+            raise ValueError(f"{path}: неизвестный формат снимка ЕГРЮЛ")
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def find(self, inn: str) -> Optional[EgrulRecord]:
+        """Двоичный поиск записи по ИНН"""
+        key = _key(inn)
+        mm, size, base = self._mm, _RECORD.size, _HEADER.size
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = base + mid * size
+            current = mm[offset:offset + _KEY_SIZE]
+            if current < key:
+                lo = mid + 1
+            elif current > key:
+                hi = mid
+            else:
+                return unpack_record(mm[offset:offset + size])
+        return None
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+
+_snapshot: Optional[EgrulSnapshot] = None
+_snapshot_checked = False
+
+
+def get_snapshot() -> Optional[EgrulSnapshot]:
+    """Снимок из настроек; None, если файл не скачан"""
+    global _snapshot, _snapshot_checked
+    if not _snapshot_checked:
+        _snapshot_checked = True
+        path = settings.EGRUL_SNAPSHOT_PATH
+        if path and os.path.exists(path):
+            try:
+                _snapshot = EgrulSnapshot(path)
+                logger.info(f"Снимок ЕГРЮЛ: {len(_snapshot)} записей")
+            except (OSError, ValueError):
+                logger.exception("Не удалось открыть снимок ЕГРЮЛ")
+    return _snapshot
+
+
+def lookup_inn(inn: str) -> Optional[EgrulRecord]:
+    """Найти ИНН в локальном снимке"""
+    snapshot = get_snapshot()
+    if snapshot is None:
+        return None
+    return snapshot.find(inn)
+
+
+# ========== КОНВЕРТАЦИЯ ==========
+
+def _read_source(path: str, delimiter: str) -> Iterator[bytes]:
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f, delimiter=delimiter):
+            inn = (row.get("inn") or "").strip()
+            if not is_inn_format(inn):
+                continue
+            liquidated = (row.get("liquidated") or "").strip() not in ("", "0", "false")
+            yield pack_record(inn, row.get("name"), row.get("legal_form"), row.get("okved"), liquidated)
+
+
+def _iter_run(path: str) -> Iterator[bytes]:
+    size = _RECORD.size
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(size)
+            if len(data) < size:
+                return
+            yield data
+
+
+def convert(source: str, target: str, delimiter: str = ";", chunk_size: int = 1_000_000) -> int:
+    """Собрать снимок из CSV внешней сортировкой.
+
+    Записи сортируются порциями по chunk_size во временные файлы и сливаются,
+    поэтому память не зависит от размера выгрузки. При повторе ИНН остаётся
+    последняя запись. Возвращает число записей.
+    """
+    runs: List[str] = []
+    tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(target)))
+    try:
+        records = _read_source(source, delimiter)
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+            # Стабильная сортировка сохраняет порядок выгрузки для одинаковых ИНН
+            chunk.sort(key=lambda r: r[:_KEY_SIZE])
+            run_path = os.path.join(tmp_dir, f"run{len(runs)}")
+            with open(run_path, "wb") as f:
+                f.writelines(chunk)
+            runs.append(run_path)
+
+        count = 0
+        tmp_target = target + ".tmp"
+        with open(tmp_target, "wb") as out:
+            out.write(_HEADER.pack(MAGIC, _RECORD.size, 0))
+            previous = None
+            merged = heapq.merge(*(_iter_run(p) for p in runs), key=lambda r: r[:_KEY_SIZE])
+            for record in merged:
+                if previous is not None and previous[:_KEY_SIZE] != record[:_KEY_SIZE]:
+                    out.write(previous)
+                    count += 1
+                previous = record
+            if previous is not None:
+                out.write(previous)
+                count += 1
+            out.seek(0)
+            out.write(_HEADER.pack(MAGIC, _RECORD.size, count))
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_target, target)
+        return count
+    finally:
+        for run_path in runs:
+            os.remove(run_path)
+        os.rmdir(tmp_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Конвертация выгрузки ЕГРЮЛ/ЕГРИП в снимок для бота")
+    parser.add_argument("source", help="CSV: inn;name;legal_form;okved;liquidated")
+    parser.add_argument("target", help="файл снимка (EGRUL_SNAPSHOT_PATH)")
+    parser.add_argument("--delimiter", default=";")
+    parser.add_argument("--chunk-size", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    count = convert(args.source, args.target, args.delimiter, args.chunk_size)
+    print(f"{count} записей за {time.perf_counter() - started:.1f} с -> {args.target}")
+
+
+if __name__ == "__main__":
+    main()
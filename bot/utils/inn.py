@@ -0,0 +1,32 @@
+"""Проверка контрольных чисел ИНН"""
+import re
+
+# Только ASCII-цифры: str.isdigit() пропускает «²», «٠» и другие цифры Юникода
+_INN_RE = re.compile(r"\d{10}|\d{12}", re.ASCII)
+
+_WEIGHTS_10 = (2, 4, 10, 3, 5, 9, 4, 6, 8)
+_WEIGHTS_11 = (7, 2, 4, 10, 3, 5, 9, 4, 6, 8)
+_WEIGHTS_12 = (3, 7, 2, 4, 10, 3, 5, 9, 4, 6, 8)
+
+
+def _control_digit(digits: str, weights: tuple) -> int:
+    return sum(int(d) * w for d, w in zip(digits, weights)) % 11 % 10
+
+
+def is_inn_format(inn: str) -> bool:
+    """10 или 12 цифр 0-9, без проверки контрольных чисел"""
+    return _INN_RE.fullmatch(inn) is not None
+
+
+def is_valid_inn(inn: str) -> bool:
+    """ИНН юрлица (10 цифр) или физлица/ИП (12 цифр) с верными контрольными числами"""
+    if not is_inn_format(inn):
+        return False
+    if len(inn) == 10:
+        return _control_digit(inn, _WEIGHTS_10) == int(inn[9])
+    if len(inn) == 12:
+        return (
+            _control_digit(inn, _WEIGHTS_11) == int(inn[10])
+            and _control_digit(inn, _WEIGHTS_12) == int(inn[11])
+        )
+    return False
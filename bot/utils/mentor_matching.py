@@ -0,0 +1,181 @@
+"""Подбор наставников под запрос организации.
+
+Экспертиза и опыт наставников разбиваются на нормализованные основы слов
+(screening.tokenize) и складываются в обратный индекс. Вес слова в анкете —
+tf-idf с нормировкой по длине анкеты, поэтому редкие специализации
+(«маркетплейсы») значат больше общих слов («бизнес»). Запрос — то, что нужно
+организации (need), её сфера и описание; потребности весят вдвое больше
+описания. Релевантность — сумма по словам запроса: вес в запросе × вес в анкете.
+
+Редкие слова хранятся списками (позиция наставника, вес). Частые — у них
+тысячи анкет — упакованы в одно большое целое: вес наставника i лежит в
+битах [64*i, 64*(i+1)). Сложение таких чисел складывает веса всех
+наставников разом на стороне C, поэтому точный подсчёт по 10k анкет
+занимает единицы миллисекунд. Веса хранятся целыми с точностью 1/SCALE.
+
+Индекс строится при первом подборе и перестраивается после изменения
+анкет (crud.mentors_revision). Занятость наставников (принятые заявки)
+хранится отдельно и обновляется обработчиками заявок без перестройки.
+"""
+import asyncio
+import heapq
+import math
+from array import array
+from collections import Counter, defaultdict
+from itertools import compress
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from database import crud
+from bot.utils.screening import tokenize
+
+# Слишком короткие основы («и», «по», «it» после стемминга) — шум
+MIN_TOKEN = 3
+NEED_WEIGHT = 2
+DESCRIPTION_WEIGHT = 1
+
+# Слова, встречающиеся чаще, чем у DENSE_DF наставников, хранятся упакованными
+DENSE_DF = 256
+SCALE = 1 << 16
+_FIELD_BYTES = 8
+
+
+class Mentor(NamedTuple):
+    id: int
+    user_id: int
+    name: str
+    expertise: str
+    experience: str
+    capacity: int
+
+
+def _terms(text: str) -> List[str]:
+    return [token for token in tokenize(text or "") if len(token) >= MIN_TOKEN]
+
+
+def org_query(org: Optional[Dict]) -> Dict[str, int]:
+    """Взвешенные основы запроса организации"""
+    if not org:
+        return {}
+    query: Dict[str, int] = defaultdict(int)
+    need = org.get('need') or {}
+    for term in _terms(" ".join(need.get('options', []))):
+        query[term] += NEED_WEIGHT
+    for term in _terms(f"{org.get('activity_field') or ''} {org.get('description') or ''}"):
+        query[term] += DESCRIPTION_WEIGHT
+    return query
+
+
+class MentorIndex:
+    """Обратный индекс анкет наставников"""
+
+    def __init__(self, mentors: List[Mentor], loads: Dict[int, int]):
+        self.mentors: Dict[int, Mentor] = {mentor.id: mentor for mentor in mentors}
+        self.loads = dict(loads)
+        self._ids = [mentor.id for mentor in mentors]
+        self._positions = {mentor_id: i for i, mentor_id in enumerate(self._ids)}
+        # 1 — у наставника есть свободное место
+        self._room = bytearray(self.has_room(mentor_id) for mentor_id in self._ids)
+
+        counts = [Counter(_terms(f"{mentor.expertise} {mentor.experience}")) for mentor in mentors]
+        df = Counter(term for terms in counts for term in terms)
+        total = max(len(mentors), 1)
+        idf = {term: math.log(1 + total / freq) for term, freq in df.items()}
+
+        postings = defaultdict(list)
+        for position, terms in enumerate(counts):
+            weights = {term: (1 + math.log(tf)) * idf[term] for term, tf in terms.items()}
+            norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+            for term, weight in weights.items():
+                postings[term].append((position, round(weight / norm * SCALE)))
+
+        self._sparse: Dict[str, List[Tuple[int, int]]] = {}
+        self._dense: Dict[str, int] = {}
+        for term, items in postings.items():
+            if len(items) <= DENSE_DF:
+                self._sparse[term] = items
+                continue
+            fields = array('Q', bytes(_FIELD_BYTES * len(self._ids)))
+            for position, weight in items:
+                fields[position] = weight
+            self._dense[term] = int.from_bytes(fields.tobytes(), 'little')
+
+    def has_room(self, mentor_id: int) -> bool:
+        mentor = self.mentors.get(mentor_id)
+        return mentor is not None and self.loads.get(mentor_id, 0) < mentor.capacity
+
+    def set_load(self, mentor_id: int, delta: int):
+        """Учесть принятую (+1) или завершённую (-1) заявку"""
+        self.loads[mentor_id] = max(0, self.loads.get(mentor_id, 0) + delta)
+        position = self._positions.get(mentor_id)
+        if position is not None:
+            self._room[position] = self.has_room(mentor_id)
+
+    def _scores(self, query: Dict[str, int]) -> array:
+        packed = 0
+        for term, query_weight in query.items():
+            dense = self._dense.get(term)
+            if dense is not None:
+                packed += dense * query_weight
+        scores = array('Q')
+        scores.frombytes(packed.to_bytes(_FIELD_BYTES * len(self._ids), 'little'))
+        for term, query_weight in query.items():
+            for position, weight in self._sparse.get(term, ()):
+                scores[position] += weight * query_weight
+        return scores
+
+    def match(self, query: Dict[str, int], limit: int) -> List[Tuple[Mentor, float]]:
+        """Лучшие наставники со свободными местами: (наставник, релевантность).
+
+        Если запрос пуст или совпадений мало, список добирается наименее
+        загруженными наставниками.
+        """
+        best = []
+        if query and self._ids:
+            scores = self._scores(query)
+            best = [
+                (score, position)
+                for score, position in heapq.nlargest(limit, compress(zip(scores, range(len(scores))), self._room))
+                if score
+            ]
+        if len(best) < limit:
+            seen = {position for _, position in best}
+            rest = heapq.nsmallest(
+                limit - len(best),
+                (position for position in compress(range(len(self._ids)), self._room) if position not in seen),
+                key=lambda position: (self.loads.get(self._ids[position], 0), position),
+            )
+            best.extend((0, position) for position in rest)
+        return [(self.mentors[self._ids[position]], score / SCALE) for score, position in best]
+
+
+class MentorMatcher:
+    """Индекс, перестраиваемый по crud.mentors_revision"""
+
+    def __init__(self):
+        self._index: Optional[MentorIndex] = None
+        self._revision = -1
+
+    async def index(self) -> MentorIndex:
+        if self._index is None or self._revision != crud.mentors_revision:
+            revision = crud.mentors_revision
+            mentors = [
+                Mentor(m['id'], m['user_id'], m['name'], m['expertise'], m['experience'], m['capacity'] or 0)
+                for m in await crud.get_all_mentors(is_available=True)
+            ]
+            loads = await crud.get_mentor_loads()
+            # Построение по 10k анкет занимает сотни миллисекунд — не в цикле событий
+            self._index = await asyncio.to_thread(MentorIndex, mentors, loads)
+            self._revision = revision
+        return self._index
+
+    async def match(self, org: Optional[Dict], limit: int) -> List[Tuple[Mentor, float]]:
+        """Подобрать наставников для организации (или для пользователя без неё)"""
+        return (await self.index()).match(org_query(org), limit)
+
+    def set_load(self, mentor_id: int, delta: int):
+        """Учесть изменение занятости; устаревший индекс при перестройке прочитает её из базы"""
+        if self._index is not None and self._revision == crud.mentors_revision:
+            self._index.set_load(mentor_id, delta)
+
+
+mentor_matcher = MentorMatcher()
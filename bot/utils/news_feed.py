@@ -0,0 +1,131 @@
+"""Лента новостей: страницы по ключу (created_at, id) и кэш отрисованных страниц.
+
+Страница выбирается запросом «N новостей старше/новее крайней новости
+текущей страницы» по индексу idx_news_created, поэтому её стоимость не
+зависит от того, насколько далеко пролистана лента и сколько всего новостей.
+Готовые тексты и клавиатуры страниц хранятся в памяти до
+NEWS_PAGE_CACHE_TTL секунд; публикация новости (crud.news_revision)
+сбрасывает кэш целиком, так как сдвигает все страницы.
+"""
+import html
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from aiogram.types import InlineKeyboardMarkup
+
+from config.config import settings
+from database import crud
+from bot.keyboards.news import NewsPageCallback, get_news_page_keyboard
+
+TITLE_LIMIT = 150
+CONTENT_LIMIT = 400
+ORG_NAME_LIMIT = 100
+MEDIA_LABEL_LIMIT = 40
+
+_PARTIAL_ENTITY_RE = re.compile(r"&[^;\s]*$")
+
+# Текст, клавиатура и id новостей страницы (для учёта просмотров)
+Page = Tuple[str, Optional[InlineKeyboardMarkup], Tuple[int, ...]]
+
+
+def clip(text: str, limit: int) -> str:
+    """Экранировать для HTML и обрезать, не разрывая сущности вида &amp;"""
+    escaped = html.escape(text or "", quote=False)
+    if len(escaped) <= limit:
+        return escaped
+    return _PARTIAL_ENTITY_RE.sub("", escaped[:limit]).rstrip() + "…"
+
+
+def _stamp(created_at: str) -> str:
+    return re.sub(r"\D", "", created_at)
+
+
+def _created_at(stamp: str) -> str:
+    """YYYYMMDDHHMMSS -> YYYY-MM-DD HH:MM:SS (формат CURRENT_TIMESTAMP)"""
+    return f"{stamp[0:4]}-{stamp[4:6]}-{stamp[6:8]} {stamp[8:10]}:{stamp[10:12]}:{stamp[12:14]}"
+
+
+def render_news(news_list: List[Dict]) -> str:
+    text = "<b>📰 Новости</b>\n\n"
+    for news in news_list:
+        text += f"<b>{clip(news['title'], TITLE_LIMIT)}</b>\n"
+        text += f"От: {clip(news['org_name'], ORG_NAME_LIMIT)}\n"
+        text += f"{clip(news['content'], CONTENT_LIMIT)}\n"
+        if news['media_ids']:
+            text += f"📎 Вложений: {len(news['media_ids'])}\n"
+        text += f"👁 Просмотров: {news['views_count']} · зрителей: {news['unique_views']}\n"
+        text += f"📅 {news['created_at'][:10]}\n\n"
+        text += "➖➖➖➖➖➖➖➖➖➖\n\n"
+    return text
+
+
+class NewsFeed:
+    """Постраничная лента с LRU-кэшем отрисованных страниц"""
+
+    def __init__(self, page_size: int, cache_size: int, ttl: float):
+        self.page_size = page_size
+        self.cache_size = cache_size
+        self.ttl = ttl
+        self._pages: "OrderedDict[Optional[tuple], Tuple[float, Page]]" = OrderedDict()
+        self._revision = crud.news_revision
+
+    def invalidate(self):
+        self._pages.clear()
+        self._revision = crud.news_revision
+
+    async def page(self, position: Optional[NewsPageCallback] = None) -> Optional[Page]:
+        """Текст, клавиатура и id новостей страницы; None, если новостей нет.
+
+        position — нажатая кнопка листания, без неё — самые свежие новости.
+        """
+        if self._revision != crud.news_revision:
+            self.invalidate()
+
+        key = None if position is None else (position.newer, position.stamp, position.id)
+        cached = self._pages.get(key)
+        now = time.monotonic()
+        if cached is not None and cached[0] > now:
+            self._pages.move_to_end(key)
+            return cached[1]
+
+        page = await self._render(position)
+        if page is not None:
+            self._pages[key] = (now + self.ttl, page)
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.cache_size:
+                self._pages.popitem(last=False)
+        return page
+
+    async def _render(self, position: Optional[NewsPageCallback]) -> Optional[Page]:
+        if position is None:
+            news_list, has_older = await crud.get_news_page(limit=self.page_size)
+            has_newer = False
+        else:
+            key = (_created_at(position.stamp), position.id)
+            news_list, more = await crud.get_news_page(key, newer=position.newer, limit=self.page_size)
+            if position.newer and not more or not news_list:
+                # Дошли до начала ленты — показываем полную первую страницу
+                return await self._render(None)
+            has_newer = more if position.newer else True
+            has_older = True if position.newer else more
+
+        if not news_list:
+            return None
+
+        first, last = news_list[0], news_list[-1]
+        newer = NewsPageCallback(newer=True, stamp=_stamp(first['created_at']), id=first['id']) if has_newer else None
+        older = NewsPageCallback(newer=False, stamp=_stamp(last['created_at']), id=last['id']) if has_older else None
+        ids = tuple(news['id'] for news in news_list)
+        with_media = [
+            (news['id'], news['title'][:MEDIA_LABEL_LIMIT]) for news in news_list if news['media_ids']
+        ]
+        return render_news(news_list), get_news_page_keyboard(newer, older, with_media), ids
+
+
+news_feed = NewsFeed(
+    page_size=settings.NEWS_PAGE_SIZE,
+    cache_size=settings.NEWS_PAGE_CACHE_SIZE,
+    ttl=settings.NEWS_PAGE_CACHE_TTL,
+)
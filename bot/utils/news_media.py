@@ -0,0 +1,63 @@
+"""Вложения новостей: разбор присланных файлов и отправка альбомами.
+
+В базе хранятся только file_id, поэтому при показе Telegram не перекачивает
+файлы заново. Фото и видео уходят одним альбомом (send_media_group — один
+вызов API до 10 файлов), документы — отдельным: Telegram не смешивает
+документы с фото в одной медиагруппе.
+"""
+from typing import Dict, List
+
+from aiogram import Bot
+from aiogram.types import InputMediaDocument, InputMediaPhoto, InputMediaVideo, Message
+
+# Больше файлов в одной медиагруппе Telegram не принимает
+MEDIA_GROUP_LIMIT = 10
+
+_INPUT_MEDIA = {
+    'photo': InputMediaPhoto,
+    'video': InputMediaVideo,
+    'document': InputMediaDocument,
+}
+
+
+def extract_media(messages: List[Message]) -> List[Dict]:
+    """Вложения из сообщений (альбома или одного сообщения), не больше MEDIA_GROUP_LIMIT"""
+    media = []
+    for message in messages:
+        if message.photo:
+            media.append({'type': 'photo', 'file_id': message.photo[-1].file_id})
+        elif message.video:
+            media.append({'type': 'video', 'file_id': message.video.file_id})
+        elif message.document:
+            media.append({'type': 'document', 'file_id': message.document.file_id})
+    return media[:MEDIA_GROUP_LIMIT]
+
+
+def build_albums(media: List[Dict]) -> List[List]:
+    """InputMedia-альбомы для send_media_group: фото с видео, затем документы"""
+    visual = [item for item in media if item['type'] != 'document']
+    documents = [item for item in media if item['type'] == 'document']
+    albums = []
+    for items in (visual, documents):
+        for start in range(0, len(items), MEDIA_GROUP_LIMIT):
+            albums.append([
+                _INPUT_MEDIA[item['type']](media=item['file_id'])
+                for item in items[start:start + MEDIA_GROUP_LIMIT]
+            ])
+    return albums
+
+
+async def send_news_media(bot: Bot, chat_id: int, media: List[Dict]):
+    """Отправить вложения новости: по одному вызову API на альбом"""
+    for album in build_albums(media):
+        if len(album) > 1:
+            await bot.send_media_group(chat_id, album)
+            continue
+        # Медиагруппа требует от двух файлов — одиночный отправляем напрямую
+        item = album[0]
+        if isinstance(item, InputMediaPhoto):
+            await bot.send_photo(chat_id, item.media)
+        elif isinstance(item, InputMediaVideo):
+            await bot.send_video(chat_id, item.media)
+        else:
+            await bot.send_document(chat_id, item.media)
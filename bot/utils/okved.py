@@ -0,0 +1,148 @@
+"""Справочник ОКВЭД 2 для проверки кодов при регистрации.
+
+Классификатор из bot/utils/data/okved2.csv загружается при старте в префиксное
+дерево по символам кода. Каждая цифра кода — следующий уровень иерархии
+(класс XX, группа XX.X, подгруппа XX.XX, вид XX.XX.X, подвид XX.XX.XX),
+поэтому префикс кода совпадает с кодом родительской группировки, и поиск
+названия и запрещённого диапазона занимает O(len(code)).
+"""
+import csv
+import logging
+import os
+import re
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+from config.config import settings
+
+logger = logging.getLogger(__name__)
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "data", "okved2.csv")
+
+_DOTTED_RE = re.compile(r"\d{2}(?:\.\d{1,2}(?:\.\d{1,2})?)?")
+_PLAIN_RE = re.compile(r"\d{2,6}")
+_TOKEN_RE = re.compile(r"\s*([\d.,]+)(?:\s|$)")
+
+
+class OkvedEntry(NamedTuple):
+    code: str
+    name: Optional[str]
+    blocked: Optional[str]
+
+
+class _Node:
+    __slots__ = ("children", "name", "blocked")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.name: Optional[str] = None
+        self.blocked: Optional[str] = None
+
+
+def normalize_code(text: str) -> Optional[str]:
+    """Привести код к виду XX.XX.XX: «6201», «62,01», «62.01 ...» → «62.01»"""
+    match = _TOKEN_RE.match(text or "")
+    if not match:
+        return None
+    code = match.group(1).replace(",", ".").rstrip(".")
+
+    if _DOTTED_RE.fullmatch(code):
+        return code
+    if _PLAIN_RE.fullmatch(code):
+        parts = [code[i:i + 2] for i in range(0, len(code), 2)]
+        return ".".join(parts)
+    return None
+
+
+class OkvedIndex:
+    """Префиксное дерево кодов ОКВЭД с названиями и запрещёнными диапазонами"""
+
+    def __init__(self, rows: List[tuple], blocked: Dict[str, List[str]]):
+        self._root = _Node()
+        self.size = 0
+        for code, name in rows:
+            self._insert(code).name = name
+            self.size += 1
+        for category, prefixes in blocked.items():
+            for prefix in prefixes:
+                self._insert(prefix).blocked = category
+
+    @classmethod
+    def load(cls, path: str = DATA_PATH, blocked: Optional[Dict[str, List[str]]] = None) -> "OkvedIndex":
+        """Загрузить классификатор из CSV (code;name)"""
+        with open(path, encoding="utf-8", newline="") as f:
+            reader = csv.reader(f, delimiter=";")
+            next(reader, None)
+            rows = [(row[0], row[1]) for row in reader if row]
+        return cls(rows, settings.BLOCKED_OKVED_PREFIXES if blocked is None else blocked)
+
+    def _insert(self, code: str) -> _Node:
+        node = self._root
+        for ch in code:
+            child = node.children.get(ch)
+            if child is None:
+                child = node.children[ch] = _Node()
+            node = child
+        return node
+
+    def lookup(self, text: str, exact: bool = True) -> Optional[OkvedEntry]:
+        """Проверить код.
+
+        Возвращает None, если код не распознан или его нет в справочнике.
+        С exact=False (коды из ЕГРЮЛ, заведомо существующие) для подвидов,
+        которых нет в справочнике, название берётся у ближайшей родительской
+        группировки, а запрещённый диапазон проверяется по всем префиксам.
+        """
+        code = normalize_code(text)
+        if code is None:
+            return None
+
+        node = self._root
+        name = None
+        blocked = None
+        depth = 0
+        for ch in code:
+            node = node.children.get(ch)
+            if node is None:
+                break
+            depth += 1
+            if node.name is not None:
+                name = node.name
+            if node.blocked is not None and blocked is None:
+                blocked = node.blocked
+
+        if exact:
+            if depth < len(code) or node.name is None:
+                return None
+        # Класс (первые две цифры) обязан существовать
+        elif depth < 2 or name is None:
+            return None
+        return OkvedEntry(code, name, blocked)
+
+    def describe(self, code: Optional[str]) -> str:
+        """Код с названием для карточки организации"""
+        if not code:
+            return ""
+        entry = self.lookup(code)
+        if entry is None or entry.code != code:
+            # Старые записи могут содержать произвольный текст
+            return code
+        return f"{entry.code} — {entry.name}"
+
+
+def _load_index() -> OkvedIndex:
+    started = time.perf_counter()
+    index = OkvedIndex.load()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if elapsed_ms > settings.OKVED_LOAD_BUDGET_MS:
+        logger.warning(
+            f"Справочник ОКВЭД загружался {elapsed_ms:.1f} мс "
+            f"(бюджет {settings.OKVED_LOAD_BUDGET_MS} мс)"
+        )
+    else:
+        logger.info(f"Справочник ОКВЭД: {index.size} кодов за {elapsed_ms:.1f} мс")
+    return index
+
+
+# Загружается один раз при импорте (старте бота)
+okved_index = _load_index()
@@ -0,0 +1,89 @@
+"""Документы организаций (сертификаты, лицензии): разбор файлов и отправка пакетом.
+
+Бот хранит только file_id и метаданные, которые Telegram присылает вместе с
+сообщением (имя, тип, размер), поэтому ни при загрузке, ни при показе
+администратору содержимое не скачивается. Один и тот же файл у разных
+организаций хранится одной строкой document_files по file_unique_id.
+"""
+from typing import Dict, List
+
+from aiogram import Bot
+from aiogram.types import Message
+
+from bot.utils.news_feed import clip
+from bot.utils.news_media import send_news_media
+
+DOCUMENT_TYPES = {
+    'certificate': "Сертификат",
+    'license': "Лицензия",
+    'other': "Другой документ",
+}
+
+FILE_NAME_LIMIT = 60
+
+
+def extract_files(messages: List[Message]) -> List[Dict]:
+    """Метаданные файлов из сообщений (альбома или одного сообщения): документы и фото"""
+    files = []
+    for message in messages:
+        if message.document:
+            document = message.document
+            files.append({
+                'file_unique_id': document.file_unique_id,
+                'file_id': document.file_id,
+                'kind': 'document',
+                'file_name': document.file_name,
+                'mime_type': document.mime_type,
+                'file_size': document.file_size,
+            })
+        elif message.photo:
+            photo = message.photo[-1]
+            files.append({
+                'file_unique_id': photo.file_unique_id,
+                'file_id': photo.file_id,
+                'kind': 'photo',
+                'file_name': None,
+                'mime_type': 'image/jpeg',
+                'file_size': photo.file_size,
+            })
+    return files
+
+
+def format_size(size: int) -> str:
+    if not size:
+        return "—"
+    for unit in ("Б", "КБ", "МБ"):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} ГБ"
+
+
+def format_document(document: Dict) -> str:
+    """Строка списка: тип, имя файла, размер; пометка, если файл есть у других организаций"""
+    name = clip(document['file_name'] or ("фото" if document['kind'] == 'photo' else "без имени"), FILE_NAME_LIMIT)
+    line = (
+        f"{DOCUMENT_TYPES.get(document['doc_type'], document['doc_type'])}: {name} · "
+        f"{format_size(document['file_size'])} · {document['created_at'][:10]}"
+    )
+    if document['shared_with']:
+        line += f" · ⚠️ тот же файл у других организаций: {document['shared_with']}"
+    return line
+
+
+def format_documents_block(documents: List[Dict], total: int) -> str:
+    """Блок «документы» для карточки заявки (только метаданные)"""
+    if not total:
+        return "\n\n📎 Документы: не загружены"
+    lines = [f"\n\n📎 <b>Документы ({total}):</b>"]
+    lines.extend(f"• {format_document(document)}" for document in documents)
+    if total > len(documents):
+        lines.append(f"… и ещё {total - len(documents)}")
+    return "\n".join(lines)
+
+
+async def send_document_bundle(bot: Bot, chat_id: int, documents: List[Dict]):
+    """Отправить документы медиагруппами по file_id (документы и фото — раздельно, по 10)"""
+    await send_news_media(bot, chat_id, [
+        {'type': document['kind'], 'file_id': document['file_id']} for document in documents
+    ])
@@ -0,0 +1,137 @@
+"""Каталог ресурсов (конкурсы, курсы, FAQ) в памяти.
+
+Активные ресурсы каждого типа читаются из базы один раз и сразу
+превращаются в готовые страницы: HTML экранирован, страница не длиннее
+RESOURCE_PAGE_CHARS и режется только по границам ресурсов, а не посреди
+тега; слишком длинный текст ресурса обрезается. Показ и листание
+обходятся без запросов к базе. Любое изменение ресурсов
+(crud.resources_revision) сбрасывает каталог целиком — ресурсы меняются
+несколько раз в неделю, а читаются постоянно.
+"""
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from aiogram.types import InlineKeyboardMarkup
+
+from config.config import settings
+from database import crud
+from bot.keyboards.resources import get_resource_page_keyboard
+from bot.utils.news_feed import clip
+
+logger = logging.getLogger(__name__)
+
+SEPARATOR = "➖➖➖➖➖➖➖➖➖➖\n\n"
+
+# Ресурс целиком помещается на страницу RESOURCE_PAGE_CHARS
+TITLE_LIMIT = 200
+CONTENT_LIMIT = 3000
+FIELD_LIMIT = 200
+REMINDER_LABEL_LIMIT = 40
+
+# Тип ресурса -> (заголовок каталога, текст для пустого каталога)
+CATALOGS = {
+    'competition': ("🏆 Активные конкурсы", "Активных конкурсов пока нет."),
+    'course': ("📚 Доступные курсы", "Доступных курсов пока нет."),
+    'faq': ("❓ Частые вопросы", "Частых вопросов пока нет."),
+}
+
+Page = Tuple[str, Optional[InlineKeyboardMarkup]]
+
+
+def render_resource(resource: Dict) -> str:
+    extra = resource['additional_data'] or {}
+    text = f"<b>{clip(resource['title'], TITLE_LIMIT)}</b>\n"
+    text += f"{clip(resource['content'], CONTENT_LIMIT)}\n"
+    if extra.get('deadline'):
+        text += f"📅 Дедлайн: {clip(str(extra['deadline']), FIELD_LIMIT)}\n"
+    if extra.get('link'):
+        text += f"🔗 Ссылка: {clip(str(extra['link']), FIELD_LIMIT)}\n"
+    return text + "\n" + SEPARATOR
+
+
+def paginate(title: str, blocks: List[str], limit: int) -> List[Tuple[str, List[int]]]:
+    """Разложить блоки по страницам не длиннее limit вместе с заголовком.
+
+    Возвращает (текст страницы, номера блоков на ней).
+    """
+    # Запас под « (стр. 10/10)» в заголовке
+    room = limit - len(title) - 32
+    bodies: List[Tuple[str, List[int]]] = []
+    body, indexes = "", []
+    for index, block in enumerate(blocks):
+        if body and len(body) + len(block) > room:
+            bodies.append((body, indexes))
+            body, indexes = "", []
+        body += block
+        indexes.append(index)
+    if body:
+        bodies.append((body, indexes))
+
+    total = len(bodies)
+    pages = []
+    for number, (body, indexes) in enumerate(bodies, 1):
+        suffix = f" (стр. {number}/{total})" if total > 1 else ""
+        pages.append((f"<b>{title}</b>{suffix}\n\n{body}", indexes))
+    return pages
+
+
+class ResourceCatalog:
+    """Готовые страницы активных ресурсов по типам"""
+
+    def __init__(self, page_chars: int):
+        self.page_chars = page_chars
+        self._pages: Dict[str, List[Page]] = {}
+        self._revision = crud.resources_revision
+
+    def invalidate(self):
+        self._pages.clear()
+        self._revision = crud.resources_revision
+
+    async def warm_up(self):
+        """Загрузить все каталоги (при старте бота)"""
+        for resource_type in CATALOGS:
+            await self.pages(resource_type)
+        logger.info(
+            "Каталог ресурсов загружен: "
+            + ", ".join(f"{t} — {len(p)} стр." for t, p in self._pages.items())
+        )
+
+    async def pages(self, resource_type: str) -> List[Page]:
+        """Страницы каталога; пустой список, если активных ресурсов нет"""
+        if self._revision != crud.resources_revision:
+            self.invalidate()
+        pages = self._pages.get(resource_type)
+        if pages is None:
+            revision = crud.resources_revision
+            pages = await self._render(resource_type)
+            # Пока шёл запрос, ресурсы могли измениться — такой результат не кэшируем
+            if revision == crud.resources_revision:
+                self._pages[resource_type] = pages
+        return pages
+
+    async def page(self, resource_type: str, number: int = 0) -> Optional[Page]:
+        """Страница number (с нуля, за концом — последняя); None, если ресурсов нет"""
+        pages = await self.pages(resource_type)
+        if not pages:
+            return None
+        return pages[max(0, min(number, len(pages) - 1))]
+
+    async def _render(self, resource_type: str) -> List[Page]:
+        resources = await crud.get_resources_by_type(resource_type, is_active=True)
+        if not resources:
+            return []
+        title = CATALOGS[resource_type][0]
+        texts = paginate(title, [render_resource(r) for r in resources], self.page_chars)
+        pages = []
+        for number, (text, indexes) in enumerate(texts):
+            # Подписаться можно на конкурсы, напоминание по которым ещё не разослано
+            reminders = [
+                (resources[i]['id'], resources[i]['title'][:REMINDER_LABEL_LIMIT])
+                for i in indexes
+                if resources[i].get('deadline_at') and not resources[i].get('reminded_at')
+            ]
+            pages.append((text, get_resource_page_keyboard(resource_type, number, len(texts), reminders)))
+        return pages
+
+
+resource_catalog = ResourceCatalog(page_chars=settings.RESOURCE_PAGE_CHARS)
@@ -0,0 +1,110 @@
+"""Планировщик отложенных задач на куче таймеров.
+
+Задачи лежат в куче по времени запуска; одна фоновая корутина спит до
+ближайшей и просыпается раньше, только если добавили задачу ещё ближе.
+Поэтому ожидание не стоит ничего, а добавление и отмена — O(log n), без
+периодических проходов по таблицам. Задачи живут в памяти: при старте
+их заново ставит тот, кто их заводил (см. bot/utils/competitions.py).
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[], Awaitable]
+
+# Дольше не спим, чтобы перевод системных часов не сдвигал запуск надолго
+MAX_SLEEP = 3600
+
+
+class _Entry:
+    __slots__ = ("when", "seq", "key", "job")
+
+    def __init__(self, when: float, seq: int, key: Hashable, job: Optional[Job]):
+        self.when = when
+        self.seq = seq
+        self.key = key
+        self.job = job
+
+    def __lt__(self, other: "_Entry") -> bool:
+        return (self.when, self.seq) < (other.when, other.seq)
+
+
+class JobScheduler:
+    """Запуск задач в заданное время (unix timestamp); задача с тем же ключом заменяется"""
+
+    def __init__(self):
+        self._heap: List[_Entry] = []
+        self._entries: Dict[Hashable, _Entry] = {}
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._running: set = set()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def start(self):
+        """Запустить фоновый цикл"""
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Остановить цикл; запущенные задачи отменяются"""
+        if not self._task:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        for job in list(self._running):
+            job.cancel()
+        await asyncio.gather(task, *self._running, return_exceptions=True)
+
+    def schedule(self, key: Hashable, when: float, job: Job):
+        """Запустить job() в момент when; прежняя задача с этим ключом отменяется"""
+        self.cancel(key)
+        entry = _Entry(when, next(self._seq), key, job)
+        self._entries[key] = entry
+        heapq.heappush(self._heap, entry)
+        if self._heap[0] is entry:
+            self._wakeup.set()
+
+    def cancel(self, key: Hashable):
+        """Отменить задачу (запись остаётся в куче и пропускается при извлечении)"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            entry.job = None
+
+    def _pop_due(self, now: float) -> List[_Entry]:
+        due = []
+        while self._heap and (self._heap[0].job is None or self._heap[0].when <= now):
+            entry = heapq.heappop(self._heap)
+            if entry.job is not None:
+                del self._entries[entry.key]
+                due.append(entry)
+        return due
+
+    async def _run(self):
+        while True:
+            for entry in self._pop_due(time.time()):
+                job = asyncio.create_task(self._execute(entry))
+                self._running.add(job)
+                job.add_done_callback(self._running.discard)
+
+            self._wakeup.clear()
+            timeout = min(max(0.0, self._heap[0].when - time.time()), MAX_SLEEP) if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _execute(self, entry: _Entry):
+        try:
+            await entry.job()
+        except Exception:
+            logger.exception(f"Ошибка в запланированной задаче {entry.key!r}")
+
+
+scheduler = JobScheduler()
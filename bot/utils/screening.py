@@ -0,0 +1,128 @@
+"""Проверка описаний деятельности на запрещённые категории бизнеса.
+
+Список терминов из настроек компилируется один раз в автомат Ахо-Корасик.
+Текст перед поиском нормализуется: регистр, ё → е, латинские двойники
+в кириллических словах, простой стемминг. Термины сопоставляются
+с начала слова, поэтому «доставка» не срабатывает на «ставк*».
+"""
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Dict, List, Set
+
+from config.config import settings
+
+# Латинские буквы и цифры, похожие на кириллические
+_HOMOGLYPHS = str.maketrans({
+    'a': 'а', 'b': 'в', 'c': 'с', 'e': 'е', 'h': 'н', 'k': 'к', 'm': 'м',
+    'o': 'о', 'p': 'р', 't': 'т', 'x': 'х', 'y': 'у',
+    '0': 'о', '3': 'з', '6': 'б',
+})
+
+_WORD_RE = re.compile(r"[0-9a-zа-я]+")
+_CYRILLIC_RE = re.compile(r"[а-я]")
+
+# Окончания по длине, от длинных к коротким
+_ENDINGS = {
+    4: {"иями"},
+    3: {"ами", "ями", "ого", "его", "ому", "ему", "ыми", "ими", "ией", "иях", "иям"},
+    2: {"ая", "яя", "ое", "ее", "ые", "ие", "ый", "ий", "ой", "ей", "ом", "ем",
+        "ах", "ях", "ов", "ев", "ую", "юю", "ам", "ям", "ия", "ья", "ью", "ии"},
+    1: {"а", "я", "о", "е", "ы", "и", "у", "ю", "ь", "й"},
+}
+_MIN_STEM = 3
+
+
+@lru_cache(maxsize=50000)
+def stem(word: str) -> str:
+    """Простой стемминг: отрезать самое длинное окончание, оставив не менее 3 букв"""
+    for length in (4, 3, 2, 1):
+        if len(word) - length >= _MIN_STEM and word[-length:] in _ENDINGS[length]:
+            return word[:-length]
+    return word
+
+
+@lru_cache(maxsize=50000)
+def normalize_word(word: str) -> str:
+    """Латинские двойники заменяются только в словах со смешанным алфавитом"""
+    if _CYRILLIC_RE.search(word) and not word.isascii():
+        word = word.translate(_HOMOGLYPHS)
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Нормализованные стеммированные слова текста"""
+    text = text.casefold().replace('ё', 'е')
+    return [stem(normalize_word(word)) for word in _WORD_RE.findall(text)]
+
+
+class Screener:
+    """Автомат Ахо-Корасик по терминам запрещённых категорий.
+
+    Термин с «*» на конце сопоставляется как префикс слова,
+    без «*» — как целое слово (фраза) после стемминга.
+    """
+
+    def __init__(self, categories: Dict[str, List[str]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[tuple]] = [[]]
+
+        for category, terms in categories.items():
+            for term in terms:
+                is_prefix = term.endswith('*')
+                tokens = tokenize(term.rstrip('*'))
+                if not tokens:
+                    continue
+                pattern = " " + " ".join(tokens) + ("" if is_prefix else " ")
+                self._add(pattern, (category, term))
+        self._build()
+
+    def _add(self, pattern: str, payload: tuple):
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append(payload)
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def match(self, text: str) -> Dict[str, List[str]]:
+        """Найденные термины по категориям"""
+        stream = " " + " ".join(tokenize(text)) + " "
+        goto, fail, out = self._goto, self._fail, self._out
+        found: Dict[str, List[str]] = {}
+        state = 0
+        for ch in stream:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for category, term in out[state]:
+                terms = found.setdefault(category, [])
+                if term not in terms:
+                    terms.append(term)
+        return found
+
+    def blocked_categories(self, text: str) -> Set[str]:
+        """Категории, к которым относится текст"""
+        return set(self.match(text))
+
+
+# Собирается один раз при импорте (старте бота)
+screener = Screener(settings.BLOCKED_CATEGORIES)
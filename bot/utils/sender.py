@@ -0,0 +1,53 @@
+"""Отправка сообщений с ограничением скорости и обработкой flood control"""
+import asyncio
+from typing import Awaitable, Callable
+
+from aiogram.exceptions import TelegramAPIError, TelegramForbiddenError, TelegramRetryAfter
+
+SENT = "sent"
+BLOCKED = "blocked"
+FAILED = "failed"
+
+
+class RateLimiter:
+    """Равномерно распределяет вызовы: не больше rate в секунду"""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        """Дождаться своего слота"""
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            if self._next > now:
+                await asyncio.sleep(self._next - now)
+                now = self._next
+            self._next = now + self.interval
+
+    def pause(self, seconds: float):
+        """Приостановить все отправки (ответ 429 от Telegram)"""
+        loop = asyncio.get_running_loop()
+        self._next = max(self._next, loop.time() + seconds)
+
+
+async def send_with_retry(limiter: RateLimiter, send: Callable[[], Awaitable],
+                          attempts: int = 3) -> str:
+    """Выполнить отправку через лимитер.
+
+    Возвращает SENT, BLOCKED (пользователь заблокировал бота) или FAILED.
+    """
+    for _ in range(attempts):
+        await limiter.wait()
+        try:
+            await send()
+            return SENT
+        except TelegramRetryAfter as e:
+            limiter.pause(e.retry_after)
+        except TelegramForbiddenError:
+            return BLOCKED
+        except TelegramAPIError:
+            return FAILED
+    return FAILED
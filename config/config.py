@@ -8,13 +8,110 @@ class Settings:
     # Database
     DATABASE_URL: str = "sqlite+aiosqlite:///./bot.db"
 
-    # Blocked business types
-    BLOCKED_KEYWORDS = [
-        "игорн", "казино", "ставк", "букмекер",
-        "алкоголь", "водка", "пиво", "вино",
-        "табак", "сигарет", "табачн"
+    # Log retention
+    LOG_RETENTION_DAYS: int = 90
+    LOG_ARCHIVE_DIR: str = "logs_archive"
+    LOG_RETENTION_BATCH_SIZE: int = 500
+    LOG_RETENTION_INTERVAL_HOURS: int = 24
+    LOG_VACUUM_PAGES: int = 2000
+
+    # Write-behind buffer for logs
+    WRITE_BUFFER_FLUSH_MS: int = 200
+    WRITE_BUFFER_MAX_BATCH: int = 500
+    WRITE_BUFFER_MAX_SIZE: int = 10000
+    WRITE_BUFFER_RETRY_ATTEMPTS: int = 5  # повторов пачки при ошибке записи, затем построчно
+    WRITE_BUFFER_RETRY_DELAY_MS: int = 200  # первая пауза перед повтором, дальше удваивается
+
+    # Broadcasts
+    BROADCAST_RATE: int = 25  # сообщений в секунду (лимит Telegram ~30)
+    BROADCAST_BATCH_SIZE: int = 100
+    BROADCAST_PROGRESS_INTERVAL: int = 5  # секунд между обновлениями прогресса
+
+    # News feed
+    NEWS_PAGE_SIZE: int = 5
+    NEWS_PAGE_CACHE_SIZE: int = 256  # отрисованных страниц в памяти
+    NEWS_PAGE_CACHE_TTL: int = 60  # секунд; новая новость сбрасывает кэш сразу
+    NEWS_VIEWS_FLUSH_MS: int = 5000  # интервал пакетной записи просмотров
+    NEWS_MEDIA_GROUP_LATENCY_MS: int = 500  # ожидание остальных файлов альбома
+
+    # Resource catalog
+    RESOURCE_PAGE_CHARS: int = 4000  # лимит сообщения Telegram — 4096
+
+    # Competitions
+    TIMEZONE_OFFSET_HOURS: int = 3  # дедлайны вводятся по московскому времени
+    COMPETITION_REMINDER_DAYS: int = 3  # за сколько дней до дедлайна напоминать подписчикам
+
+    # Mentor matching
+    MENTOR_PAGE_SIZE: int = 5
+    MENTOR_MATCH_LIMIT: int = 30  # наставников в подборке (6 страниц)
+
+    # Partner chat relay
+    RELAY_RATE: int = 25  # вызовов Bot API в секунду на все чаты
+    RELAY_ROUTE_CACHE_SIZE: int = 10000  # матчей в кэше маршрутов
+    RELAY_IDLE_TIMEOUT: int = 60  # секунд без сообщений до остановки очереди отправителя
+    RELAY_ALBUM_WAIT_MS: int = 300  # ожидание остальных файлов альбома перед пересылкой
+    RELAY_HEADER_GAP: int = 600  # секунд; после паузы получатель снова видит, от кого сообщения
+    RELAY_RETRY_ATTEMPTS: int = 5  # попыток при flood control (429)
+
+    # Organization documents
+    DOCUMENTS_PAGE_SIZE: int = 10
+    DOCUMENTS_CARD_PREVIEW: int = 5  # документов в карточке заявки у администратора
+    DOCUMENT_BUNDLE_LIMIT: int = 30  # файлов в пакете для администратора
+
+    # Contracts (PDF)
+    CONTRACT_PDF_WORKERS: int = 0  # процессов вёрстки; 0 — по числу ядер
+    # Пары (обычный, жирный) TTF-шрифтов с кириллицей; берётся первая найденная,
+    # иначе DejaVu Serif из bot/utils/data/fonts
+    CONTRACT_FONT_PATHS = [
+        ("C:/Windows/Fonts/times.ttf", "C:/Windows/Fonts/timesbd.ttf"),
     ]
 
+    # Owner analytics
+    ANALYTICS_REFRESH_INTERVAL: int = 300  # секунд
+    ANALYTICS_REFRESH_BATCH: int = 2000  # строк источника в одной транзакции обновления
+    ANALYTICS_REFRESH_PAUSE_MS: int = 30  # пауза между транзакциями, чтобы вклинились записи бота
+
+    # Admin roster cache
+    ROSTER_SYNC_INTERVAL: int = 5  # секунд между проверками ленты изменений ролей
+
+    # Blocked business types by category.
+    # "*" в конце — совпадение по началу слова, иначе — целое слово после стемминга
+    BLOCKED_CATEGORIES = {
+        "gambling": ["игорн*", "казино", "ставк*", "ставок", "букмекер*"],
+        "alcohol": ["алкогол*", "водк*", "пив*", "вино", "винн*", "винодел*"],
+        "tobacco": ["табак*", "табачн*", "сигарет*"],
+    }
+    BLOCKED_KEYWORDS = [term.rstrip("*") for terms in BLOCKED_CATEGORIES.values() for term in terms]
+
+    # Blocked OKVED 2 codes by category (prefix matches the code and all its subcodes)
+    BLOCKED_OKVED_PREFIXES = {
+        "gambling": ["92"],
+        "alcohol": ["11.01", "11.02", "11.03", "11.04", "11.05", "46.34.2", "47.25.1"],
+        "tobacco": ["12", "46.35", "47.26"],
+    }
+    OKVED_LOAD_BUDGET_MS: int = 50  # допустимое время загрузки справочника при старте
+    CITIES_LOAD_BUDGET_MS: int = 50  # то же для справочника городов
+
+    # Local EGRUL/EGRIP snapshot (python -m bot.utils.egrul_snapshot); проверка пропускается, если файла нет
+    EGRUL_SNAPSHOT_PATH: str = "egrul.bin"
+
+    # Online INN lookup (DaData findById/party-compatible API); пустой URL — проверка выключена
+    EGRUL_API_URL: str = ""
+    EGRUL_API_TOKEN: str = ""
+    EGRUL_API_TIMEOUT: float = 1.5  # секунд на весь запрос
+    EGRUL_CACHE_TTL_HOURS: int = 24 * 7
+    EGRUL_NEGATIVE_TTL_HOURS: int = 24
+    EGRUL_BREAKER_FAILURES: int = 5  # ошибок подряд до отключения сервиса
+    EGRUL_BREAKER_RESET_SECONDS: int = 60
+
+    # Registration drafts
+    REGISTRATION_DRAFT_FLUSH_MS: int = 1000
+    REGISTRATION_DRAFT_TTL_HOURS: int = 72
+    REGISTRATION_DRAFT_CLEANUP_INTERVAL_HOURS: int = 6
+
+    # Значения списков ниже хранятся в БД по позиции (database/codecs.py):
+    # новые значения добавлять только в конец, существующие не переставлять и не удалять
+
     # Partnership options
     CAN_GIVE_OPTIONS = [
         "Финансирование", "Информационное", "Кадровое", "Идейное",
@@ -1,4 +1,4 @@
 from .database import init_db, get_db
-from . import crud
+from . import crud, analytics, drafts, news_views
 
-__all__ = ['init_db', 'get_db', 'crud']
+__all__ = ['init_db', 'get_db', 'crud', 'analytics', 'drafts', 'news_views']
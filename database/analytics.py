@@ -0,0 +1,235 @@
+"""Аналитика для владельца: воронка и недельные когорты организаций"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from config.config import settings
+from .database import get_db
+
+logger = logging.getLogger(__name__)
+
+
+def _earliest(column: str) -> str:
+    """Выражение для ON CONFLICT: оставить самую раннюю дату"""
+    return (
+        f"{column} = CASE WHEN {column} IS NULL OR excluded.{column} < {column} "
+        f"THEN excluded.{column} ELSE {column} END"
+    )
+
+
+# Источник -> (таблица, запрос агрегации строк в окне id)
+# Каждый запрос получает параметры (after_id, up_to_id) и обновляет analytics_org_funnel.
+SOURCES = {
+    'organizations': ("organizations", """
+        INSERT INTO analytics_org_funnel (org_id, registered_at, cohort_week)
+        SELECT id, created_at, date(created_at, 'weekday 0', '-6 days')
+        FROM organizations
+        WHERE id > ? AND id <= ?
+        ON CONFLICT(org_id) DO UPDATE SET
+            registered_at = excluded.registered_at,
+            cohort_week = excluded.cohort_week
+    """),
+    'likes': ("likes", f"""
+        INSERT INTO analytics_org_funnel (org_id, first_like_at)
+        SELECT from_org_id, MIN(created_at)
+        FROM likes
+        WHERE id > ? AND id <= ?
+        GROUP BY from_org_id
+        ON CONFLICT(org_id) DO UPDATE SET {_earliest('first_like_at')}
+    """),
+    'matches': ("matches", f"""
+        INSERT INTO analytics_org_funnel (org_id, first_match_at)
+        SELECT org_id, MIN(created_at) FROM (
+            SELECT org1_id AS org_id, created_at FROM matches WHERE id > ?1 AND id <= ?2
+            UNION ALL
+            SELECT org2_id, created_at FROM matches WHERE id > ?1 AND id <= ?2
+        )
+        WHERE true
+        GROUP BY org_id
+        ON CONFLICT(org_id) DO UPDATE SET {_earliest('first_match_at')}
+    """),
+    'contracts': ("contracts", f"""
+        INSERT INTO analytics_org_funnel (org_id, first_contract_at)
+        SELECT org_id, MIN(created_at) FROM (
+            SELECT creator_org_id AS org_id, created_at FROM contracts WHERE id > ?1 AND id <= ?2
+            UNION ALL
+            SELECT recipient_org_id, created_at FROM contracts WHERE id > ?1 AND id <= ?2
+        )
+        WHERE true
+        GROUP BY org_id
+        ON CONFLICT(org_id) DO UPDATE SET {_earliest('first_contract_at')}
+    """),
+}
+
+# Одобрение — UPDATE строки verifications, созданной при регистрации, поэтому
+# водяной знак этапа «верифицирована» — пара (verified_at, id), а не id.
+VERIFIED_SOURCE = 'verifications'
+_VERIFIED_WINDOW = """
+    SELECT verified_at, id FROM verifications
+    WHERE verified_at >= ?1 AND (verified_at > ?1 OR id > ?2) AND verified_at < ?3
+    ORDER BY verified_at, id
+    LIMIT ?4
+"""
+_VERIFIED_QUERY = f"""
+    INSERT INTO analytics_org_funnel (org_id, verified_at)
+    SELECT organization_id, datetime(verified_at)
+    FROM verifications
+    WHERE verified_at >= ?1 AND (verified_at > ?1 OR id > ?2)
+      AND verified_at <= ?3 AND (verified_at < ?3 OR id <= ?4)
+      AND status = 'approved'
+    ON CONFLICT(org_id) DO UPDATE SET {_earliest('verified_at')}
+"""
+# verified_at вычисляется до UPDATE, поэтому одобрение может закоммититься
+# позже более нового; свежие одобрения ждут следующего обновления.
+VERIFIED_LAG = timedelta(minutes=1)
+
+
+async def _get_watermark(db, source: str) -> Tuple[int, str]:
+    async with db.execute(
+        "SELECT last_id, last_key FROM analytics_watermarks WHERE source = ?", (source,)
+    ) as cursor:
+        row = await cursor.fetchone()
+    return (row[0], row[1] or "") if row else (0, "")
+
+
+async def _set_watermark(db, source: str, last_id: int, last_key: Optional[str] = None):
+    await db.execute("""
+        INSERT INTO analytics_watermarks (source, last_id, last_key) VALUES (?, ?, ?)
+        ON CONFLICT(source) DO UPDATE SET last_id = excluded.last_id, last_key = excluded.last_key
+    """, (source, last_id, last_key))
+
+
+async def _refresh_window(db, source: str, table: str, query: str, target_id: int, batch: int) -> int:
+    """Обработать следующее окно из batch строк источника одной короткой транзакцией"""
+    await db.execute("BEGIN IMMEDIATE")
+    try:
+        after_id, _ = await _get_watermark(db, source)
+        async with db.execute(f"""
+            SELECT COUNT(*), MAX(id) FROM (
+                SELECT id FROM {table} WHERE id > ? AND id <= ? ORDER BY id LIMIT ?
+            )
+        """, (after_id, target_id, batch)) as cursor:
+            count, up_to_id = await cursor.fetchone()
+        if count:
+            await db.execute(query, (after_id, up_to_id))
+            await _set_watermark(db, source, up_to_id)
+        await db.commit()
+        return count
+    except Exception:
+        await db.rollback()
+        raise
+
+
+async def _refresh_verified_window(db, cutoff: str, batch: int) -> int:
+    """Окно одобренных верификаций по (verified_at, id)"""
+    await db.execute("BEGIN IMMEDIATE")
+    try:
+        after_id, after_key = await _get_watermark(db, VERIFIED_SOURCE)
+        async with db.execute(_VERIFIED_WINDOW, (after_key, after_id, cutoff, batch)) as cursor:
+            window = await cursor.fetchall()
+        if window:
+            up_to_key, up_to_id = window[-1]
+            await db.execute(_VERIFIED_QUERY, (after_key, after_id, up_to_key, up_to_id))
+            await _set_watermark(db, VERIFIED_SOURCE, up_to_id, up_to_key)
+        await db.commit()
+        return len(window)
+    except Exception:
+        await db.rollback()
+        raise
+
+
+async def refresh_analytics() -> Dict[str, int]:
+    """Обработать строки, появившиеся после последнего обновления.
+
+    Для каждого источника хранится водяной знак (последний обработанный id),
+    поэтому время обновления зависит от числа новых строк, а не от размера истории.
+    Строки обрабатываются окнами по ANALYTICS_REFRESH_BATCH, каждое в своей
+    транзакции, — блокировка записи не держится дольше одного окна.
+    Возвращает количество обработанных строк по источникам.
+    """
+    batch = settings.ANALYTICS_REFRESH_BATCH
+    # Писатель, ждущий блокировку, просыпается с растущими паузами (busy timeout SQLite),
+    # поэтому без паузы между окнами он не успевает вклиниться
+    pause = settings.ANALYTICS_REFRESH_PAUSE_MS / 1000
+    processed = {}
+    db = await get_db()
+    try:
+        for source, (table, query) in SOURCES.items():
+            # Граница фиксируется в начале: поток новых строк не растягивает обновление
+            async with db.execute(f"SELECT MAX(id) FROM {table}") as cursor:
+                target_id = (await cursor.fetchone())[0] or 0
+            total = 0
+            while (count := await _refresh_window(db, source, table, query, target_id, batch)) == batch:
+                total += count
+                await asyncio.sleep(pause)
+            if total + count:
+                processed[source] = total + count
+
+        cutoff = (datetime.utcnow() - VERIFIED_LAG).isoformat()
+        total = 0
+        while (count := await _refresh_verified_window(db, cutoff, batch)) == batch:
+            total += count
+            await asyncio.sleep(pause)
+        if total + count:
+            processed[VERIFIED_SOURCE] = total + count
+    finally:
+        await db.close()
+    return processed
+
+
+async def get_funnel() -> Dict[str, int]:
+    """Воронка: регистрация → верификация → лайк → матч → договор"""
+    db = await get_db()
+    async with db.execute("""
+        SELECT COUNT(registered_at), COUNT(verified_at), COUNT(first_like_at),
+               COUNT(first_match_at), COUNT(first_contract_at)
+        FROM analytics_org_funnel
+        WHERE registered_at IS NOT NULL
+    """) as cursor:
+        row = await cursor.fetchone()
+    await db.close()
+    return {
+        'registered': row[0],
+        'verified': row[1],
+        'liked': row[2],
+        'matched': row[3],
+        'contracted': row[4],
+    }
+
+
+async def get_cohorts(weeks: int = 8) -> List[Dict]:
+    """Недельные когорты по дате регистрации (последние weeks недель)"""
+    db = await get_db()
+    async with db.execute("""
+        SELECT cohort_week, COUNT(*), COUNT(verified_at), COUNT(first_like_at),
+               COUNT(first_match_at), COUNT(first_contract_at)
+        FROM analytics_org_funnel
+        WHERE cohort_week IS NOT NULL
+        GROUP BY cohort_week
+        ORDER BY cohort_week DESC
+        LIMIT ?
+    """, (weeks,)) as cursor:
+        rows = await cursor.fetchall()
+    await db.close()
+    return [
+        {
+            'week': row[0],
+            'registered': row[1],
+            'verified': row[2],
+            'liked': row[3],
+            'matched': row[4],
+            'contracted': row[5],
+        }
+        for row in rows
+    ]
+
+
+async def run_analytics_refresh():
+    """Фоновая задача: периодическое обновление аналитики"""
+    while True:
+        try:
+            await refresh_analytics()
+        except Exception:
+            logger.exception("Ошибка обновления аналитики")
+        await asyncio.sleep(settings.ANALYTICS_REFRESH_INTERVAL)
@@ -0,0 +1,144 @@
+"""Целочисленное хранение полей организации со значениями из фиксированных списков.
+
+Код перечисления — позиция значения в списке настроек (LEGAL_FORMS,
+TURNOVER_RANGES, INTERACTION_FORMATS, PARTNERSHIP_TYPES) или в
+VERIFICATION_STATUSES. Поэтому списки в config можно только дополнять в конец:
+перестановка или удаление значения меняет смысл уже сохранённых кодов.
+
+Опции can_give/need хранятся битовой маской (бит i — опция i списка), а свои
+варианты пользователя — JSON-списком в can_give_custom/need_custom.
+"""
+import json
+import sqlite3
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.config import settings
+
+VERIFICATION_STATUSES = ["pending", "verified", "rejected"]
+
+UNKNOWN_LABEL = "Не указано"
+
+
+class EnumCodec:
+    """Значение из списка <-> его позиция в списке"""
+
+    def __init__(self, labels: List[str]):
+        self.labels = labels
+        self._codes = {label: code for code, label in enumerate(labels)}
+
+    def encode(self, label: Optional[str]) -> Optional[int]:
+        """Код значения; None для значения не из списка"""
+        return self._codes.get(label)
+
+    def decode(self, code: Optional[int]) -> str:
+        if code is None or not 0 <= code < len(self.labels):
+            return UNKNOWN_LABEL
+        return self.labels[code]
+
+
+class OptionsCodec:
+    """Список опций <-> (битовая маска стандартных опций, JSON своих вариантов)"""
+
+    def __init__(self, options: List[str]):
+        self.options = options
+        self._bits = {option: 1 << i for i, option in enumerate(options)}
+
+    def encode(self, selected: List[str]) -> Tuple[int, Optional[str]]:
+        mask = 0
+        custom = []
+        for option in selected or []:
+            bit = self._bits.get(option)
+            if bit is None:
+                custom.append(option)
+            else:
+                mask |= bit
+        return mask, json.dumps(custom, ensure_ascii=False) if custom else None
+
+    def decode(self, mask: Optional[int], custom: Optional[str]) -> List[str]:
+        mask = mask or 0
+        selected = [option for i, option in enumerate(self.options) if mask >> i & 1]
+        if custom:
+            selected.extend(json.loads(custom))
+        return selected
+
+
+legal_forms = EnumCodec(settings.LEGAL_FORMS)
+turnovers = EnumCodec(settings.TURNOVER_RANGES)
+interaction_formats = EnumCodec(settings.INTERACTION_FORMATS)
+partnership_types = EnumCodec(settings.PARTNERSHIP_TYPES)
+statuses = EnumCodec(VERIFICATION_STATUSES)
+can_give_options = OptionsCodec(settings.CAN_GIVE_OPTIONS)
+need_options = OptionsCodec(settings.NEED_OPTIONS)
+
+# Колонка organizations -> кодек
+ENUM_COLUMNS = {
+    'legal_form': legal_forms,
+    'turnover': turnovers,
+    'interaction_format': interaction_formats,
+    'partnership_type': partnership_types,
+    'verification_status': statuses,
+}
+OPTION_COLUMNS = {
+    'can_give': can_give_options,
+    'need': need_options,
+}
+
+_CODED_COLUMNS = frozenset((*ENUM_COLUMNS, *OPTION_COLUMNS))
+
+STATUS_PENDING = statuses.encode("pending")
+STATUS_VERIFIED = statuses.encode("verified")
+STATUS_REJECTED = statuses.encode("rejected")
+
+
+class OrganizationRecord(dict):
+    """Строка organizations, в которой коды превращаются в подписи при первом
+    обращении к полю: org['turnover'] -> «До 3 млн», org['can_give'] -> {'options': [...]}.
+
+    Поля, которые обработчик не читает, не декодируются вовсе.
+    """
+
+    def __init__(self, row: sqlite3.Row):
+        # zip заметно быстрее, чем dict(row) через протокол отображения
+        super().__init__(zip(row.keys(), row))
+        self._encoded = _CODED_COLUMNS & self.keys()
+
+    def _decode(self, key: str):
+        raw = dict.__getitem__(self, key)
+        if key in ENUM_COLUMNS:
+            return ENUM_COLUMNS[key].decode(raw)
+        return {'options': OPTION_COLUMNS[key].decode(raw, dict.get(self, f"{key}_custom"))}
+
+    def __getitem__(self, key: str):
+        if key in self._encoded:
+            self._encoded.discard(key)
+            dict.__setitem__(self, key, self._decode(key))
+        return dict.__getitem__(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self[key] if key in self else default
+
+    # Итерация по значениям тоже отдаёт подписи (dict(record), {**record})
+    def __iter__(self):
+        return dict.__iter__(self)
+
+    def values(self):
+        return [self[key] for key in self]
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+
+def encode_organization(data: Dict) -> Dict:
+    """Коды полей анкеты для записи в organizations"""
+    can_give, can_give_custom = can_give_options.encode(data.get('can_give_list'))
+    need, need_custom = need_options.encode(data.get('need_list'))
+    return {
+        'legal_form': legal_forms.encode(data.get('legal_form')),
+        'turnover': turnovers.encode(data.get('turnover')),
+        'interaction_format': interaction_formats.encode(data.get('interaction_format')),
+        'partnership_type': partnership_types.encode(data.get('partnership_type')),
+        'can_give': can_give,
+        'can_give_custom': can_give_custom,
+        'need': need,
+        'need_custom': need_custom,
+    }
@@ -1,8 +1,11 @@
 """CRUD операции для работы с базой данных"""
 import json
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Callable, Tuple
 from datetime import datetime
 from .database import get_db, dict_to_json, json_to_dict
+from . import retention, duplicates, codecs
+from .codecs import OrganizationRecord, STATUS_PENDING, STATUS_VERIFIED, STATUS_REJECTED
+from .write_buffer import log_buffer
 
 
 # ========== USERS ==========
@@ -57,56 +60,161 @@ async def get_owner() -> Optional[Dict]:
 
 
 async def update_user_role(telegram_id: int, new_role: str):
-    """Обновить роль пользователя"""
+    """Обновить роль пользователя и записать изменение в ленту role_changes"""
     db = await get_db()
     await db.execute(
         "UPDATE users SET role = ? WHERE telegram_id = ?",
         (new_role, telegram_id)
     )
+    await db.execute(
+        "INSERT INTO role_changes (telegram_id, new_role) VALUES (?, ?)",
+        (telegram_id, new_role)
+    )
+    await db.commit()
+    await db.close()
+
+
+async def get_last_role_change_id() -> int:
+    """Получить ID последнего изменения ролей"""
+    db = await get_db()
+    async with db.execute("SELECT MAX(id) FROM role_changes") as cursor:
+        row = await cursor.fetchone()
+    await db.close()
+    return row[0] or 0
+
+
+async def set_user_active(user_id: int, is_active: bool):
+    """Отметить пользователя активным/неактивным (например, заблокировал бота)"""
+    db = await get_db()
+    await db.execute(
+        "UPDATE users SET is_active = ? WHERE id = ?",
+        (1 if is_active else 0, user_id)
+    )
     await db.commit()
     await db.close()
 
 
 # ========== ORGANIZATIONS ==========
 
+_ORGANIZATION_INSERT = """
+    INSERT INTO organizations (
+        user_id, name, legal_form, activity_field, okved, inn,
+        phone, email, telegram, description, turnover,
+        can_give, can_give_custom, need, need_custom,
+        interaction_format, city, city_id, partnership_type,
+        gdpr_consent, verification_status
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _organization_params(user_id: int, data: Dict) -> tuple:
+    """Параметры INSERT организации из данных анкеты"""
+    codes = codecs.encode_organization(data)
+    return (
+        user_id, data['name'], codes['legal_form'],
+        data.get('activity_field'), data.get('okved'), data['inn'],
+        data['phone'], data['email'], data['telegram_contact'],
+        data['description'], codes['turnover'],
+        codes['can_give'], codes['can_give_custom'], codes['need'], codes['need_custom'],
+        codes['interaction_format'], data.get('city'), data.get('city_id'),
+        codes['partnership_type'], 1, STATUS_PENDING
+    )
+
+
 async def create_organization(user_id: int, data: Dict) -> int:
     """Создать организацию"""
     db = await get_db()
-    async with db.execute("""
-        INSERT INTO organizations (
-            user_id, name, legal_form, activity_field, okved, inn,
-            phone, email, telegram, description, turnover,
-            can_give, need, interaction_format, city, partnership_type,
-            gdpr_consent, verification_status
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
-        user_id, data['name'], data['legal_form'],
-        data.get('activity_field'), data.get('okved'), data['inn'],
-        data['phone'], data['email'], data['telegram_contact'],
-        data['description'], data['turnover'],
-        dict_to_json({'options': data['can_give_list']}),
-        dict_to_json({'options': data['need_list']}),
-        data['interaction_format'], data.get('city'),
-        data['partnership_type'], 1, 'pending'
-    )) as cursor:
+    async with db.execute(_ORGANIZATION_INSERT, _organization_params(user_id, data)) as cursor:
         org_id = cursor.lastrowid
+    await duplicates.index_organization(db, org_id, data)
     await db.commit()
     await db.close()
     return org_id
 
 
+async def register_organization(telegram_id: int, username: Optional[str],
+                                full_name: Optional[str], data: Dict) -> Optional[Dict]:
+    """Зарегистрировать организацию одной транзакцией: пользователь, организация,
+    заявка на проверку (с найденными возможными дублями) и лог.
+
+    BEGIN IMMEDIATE берёт блокировку записи сразу, поэтому проверка ИНН и вставка
+    не пересекаются с параллельной регистрацией. Возвращает
+    {'user_id', 'organization_id', 'verification_id', 'created', 'duplicates'} или None,
+    если ИНН уже занят организацией другого пользователя. Если у пользователя
+    организация уже есть (повторное нажатие), возвращаются её ID с created=False.
+    """
+    db = await get_db()
+    try:
+        await db.execute("BEGIN IMMEDIATE")
+        await db.execute("""
+            INSERT INTO users (telegram_id, username, full_name, role)
+            VALUES (?, ?, ?, 'organization')
+            ON CONFLICT(telegram_id) DO NOTHING
+        """, (telegram_id, username, full_name))
+        async with db.execute("SELECT id FROM users WHERE telegram_id = ?", (telegram_id,)) as cursor:
+            user_id = (await cursor.fetchone())[0]
+
+        async with db.execute("""
+            SELECT o.id, o.user_id, v.id FROM organizations o
+            LEFT JOIN verifications v ON v.organization_id = o.id
+            WHERE o.inn = ? OR o.user_id = ?
+            ORDER BY o.user_id = ? DESC
+            LIMIT 1
+        """, (data['inn'], user_id, user_id)) as cursor:
+            existing = await cursor.fetchone()
+
+        if existing:
+            await db.rollback()
+            if existing[1] != user_id:
+                return None
+            return {
+                'user_id': user_id,
+                'organization_id': existing[0],
+                'verification_id': existing[2],
+                'created': False,
+                'duplicates': [],
+            }
+
+        found = await duplicates.find_duplicates(db, data)
+
+        async with db.execute(_ORGANIZATION_INSERT, _organization_params(user_id, data)) as cursor:
+            org_id = cursor.lastrowid
+        await duplicates.index_organization(db, org_id, data)
+        async with db.execute(
+            "INSERT INTO verifications (organization_id, status, duplicates) VALUES (?, 'pending', ?)",
+            (org_id, dict_to_json(found) if found else None)
+        ) as cursor:
+            verification_id = cursor.lastrowid
+        # Лог пишем в той же транзакции, а не через буфер
+        await db.execute(
+            "INSERT INTO logs (user_id, action, details, created_at) VALUES (?, ?, ?, ?)",
+            (user_id, "registration",
+             dict_to_json({"type": "organization", "inn": data['inn'], "organization_id": org_id}),
+             datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"))
+        )
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    finally:
+        await db.close()
+
+    return {
+        'user_id': user_id,
+        'organization_id': org_id,
+        'verification_id': verification_id,
+        'created': True,
+        'duplicates': found,
+    }
+
+
 async def get_organization_by_inn(inn: str) -> Optional[Dict]:
     """Получить организацию по ИНН"""
     db = await get_db()
     async with db.execute("SELECT * FROM organizations WHERE inn = ?", (inn,)) as cursor:
         row = await cursor.fetchone()
     await db.close()
-    if row:
-        org = dict(row)
-        org['can_give'] = json_to_dict(org['can_give'])
-        org['need'] = json_to_dict(org['need'])
-        return org
-    return None
+    return OrganizationRecord(row) if row else None
 
 
 async def get_organization_by_user_id(user_id: int) -> Optional[Dict]:
@@ -115,12 +223,7 @@ async def get_organization_by_user_id(user_id: int) -> Optional[Dict]:
     async with db.execute("SELECT * FROM organizations WHERE user_id = ?", (user_id,)) as cursor:
         row = await cursor.fetchone()
     await db.close()
-    if row:
-        org = dict(row)
-        org['can_give'] = json_to_dict(org['can_give'])
-        org['need'] = json_to_dict(org['need'])
-        return org
-    return None
+    return OrganizationRecord(row) if row else None
 
 
 async def get_organization_by_telegram_id(telegram_id: int) -> Optional[Dict]:
@@ -133,12 +236,7 @@ async def get_organization_by_telegram_id(telegram_id: int) -> Optional[Dict]:
     """, (telegram_id,)) as cursor:
         row = await cursor.fetchone()
     await db.close()
-    if row:
-        org = dict(row)
-        org['can_give'] = json_to_dict(org['can_give'])
-        org['need'] = json_to_dict(org['need'])
-        return org
-    return None
+    return OrganizationRecord(row) if row else None
 
 
 async def get_organization_by_id(org_id: int) -> Optional[Dict]:
@@ -147,12 +245,36 @@ async def get_organization_by_id(org_id: int) -> Optional[Dict]:
     async with db.execute("SELECT * FROM organizations WHERE id = ?", (org_id,)) as cursor:
         row = await cursor.fetchone()
     await db.close()
-    if row:
-        org = dict(row)
-        org['can_give'] = json_to_dict(org['can_give'])
-        org['need'] = json_to_dict(org['need'])
-        return org
-    return None
+    return OrganizationRecord(row) if row else None
+
+
+async def normalize_organization_cities(resolve: Callable[[str], Any]) -> int:
+    """Проставить city_id организациям, у которых его ещё нет (старые записи).
+
+    resolve(city) возвращает город справочника (с полями id и name) или None;
+    город заменяется каноническим названием. Нераспознанные остаются как есть.
+    """
+    db = await get_db()
+    async with db.execute("""
+        SELECT id, city FROM organizations
+        WHERE city_id IS NULL AND city IS NOT NULL AND city != ''
+    """) as cursor:
+        rows = await cursor.fetchall()
+
+    resolved = {}
+    updates = []
+    for org_id, city in rows:
+        if city not in resolved:
+            resolved[city] = resolve(city)
+        match = resolved[city]
+        if match is not None:
+            updates.append((match.id, match.name, org_id))
+
+    if updates:
+        await db.executemany("UPDATE organizations SET city_id = ?, city = ? WHERE id = ?", updates)
+        await db.commit()
+    await db.close()
+    return len(updates)
 
 
 async def update_organization_status(org_id: int, status: str):
@@ -160,7 +282,7 @@ async def update_organization_status(org_id: int, status: str):
     db = await get_db()
     await db.execute(
         "UPDATE organizations SET verification_status = ? WHERE id = ?",
-        (status, org_id)
+        (codecs.statuses.encode(status), org_id)
     )
     await db.commit()
     await db.close()
@@ -171,18 +293,11 @@ async def get_verified_organizations(exclude_id: int, turnover: str) -> List[Dic
     db = await get_db()
     async with db.execute("""
         SELECT * FROM organizations
-        WHERE id != ? AND verification_status = 'verified' AND turnover = ?
-    """, (exclude_id, turnover)) as cursor:
+        WHERE verification_status = ? AND turnover = ? AND id != ?
+    """, (STATUS_VERIFIED, codecs.turnovers.encode(turnover), exclude_id)) as cursor:
         rows = await cursor.fetchall()
     await db.close()
-
-    orgs = []
-    for row in rows:
-        org = dict(row)
-        org['can_give'] = json_to_dict(org['can_give'])
-        org['need'] = json_to_dict(org['need'])
-        orgs.append(org)
-    return orgs
+    return [OrganizationRecord(row) for row in rows]
 
 
 # ========== VERIFICATIONS ==========
@@ -250,9 +365,9 @@ async def approve_verification(organization_id: int, admin_id: int):
     # Обновляем статус организации
     await db.execute("""
         UPDATE organizations
-        SET verification_status = 'verified'
+        SET verification_status = ?
         WHERE id = ?
-    """, (organization_id,))
+    """, (STATUS_VERIFIED, organization_id))
 
     await db.commit()
     await db.close()
@@ -272,9 +387,9 @@ async def reject_verification(organization_id: int, admin_id: int, reason: str):
     # Обновляем статус организации
     await db.execute("""
         UPDATE organizations
-        SET verification_status = 'rejected'
+        SET verification_status = ?
         WHERE id = ?
-    """, (organization_id,))
+    """, (STATUS_REJECTED, organization_id))
 
     await db.commit()
     await db.close()
@@ -319,15 +434,59 @@ async def get_liked_org_ids(from_org_id: int) -> List[int]:
 
 # ========== MATCHES ==========
 
-async def create_match(org1_id: int, org2_id: int):
-    """Создать матч"""
+async def create_match(org1_id: int, org2_id: int) -> bool:
+    """Создать матч; повторный матч той же пары только активирует его.
+
+    Возвращает True, если пара раньше не была активным матчем.
+    """
+    low, high = sorted((org1_id, org2_id))
     db = await get_db()
-    await db.execute(
-        "INSERT INTO matches (org1_id, org2_id) VALUES (?, ?)",
-        (org1_id, org2_id)
-    )
+    cursor = await db.execute("""
+        INSERT INTO matches (org1_id, org2_id) VALUES (?, ?)
+        ON CONFLICT(org1_id, org2_id) DO UPDATE SET is_active = 1 WHERE is_active = 0
+    """, (low, high))
     await db.commit()
     await db.close()
+    return cursor.rowcount > 0
+
+
+async def get_partner_orgs(org_id: int) -> List[Dict]:
+    """Организации, с которыми у org_id активный матч: id, name и match_id.
+
+    Пара хранится как (меньший id, больший id), поэтому партнёры ищутся двумя
+    выборками по индексам — idx_matches_pair по org1_id и idx_matches_org2 по org2_id.
+    """
+    db = await get_db()
+    async with db.execute("""
+        SELECT o.id, o.name, p.match_id
+        FROM (
+            SELECT id AS match_id, org2_id AS partner_id FROM matches WHERE org1_id = ?1 AND is_active = 1
+            UNION
+            SELECT id, org1_id FROM matches WHERE org2_id = ?1 AND is_active = 1
+        ) p
+        JOIN organizations o ON o.id = p.partner_id
+        ORDER BY o.name
+    """, (org_id,)) as cursor:
+        rows = await cursor.fetchall()
+    await db.close()
+    return [dict(row) for row in rows]
+
+
+async def get_match_id(org_id: int, partner_id: int) -> Optional[int]:
+    """id активного матча организаций или None"""
+    low, high = sorted((org_id, partner_id))
+    db = await get_db()
+    async with db.execute(
+        "SELECT id FROM matches WHERE org1_id = ? AND org2_id = ? AND is_active = 1", (low, high)
+    ) as cursor:
+        row = await cursor.fetchone()
+    await db.close()
+    return row[0] if row else None
+
+
+async def is_partner(org_id: int, partner_id: int) -> bool:
+    """Есть ли у организаций активный матч"""
+    return await get_match_id(org_id, partner_id) is not None
 
 
 async def get_matches_count() -> int:
@@ -339,10 +498,180 @@ async def get_matches_count() -> int:
     return row[0] if row else 0
 
 
+async def get_match_route(match_id: int) -> Optional[Dict]:
+    """Стороны матча для пересылки: id и названия организаций, telegram_id их владельцев"""
+    db = await get_db()
+    async with db.execute("""
+        SELECT m.id, m.is_active,
+               m.org1_id, o1.name AS org1_name, u1.telegram_id AS chat1_id,
+               m.org2_id, o2.name AS org2_name, u2.telegram_id AS chat2_id
+        FROM matches m
+        JOIN organizations o1 ON o1.id = m.org1_id
+        JOIN organizations o2 ON o2.id = m.org2_id
+        JOIN users u1 ON u1.id = o1.user_id
+        JOIN users u2 ON u2.id = o2.user_id
+        WHERE m.id = ?
+    """, (match_id,)) as cursor:
+        row = await cursor.fetchone()
+    await db.close()
+    return dict(row) if row else None
+
+
+# ========== RELAY ==========
+
+async def get_relay_conversations() -> Dict[int, int]:
+    """Открытые чаты: telegram_id -> match_id"""
+    db = await get_db()
+    async with db.execute("SELECT telegram_id, match_id FROM relay_conversations") as cursor:
+        rows = await cursor.fetchall()
+    await db.close()
+    return {telegram_id: match_id for telegram_id, match_id in rows}
+
+
+async def set_relay_conversation(telegram_id: int, match_id: Optional[int]):
+    """Открыть чат пользователя с матчем match_id; None — закрыть"""
+    db = await get_db()
+    if match_id is None:
+        await db.execute("DELETE FROM relay_conversations WHERE telegram_id = ?", (telegram_id,))
+    else:
+        await db.execute("""
+            INSERT INTO relay_conversations (telegram_id, match_id) VALUES (?, ?)
+            ON CONFLICT(telegram_id) DO UPDATE SET match_id = excluded.match_id
+        """, (telegram_id, match_id))
+    await db.commit()
+    await db.close()
+
+
+async def log_match_messages(rows: List[tuple]):
+    """Записать пересланные сообщения: (match_id, sender_org_id, message_id, relayed_message_id).
+
+    Через буфер отложенной записи, если он запущен.
+    """
+    created_at = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+    query = """
+        INSERT INTO match_messages (match_id, sender_org_id, message_id, relayed_message_id, created_at)
+        VALUES (?, ?, ?, ?, ?)
+    """
+    params = [(*row, created_at) for row in rows]
+
+    if log_buffer.running:
+        for row in params:
+            await log_buffer.put(query, row)
+        return
+
+    db = await get_db()
+    await db.executemany(query, params)
+    await db.commit()
+    await db.close()
+
+
+# ========== ORGANIZATION DOCUMENTS ==========
+
+async def add_org_documents(organization_id: int, doc_type: str, files: List[Dict]) -> int:
+    """Прикрепить файлы к организации; возвращает число новых документов.
+
+    files — метаданные из Telegram (file_unique_id, file_id, kind, file_name,
+    mime_type, file_size). Файл, уже известный по file_unique_id, повторно не
+    сохраняется; уже прикреплённый к этой организации — пропускается.
+    """
+    db = await get_db()
+    await db.executemany("""
+        INSERT INTO document_files (file_unique_id, file_id, kind, file_name, mime_type, file_size)
+        VALUES (:file_unique_id, :file_id, :kind, :file_name, :mime_type, :file_size)
+        ON CONFLICT(file_unique_id) DO NOTHING
+    """, files)
+    before = db.total_changes
+    await db.executemany("""
+        INSERT OR IGNORE INTO org_documents (organization_id, file_unique_id, doc_type)
+        VALUES (?, ?, ?)
+    """, [(organization_id, file['file_unique_id'], doc_type) for file in files])
+    added = db.total_changes - before
+    await db.commit()
+    await db.close()
+    return added
+
+
+async def get_org_documents(organization_id: int, before_id: Optional[int] = None,
+                            limit: int = 10) -> Tuple[List[Dict], bool]:
+    """Страница документов организации, новые первыми, и есть ли следующая.
+
+    Страница выбирается по ключу id (before_id — id последнего документа
+    предыдущей страницы) по индексу idx_org_documents_org. shared_with —
+    сколько ещё организаций загрузили тот же файл.
+    """
+    db = await get_db()
+    async with db.execute("""
+        SELECT d.id, d.doc_type, d.created_at, f.file_unique_id, f.file_id, f.kind,
+               f.file_name, f.mime_type, f.file_size,
+               (SELECT COUNT(*) FROM org_documents x
+                WHERE x.file_unique_id = d.file_unique_id) - 1 AS shared_with
+        FROM org_documents d
+        JOIN document_files f ON f.file_unique_id = d.file_unique_id
+        WHERE d.organization_id = ? AND d.id < ?
+        ORDER BY d.id DESC
+        LIMIT ?
+    """, (organization_id, before_id or 2 ** 63 - 1, limit + 1)) as cursor:
+        rows = await cursor.fetchall()
+    await db.close()
+    return [dict(row) for row in rows[:limit]], len(rows) > limit
+
+
+async def get_org_document(organization_id: int, document_id: int) -> Optional[Dict]:
+    """Документ организации с метаданными файла"""
+    db = await get_db()
+    async with db.execute("""
+        SELECT d.id, d.doc_type, d.created_at, f.file_id, f.kind, f.file_name
+        FROM org_documents d
+        JOIN document_files f ON f.file_unique_id = d.file_unique_id
+        WHERE d.id = ? AND d.organization_id = ?
+    """, (document_id, organization_id)) as cursor:
+        row = await cursor.fetchone()
+    await db.close()
+    return dict(row) if row else None
+
+
+async def count_org_documents(organization_id: int) -> int:
+    """Число документов организации"""
+    db = await get_db()
+    async with db.execute(
+        "SELECT COUNT(*) FROM org_documents WHERE organization_id = ?", (organization_id,)
+    ) as cursor:
+        row = await cursor.fetchone()
+    await db.close()
+    return row[0]
+
+
+async def delete_org_document(organization_id: int, document_id: int) -> bool:
+    """Открепить документ; файл удаляется, если он больше ни у кого не прикреплён"""
+    db = await get_db()
+    async with db.execute(
+        "SELECT file_unique_id FROM org_documents WHERE id = ? AND organization_id = ?",
+        (document_id, organization_id)
+    ) as cursor:
+        row = await cursor.fetchone()
+    if row is None:
+        await db.close()
+        return False
+    await db.execute("DELETE FROM org_documents WHERE id = ?", (document_id,))
+    await db.execute("""
+        DELETE FROM document_files
+        WHERE file_unique_id = ?1
+          AND NOT EXISTS (SELECT 1 FROM org_documents WHERE file_unique_id = ?1)
+    """, (row[0],))
+    await db.commit()
+    await db.close()
+    return True
+
+
 # ========== MENTORS ==========
 
+# Растёт при изменении анкет и доступности наставников; по нему индекс подбора понимает, что устарел
+mentors_revision = 0
+
+
 async def create_mentor(user_id: int, data: Dict) -> int:
     """Создать наставника"""
+    global mentors_revision
     db = await get_db()
     async with db.execute("""
         INSERT INTO mentors (user_id, name, expertise, experience, contact_info)
@@ -351,19 +680,26 @@ async def create_mentor(user_id: int, data: Dict) -> int:
         mentor_id = cursor.lastrowid
     await db.commit()
     await db.close()
+    mentors_revision += 1
     return mentor_id
 
 
 # ========== LOGS ==========
 
 async def create_log(user_id: int, action: str, details: Optional[Dict] = None):
-    """Создать лог"""
-    db = await get_db()
+    """Создать лог (через буфер отложенной записи, если он запущен)"""
     details_json = dict_to_json(details) if details else None
-    await db.execute(
-        "INSERT INTO logs (user_id, action, details) VALUES (?, ?, ?)",
-        (user_id, action, details_json)
-    )
+    # Время события фиксируем сразу, а не в момент сброса буфера
+    created_at = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+    query = "INSERT INTO logs (user_id, action, details, created_at) VALUES (?, ?, ?, ?)"
+    params = (user_id, action, details_json, created_at)
+
+    if log_buffer.running:
+        await log_buffer.put(query, params)
+        return
+
+    db = await get_db()
+    await db.execute(query, params)
     await db.commit()
     await db.close()
 
@@ -380,10 +716,14 @@ async def get_statistics() -> Dict:
     async with db.execute("SELECT COUNT(*) FROM organizations") as cursor:
         total_orgs = (await cursor.fetchone())[0]
 
-    async with db.execute("SELECT COUNT(*) FROM organizations WHERE verification_status = 'verified'") as cursor:
+    async with db.execute(
+        "SELECT COUNT(*) FROM organizations WHERE verification_status = ?", (STATUS_VERIFIED,)
+    ) as cursor:
         verified_orgs = (await cursor.fetchone())[0]
 
-    async with db.execute("SELECT COUNT(*) FROM organizations WHERE verification_status = 'pending'") as cursor:
+    async with db.execute(
+        "SELECT COUNT(*) FROM organizations WHERE verification_status = ?", (STATUS_PENDING,)
+    ) as cursor:
         pending_orgs = (await cursor.fetchone())[0]
 
     async with db.execute("SELECT COUNT(*) FROM matches") as cursor:
@@ -402,17 +742,24 @@ async def get_statistics() -> Dict:
 
 # ========== RESOURCES (COURSES & COMPETITIONS) ==========
 
-async def create_resource(resource_type: str, title: str, content: str, additional_data: Optional[Dict] = None) -> int:
-    """Создать ресурс (курс или конкурс)"""
+# Растёт при каждом изменении ресурсов; по нему каталог в памяти понимает, что устарел
+resources_revision = 0
+
+
+async def create_resource(resource_type: str, title: str, content: str, additional_data: Optional[Dict] = None,
+                          deadline_at: Optional[str] = None) -> int:
+    """Создать ресурс (курс или конкурс); deadline_at — дедлайн в UTC"""
+    global resources_revision
     db = await get_db()
     data_json = dict_to_json(additional_data) if additional_data else None
     async with db.execute("""
-        INSERT INTO resources (type, title, content, additional_data)
-        VALUES (?, ?, ?, ?)
-    """, (resource_type, title, content, data_json)) as cursor:
+        INSERT INTO resources (type, title, content, additional_data, deadline_at)
+        VALUES (?, ?, ?, ?, ?)
+    """, (resource_type, title, content, data_json, deadline_at)) as cursor:
         resource_id = cursor.lastrowid
     await db.commit()
     await db.close()
+    resources_revision += 1
     return resource_id
 
 
@@ -452,12 +799,13 @@ async def get_resource_by_id(resource_id: int) -> Optional[Dict]:
 
 async def update_resource(resource_id: int, **kwargs):
     """Обновить ресурс"""
+    global resources_revision
     db = await get_db()
     updates = []
     values = []
 
     for key, value in kwargs.items():
-        if key in ['title', 'content', 'is_active']:
+        if key in ['title', 'content', 'is_active', 'deadline_at']:
             updates.append(f"{key} = ?")
             values.append(value)
         elif key == 'additional_data' and value is not None:
@@ -470,24 +818,121 @@ async def update_resource(resource_id: int, **kwargs):
         query = f"UPDATE resources SET {', '.join(updates)}, updated_at = ? WHERE id = ?"
         await db.execute(query, values)
         await db.commit()
+        resources_revision += 1
 
     await db.close()
 
 
 async def delete_resource(resource_id: int):
     """Удалить ресурс (мягкое удаление)"""
+    global resources_revision
     db = await get_db()
     await db.execute("UPDATE resources SET is_active = 0 WHERE id = ?", (resource_id,))
     await db.commit()
     await db.close()
+    resources_revision += 1
+
+
+async def backfill_competition_deadlines(parse: Callable[[str], Optional[str]]) -> int:
+    """Проставить deadline_at конкурсам, у которых дедлайн есть только текстом.
+
+    parse(text) возвращает дедлайн в UTC («YYYY-MM-DD HH:MM:SS») или None.
+    """
+    db = await get_db()
+    async with db.execute("""
+        SELECT id, json_extract(additional_data, '$.deadline') FROM resources
+        WHERE type = 'competition' AND is_active = 1 AND deadline_at IS NULL
+          AND json_extract(additional_data, '$.deadline') IS NOT NULL
+    """) as cursor:
+        rows = await cursor.fetchall()
+
+    updates = [(deadline_at, resource_id) for resource_id, text in rows if (deadline_at := parse(str(text)))]
+    if updates:
+        await db.executemany("UPDATE resources SET deadline_at = ? WHERE id = ?", updates)
+        await db.commit()
+    await db.close()
+    return len(updates)
+
+
+async def get_active_deadlines() -> List[Dict]:
+    """Активные ресурсы с дедлайном (для планировщика при старте)"""
+    db = await get_db()
+    async with db.execute("""
+        SELECT id, title, deadline_at, reminded_at FROM resources
+        WHERE is_active = 1 AND deadline_at IS NOT NULL
+        ORDER BY deadline_at
+    """) as cursor:
+        rows = await cursor.fetchall()
+    await db.close()
+    return [dict(row) for row in rows]
+
+
+async def mark_resource_reminded(resource_id: int):
+    """Отметить, что напоминание о дедлайне разослано"""
+    global resources_revision
+    db = await get_db()
+    await db.execute(
+        "UPDATE resources SET reminded_at = ? WHERE id = ?",
+        (datetime.utcnow().strftime(retention.TIMESTAMP_FORMAT), resource_id)
+    )
+    await db.commit()
+    await db.close()
+    resources_revision += 1
+
+
+async def toggle_competition_reminder(resource_id: int, user_id: int) -> bool:
+    """Подписать пользователя на напоминание или отписать; True — подписан"""
+    db = await get_db()
+    async with db.execute(
+        "DELETE FROM competition_reminders WHERE resource_id = ? AND user_id = ?", (resource_id, user_id)
+    ) as cursor:
+        removed = cursor.rowcount
+    if not removed:
+        await db.execute(
+            "INSERT INTO competition_reminders (resource_id, user_id) VALUES (?, ?)", (resource_id, user_id)
+        )
+    await db.commit()
+    await db.close()
+    return not removed
+
+
+async def get_reminder_recipients(resource_id: int) -> List[int]:
+    """telegram_id активных пользователей, подписанных на напоминание"""
+    db = await get_db()
+    async with db.execute("""
+        SELECT u.telegram_id FROM competition_reminders r
+        JOIN users u ON r.user_id = u.id
+        WHERE r.resource_id = ? AND u.is_active = 1
+    """, (resource_id,)) as cursor:
+        rows = await cursor.fetchall()
+    await db.close()
+    return [row[0] for row in rows]
 
 
 # ========== NEWS ==========
 
-async def create_news(organization_id: int, title: str, content: str, media_ids: Optional[List[str]] = None) -> int:
-    """Создать новость"""
+# Растёт при каждой новой новости; по нему кэш ленты понимает, что устарел
+news_revision = 0
+
+
+def parse_news_media(raw: Optional[str]) -> List[Dict]:
+    """Вложения новости: [{'type': 'photo'|'video'|'document', 'file_id': ...}].
+
+    В старом формате {'ids': [...]} хранились только file_id фото.
+    """
+    if not raw:
+        return []
+    data = json_to_dict(raw)
+    if 'items' in data:
+        return data['items']
+    return [{'type': 'photo', 'file_id': file_id} for file_id in data.get('ids', [])]
+
+
+async def create_news(organization_id: int, title: str, content: str, media: Optional[List[Dict]] = None) -> int:
+    """Создать новость; media — вложения в формате parse_news_media"""
+    global news_revision
     db = await get_db()
-    media_json = dict_to_json({'ids': media_ids}) if media_ids else None
+    media_json = dict_to_json({'items': media}) if media else None
     async with db.execute("""
         INSERT INTO news (organization_id, title, content, media_ids)
         VALUES (?, ?, ?, ?)
@@ -495,6 +940,7 @@ async def create_news(organization_id: int, title: str, content: str, media_ids:
         news_id = cursor.lastrowid
     await db.commit()
     await db.close()
+    news_revision += 1
     return news_id
 
 
@@ -514,12 +960,58 @@ async def get_all_news(limit: int = 50) -> List[Dict]:
     news_list = []
     for row in rows:
         news = dict(row)
-        if news['media_ids']:
-            news['media_ids'] = json_to_dict(news['media_ids']).get('ids', [])
+        news['media_ids'] = parse_news_media(news['media_ids'])
         news_list.append(news)
     return news_list
 
 
+async def get_news_page(key: Optional[tuple] = None, newer: bool = False,
+                        limit: int = 5) -> tuple:
+    """Страница ленты новостей, от новых к старым, по ключу (created_at, id).
+
+    key — (created_at, id) крайней новости текущей страницы; без него —
+    самые свежие. newer=True — страница новее курсора, иначе старше.
+    Возвращает (новости, есть_ли_ещё_в_этом_направлении).
+    """
+    if key is None:
+        where, order, params = "", "DESC", ()
+    elif newer:
+        where, order, params = "WHERE (n.created_at, n.id) > (?, ?)", "ASC", tuple(key)
+    else:
+        where, order, params = "WHERE (n.created_at, n.id) < (?, ?)", "DESC", tuple(key)
+
+    db = await get_db()
+    async with db.execute(f"""
+        SELECT n.id, n.title, n.content, n.media_ids, n.views_count, n.unique_views, n.created_at,
+               o.name AS org_name
+        FROM news n
+        JOIN organizations o ON n.organization_id = o.id
+        {where}
+        ORDER BY n.created_at {order}, n.id {order}
+        LIMIT ?
+    """, (*params, limit + 1)) as cursor:
+        rows = await cursor.fetchall()
+    await db.close()
+
+    news_list = []
+    for row in rows[:limit]:
+        news = dict(row)
+        news['media_ids'] = parse_news_media(news['media_ids'])
+        news_list.append(news)
+    if key is not None and newer:
+        news_list.reverse()
+    return news_list, len(rows) > limit
+
+
+async def get_news_media(news_id: int) -> List[Dict]:
+    """Вложения новости (пустой список, если их нет или новости нет)"""
+    db = await get_db()
+    async with db.execute("SELECT media_ids FROM news WHERE id = ?", (news_id,)) as cursor:
+        row = await cursor.fetchone()
+    await db.close()
+    return parse_news_media(row['media_ids']) if row else []
+
+
 async def get_news_by_org(organization_id: int) -> List[Dict]:
     """Получить новости организации"""
     db = await get_db()
@@ -534,20 +1026,11 @@ async def get_news_by_org(organization_id: int) -> List[Dict]:
     news_list = []
     for row in rows:
         news = dict(row)
-        if news['media_ids']:
-            news['media_ids'] = json_to_dict(news['media_ids']).get('ids', [])
+        news['media_ids'] = parse_news_media(news['media_ids'])
         news_list.append(news)
     return news_list
 
 
-async def increment_news_views(news_id: int):
-    """Увеличить счетчик просмотров новости"""
-    db = await get_db()
-    await db.execute("UPDATE news SET views_count = views_count + 1 WHERE id = ?", (news_id,))
-    await db.commit()
-    await db.close()
-
-
 # ========== CONTRACTS ==========
 
 async def create_contract(creator_org_id: int, recipient_org_id: int, contract_data: Dict, file_id: Optional[str] = None) -> int:
@@ -588,6 +1071,14 @@ async def get_contracts_by_org(organization_id: int) -> List[Dict]:
     return contracts
 
 
+async def set_contract_file_id(contract_id: int, file_id: str):
+    """Сохранить file_id загруженного в Telegram PDF договора"""
+    db = await get_db()
+    await db.execute("UPDATE contracts SET file_id = ? WHERE id = ?", (file_id, contract_id))
+    await db.commit()
+    await db.close()
+
+
 async def get_contract_by_id(contract_id: int) -> Optional[Dict]:
     """Получить договор по ID"""
     db = await get_db()
@@ -627,6 +1118,7 @@ async def get_mentor_by_user_id(user_id: int) -> Optional[Dict]:
 
 async def update_mentor_availability(user_id: int, is_available: bool):
     """Обновить доступность наставника"""
+    global mentors_revision
     db = await get_db()
     await db.execute(
         "UPDATE mentors SET is_available = ? WHERE user_id = ?",
@@ -634,36 +1126,156 @@ async def update_mentor_availability(user_id: int, is_available: bool):
     )
     await db.commit()
     await db.close()
+    mentors_revision += 1
+
+
+# ========== MENTOR REQUESTS ==========
+
+async def get_mentor_loads() -> Dict[int, int]:
+    """Число принятых заявок по наставникам: mentor_id -> занятых мест"""
+    db = await get_db()
+    async with db.execute("""
+        SELECT mentor_id, COUNT(*) FROM mentor_requests
+        WHERE status = 'accepted'
+        GROUP BY mentor_id
+    """) as cursor:
+        rows = await cursor.fetchall()
+    await db.close()
+    return {mentor_id: count for mentor_id, count in rows}
+
+
+async def create_mentor_request(mentor_id: int, user_id: int) -> Optional[int]:
+    """Поставить заявку в очередь наставника; None, если открытая заявка уже есть"""
+    db = await get_db()
+    async with db.execute("""
+        INSERT INTO mentor_requests (mentor_id, user_id) VALUES (?, ?)
+        ON CONFLICT DO NOTHING
+    """, (mentor_id, user_id)) as cursor:
+        request_id = cursor.lastrowid if cursor.rowcount else None
+    await db.commit()
+    await db.close()
+    return request_id
+
+
+_MENTOR_REQUEST_SELECT = """
+    SELECT r.*, m.name AS mentor_name, m.contact_info AS mentor_contact, m.capacity,
+           mu.telegram_id AS mentor_telegram_id,
+           u.telegram_id AS requester_telegram_id, u.full_name AS requester_name,
+           o.name AS org_name, o.description AS org_description
+    FROM mentor_requests r
+    JOIN mentors m ON r.mentor_id = m.id
+    JOIN users mu ON m.user_id = mu.id
+    JOIN users u ON r.user_id = u.id
+    LEFT JOIN organizations o ON o.user_id = r.user_id
+"""
+
+
+async def get_mentor_request(request_id: int) -> Optional[Dict]:
+    """Заявка с контактами наставника и заявителя"""
+    db = await get_db()
+    async with db.execute(_MENTOR_REQUEST_SELECT + " WHERE r.id = ?", (request_id,)) as cursor:
+        row = await cursor.fetchone()
+    await db.close()
+    return dict(row) if row else None
+
+
+async def get_next_mentor_request(mentor_id: int) -> Optional[Dict]:
+    """Самая старая заявка в очереди наставника"""
+    db = await get_db()
+    async with db.execute(
+        _MENTOR_REQUEST_SELECT + " WHERE r.mentor_id = ? AND r.status = 'pending' ORDER BY r.id LIMIT 1",
+        (mentor_id,)
+    ) as cursor:
+        row = await cursor.fetchone()
+    await db.close()
+    return dict(row) if row else None
+
+
+async def count_pending_mentor_requests(mentor_id: int) -> int:
+    """Длина очереди заявок наставника"""
+    db = await get_db()
+    async with db.execute(
+        "SELECT COUNT(*) FROM mentor_requests WHERE mentor_id = ? AND status = 'pending'", (mentor_id,)
+    ) as cursor:
+        count = (await cursor.fetchone())[0]
+    await db.close()
+    return count
+
+
+async def accept_mentor_request(request_id: int) -> bool:
+    """Принять заявку, если у наставника есть свободное место.
+
+    Проверка места и смена статуса — один UPDATE, поэтому два одновременных
+    нажатия не превысят capacity.
+    """
+    db = await get_db()
+    async with db.execute("""
+        UPDATE mentor_requests SET status = 'accepted', decided_at = CURRENT_TIMESTAMP
+        WHERE id = ?1 AND status = 'pending'
+          AND (SELECT COUNT(*) FROM mentor_requests a
+               WHERE a.mentor_id = mentor_requests.mentor_id AND a.status = 'accepted')
+              < (SELECT capacity FROM mentors m WHERE m.id = mentor_requests.mentor_id)
+    """, (request_id,)) as cursor:
+        accepted = cursor.rowcount > 0
+    await db.commit()
+    await db.close()
+    return accepted
+
+
+async def set_mentor_request_status(request_id: int, from_status: str, to_status: str) -> bool:
+    """Перевести заявку из from_status в to_status; False, если статус уже другой"""
+    db = await get_db()
+    async with db.execute("""
+        UPDATE mentor_requests SET status = ?, decided_at = CURRENT_TIMESTAMP
+        WHERE id = ? AND status = ?
+    """, (to_status, request_id, from_status)) as cursor:
+        changed = cursor.rowcount > 0
+    await db.commit()
+    await db.close()
+    return changed
 
 
 # ========== LOGS ==========
 
-async def get_logs(limit: int = 100, user_id: Optional[int] = None) -> List[Dict]:
-    """Получить логи"""
+async def get_logs(limit: int = 100, user_id: Optional[int] = None,
+                   date_from: Optional[str] = None, date_to: Optional[str] = None) -> List[Dict]:
+    """Получить логи.
+
+    date_from/date_to задают период [date_from, date_to). Если период начинается
+    раньше самой старой записи в базе, недостающие логи читаются из архивов.
+    """
     db = await get_db()
 
+    conditions = []
+    params = []
     if user_id:
-        query = """
-            SELECT l.*, u.username, u.full_name
-            FROM logs l
-            JOIN users u ON l.user_id = u.id
-            WHERE l.user_id = ?
-            ORDER BY l.created_at DESC
-            LIMIT ?
-        """
-        params = (user_id, limit)
-    else:
-        query = """
-            SELECT l.*, u.username, u.full_name
-            FROM logs l
-            JOIN users u ON l.user_id = u.id
-            ORDER BY l.created_at DESC
-            LIMIT ?
-        """
-        params = (limit,)
+        conditions.append("l.user_id = ?")
+        params.append(user_id)
+    if date_from:
+        conditions.append("l.created_at >= ?")
+        params.append(date_from)
+    if date_to:
+        conditions.append("l.created_at < ?")
+        params.append(date_to)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    query = f"""
+        SELECT l.*, u.username, u.full_name
+        FROM logs l
+        JOIN users u ON l.user_id = u.id
+        {where}
+        ORDER BY l.created_at DESC
+        LIMIT ?
+    """
+    params.append(limit)
 
     async with db.execute(query, params) as cursor:
         rows = await cursor.fetchall()
+
+    oldest = None
+    if date_from:
+        async with db.execute("SELECT MIN(created_at) FROM logs") as cursor:
+            oldest = (await cursor.fetchone())[0]
     await db.close()
 
     logs = []
@@ -672,4 +1284,166 @@ async def get_logs(limit: int = 100, user_id: Optional[int] = None) -> List[Dict
         if log['details']:
             log['details'] = json_to_dict(log['details'])
         logs.append(log)
+
+    # Часть периода уже перенесена в архив
+    if date_from and len(logs) < limit and (oldest is None or date_from < oldest):
+        archive_to = min(date_to, oldest) if date_to and oldest else (date_to or oldest)
+        archived = await retention.read_archived_logs(date_from, archive_to, user_id)
+        logs.extend(archived)
+        logs.sort(key=lambda log: (log['created_at'], log['id']), reverse=True)
+        logs = logs[:limit]
+
     return logs
+
+
+# ========== BROADCASTS ==========
+
+def _broadcast_filter_sql(filters: Dict) -> tuple:
+    """Условия WHERE и параметры для аудитории рассылки"""
+    conditions = ["u.is_active = 1", "u.is_blocked = 0"]
+    params = []
+    if filters.get('role'):
+        conditions.append("u.role = ?")
+        params.append(filters['role'])
+    if filters.get('verified'):
+        conditions.append("o.verification_status = ?")
+        params.append(STATUS_VERIFIED)
+    if filters.get('turnover'):
+        conditions.append("o.turnover = ?")
+        params.append(codecs.turnovers.encode(filters['turnover']))
+    if filters.get('city_id'):
+        conditions.append("o.city_id = ?")
+        params.append(filters['city_id'])
+    elif filters.get('city'):
+        conditions.append("o.city = ?")
+        params.append(filters['city'])
+    return " AND ".join(conditions), params
+
+
+async def count_broadcast_recipients(filters: Dict) -> int:
+    """Посчитать получателей рассылки"""
+    where, params = _broadcast_filter_sql(filters)
+    db = await get_db()
+    async with db.execute(f"""
+        SELECT COUNT(*) FROM users u
+        LEFT JOIN organizations o ON o.user_id = u.id
+        WHERE {where}
+    """, params) as cursor:
+        row = await cursor.fetchone()
+    await db.close()
+    return row[0] if row else 0
+
+
+async def get_broadcast_recipients(filters: Dict, after_user_id: int, limit: int) -> List[Dict]:
+    """Получить следующую порцию получателей (курсор по users.id)"""
+    where, params = _broadcast_filter_sql(filters)
+    db = await get_db()
+    async with db.execute(f"""
+        SELECT u.id, u.telegram_id FROM users u
+        LEFT JOIN organizations o ON o.user_id = u.id
+        WHERE {where} AND u.id > ?
+        ORDER BY u.id
+        LIMIT ?
+    """, (*params, after_user_id, limit)) as cursor:
+        rows = await cursor.fetchall()
+    await db.close()
+    return [dict(row) for row in rows]
+
+
+async def create_broadcast(admin_id: int, text: str, filters: Dict, total_count: int) -> int:
+    """Создать рассылку"""
+    db = await get_db()
+    async with db.execute("""
+        INSERT INTO broadcasts (admin_id, text, filters, total_count)
+        VALUES (?, ?, ?, ?)
+    """, (admin_id, text, dict_to_json(filters), total_count)) as cursor:
+        broadcast_id = cursor.lastrowid
+    await db.commit()
+    await db.close()
+    return broadcast_id
+
+
+async def get_broadcast(broadcast_id: int) -> Optional[Dict]:
+    """Получить рассылку по ID"""
+    db = await get_db()
+    async with db.execute("SELECT * FROM broadcasts WHERE id = ?", (broadcast_id,)) as cursor:
+        row = await cursor.fetchone()
+    await db.close()
+    if row:
+        broadcast = dict(row)
+        broadcast['filters'] = json_to_dict(broadcast['filters'])
+        return broadcast
+    return None
+
+
+async def get_running_broadcast_ids() -> List[int]:
+    """Получить ID незавершённых рассылок (для возобновления после перезапуска)"""
+    db = await get_db()
+    async with db.execute("SELECT id FROM broadcasts WHERE status = 'running' ORDER BY id") as cursor:
+        rows = await cursor.fetchall()
+    await db.close()
+    return [row[0] for row in rows]
+
+
+async def set_broadcast_progress_message(broadcast_id: int, chat_id: int, message_id: int):
+    """Сохранить сообщение, в котором показывается прогресс рассылки"""
+    db = await get_db()
+    await db.execute(
+        "UPDATE broadcasts SET progress_chat_id = ?, progress_message_id = ? WHERE id = ?",
+        (chat_id, message_id, broadcast_id)
+    )
+    await db.commit()
+    await db.close()
+
+
+async def update_broadcast_progress(broadcast_id: int, last_user_id: int,
+                                    sent: int, failed: int, blocked: int):
+    """Сохранить прогресс рассылки"""
+    db = await get_db()
+    await db.execute("""
+        UPDATE broadcasts
+        SET last_user_id = ?, sent_count = ?, failed_count = ?, blocked_count = ?
+        WHERE id = ?
+    """, (last_user_id, sent, failed, blocked, broadcast_id))
+    await db.commit()
+    await db.close()
+
+
+async def set_broadcast_status(broadcast_id: int, status: str):
+    """Обновить статус рассылки"""
+    db = await get_db()
+    finished_at = datetime.utcnow().isoformat() if status in ('done', 'cancelled') else None
+    await db.execute(
+        "UPDATE broadcasts SET status = ?, finished_at = ? WHERE id = ?",
+        (status, finished_at, broadcast_id)
+    )
+    await db.commit()
+    await db.close()
+
+
+# ========== EGRUL CACHE ==========
+
+async def get_egrul_cache(inn: str, ttl_hours: int, negative_ttl_hours: int) -> Optional[Dict]:
+    """Свежая запись кэша проверки ИНН: {'data': dict | None} или None, если записи нет"""
+    db = await get_db()
+    async with db.execute("""
+        SELECT data FROM egrul_cache
+        WHERE inn = ?
+          AND fetched_at > datetime('now', CASE WHEN data IS NULL THEN ? ELSE ? END)
+    """, (inn, f"-{negative_ttl_hours} hours", f"-{ttl_hours} hours")) as cursor:
+        row = await cursor.fetchone()
+    await db.close()
+    if row:
+        return {'data': json_to_dict(row[0]) if row[0] else None}
+    return None
+
+
+async def set_egrul_cache(inn: str, data: Optional[Dict]):
+    """Сохранить ответ проверки ИНН (None — ИНН не найден)"""
+    db = await get_db()
+    await db.execute("""
+        INSERT INTO egrul_cache (inn, data, fetched_at) VALUES (?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(inn) DO UPDATE SET data = excluded.data, fetched_at = excluded.fetched_at
+    """, (inn, dict_to_json(data) if data is not None else None))
+    await db.commit()
+    await db.close()
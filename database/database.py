@@ -1,14 +1,64 @@
 import aiosqlite
 import json
+import logging
 from datetime import datetime
 from typing import Optional, Dict, List, Any
 
+from .duplicates import rebuild_index as rebuild_duplicate_index
+from . import codecs
+
+logger = logging.getLogger(__name__)
+
 DATABASE_PATH = "bot.db"
+AUTO_VACUUM_INCREMENTAL = 2
+
+_ORGANIZATIONS_TABLE = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER UNIQUE NOT NULL,
+        name TEXT NOT NULL,
+        legal_form INTEGER,
+        activity_field TEXT,
+        okved TEXT,
+        inn TEXT UNIQUE NOT NULL,
+        phone TEXT NOT NULL,
+        email TEXT NOT NULL,
+        telegram TEXT NOT NULL,
+        description TEXT NOT NULL,
+        turnover INTEGER,
+        can_give INTEGER NOT NULL DEFAULT 0,
+        can_give_custom TEXT,
+        need INTEGER NOT NULL DEFAULT 0,
+        need_custom TEXT,
+        interaction_format INTEGER,
+        city TEXT,
+        city_id INTEGER,
+        partnership_type INTEGER,
+        gdpr_consent INTEGER DEFAULT 1,
+        verification_status INTEGER DEFAULT 0,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users(id)
+    )
+"""
 
 
 async def init_db():
     """Инициализация базы данных и создание таблиц"""
     async with aiosqlite.connect(DATABASE_PATH) as db:
+        # Инкрементальный vacuum, чтобы освобождать место после архивации логов.
+        # Новая база создаётся сразу в этом режиме; существующую переводит
+        # разовая команда python -m database.maintenance --enable-incremental-vacuum
+        # (полный VACUUM переписывает файл, при старте бота его не запускаем).
+        await db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        async with db.execute("PRAGMA auto_vacuum") as cursor:
+            auto_vacuum = (await cursor.fetchone())[0]
+        if auto_vacuum != AUTO_VACUUM_INCREMENTAL:
+            logger.warning(
+                "auto_vacuum не включён: место после архивации логов не освобождается. "
+                "Остановите бота и выполните python -m database.maintenance --enable-incremental-vacuum"
+            )
+
         # Таблица пользователей
         await db.execute("""
             CREATE TABLE IF NOT EXISTS users (
@@ -18,37 +68,13 @@ async def init_db():
                 full_name TEXT,
                 role TEXT DEFAULT 'organization',
                 is_blocked INTEGER DEFAULT 0,
+                is_active INTEGER DEFAULT 1,
                 created_at TEXT DEFAULT CURRENT_TIMESTAMP
             )
         """)
 
-        # Таблица организаций
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS organizations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER UNIQUE NOT NULL,
-                name TEXT NOT NULL,
-                legal_form TEXT NOT NULL,
-                activity_field TEXT,
-                okved TEXT,
-                inn TEXT UNIQUE NOT NULL,
-                phone TEXT NOT NULL,
-                email TEXT NOT NULL,
-                telegram TEXT NOT NULL,
-                description TEXT NOT NULL,
-                turnover TEXT NOT NULL,
-                can_give TEXT NOT NULL,
-                need TEXT NOT NULL,
-                interaction_format TEXT NOT NULL,
-                city TEXT,
-                partnership_type TEXT NOT NULL,
-                gdpr_consent INTEGER DEFAULT 1,
-                verification_status TEXT DEFAULT 'pending',
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(id)
-            )
-        """)
+        # Таблица организаций (перечисления — целочисленные коды, см. codecs.py)
+        await db.execute(_ORGANIZATIONS_TABLE.format(table="organizations"))
 
         # Таблица верификаций
         await db.execute("""
@@ -114,6 +140,7 @@ async def init_db():
                 content TEXT NOT NULL,
                 media_ids TEXT,
                 views_count INTEGER DEFAULT 0,
+                unique_views INTEGER DEFAULT 0,
                 created_at TEXT DEFAULT CURRENT_TIMESTAMP,
                 FOREIGN KEY (organization_id) REFERENCES organizations(id)
             )
@@ -129,6 +156,7 @@ async def init_db():
                 experience TEXT NOT NULL,
                 contact_info TEXT NOT NULL,
                 is_available INTEGER DEFAULT 1,
+                capacity INTEGER DEFAULT 3,
                 created_at TEXT DEFAULT CURRENT_TIMESTAMP,
                 FOREIGN KEY (user_id) REFERENCES users(id)
             )
@@ -159,11 +187,364 @@ async def init_db():
                 FOREIGN KEY (user_id) REFERENCES users(id)
             )
         """)
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_logs_created_at ON logs(created_at)")
+
+        # Таблица рассылок
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS broadcasts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                admin_id INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                filters TEXT,
+                status TEXT DEFAULT 'running',
+                total_count INTEGER DEFAULT 0,
+                sent_count INTEGER DEFAULT 0,
+                failed_count INTEGER DEFAULT 0,
+                blocked_count INTEGER DEFAULT 0,
+                last_user_id INTEGER DEFAULT 0,
+                progress_chat_id INTEGER,
+                progress_message_id INTEGER,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                finished_at TEXT,
+                FOREIGN KEY (admin_id) REFERENCES users(id)
+            )
+        """)
+
+        # Аналитика: воронка по организациям и водяные знаки обработанных строк
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS analytics_org_funnel (
+                org_id INTEGER PRIMARY KEY,
+                cohort_week TEXT,
+                registered_at TEXT,
+                verified_at TEXT,
+                first_like_at TEXT,
+                first_match_at TEXT,
+                first_contract_at TEXT
+            )
+        """)
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_analytics_funnel_cohort ON analytics_org_funnel(cohort_week)"
+        )
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS analytics_watermarks (
+                source TEXT PRIMARY KEY,
+                last_id INTEGER NOT NULL DEFAULT 0,
+                last_key TEXT
+            )
+        """)
+
+        # Лента изменений ролей: реплики бота опрашивают MAX(id), чтобы обновить кэш админов
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS role_changes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                telegram_id INTEGER NOT NULL,
+                new_role TEXT NOT NULL,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+        # Кэш ответов онлайн-проверки ИНН; data IS NULL — ИНН не найден
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS egrul_cache (
+                inn TEXT PRIMARY KEY,
+                data TEXT,
+                fetched_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+        # Черновики регистрации организаций (пошаговое сохранение анкеты)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS registration_drafts (
+                telegram_id INTEGER PRIMARY KEY,
+                state TEXT NOT NULL,
+                data TEXT NOT NULL,
+                updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_registration_drafts_updated ON registration_drafts(updated_at)"
+        )
+
+        # Индекс для поиска дублей организаций: нормализованные контакты и триграммы названия
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS org_fingerprints (
+                organization_id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                phone TEXT,
+                email TEXT,
+                telegram TEXT
+            )
+        """)
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_org_fingerprints_phone ON org_fingerprints(phone)")
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_org_fingerprints_email ON org_fingerprints(email)")
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_org_fingerprints_telegram ON org_fingerprints(telegram)")
+        await db.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS org_names_fts USING fts5(name, tokenize='trigram')"
+        )
+        # Частоты триграмм для выбора самых редких при поиске дублей
+        await db.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS org_names_vocab USING fts5vocab(org_names_fts, 'row')"
+        )
+
+        # Лента новостей листается по ключу (created_at, id)
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_news_created ON news(created_at, id)")
+
+        # HyperLogLog-скетчи уникальных зрителей новостей (news_views.py)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS news_viewers (
+                news_id INTEGER PRIMARY KEY,
+                sketch BLOB NOT NULL,
+                FOREIGN KEY (news_id) REFERENCES news(id)
+            )
+        """)
+
+        # Подписки на напоминания о дедлайнах конкурсов
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS competition_reminders (
+                resource_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (resource_id, user_id),
+                FOREIGN KEY (resource_id) REFERENCES resources(id),
+                FOREIGN KEY (user_id) REFERENCES users(id)
+            ) WITHOUT ROWID
+        """)
+
+        # Заявки организаций наставникам: очередь pending, принятые занимают место наставника
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS mentor_requests (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                mentor_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                decided_at TEXT,
+                FOREIGN KEY (mentor_id) REFERENCES mentors(id),
+                FOREIGN KEY (user_id) REFERENCES users(id)
+            )
+        """)
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_mentor_requests_queue ON mentor_requests(mentor_id, status, id)"
+        )
+        # Не больше одной открытой заявки пользователя к одному наставнику
+        await db.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_mentor_requests_open
+            ON mentor_requests(mentor_id, user_id) WHERE status IN ('pending', 'accepted')
+        """)
+
+        # Переписка партнёров через бота: журнал пересланных сообщений
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS match_messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                match_id INTEGER NOT NULL,
+                sender_org_id INTEGER NOT NULL,
+                message_id INTEGER NOT NULL,
+                relayed_message_id INTEGER,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (match_id) REFERENCES matches(id),
+                FOREIGN KEY (sender_org_id) REFERENCES organizations(id)
+            )
+        """)
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_match_messages_match ON match_messages(match_id, id)")
+
+        # Открытый чат пользователя: его сообщения пересылаются партнёру по матчу
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS relay_conversations (
+                telegram_id INTEGER PRIMARY KEY,
+                match_id INTEGER NOT NULL,
+                FOREIGN KEY (match_id) REFERENCES matches(id)
+            ) WITHOUT ROWID
+        """)
+
+        # Файлы документов организаций: одна строка на содержимое (file_unique_id
+        # одинаков у одного файла, кто бы его ни загрузил), само содержимое — в Telegram
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS document_files (
+                file_unique_id TEXT PRIMARY KEY,
+                file_id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                file_name TEXT,
+                mime_type TEXT,
+                file_size INTEGER,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP
+            ) WITHOUT ROWID
+        """)
+
+        # Документы организаций: сертификаты, лицензии и прочее
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS org_documents (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                organization_id INTEGER NOT NULL,
+                file_unique_id TEXT NOT NULL,
+                doc_type TEXT NOT NULL,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (organization_id) REFERENCES organizations(id),
+                FOREIGN KEY (file_unique_id) REFERENCES document_files(file_unique_id)
+            )
+        """)
+        # Страницы списка организации по ключу id
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_org_documents_org ON org_documents(organization_id, id)"
+        )
+        # Файл прикрепляется к организации один раз; по этому же индексу ищутся
+        # другие организации с тем же файлом
+        await db.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_org_documents_file
+            ON org_documents(file_unique_id, organization_id)
+        """)
+
+        # Миграции существующих баз
+        await add_column_if_missing(db, "users", "is_active", "INTEGER DEFAULT 1")
+        await add_column_if_missing(db, "verifications", "duplicates", "TEXT")
+        await add_column_if_missing(db, "organizations", "city_id", "INTEGER")
+        await add_column_if_missing(db, "news", "unique_views", "INTEGER DEFAULT 0")
+        # Курсор аналитики по verified_at (одобрение — UPDATE старой строки, id не растёт)
+        await add_column_if_missing(db, "analytics_watermarks", "last_key", "TEXT")
+        # Дедлайн конкурса в UTC (additional_data.deadline — текст, как ввёл администратор)
+        await add_column_if_missing(db, "resources", "deadline_at", "TEXT")
+        await add_column_if_missing(db, "resources", "reminded_at", "TEXT")
+        # Сколько организаций наставник ведёт одновременно
+        await add_column_if_missing(db, "mentors", "capacity", "INTEGER DEFAULT 3")
+        await migrate_organization_codes(db)
+        await normalize_matches(db)
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_organizations_city_id ON organizations(city_id)")
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_verifications_verified ON verifications(verified_at, id)"
+        )
+        await db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_organizations_status_turnover
+            ON organizations(verification_status, turnover)
+        """)
+        await db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_resources_deadline
+            ON resources(deadline_at) WHERE is_active = 1 AND deadline_at IS NOT NULL
+        """)
+        await rebuild_duplicate_index(db)
 
         await db.commit()
         print("База данных инициализирована")
 
 
+async def migrate_organization_codes(db) -> bool:
+    """Перевести organizations со строковых перечислений и JSON опций на коды.
+
+    SQLite не меняет тип колонки, поэтому таблица пересоздаётся: строки
+    копируются в organizations_new с перекодированием, старая таблица
+    удаляется, новая переименовывается. Всё — одной транзакцией.
+    """
+    async with db.execute("PRAGMA table_info(organizations)") as cursor:
+        columns = {row[1]: row[2] for row in await cursor.fetchall()}
+    if columns.get("turnover", "").upper() != "TEXT":
+        return False
+
+    def encode_enum(column, label):
+        return codecs.ENUM_COLUMNS[column].encode(label)
+
+    def encode_options(column, data, part):
+        selected = json_to_dict(data).get('options', [])
+        return codecs.OPTION_COLUMNS[column].encode(selected)[part]
+
+    await db.create_function("encode_enum", 2, encode_enum, deterministic=True)
+    await db.create_function("encode_options", 3, encode_options, deterministic=True)
+
+    await db.execute("BEGIN IMMEDIATE")
+    try:
+        await db.execute(_ORGANIZATIONS_TABLE.format(table="organizations_new"))
+        await db.execute("""
+            INSERT INTO organizations_new (
+                id, user_id, name, legal_form, activity_field, okved, inn,
+                phone, email, telegram, description, turnover,
+                can_give, can_give_custom, need, need_custom,
+                interaction_format, city, city_id, partnership_type,
+                gdpr_consent, verification_status, created_at, updated_at
+            )
+            SELECT
+                id, user_id, name, encode_enum('legal_form', legal_form), activity_field, okved, inn,
+                phone, email, telegram, description, encode_enum('turnover', turnover),
+                encode_options('can_give', can_give, 0), encode_options('can_give', can_give, 1),
+                encode_options('need', need, 0), encode_options('need', need, 1),
+                encode_enum('interaction_format', interaction_format), city, city_id,
+                encode_enum('partnership_type', partnership_type),
+                gdpr_consent, encode_enum('verification_status', verification_status),
+                created_at, updated_at
+            FROM organizations
+        """)
+        async with db.execute("""
+            SELECT COUNT(*) FROM organizations_new
+            WHERE legal_form IS NULL OR turnover IS NULL OR interaction_format IS NULL
+               OR partnership_type IS NULL OR verification_status IS NULL
+        """) as cursor:
+            unknown = (await cursor.fetchone())[0]
+        await db.execute("DROP TABLE organizations")
+        await db.execute("ALTER TABLE organizations_new RENAME TO organizations")
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
+    if unknown:
+        logger.warning(f"Организаций со значениями не из списков настроек: {unknown} (сохранены как NULL)")
+    logger.info("Таблица organizations переведена на целочисленные коды")
+    return True
+
+
+async def normalize_matches(db) -> bool:
+    """Привести matches к виду org1_id < org2_id без повторов пар и проиндексировать.
+
+    Пара хранится одной строкой: (меньший id, больший id). Из повторов
+    остаётся самая ранняя строка; она активна, если активна любая из копий.
+    Уникальный индекс по паре заодно служит поиском по org1_id, второй
+    индекс — по org2_id.
+    """
+    async with db.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_matches_pair'"
+    ) as cursor:
+        if await cursor.fetchone():
+            return False
+
+    await db.execute("BEGIN IMMEDIATE")
+    try:
+        await db.execute("""
+            UPDATE matches SET org1_id = org2_id, org2_id = org1_id
+            WHERE org1_id > org2_id
+        """)
+        # Индекс по org2_id нужен и поиску повторов ниже: без него EXISTS
+        # просматривает всю таблицу на каждую неактивную строку
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_matches_org2 ON matches(org2_id, org1_id)")
+        await db.execute("""
+            UPDATE matches SET is_active = 1
+            WHERE is_active = 0 AND EXISTS (
+                SELECT 1 FROM matches other
+                WHERE other.org1_id = matches.org1_id AND other.org2_id = matches.org2_id
+                  AND other.is_active = 1
+            )
+        """)
+        cursor = await db.execute("""
+            DELETE FROM matches
+            WHERE org1_id = org2_id OR id NOT IN (
+                SELECT MIN(id) FROM matches GROUP BY org1_id, org2_id
+            )
+        """)
+        removed = cursor.rowcount
+        await db.execute("CREATE UNIQUE INDEX idx_matches_pair ON matches(org1_id, org2_id)")
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
+    if removed:
+        logger.info(f"Удалено повторяющихся матчей: {removed}")
+    return True
+
+
+async def add_column_if_missing(db, table: str, column: str, definition: str):
+    """Добавить колонку в существующую таблицу, если её ещё нет"""
+    async with db.execute(f"PRAGMA table_info({table})") as cursor:
+        columns = [row[1] for row in await cursor.fetchall()]
+    if column not in columns:
+        await db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
 async def get_db():
     """Получить подключение к базе данных"""
     db = await aiosqlite.connect(DATABASE_PATH)
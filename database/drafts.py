@@ -0,0 +1,138 @@
+"""Черновики регистрации: пошаговое сохранение анкеты с отложенной записью"""
+import asyncio
+import logging
+from typing import Dict, Optional, Tuple
+
+from config.config import settings
+from .database import get_db, dict_to_json, json_to_dict
+
+logger = logging.getLogger(__name__)
+
+
+class DraftStore:
+    """Черновики анкет по telegram_id.
+
+    save()/delete() только запоминают последнее состояние в памяти; раз в
+    flush_interval_ms все накопленные изменения пишутся одной транзакцией.
+    Серия быстрых правок одного черновика (например, отметки в списке опций)
+    превращается в одну запись. get() сначала смотрит в несброшенные изменения.
+    """
+
+    def __init__(self, flush_interval_ms: int):
+        self.flush_interval = flush_interval_ms / 1000
+        # telegram_id -> (state, data_json) или None для удаления
+        self._pending: Dict[int, Optional[Tuple[str, str]]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._stop: Optional[asyncio.Event] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self):
+        """Запустить фоновый сброс"""
+        self._stop = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Остановить сброс и записать накопленное"""
+        if not self._task:
+            return
+        task, self._task = self._task, None
+        self._stop.set()
+        await task
+
+    def save(self, telegram_id: int, state: str, data: Dict):
+        """Запомнить шаг и данные анкеты"""
+        self._pending[telegram_id] = (state, dict_to_json(data))
+
+    def delete(self, telegram_id: int):
+        """Удалить черновик (регистрация завершена или прервана)"""
+        self._pending[telegram_id] = None
+
+    async def get(self, telegram_id: int) -> Optional[Dict]:
+        """Черновик: {'state', 'data', 'updated_at'} или None"""
+        if telegram_id in self._pending:
+            pending = self._pending[telegram_id]
+            if pending is None:
+                return None
+            return {'state': pending[0], 'data': json_to_dict(pending[1]), 'updated_at': None}
+
+        db = await get_db()
+        async with db.execute("""
+            SELECT state, data, updated_at FROM registration_drafts
+            WHERE telegram_id = ? AND updated_at > datetime('now', ?)
+        """, (telegram_id, f"-{settings.REGISTRATION_DRAFT_TTL_HOURS} hours")) as cursor:
+            row = await cursor.fetchone()
+        await db.close()
+        if row:
+            return {'state': row[0], 'data': json_to_dict(row[1]), 'updated_at': row[2]}
+        return None
+
+    async def flush(self) -> int:
+        """Записать накопленные изменения; возвращает число черновиков"""
+        if not self._pending:
+            return 0
+        batch, self._pending = self._pending, {}
+
+        upserts = [(tid, value[0], value[1]) for tid, value in batch.items() if value is not None]
+        deletes = [(tid,) for tid, value in batch.items() if value is None]
+
+        db = await get_db()
+        try:
+            if upserts:
+                await db.executemany("""
+                    INSERT INTO registration_drafts (telegram_id, state, data, updated_at)
+                    VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                    ON CONFLICT(telegram_id) DO UPDATE SET
+                        state = excluded.state,
+                        data = excluded.data,
+                        updated_at = excluded.updated_at
+                """, upserts)
+            if deletes:
+                await db.executemany("DELETE FROM registration_drafts WHERE telegram_id = ?", deletes)
+            await db.commit()
+        except Exception:
+            logger.exception(f"Не удалось записать {len(batch)} черновиков регистрации")
+            # Возвращаем несохранённое, не затирая более свежие изменения
+            for tid, value in batch.items():
+                self._pending.setdefault(tid, value)
+        finally:
+            await db.close()
+        return len(batch)
+
+    async def _run(self):
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+
+draft_store = DraftStore(flush_interval_ms=settings.REGISTRATION_DRAFT_FLUSH_MS)
+
+
+async def delete_stale_drafts() -> int:
+    """Удалить черновики, которые не менялись дольше REGISTRATION_DRAFT_TTL_HOURS"""
+    db = await get_db()
+    async with db.execute(
+        "DELETE FROM registration_drafts WHERE updated_at < datetime('now', ?)",
+        (f"-{settings.REGISTRATION_DRAFT_TTL_HOURS} hours",)
+    ) as cursor:
+        deleted = cursor.rowcount
+    await db.commit()
+    await db.close()
+    return deleted
+
+
+async def run_draft_cleanup():
+    """Фоновая задача: удаление устаревших черновиков"""
+    while True:
+        try:
+            deleted = await delete_stale_drafts()
+            if deleted:
+                logger.info(f"Удалено устаревших черновиков регистрации: {deleted}")
+        except Exception:
+            logger.exception("Ошибка очистки черновиков регистрации")
+        await asyncio.sleep(settings.REGISTRATION_DRAFT_CLEANUP_INTERVAL_HOURS * 3600)
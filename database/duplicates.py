@@ -0,0 +1,195 @@
+"""Поиск возможных дублей организаций при регистрации.
+
+Нормализованные название и контакты хранятся в org_fingerprints (индексы по
+телефону, email и Telegram), название дополнительно — в FTS5-таблице
+org_names_fts с триграммным токенизатором. Кандидаты по названию набираются
+по самым редким триграммам запроса (частоты берутся из org_names_vocab), пока
+суммарная длина их списков не превысит POSTINGS_BUDGET: частые триграммы
+вроде «строй» или «сервис» почти ничего не говорят о сходстве, а чтение их
+списков и есть основная стоимость поиска. Для CANDIDATE_LIMIT кандидатов с
+наибольшим числом общих триграмм считается коэффициент Жаккара.
+"""
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+
+# Организационно-правовые формы и служебные слова, не влияющие на сходство
+_LEGAL_WORDS = {
+    "ооо", "ип", "ао", "пао", "зао", "оао", "нко", "ано", "чоу", "фонд",
+    "общество", "с", "ограниченной", "ответственностью", "индивидуальный", "предприниматель",
+    "llc", "ltd", "inc",
+}
+_WORD_RE = re.compile(r"[0-9a-zа-я]+")
+
+NAME_THRESHOLD = 0.5
+CANDIDATE_LIMIT = 50
+POSTINGS_BUDGET = 5000
+TOP_MATCHES = 5
+
+
+def normalize_name(name: str) -> str:
+    words = _WORD_RE.findall((name or "").casefold().replace("ё", "е"))
+    return " ".join(word for word in words if word not in _LEGAL_WORDS)
+
+
+def normalize_phone(phone: str) -> str:
+    digits = re.sub(r"\D", "", phone or "")
+    # +7 / 8 / без кода страны — сравниваем последние 10 цифр
+    if len(digits) < 7:
+        return ""
+    return digits[-10:]
+
+
+def normalize_email(email: str) -> str:
+    email = (email or "").strip().casefold()
+    return email if "@" in email else ""
+
+
+def normalize_telegram(handle: str) -> str:
+    handle = (handle or "").strip().casefold()
+    handle = re.sub(r"^(https?://)?(t\.me/|telegram\.me/)", "", handle)
+    handle = handle.lstrip("@")
+    return handle if len(handle) >= 3 else ""
+
+
+def trigrams(text: str) -> set:
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(a: str, b: str) -> float:
+    """Коэффициент Жаккара по триграммам"""
+    ta, tb = trigrams(a), trigrams(b)
+    if not ta or not tb:
+        return 0.0
+    return len(ta & tb) / len(ta | tb)
+
+
+def fingerprint(data: Dict) -> Dict:
+    """Нормализованные поля анкеты (ключи как в форме регистрации)"""
+    return {
+        'name': normalize_name(data.get('name')),
+        'phone': normalize_phone(data.get('phone')),
+        'email': normalize_email(data.get('email')),
+        'telegram': normalize_telegram(data.get('telegram_contact') or data.get('telegram')),
+    }
+
+
+def _fts_term(gram: str) -> str:
+    return '"' + gram.replace('"', '""') + '"'
+
+
+async def _name_candidates(db, name: str) -> List[int]:
+    """Организации с наибольшим числом общих триграмм названия"""
+    grams = sorted(g for g in trigrams(name) if " " not in g)
+    if not grams:
+        return []
+    placeholders = ",".join("?" * len(grams))
+    async with db.execute(
+        f"SELECT term, doc FROM org_names_vocab WHERE term IN ({placeholders})", grams
+    ) as cursor:
+        frequency = dict(await cursor.fetchall())
+
+    counts = Counter()
+    postings = 0
+    for gram in sorted((g for g in grams if g in frequency), key=frequency.get):
+        # Самую редкую триграмму берём всегда, остальные — пока укладываемся в бюджет
+        if postings and postings + frequency[gram] > POSTINGS_BUDGET:
+            break
+        postings += frequency[gram]
+        async with db.execute(
+            "SELECT rowid FROM org_names_fts WHERE org_names_fts MATCH ?", (_fts_term(gram),)
+        ) as cursor:
+            counts.update(row[0] for row in await cursor.fetchall())
+    return [org_id for org_id, _ in counts.most_common(CANDIDATE_LIMIT)]
+
+
+async def index_organization(db, organization_id: int, data: Dict):
+    """Добавить организацию в индекс дублей (в транзакции вызывающего)"""
+    fp = fingerprint(data)
+    await db.execute("""
+        INSERT OR REPLACE INTO org_fingerprints (organization_id, name, phone, email, telegram)
+        VALUES (?, ?, ?, ?, ?)
+    """, (organization_id, fp['name'], fp['phone'], fp['email'], fp['telegram']))
+    await db.execute("DELETE FROM org_names_fts WHERE rowid = ?", (organization_id,))
+    await db.execute("INSERT INTO org_names_fts (rowid, name) VALUES (?, ?)", (organization_id, fp['name']))
+
+
+async def find_duplicates(db, data: Dict, exclude_id: Optional[int] = None) -> List[Dict]:
+    """Похожие организации: [{'organization_id', 'name', 'inn', 'score', 'reasons'}], лучшие сначала"""
+    fp = fingerprint(data)
+    matches: Dict[int, Dict] = {}
+
+    def add(org_id: int, score: float, reason: str):
+        if org_id == exclude_id:
+            return
+        match = matches.setdefault(org_id, {'organization_id': org_id, 'score': 0.0, 'reasons': []})
+        match['score'] = max(match['score'], score)
+        match['reasons'].append(reason)
+
+    for field, reason in (('phone', 'телефон'), ('email', 'email'), ('telegram', 'telegram')):
+        if not fp[field]:
+            continue
+        async with db.execute(
+            f"SELECT organization_id FROM org_fingerprints WHERE {field} = ? LIMIT ?",
+            (fp[field], CANDIDATE_LIMIT)
+        ) as cursor:
+            for row in await cursor.fetchall():
+                add(row[0], 1.0, reason)
+
+    candidates = await _name_candidates(db, fp['name'])
+    if candidates:
+        placeholders = ",".join("?" * len(candidates))
+        async with db.execute(
+            f"SELECT organization_id, name FROM org_fingerprints WHERE organization_id IN ({placeholders})",
+            candidates
+        ) as cursor:
+            for org_id, name in await cursor.fetchall():
+                score = similarity(fp['name'], name)
+                if score >= NAME_THRESHOLD:
+                    add(org_id, score, f"название {score:.0%}")
+
+    if not matches:
+        return []
+
+    top = sorted(matches.values(), key=lambda m: m['score'], reverse=True)[:TOP_MATCHES]
+    placeholders = ",".join("?" * len(top))
+    async with db.execute(
+        f"SELECT id, name, inn FROM organizations WHERE id IN ({placeholders})",
+        [m['organization_id'] for m in top]
+    ) as cursor:
+        orgs = {row[0]: (row[1], row[2]) for row in await cursor.fetchall()}
+
+    result = []
+    for match in top:
+        if match['organization_id'] in orgs:
+            match['name'], match['inn'] = orgs[match['organization_id']]
+            match['score'] = round(match['score'], 2)
+            result.append(match)
+    return result
+
+
+async def rebuild_index(db) -> int:
+    """Проиндексировать организации, которых ещё нет в индексе (миграция старых баз)"""
+    async with db.execute("""
+        SELECT o.id, o.name, o.phone, o.email, o.telegram FROM organizations o
+        LEFT JOIN org_fingerprints f ON f.organization_id = o.id
+        WHERE f.organization_id IS NULL
+    """) as cursor:
+        rows = await cursor.fetchall()
+    for org_id, name, phone, email, telegram in rows:
+        await index_organization(db, org_id, {'name': name, 'phone': phone, 'email': email, 'telegram': telegram})
+    return len(rows)
+
+
+def format_duplicates(duplicates: List[Dict]) -> str:
+    """Блок «возможные дубли» для карточки заявки"""
+    if not duplicates:
+        return ""
+    lines = ["\n\n⚠️ <b>Возможные дубли:</b>"]
+    for dup in duplicates:
+        lines.append(
+            f"• #{dup['organization_id']} {dup['name']} (ИНН {dup['inn']}) — "
+            f"{dup['score']:.0%}: {', '.join(dup['reasons'])}"
+        )
+    return "\n".join(lines)
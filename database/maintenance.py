@@ -0,0 +1,52 @@
+"""Разовые операции обслуживания базы, запускаются вручную при остановленном боте"""
+import argparse
+import asyncio
+import os
+import time
+
+from . import database
+from .database import AUTO_VACUUM_INCREMENTAL, get_db
+
+
+async def enable_incremental_vacuum() -> bool:
+    """Перевести существующую базу в auto_vacuum=INCREMENTAL.
+
+    Полный VACUUM переписывает файл целиком и держит эксклюзивную блокировку,
+    поэтому запускается вручную при остановленном боте. Возвращает False,
+    если режим уже включён.
+    """
+    db = await get_db()
+    try:
+        async with db.execute("PRAGMA auto_vacuum") as cursor:
+            if (await cursor.fetchone())[0] == AUTO_VACUUM_INCREMENTAL:
+                return False
+        await db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        await db.execute("VACUUM")
+    finally:
+        await db.close()
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Разовые операции обслуживания базы")
+    parser.add_argument("--database", default=database.DATABASE_PATH, help="файл базы")
+    parser.add_argument("--enable-incremental-vacuum", action="store_true",
+                        help="включить auto_vacuum=INCREMENTAL полным VACUUM (бот должен быть остановлен)")
+    args = parser.parse_args()
+    if not args.enable_incremental_vacuum:
+        parser.error("не задана операция")
+    if not os.path.exists(args.database):
+        parser.error(f"нет файла базы {args.database}")
+
+    database.DATABASE_PATH = args.database
+    size = os.path.getsize(args.database)
+    started = time.perf_counter()
+    if asyncio.run(enable_incremental_vacuum()):
+        print(f"auto_vacuum=INCREMENTAL включён за {time.perf_counter() - started:.1f} с, "
+              f"размер {size / 2**20:.1f} -> {os.path.getsize(args.database) / 2**20:.1f} МБ")
+    else:
+        print("auto_vacuum=INCREMENTAL уже включён")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""Учёт просмотров новостей: накопление в памяти и пакетная запись.
+
+Показ новости пользователю только запоминается в памяти (record). Раз в
+NEWS_VIEWS_FLUSH_MS все накопленные показы пишутся короткими транзакциями:
+news.views_count увеличивается на число разных зрителей за интервал
+(повторные показы тому же человеку внутри интервала не считаются), а
+уникальные зрители за всё время оцениваются по HyperLogLog-скетчу из
+news_viewers.sketch, результат кладётся в news.unique_views.
+"""
+import asyncio
+import hashlib
+import logging
+import math
+import struct
+from typing import Dict, Iterable, Optional, Set
+
+from config.config import settings
+from .database import get_db
+
+logger = logging.getLogger(__name__)
+
+
+class HyperLogLog:
+    """Оценка числа уникальных элементов по 2**P регистрам (ошибка ~3%).
+
+    Пока ненулевых регистров мало, скетч хранится разреженно — словарём
+    в памяти и парами (регистр, значение) в базе, поэтому у новости с
+    десятком зрителей он занимает десятки байт, а не килобайт.
+    """
+
+    P = 10
+    M = 1 << P
+    _REST_BITS = 64 - P
+    _SPARSE = b"S"
+    _DENSE = b"D"
+    _PAIR = struct.Struct("<HB")
+    _POW = [2.0 ** -r for r in range(_REST_BITS + 2)]
+
+    __slots__ = ("sparse", "dense")
+
+    def __init__(self):
+        self.sparse: Optional[Dict[int, int]] = {}
+        self.dense: Optional[bytearray] = None
+
+    @staticmethod
+    def hash(value: int) -> int:
+        digest = hashlib.blake2b(value.to_bytes(8, "little", signed=True), digest_size=8).digest()
+        return int.from_bytes(digest, "little")
+
+    def add_hash(self, hashed: int):
+        index = hashed >> self._REST_BITS
+        rest = hashed & ((1 << self._REST_BITS) - 1)
+        rank = self._REST_BITS - rest.bit_length() + 1
+        if self.dense is not None:
+            if rank > self.dense[index]:
+                self.dense[index] = rank
+        elif rank > self.sparse.get(index, 0):
+            self.sparse[index] = rank
+            if len(self.sparse) * self._PAIR.size >= self.M:
+                self._densify()
+
+    def _densify(self):
+        self.dense = bytearray(self.M)
+        for index, rank in self.sparse.items():
+            self.dense[index] = rank
+        self.sparse = None
+
+    def estimate(self) -> int:
+        m = self.M
+        if self.dense is not None:
+            zeros = self.dense.count(0)
+            total = sum(map(self._POW.__getitem__, self.dense))
+        else:
+            zeros = m - len(self.sparse)
+            total = zeros + sum(map(self._POW.__getitem__, self.sparse.values()))
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / total
+        if raw <= 2.5 * m and zeros:
+            # Поправка для малых мощностей (linear counting)
+            return round(m * math.log(m / zeros))
+        return round(raw)
+
+    def to_bytes(self) -> bytes:
+        if self.dense is not None:
+            return self._DENSE + bytes(self.dense)
+        pack = self._PAIR.pack
+        return self._SPARSE + b"".join(pack(index, rank) for index, rank in self.sparse.items())
+
+    @classmethod
+    def from_bytes(cls, data: Optional[bytes]) -> "HyperLogLog":
+        sketch = cls()
+        if not data:
+            return sketch
+        if data[:1] == cls._DENSE:
+            sketch.dense = bytearray(data[1:])
+            sketch.sparse = None
+        else:
+            sketch.sparse = dict(cls._PAIR.iter_unpack(data[1:]))
+        return sketch
+
+
+class NewsViewCounter:
+    """Показы новостей, накопленные с последнего сброса: news_id -> хэши зрителей"""
+
+    # Новостей в одной транзакции сброса (и в одном запросе IN (...) —
+    # не больше лимита параметров SQLite)
+    FLUSH_CHUNK = 500
+    CHUNK_PAUSE = 0.02
+
+    def __init__(self, flush_interval_ms: int):
+        self.flush_interval = flush_interval_ms / 1000
+        self._pending: Dict[int, Set[int]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._stop: Optional[asyncio.Event] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self):
+        """Запустить фоновый сброс"""
+        self._stop = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Остановить сброс и записать накопленное"""
+        if not self._task:
+            return
+        task, self._task = self._task, None
+        self._stop.set()
+        await task
+
+    def record(self, news_ids: Iterable[int], viewer_id: int):
+        """Запомнить, что пользователь viewer_id увидел новости news_ids"""
+        hashed = HyperLogLog.hash(viewer_id)
+        for news_id in news_ids:
+            viewers = self._pending.get(news_id)
+            if viewers is None:
+                viewers = self._pending[news_id] = set()
+            viewers.add(hashed)
+
+    async def flush(self) -> int:
+        """Записать накопленные показы; возвращает число новостей.
+
+        Пачка пишется частями по FLUSH_CHUNK новостей, каждая своей короткой
+        транзакцией, чтобы не держать блокировку записи долго. Скетчи меняет
+        только этот сброс, поэтому они читаются и пересчитываются до BEGIN.
+        """
+        if not self._pending:
+            return 0
+        batch, self._pending = self._pending, {}
+        ids = list(batch)
+
+        db = None
+        written = 0
+        try:
+            db = await get_db()
+            for written in range(0, len(ids), self.FLUSH_CHUNK):
+                chunk = ids[written:written + self.FLUSH_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                async with db.execute(
+                    f"SELECT news_id, sketch FROM news_viewers WHERE news_id IN ({placeholders})", chunk
+                ) as cursor:
+                    sketches = {news_id: HyperLogLog.from_bytes(data) for news_id, data in await cursor.fetchall()}
+
+                sketch_rows = []
+                count_rows = []
+                for news_id in chunk:
+                    viewers = batch[news_id]
+                    sketch = sketches.get(news_id) or HyperLogLog()
+                    for hashed in viewers:
+                        sketch.add_hash(hashed)
+                    sketch_rows.append((news_id, sketch.to_bytes()))
+                    count_rows.append((len(viewers), sketch.estimate(), news_id))
+
+                await db.execute("BEGIN IMMEDIATE")
+                await db.executemany("""
+                    INSERT INTO news_viewers (news_id, sketch) VALUES (?, ?)
+                    ON CONFLICT(news_id) DO UPDATE SET sketch = excluded.sketch
+                """, sketch_rows)
+                await db.executemany(
+                    "UPDATE news SET views_count = views_count + ?, unique_views = ? WHERE id = ?",
+                    count_rows
+                )
+                await db.commit()
+                # Пауза между частями — окно для остальных писателей
+                await asyncio.sleep(self.CHUNK_PAUSE)
+        except Exception:
+            if db is not None and db.in_transaction:
+                await db.rollback()
+            logger.exception(f"Не удалось записать просмотры {len(ids) - written} новостей")
+            # Возвращаем несохранённое, объединяя с показами, пришедшими за время сброса
+            for news_id in ids[written:]:
+                self._pending.setdefault(news_id, set()).update(batch[news_id])
+        finally:
+            if db is not None:
+                await db.close()
+        return len(batch)
+
+    async def _run(self):
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+
+news_views = NewsViewCounter(flush_interval_ms=settings.NEWS_VIEWS_FLUSH_MS)
@@ -0,0 +1,146 @@
+"""Архивация и ротация таблицы логов"""
+import asyncio
+import gzip
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Optional, Dict, List
+
+from config.config import settings
+from .database import get_db
+
+logger = logging.getLogger(__name__)
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _archive_path(month: str) -> str:
+    """Путь к архиву логов за месяц (YYYY-MM)"""
+    return os.path.join(settings.LOG_ARCHIVE_DIR, f"logs-{month}.jsonl.gz")
+
+
+def _append_archive(rows: List[Dict]):
+    """Дописать строки в помесячные архивы.
+
+    Каждый вызов добавляет новый gzip-member в конец файла,
+    gzip.open читает такие файлы целиком.
+    """
+    os.makedirs(settings.LOG_ARCHIVE_DIR, exist_ok=True)
+    by_month: Dict[str, List[Dict]] = {}
+    for row in rows:
+        by_month.setdefault(row['created_at'][:7], []).append(row)
+
+    for month, month_rows in by_month.items():
+        payload = "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in month_rows)
+        with gzip.open(_archive_path(month), "at", encoding="utf-8") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def _months_between(date_from: str, date_to: str) -> List[str]:
+    """Список месяцев YYYY-MM в диапазоне (включительно)"""
+    year, month = int(date_from[:4]), int(date_from[5:7])
+    end_year, end_month = int(date_to[:4]), int(date_to[5:7])
+    months = []
+    while (year, month) <= (end_year, end_month):
+        months.append(f"{year:04d}-{month:02d}")
+        month += 1
+        if month > 12:
+            year, month = year + 1, 1
+    return months
+
+
+def _read_archive(date_from: str, date_to: Optional[str], user_id: Optional[int]) -> List[Dict]:
+    """Прочитать логи из архивов за период [date_from, date_to)"""
+    last = date_to or datetime.utcnow().strftime(TIMESTAMP_FORMAT)
+    logs = []
+    seen_ids = set()
+    for month in _months_between(date_from, last):
+        path = _archive_path(month)
+        if not os.path.exists(path):
+            continue
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                log = json.loads(line)
+                # После сбоя между записью архива и удалением батч может повториться
+                if log['id'] in seen_ids:
+                    continue
+                if log['created_at'] < date_from or (date_to and log['created_at'] >= date_to):
+                    continue
+                if user_id and log['user_id'] != user_id:
+                    continue
+                seen_ids.add(log['id'])
+                logs.append(log)
+    return logs
+
+
+async def read_archived_logs(date_from: str, date_to: Optional[str] = None,
+                             user_id: Optional[int] = None) -> List[Dict]:
+    """Получить логи из архивов (details уже распакованы)"""
+    logs = await asyncio.to_thread(_read_archive, date_from, date_to, user_id)
+    for log in logs:
+        if log['details']:
+            log['details'] = json.loads(log['details'])
+    return logs
+
+
+async def archive_old_logs(retention_days: Optional[int] = None) -> int:
+    """Перенести логи старше срока хранения в архив и удалить их из базы.
+
+    Удаление идёт небольшими батчами, каждый в своей короткой транзакции,
+    чтобы не держать блокировку записи. Возвращает количество перенесённых строк.
+    """
+    retention_days = retention_days if retention_days is not None else settings.LOG_RETENTION_DAYS
+    cutoff = (datetime.utcnow() - timedelta(days=retention_days)).strftime(TIMESTAMP_FORMAT)
+    archived = 0
+
+    db = await get_db()
+    try:
+        while True:
+            async with db.execute("""
+                SELECT l.id, l.user_id, l.action, l.details, l.created_at,
+                       u.username, u.full_name
+                FROM logs l
+                LEFT JOIN users u ON l.user_id = u.id
+                WHERE l.created_at < ?
+                ORDER BY l.created_at, l.id
+                LIMIT ?
+            """, (cutoff, settings.LOG_RETENTION_BATCH_SIZE)) as cursor:
+                rows = [dict(row) for row in await cursor.fetchall()]
+
+            if not rows:
+                break
+
+            await asyncio.to_thread(_append_archive, rows)
+
+            ids = [row['id'] for row in rows]
+            placeholders = ", ".join("?" * len(ids))
+            await db.execute(f"DELETE FROM logs WHERE id IN ({placeholders})", ids)
+            await db.commit()
+            archived += len(rows)
+
+            # Отдаём управление другим корутинам между батчами
+            await asyncio.sleep(0)
+
+        if archived:
+            # Прагма освобождает страницы по мере чтения результата
+            async with db.execute(f"PRAGMA incremental_vacuum({settings.LOG_VACUUM_PAGES})") as cursor:
+                await cursor.fetchall()
+    finally:
+        await db.close()
+
+    return archived
+
+
+async def run_log_retention():
+    """Фоновая задача: периодическая архивация логов"""
+    while True:
+        try:
+            archived = await archive_old_logs()
+            if archived:
+                logger.info(f"Логи: в архив перенесено {archived} записей")
+        except Exception:
+            logger.exception("Ошибка архивации логов")
+        await asyncio.sleep(settings.LOG_RETENTION_INTERVAL_HOURS * 3600)
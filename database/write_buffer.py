@@ -0,0 +1,162 @@
+"""Буфер отложенной записи для логов и других fire-and-forget вставок"""
+import asyncio
+import logging
+from typing import Optional, Dict, List, Tuple
+
+from config.config import settings
+from .database import get_db
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class WriteBehindBuffer:
+    """Накапливает вставки в памяти и пишет их пачкой в одной транзакции.
+
+    Сброс происходит каждые flush_interval_ms миллисекунд или при накоплении
+    max_batch строк. Очередь ограничена max_size: если база не успевает,
+    put() ждёт освобождения места. Неудачная пачка повторяется с растущей
+    паузой, а после retry_attempts попыток пишется построчно, чтобы одна
+    плохая строка не потянула за собой остальные. Если фоновая задача
+    всё же остановилась, put() пишет в базу напрямую.
+    """
+
+    def __init__(self, flush_interval_ms: int, max_batch: int, max_size: int,
+                 retry_attempts: int = 5, retry_delay_ms: int = 200):
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_batch = max_batch
+        self.max_size = max_size
+        self.retry_attempts = retry_attempts
+        self.retry_delay = retry_delay_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Запустить фоновый сброс"""
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Сбросить всё накопленное и остановить буфер"""
+        if not self._task:
+            return
+        task, self._task = self._task, None
+        if not task.done():
+            await self._queue.put(_STOP)
+            await asyncio.wait((task,))
+        if not task.cancelled() and task.exception():
+            logger.error("Буфер отложенной записи завершился с ошибкой", exc_info=task.exception())
+
+        # Если задача сброса остановилась раньше, дописываем оставшееся сами
+        leftover = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not _STOP:
+                leftover.append(item)
+        if leftover:
+            await self._flush(leftover)
+
+    async def put(self, sql: str, params: Tuple):
+        """Поставить вставку в очередь"""
+        item = (sql, params)
+        if not self.running:
+            await self._flush([item])
+            return
+        if not self._queue.full():
+            self._queue.put_nowait(item)
+            return
+
+        # Очередь полна: ждём места, но не дольше, чем живёт задача сброса
+        waiter = asyncio.ensure_future(self._queue.put(item))
+        await asyncio.wait((waiter, self._task), return_when=asyncio.FIRST_COMPLETED)
+        if not waiter.done():
+            waiter.cancel()
+            await self._flush([item])
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queue.get()
+            batch = []
+            stopping = item is _STOP
+            if not stopping:
+                batch.append(item)
+
+            deadline = loop.time() + self.flush_interval
+            while not stopping and len(batch) < self.max_batch:
+                if self._queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    item = self._queue.get_nowait()
+
+                if item is _STOP:
+                    stopping = True
+                else:
+                    batch.append(item)
+
+            if batch:
+                try:
+                    await self._flush(batch)
+                except Exception:
+                    logger.exception(f"Ошибка сброса {len(batch)} отложенных строк")
+            if stopping:
+                return
+
+    async def _flush(self, batch: List[Tuple[str, Tuple]]):
+        """Записать пачку с повторами; после исчерпания попыток — построчно"""
+        delay = self.retry_delay
+        for attempt in range(1, self.retry_attempts + 1):
+            if await self._write(batch):
+                return
+            if attempt < self.retry_attempts:
+                await asyncio.sleep(delay)
+                delay *= 2
+
+        lost = len(batch)
+        if len(batch) > 1:
+            lost = 0
+            for item in batch:
+                if not await self._write([item]):
+                    lost += 1
+        if lost:
+            logger.error(f"Не удалось записать {lost} из {len(batch)} отложенных строк")
+
+    async def _write(self, batch: List[Tuple[str, Tuple]]) -> bool:
+        """Одна попытка: executemany по каждому запросу, один commit"""
+        grouped: Dict[str, List[Tuple]] = {}
+        for sql, params in batch:
+            grouped.setdefault(sql, []).append(params)
+
+        db = None
+        try:
+            db = await get_db()
+            for sql, rows in grouped.items():
+                await db.executemany(sql, rows)
+            await db.commit()
+            return True
+        except Exception:
+            logger.exception(f"Не удалось записать {len(batch)} отложенных строк")
+            return False
+        finally:
+            if db is not None:
+                await db.close()
+
+
+log_buffer = WriteBehindBuffer(
+    flush_interval_ms=settings.WRITE_BUFFER_FLUSH_MS,
+    max_batch=settings.WRITE_BUFFER_MAX_BATCH,
+    max_size=settings.WRITE_BUFFER_MAX_SIZE,
+    retry_attempts=settings.WRITE_BUFFER_RETRY_ATTEMPTS,
+    retry_delay_ms=settings.WRITE_BUFFER_RETRY_DELAY_MS
+)
@@ -0,0 +1,102 @@
+"""Замер обновления аналитики: время на порцию новых строк при растущей истории.
+
+На каждом шаге в базу добавляется одинаковая порция организаций, лайков,
+матчей, договоров и одобренных верификаций, после чего выполняется
+refresh_analytics. Время обновления должно оставаться ровным, пока история
+растёт. Параллельно пишет «бот»: вставляет лайки своим подключением и
+запоминает самое долгое ожидание блокировки записи — его ограничивает
+размер окна (--batch).
+
+    python -m tests.bench_analytics --steps 10 --orgs 2000 --batch 2000 200000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from config.config import settings
+from database import analytics, database, init_db
+from database.database import get_db
+from tests.test_analytics import approve, seed_organizations
+
+
+def seed_step(path: str, rng: random.Random, orgs: int):
+    """Порция новых строк: на организацию 5 лайков, 0.5 матча, 0.1 договора"""
+    con = sqlite3.connect(path)
+    ids = seed_organizations(con, orgs)
+    total = ids[-1]
+    pairs = lambda count: [(rng.randint(1, total), rng.randint(1, total)) for _ in range(count)]  # noqa: E731
+    con.executemany("INSERT INTO likes (from_org_id, to_org_id) VALUES (?, ?)", pairs(orgs * 5))
+    con.executemany("INSERT INTO matches (org1_id, org2_id) VALUES (?, ?)", pairs(orgs // 2))
+    con.executemany(
+        "INSERT INTO contracts (creator_org_id, recipient_org_id, contract_data) VALUES (?, ?, ?)",
+        [pair + (json.dumps({'type': 'services'}),) for pair in pairs(orgs // 10)]
+    )
+    con.commit()
+    approve(con, rng.sample(ids, len(ids) * 3 // 5), datetime.utcnow() - timedelta(hours=1))
+    con.close()
+    return total
+
+
+async def writer(waits: list, stop: asyncio.Event):
+    """Лайки от бота во время обновления: наибольшее время одной записи"""
+    db = await get_db()
+    try:
+        while not stop.is_set():
+            started = time.perf_counter()
+            await db.execute("INSERT INTO likes (from_org_id, to_org_id) VALUES (1, 2)")
+            await db.commit()
+            waits.append(time.perf_counter() - started)
+            await asyncio.sleep(0.001)
+    finally:
+        await db.close()
+
+
+async def run(path: str, steps: int, orgs: int, batch: int):
+    settings.ANALYTICS_REFRESH_BATCH = batch
+    await init_db()
+    rng = random.Random(29)
+    waits, stop = [], asyncio.Event()
+    task = asyncio.create_task(writer(waits, stop))
+    await asyncio.sleep(0.2)
+    stop.set()
+    await task
+    print(f"окно {batch} строк; запись бота без обновления — до {max(waits) * 1000:.1f} мс")
+    for _ in range(steps):
+        total = seed_step(path, rng, orgs)
+        waits, stop = [], asyncio.Event()
+        task = asyncio.create_task(writer(waits, stop))
+        await asyncio.sleep(0.01)
+        started = time.perf_counter()
+        await analytics.refresh_analytics()
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await task
+        print(f"  организаций {total:>7}: обновление {elapsed * 1000:6.1f} мс, "
+              f"запись бота ждала до {max(waits) * 1000:6.1f} мс")
+
+    started = time.perf_counter()
+    await analytics.refresh_analytics()
+    print(f"  обновление без новых строк: {(time.perf_counter() - started) * 1000:.1f} мс")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замер обновления аналитики")
+    parser.add_argument("--steps", type=int, default=10)
+    parser.add_argument("--orgs", type=int, default=2000, help="новых организаций на шаге")
+    parser.add_argument("--batch", type=int, nargs="+", default=[2000, 200000],
+                        help="размеры окна ANALYTICS_REFRESH_BATCH")
+    args = parser.parse_args()
+    for batch in args.batch:
+        with tempfile.TemporaryDirectory() as tmp:
+            database.DATABASE_PATH = os.path.join(tmp, "bot.db")
+            asyncio.run(run(database.DATABASE_PATH, args.steps, args.orgs, batch))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Замер справочника городов: загрузка, поиск, подсказки и перенос старых записей.
+
+Загрузка — медиана нескольких прогонов CityIndex.load и память дерева
+(tracemalloc). Поиск и подсказки — среднее на запрос по смеси написаний.
+Перенос — crud.normalize_organization_cities на базе из --orgs организаций
+с городами в разных написаниях, затем повторный запуск.
+
+    python -m tests.bench_cities --orgs 100000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from config.config import settings
+from database import crud, database, init_db
+from bot.utils.cities import CityIndex, city_index
+from tests.test_cities import seed_organizations
+
+QUERIES = ["Москва", "г. Москва", "мск", "Moskva", "питер", "нижний-новгород", "Ростов на Дону",
+           "Орел", "Новосибирк", "Урюпинск", "екб", "Kazan"]
+PREFIXES = ["Мо", "Ново", "Сан", "Ека", "Кра", "Ниж", "Влад", "Ростов"]
+
+
+def measure_load(runs: int):
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        CityIndex.load()
+        times.append((time.perf_counter() - started) * 1000)
+    tracemalloc.start()
+    index = CityIndex.load()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"загрузка: {statistics.median(times):.1f} мс (медиана {runs}, бюджет "
+          f"{settings.CITIES_LOAD_BUDGET_MS} мс), {index.size} городов, {size / 1024:.0f} КБ")
+
+
+def measure_calls(name: str, func, args: list, repeat: int):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for arg in args:
+            func(arg)
+    elapsed = time.perf_counter() - started
+    print(f"{name}: {elapsed / (repeat * len(args)) * 1e6:.1f} мкс на запрос")
+
+
+def spellings(rng: random.Random, count: int) -> list:
+    """Города как их вводили до справочника: канон, «г.», регистр, синонимы, опечатки"""
+    cities = [city for city in map(city_index.get, range(1, city_index.size + 1)) if city]
+    variants = []
+    for _ in range(count):
+        city = rng.choice(cities)
+        variants.append(rng.choice([
+            city.name, f"г. {city.name}", city.name.upper(), city.name.lower(),
+            city.name.replace("-", " "), city.name[:-1] + "ъ", f"{city.name} (область)",
+        ]))
+    return variants
+
+
+async def measure_migration(path: str, orgs: int):
+    await init_db()
+    con = sqlite3.connect(path)
+    seed_organizations(con, spellings(random.Random(39), orgs))
+    con.close()
+
+    started = time.perf_counter()
+    updated = await crud.normalize_organization_cities(city_index.lookup)
+    print(f"перенос {orgs} организаций: {time.perf_counter() - started:.2f} с, обновлено {updated}")
+    started = time.perf_counter()
+    await crud.normalize_organization_cities(city_index.lookup)
+    print(f"повторный запуск: {time.perf_counter() - started:.2f} с")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замер справочника городов")
+    parser.add_argument("--orgs", type=int, default=100_000, help="организаций для переноса")
+    parser.add_argument("--repeat", type=int, default=20_000, help="повторов смеси запросов")
+    parser.add_argument("--load-runs", type=int, default=20)
+    args = parser.parse_args()
+
+    measure_load(args.load_runs)
+    measure_calls("поиск", city_index.lookup, QUERIES, args.repeat)
+    measure_calls("подсказки", city_index.suggest, PREFIXES, args.repeat)
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DATABASE_PATH = os.path.join(tmp, "bot.db")
+        asyncio.run(measure_migration(database.DATABASE_PATH, args.orgs))
+
+
+if __name__ == "__main__":
+    main()
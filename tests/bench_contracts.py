@@ -0,0 +1,77 @@
+"""Замер вёрстки PDF договоров: PDF в секунду и задержка цикла событий.
+
+Сравниваются вёрстка прямо в цикле событий, asyncio.to_thread и пул
+процессов ContractRenderer с разным числом воркеров. Пока идёт вёрстка,
+фоновая задача каждые 5 мс проверяет, насколько опоздало её пробуждение, —
+это задержка, которую увидели бы остальные апдейты бота.
+
+    python -m tests.bench_contracts --contracts 60 --workers 1 2
+"""
+import argparse
+import asyncio
+import time
+
+from bot.utils.contracts import ContractRenderer, contract_context, render_contract_pdf
+from tests.test_contracts import make_contract
+
+TICK = 0.005
+
+
+async def watch_loop(stalls: list, stop: asyncio.Event):
+    """Наибольшее опоздание пробуждения цикла событий"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(TICK)
+        stalls.append(loop.time() - started - TICK)
+
+
+async def measure(name: str, contracts: list, render):
+    stalls, stop = [], asyncio.Event()
+    watcher = asyncio.create_task(watch_loop(stalls, stop))
+    await asyncio.sleep(TICK * 2)
+    started = time.perf_counter()
+    await render(contracts)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await watcher
+    print(f"{name:<28} {len(contracts) / elapsed:6.0f} PDF/с, задержка цикла до {max(stalls) * 1000:.1f} мс")
+
+
+async def run(count: int, workers_list: list):
+    contracts = [make_contract(n) for n in range(1, count + 1)]
+
+    async def inline(items):
+        for contract in items:
+            render_contract_pdf(contract['contract_data']['type'], contract_context(contract))
+
+    async def in_thread(items):
+        await asyncio.gather(*(ContractRenderer(1).render(contract) for contract in items))
+
+    # Прогрев: шрифты и шаблоны в этом процессе
+    await inline(contracts[:1])
+    await measure("в цикле событий", contracts, inline)
+    await measure("asyncio.to_thread", contracts, in_thread)
+
+    for workers in workers_list:
+        renderer = ContractRenderer(workers)
+        renderer.start()
+        # Ждём, пока процессы поднимутся и прогреют шаблоны
+        await renderer.render(contracts[0])
+        try:
+            await measure(f"пул процессов, воркеров: {workers}", contracts,
+                          lambda items: asyncio.gather(*(renderer.render(contract) for contract in items)))
+        finally:
+            renderer.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замер вёрстки PDF договоров")
+    parser.add_argument("--contracts", type=int, default=60)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2])
+    args = parser.parse_args()
+    asyncio.run(run(args.contracts, args.workers))
+
+
+if __name__ == "__main__":
+    main()
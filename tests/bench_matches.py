@@ -0,0 +1,121 @@
+"""Замер поиска партнёров по матчам: прежний CASE-join против индексных выборок.
+
+База в прежнем виде: --matches пар в случайном порядке (org1_id то меньше,
+то больше org2_id) по --orgs организациям, плюс --duplicates повторов
+в обратном порядке, без индексов по matches. Замеряется прежний запрос
+без индексов и с индексами по org1_id/org2_id, затем однократная миграция
+normalize_matches и crud.get_partner_orgs. Наборы партнёров до и после
+миграции должны совпасть, а повторная пара — упираться в уникальный индекс.
+
+    python -m tests.bench_matches --orgs 100000 --matches 1000000 --duplicates 2000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from database import crud, database, init_db
+from database.database import get_db
+from tests.test_cities import seed_organizations
+
+LEGACY_QUERY = """
+    SELECT DISTINCT o.id, o.name
+    FROM matches m
+    JOIN organizations o ON (
+        CASE
+            WHEN m.org1_id = ? THEN m.org2_id = o.id
+            WHEN m.org2_id = ? THEN m.org1_id = o.id
+        END
+    )
+    WHERE m.is_active = 1 AND (m.org1_id = ? OR m.org2_id = ?)
+"""
+
+
+def seed_legacy(path: str, rng: random.Random, orgs: int, matches: int, duplicates: int):
+    """Матчи в прежнем виде: порядок пары случайный, есть повторы, индексов нет"""
+    con = sqlite3.connect(path)
+    con.execute("DROP INDEX idx_matches_pair")
+    con.execute("DROP INDEX idx_matches_org2")
+    seed_organizations(con, [None] * orgs)
+    pairs = set()
+    while len(pairs) < matches:
+        low, high = sorted(rng.sample(range(1, orgs + 1), 2))
+        pairs.add((low, high))
+    rows = [(pair if rng.random() < 0.5 else pair[::-1]) + (int(rng.random() < 0.95),) for pair in pairs]
+    rows += [(org2, org1, 1) for org1, org2, _ in rng.sample(rows, duplicates)]
+    con.executemany("INSERT INTO matches (org1_id, org2_id, is_active) VALUES (?, ?, ?)", rows)
+    con.commit()
+    con.close()
+
+
+def legacy_partners(con: sqlite3.Connection, org_ids: list) -> tuple:
+    """Наборы партнёров прежним запросом и среднее время запроса, мс"""
+    started = time.perf_counter()
+    partners = [{row[0] for row in con.execute(LEGACY_QUERY, (org_id,) * 4)} for org_id in org_ids]
+    return partners, (time.perf_counter() - started) / len(org_ids) * 1000
+
+
+async def run(path: str, rng: random.Random, samples: int, repeat: int):
+    con = sqlite3.connect(path)
+    org_count = con.execute("SELECT COUNT(*) FROM organizations").fetchone()[0]
+    before = con.execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+    org_ids = rng.sample(range(1, org_count + 1), samples)
+
+    expected, elapsed = legacy_partners(con, org_ids)
+    print(f"прежний CASE-join без индексов: {elapsed:.0f} мс на запрос")
+    con.execute("CREATE INDEX legacy_org1 ON matches(org1_id)")
+    con.execute("CREATE INDEX legacy_org2 ON matches(org2_id)")
+    _, elapsed = legacy_partners(con, org_ids)
+    print(f"прежний CASE-join с индексами org1_id/org2_id: {elapsed:.0f} мс на запрос")
+    con.execute("DROP INDEX legacy_org1")
+    con.execute("DROP INDEX legacy_org2")
+    con.commit()
+
+    db = await get_db()
+    try:
+        started = time.perf_counter()
+        await database.normalize_matches(db)
+        elapsed = time.perf_counter() - started
+    finally:
+        await db.close()
+    after = con.execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+    print(f"миграция: {elapsed:.1f} с, удалено строк {before - after}")
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        partners = [{row['id'] for row in await crud.get_partner_orgs(org_id)} for org_id in org_ids]
+    elapsed = (time.perf_counter() - started) / (repeat * len(org_ids)) * 1000
+    print(f"get_partner_orgs: {elapsed:.2f} мс на запрос (с открытием подключения), "
+          f"наборы партнёров {'совпадают' if partners == expected else 'РАЗЛИЧАЮТСЯ'}")
+
+    org1, org2 = con.execute("SELECT org1_id, org2_id FROM matches LIMIT 1").fetchone()
+    try:
+        con.execute("INSERT INTO matches (org1_id, org2_id) VALUES (?, ?)", (org1, org2))
+        print("повторная пара: ВСТАВЛЕНА")
+    except sqlite3.IntegrityError as e:
+        print(f"повторная пара: {e}")
+    con.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замер поиска партнёров по матчам")
+    parser.add_argument("--orgs", type=int, default=100_000)
+    parser.add_argument("--matches", type=int, default=1_000_000)
+    parser.add_argument("--duplicates", type=int, default=2000, help="повторов пар в обратном порядке")
+    parser.add_argument("--samples", type=int, default=5, help="организаций для замера запросов")
+    parser.add_argument("--repeat", type=int, default=100, help="повторов get_partner_orgs")
+    args = parser.parse_args()
+
+    rng = random.Random(48)
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DATABASE_PATH = os.path.join(tmp, "bot.db")
+        asyncio.run(init_db())
+        seed_legacy(database.DATABASE_PATH, rng, args.orgs, args.matches, args.duplicates)
+        asyncio.run(run(database.DATABASE_PATH, rng, args.samples, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
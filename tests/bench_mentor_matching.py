@@ -0,0 +1,128 @@
+"""Замер подбора наставников: построение индекса, время подбора и точность.
+
+Синтетические анкеты: около 80 общих слов («маркетинг», «продажи» — есть у
+тысяч наставников) и словарь из --rare редких ниш. Запросы — организации со
+случайными потребностями, сферой и описанием. Топ-5 индекса сравнивается
+с эталоном — тем же tf-idf на float без упаковки. Для сравнения приведён
+прежний вариант с обрезкой списков частых слов до 256 лучших анкет.
+
+    python -m tests.bench_mentor_matching --mentors 10000 --queries 300
+"""
+import argparse
+import heapq
+import math
+import random
+import statistics
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+
+from config.config import settings
+from bot.utils.mentor_matching import Mentor, MentorIndex, _terms, org_query
+
+COMMON = (
+    "маркетинг продажи финансы бухгалтерия налоги юриспруденция договоры управление персонал кадры рекрутинг "
+    "брендинг дизайн разработка программирование аналитика данные стратегия инвестиции стартапы экспорт логистика "
+    "производство закупки маркетплейсы реклама таргетинг контент социальные сети мероприятия event спонсорство "
+    "образование обучение коучинг лидерство переговоры франшиза ресторан розница e-commerce туризм строительство "
+    "недвижимость агробизнес медицина экология энергетика IT кибербезопасность облака искусственный интеллект "
+    "публичные выступления PR СМИ партнерства гранты некоммерческие фонды волонтеры краудфандинг"
+).split()
+TOP = 5
+CAP = 256
+
+
+class Reference:
+    """Тот же tf-idf на float, без упаковки и без обрезки (или с обрезкой cap)"""
+
+    def __init__(self, mentors: list, loads: dict, cap: int = 0):
+        counts = [Counter(_terms(f"{m.expertise} {m.experience}")) for m in mentors]
+        df = Counter(term for terms in counts for term in terms)
+        idf = {term: math.log(1 + len(mentors) / freq) for term, freq in df.items()}
+        postings = defaultdict(list)
+        for mentor, terms in zip(mentors, counts):
+            weights = {term: (1 + math.log(tf)) * idf[term] for term, tf in terms.items()}
+            norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+            for term, weight in weights.items():
+                postings[term].append((weight / norm, mentor.id))
+        if cap:
+            postings = {term: heapq.nlargest(cap, items) for term, items in postings.items()}
+        self.postings = postings
+        self.free = {m.id for m in mentors if loads.get(m.id, 0) < m.capacity}
+
+    def top(self, query: dict, limit: int) -> set:
+        scores = defaultdict(float)
+        for term, query_weight in query.items():
+            for weight, mentor_id in self.postings.get(term, ()):
+                scores[mentor_id] += weight * query_weight
+        return {mentor_id for _, mentor_id in heapq.nlargest(
+            limit, ((score, mentor_id) for mentor_id, score in scores.items() if mentor_id in self.free)
+        )}
+
+
+def generate(rng: random.Random, mentors: int, rare: int, queries: int):
+    niches = [f"ниша{i}" for i in range(rare)]
+
+    def text(words: int) -> str:
+        return " ".join(rng.choice(COMMON if rng.random() < 0.8 else niches) for _ in range(words))
+
+    profiles = [Mentor(i, i, f"Наставник {i}", text(rng.randint(5, 25)), text(rng.randint(5, 40)), 3)
+                for i in range(1, mentors + 1)]
+    loads = {i: rng.randint(0, 3) for i in range(1, mentors + 1)}
+    orgs = [{'need': {'options': rng.sample(settings.NEED_OPTIONS, 3)}, 'activity_field': text(3),
+             'description': text(rng.randint(10, 60))} for _ in range(queries)]
+    return profiles, loads, [org_query(org) for org in orgs]
+
+
+def percentiles(times: list) -> str:
+    times = sorted(times)
+    return f"p50 {times[len(times) // 2]:.1f} мс, p99 {times[int(len(times) * 0.99)]:.1f} мс"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замер подбора наставников")
+    parser.add_argument("--mentors", type=int, default=10_000)
+    parser.add_argument("--rare", type=int, default=3000, help="редких слов в словаре")
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--builds", type=int, default=3, help="повторов построения индекса")
+    args = parser.parse_args()
+
+    mentors, loads, queries = generate(random.Random(46), args.mentors, args.rare, args.queries)
+
+    times = []
+    for _ in range(args.builds):
+        started = time.perf_counter()
+        MentorIndex(mentors, loads)
+        times.append(time.perf_counter() - started)
+    tracemalloc.start()
+    index = MentorIndex(mentors, loads)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"построение по {args.mentors} анкетам: {statistics.median(times):.2f} с; "
+          f"слов {len(index._sparse) + len(index._dense)}, из них упакованных {len(index._dense)}; "
+          f"память индекса {size / 1024 / 1024:.0f} МБ")
+
+    times, found = [], []
+    for query in queries:
+        started = time.perf_counter()
+        found.append({mentor.id for mentor, _ in index.match(query, TOP)})
+        times.append((time.perf_counter() - started) * 1000)
+    print(f"подбор: {percentiles(times)}")
+
+    reference = Reference(mentors, loads)
+    same = sum(ids == reference.top(query, TOP) for ids, query in zip(found, queries))
+    print(f"топ-{TOP} совпадает с эталоном float tf-idf: {same}/{len(queries)}")
+
+    capped = Reference(mentors, loads, cap=CAP)
+    times, overlap = [], []
+    for query in queries:
+        started = time.perf_counter()
+        ids = capped.top(query, TOP)
+        times.append((time.perf_counter() - started) * 1000)
+        overlap.append(len(ids & reference.top(query, TOP)) / TOP)
+    print(f"обрезка списков до {CAP}: {percentiles(times)}, пересечение топ-{TOP} с эталоном "
+          f"{statistics.mean(overlap):.0%}")
+
+
+if __name__ == "__main__":
+    main()
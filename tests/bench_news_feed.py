@@ -0,0 +1,127 @@
+"""Замер ленты новостей: стоимость страницы по глубине листания и кэш страниц.
+
+Лента без кэша (cache_size=0) листается от свежих новостей к старым на
+--pages страниц: время первой страницы, медиана и время последней, страница
+у самой старой новости. Затем — страница из кэша и прежний запрос
+ORDER BY created_at без индекса. В конце 30 страниц пролистываются назад и
+вперёд, тексты должны совпасть.
+
+    python -m tests.bench_news_feed --news 1000000 --pages 2000
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from config.config import settings
+from database import database, init_db
+from bot.keyboards.news import NewsPageCallback
+from bot.utils.news_feed import NewsFeed, _stamp
+from tests.test_cities import seed_organizations
+
+LEGACY_QUERY = """
+    SELECT n.*, o.name as org_name
+    FROM news n
+    JOIN organizations o ON n.organization_id = o.id
+    ORDER BY n.created_at DESC
+    LIMIT 10
+"""
+
+
+def seed_news(path: str, count: int, orgs: int = 1000):
+    """Новости раз в 30 секунд, по три с одинаковым created_at — ключ различает их по id"""
+    con = sqlite3.connect(path)
+    seed_organizations(con, [None] * orgs)
+    started = datetime(2020, 1, 1)
+    con.executemany(
+        "INSERT INTO news (organization_id, title, content, views_count, created_at) VALUES (?, ?, ?, ?, ?)",
+        ((i % orgs + 1, f"Новость {i} <важно> & срочно", "Текст новости. " * 20, i % 97,
+          (started + timedelta(seconds=30 * (i // 3))).strftime("%Y-%m-%d %H:%M:%S"))
+         for i in range(count))
+    )
+    con.commit()
+    con.close()
+
+
+def navigation(page) -> dict:
+    """Кнопки листания страницы: {'newer': ..., 'older': ...}"""
+    buttons = {}
+    for row in page[1].inline_keyboard if page[1] else []:
+        for button in row:
+            if button.callback_data.startswith(f"{NewsPageCallback.__prefix__}:"):
+                position = NewsPageCallback.unpack(button.callback_data)
+                buttons['newer' if position.newer else 'older'] = position
+    return buttons
+
+
+async def timed(feed: NewsFeed, position=None):
+    started = time.perf_counter()
+    page = await feed.page(position)
+    return page, (time.perf_counter() - started) * 1000
+
+
+async def run(path: str, pages: int, repeat: int):
+    feed = NewsFeed(page_size=settings.NEWS_PAGE_SIZE, cache_size=0, ttl=0)
+
+    page, first = await timed(feed)
+    print(f"первая страница: {first:.1f} мс")
+    times = []
+    for _ in range(pages):
+        page, elapsed = await timed(feed, navigation(page)['older'])
+        times.append(elapsed)
+    print(f"листание {pages} страниц назад: медиана {statistics.median(times):.1f} мс, "
+          f"последняя {times[-1]:.1f} мс")
+
+    con = sqlite3.connect(path)
+    oldest = con.execute("SELECT created_at, id FROM news ORDER BY created_at, id LIMIT 1 OFFSET ?",
+                         (settings.NEWS_PAGE_SIZE,)).fetchone()
+    position = NewsPageCallback(newer=False, stamp=_stamp(oldest[0]), id=oldest[1])
+    page, elapsed = await timed(feed, position)
+    print(f"страница у самой старой новости: {elapsed:.1f} мс, новостей {len(page[2])}")
+
+    cached = NewsFeed(page_size=settings.NEWS_PAGE_SIZE, cache_size=settings.NEWS_PAGE_CACHE_SIZE, ttl=60)
+    await cached.page(position)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await cached.page(position)
+    print(f"страница из кэша: {(time.perf_counter() - started) / repeat * 1e6:.1f} мкс")
+
+    con.execute("DROP INDEX idx_news_created")
+    started = time.perf_counter()
+    con.execute(LEGACY_QUERY).fetchall()
+    print(f"прежний запрос без индекса: {time.perf_counter() - started:.2f} с")
+    con.execute("CREATE INDEX idx_news_created ON news(created_at, id)")
+    con.close()
+
+    page = await feed.page()
+    back = [page[0]]
+    for _ in range(30):
+        page = await feed.page(navigation(page)['older'])
+        back.append(page[0])
+    forward = [page[0]]
+    for _ in range(30):
+        page = await feed.page(navigation(page)['newer'])
+        forward.append(page[0])
+    print(f"30 страниц назад и вперёд: {'совпадают' if back == forward[::-1] else 'РАЗЛИЧАЮТСЯ'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замер ленты новостей")
+    parser.add_argument("--news", type=int, default=1_000_000)
+    parser.add_argument("--pages", type=int, default=2000, help="страниц листания назад")
+    parser.add_argument("--repeat", type=int, default=100_000, help="обращений к странице из кэша")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DATABASE_PATH = os.path.join(tmp, "bot.db")
+        asyncio.run(init_db())
+        seed_news(database.DATABASE_PATH, args.news)
+        asyncio.run(run(database.DATABASE_PATH, args.pages, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
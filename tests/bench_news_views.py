@@ -0,0 +1,143 @@
+"""Замер учёта просмотров новостей: поток показов, сбросы и параллельная запись.
+
+Сначала точность и размер HyperLogLog-скетча на разном числе зрителей.
+Затем --seconds секунд NewsViewCounter получает --rate показов в секунду
+(страницы по 5 новостей из --hot самых читаемых), сбрасывая их каждые
+NEWS_VIEWS_FLUSH_MS, а отдельное подключение раз в 20 мс пишет в logs и
+запоминает время своих коммитов. В конце — прежний способ: UPDATE и commit
+на каждый показ.
+
+    python -m tests.bench_news_views --news 1000000 --hot 20000 --rate 10000 --seconds 15
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from config.config import settings
+from database import database, init_db
+from database.database import get_db
+from database.news_views import HyperLogLog, NewsViewCounter
+from tests.bench_news_feed import seed_news
+
+PAGE_SIZE = 5
+TICK = 0.01
+
+
+def measure_sketch(rng: random.Random):
+    for viewers in (10, 100, 1000, 10_000, 100_000):
+        sketch = HyperLogLog()
+        for _ in range(viewers):
+            sketch.add_hash(HyperLogLog.hash(rng.getrandbits(40)))
+        data = sketch.to_bytes()
+        estimate = HyperLogLog.from_bytes(data).estimate()
+        print(f"  зрителей {viewers:>6}: оценка {estimate} ({(estimate - viewers) / viewers:+.1%}), "
+              f"скетч {len(data)} Б")
+
+
+async def writer(commits: list, stop: asyncio.Event):
+    """Чужая запись во время сбросов: время каждого коммита"""
+    db = await get_db()
+    try:
+        while not stop.is_set():
+            started = time.perf_counter()
+            await db.execute("INSERT INTO logs (user_id, action) VALUES (1, 'probe')")
+            await db.commit()
+            commits.append((time.perf_counter() - started) * 1000)
+            await asyncio.sleep(0.02)
+    finally:
+        await db.close()
+
+
+async def total_views() -> int:
+    db = await get_db()
+    try:
+        async with db.execute("SELECT SUM(views_count) FROM news") as cursor:
+            return (await cursor.fetchone())[0]
+    finally:
+        await db.close()
+
+
+async def measure_stream(rng: random.Random, hot: int, rate: int, seconds: int):
+    views_before = await total_views()
+    counter = NewsViewCounter(flush_interval_ms=settings.NEWS_VIEWS_FLUSH_MS)
+    flushes = []
+    flush = counter.flush
+
+    async def timed_flush():
+        started = time.perf_counter()
+        news = await flush()
+        if news:
+            flushes.append(((time.perf_counter() - started) * 1000, news))
+        return news
+
+    counter.flush = timed_flush
+    counter.start()
+    commits, stop = [], asyncio.Event()
+    task = asyncio.create_task(writer(commits, stop))
+
+    pages_per_tick = max(1, round(rate * TICK / PAGE_SIZE))
+    record_us, views = [], 0
+    started = time.perf_counter()
+    for tick in range(round(seconds / TICK)):
+        tick_started = time.perf_counter()
+        for _ in range(pages_per_tick):
+            counter.record([rng.randint(1, hot) for _ in range(PAGE_SIZE)], rng.randint(1, 50_000))
+        record_us.append((time.perf_counter() - tick_started) * 1e6 / pages_per_tick)
+        views += pages_per_tick * PAGE_SIZE
+        await asyncio.sleep(max(0.0, started + (tick + 1) * TICK - time.perf_counter()))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await task
+    await counter.stop()
+
+    print(f"поток: {views / elapsed:.0f} показов/с, record() на страницу — медиана "
+          f"{statistics.median(record_us):.1f} мкс")
+    for ms, news in flushes:
+        print(f"  сброс: {news} новостей за {ms:.0f} мс")
+    commits.sort()
+    print(f"параллельные коммиты ({len(commits)}): p50 {commits[len(commits) // 2]:.1f} мс, "
+          f"p99 {commits[int(len(commits) * 0.99)]:.1f} мс, максимум {commits[-1]:.1f} мс")
+
+    written = await total_views() - views_before
+    db = await get_db()
+    try:
+        async with db.execute("SELECT AVG(LENGTH(sketch)), MAX(LENGTH(sketch)) FROM news_viewers") as cursor:
+            average, largest = await cursor.fetchone()
+        print(f"записано просмотров: {written} (повторы зрителя в интервале не считаются); "
+              f"скетч в среднем {average:.0f} Б, максимум {largest} Б")
+
+        # Прежний способ: UPDATE и commit на каждый показ
+        count, started = 0, time.perf_counter()
+        while time.perf_counter() - started < 3:
+            await db.execute("UPDATE news SET views_count = views_count + 1 WHERE id = ?", (rng.randint(1, hot),))
+            await db.commit()
+            count += 1
+        print(f"UPDATE и commit на каждый показ: {count / (time.perf_counter() - started):.0f} показов/с")
+    finally:
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замер учёта просмотров новостей")
+    parser.add_argument("--news", type=int, default=1_000_000, help="новостей в базе")
+    parser.add_argument("--hot", type=int, default=20_000, help="новостей, которые читают")
+    parser.add_argument("--rate", type=int, default=10_000, help="показов в секунду")
+    parser.add_argument("--seconds", type=int, default=15)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print("точность и размер скетча:")
+    measure_sketch(rng)
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DATABASE_PATH = os.path.join(tmp, "bot.db")
+        asyncio.run(init_db())
+        seed_news(database.DATABASE_PATH, args.news)
+        asyncio.run(measure_stream(rng, args.hot, args.rate, args.seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""Замер хранения перечислений организаций кодами: размер таблицы, запросы, перенос.
+
+Строится база в старом формате (подписи строками, опции JSON), копия
+переводится на коды через migrate_organization_codes, после чего обе
+сравниваются: байты перечислений на строку и размер таблицы (dbstat после
+VACUUM), медианы запросов партнёров и рассылки, время сборки словарей строк.
+В конце проверяется, что коды декодируются в прежние значения.
+
+    python -m tests.bench_organization_codes --orgs 100000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from config.config import settings
+from database import database, init_db
+from database.codecs import OrganizationRecord, STATUS_VERIFIED, VERIFICATION_STATUSES, turnovers
+from database.database import get_db
+
+LEGACY_SCHEMA = """
+    CREATE TABLE users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        telegram_id INTEGER UNIQUE NOT NULL,
+        username TEXT,
+        full_name TEXT,
+        role TEXT DEFAULT 'organization',
+        is_blocked INTEGER DEFAULT 0,
+        is_active INTEGER DEFAULT 1,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE organizations (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER UNIQUE NOT NULL,
+        name TEXT NOT NULL,
+        legal_form TEXT NOT NULL,
+        activity_field TEXT,
+        okved TEXT,
+        inn TEXT UNIQUE NOT NULL,
+        phone TEXT NOT NULL,
+        email TEXT NOT NULL,
+        telegram TEXT NOT NULL,
+        description TEXT NOT NULL,
+        turnover TEXT NOT NULL,
+        can_give TEXT NOT NULL,
+        need TEXT NOT NULL,
+        interaction_format TEXT NOT NULL,
+        city TEXT,
+        city_id INTEGER,
+        partnership_type TEXT NOT NULL,
+        gdpr_consent INTEGER DEFAULT 1,
+        verification_status TEXT DEFAULT 'pending',
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users(id)
+    );
+"""
+
+CODED_COLUMNS = ["legal_form", "turnover", "interaction_format", "partnership_type", "verification_status",
+                 "can_give", "need"]
+
+TURNOVER = settings.TURNOVER_RANGES[1]
+
+QUERIES = [
+    # (название, старый запрос, параметры, новый запрос, параметры)
+    ("число одобренных",
+     "SELECT COUNT(*) FROM organizations WHERE verification_status = 'verified'", (),
+     "SELECT COUNT(*) FROM organizations WHERE verification_status = ?", (STATUS_VERIFIED,)),
+    ("аудитория рассылки",
+     """SELECT COUNT(*) FROM users u LEFT JOIN organizations o ON o.user_id = u.id
+        WHERE u.is_active = 1 AND u.is_blocked = 0 AND o.verification_status = 'verified' AND o.turnover = ?""",
+     (TURNOVER,),
+     """SELECT COUNT(*) FROM users u LEFT JOIN organizations o ON o.user_id = u.id
+        WHERE u.is_active = 1 AND u.is_blocked = 0 AND o.verification_status = ? AND o.turnover = ?""",
+     (STATUS_VERIFIED, turnovers.encode(TURNOVER))),
+    ("партнёры с тем же оборотом",
+     "SELECT * FROM organizations WHERE verification_status = 'verified' AND turnover = ? AND id != 1",
+     (TURNOVER,),
+     "SELECT * FROM organizations WHERE verification_status = ? AND turnover = ? AND id != 1",
+     (STATUS_VERIFIED, turnovers.encode(TURNOVER))),
+]
+
+
+def seed_legacy(path: str, orgs: int):
+    """Организации в старом формате: подписи строками, опции — JSON"""
+    rng = random.Random(40)
+    con = sqlite3.connect(path)
+    con.executescript(LEGACY_SCHEMA)
+    con.executemany("INSERT INTO users (id, telegram_id, username) VALUES (?, ?, ?)",
+                    [(i, 100_000_000 + i, f"user{i}") for i in range(1, orgs + 1)])
+
+    def options(choices: list) -> str:
+        selected = rng.sample(choices, rng.randint(1, 4))
+        if rng.random() < 0.1:
+            selected.append("Свой вариант")
+        return json.dumps({'options': selected}, ensure_ascii=False)
+
+    con.executemany("""
+        INSERT INTO organizations (
+            id, user_id, name, legal_form, activity_field, inn, phone, email, telegram, description,
+            turnover, can_give, need, interaction_format, city, partnership_type, verification_status
+        ) VALUES (?, ?, ?, ?, 'Услуги', ?, '+79990000000', 'info@example.ru', '@org', ?, ?, ?, ?, ?, 'Москва', ?, ?)
+    """, [
+        (i, i, f"ООО «Организация {i}»", rng.choice(settings.LEGAL_FORMS), f"{i:010d}",
+         "Описание деятельности организации. " * 3, rng.choice(settings.TURNOVER_RANGES),
+         options(settings.CAN_GIVE_OPTIONS), options(settings.NEED_OPTIONS),
+         rng.choice(settings.INTERACTION_FORMATS), rng.choice(settings.PARTNERSHIP_TYPES),
+         rng.choices(VERIFICATION_STATUSES, weights=(3, 6, 1))[0])
+        for i in range(1, orgs + 1)
+    ])
+    con.commit()
+    con.close()
+
+
+async def migrate() -> float:
+    db = await get_db()
+    try:
+        started = time.perf_counter()
+        await database.migrate_organization_codes(db)
+        elapsed = time.perf_counter() - started
+    finally:
+        await db.close()
+    # Остальные таблицы и индексы новой схемы
+    await init_db()
+    return elapsed
+
+
+def table_size(con: sqlite3.Connection, orgs: int):
+    """Байты перечислений на строку, полезная нагрузка строки и размер таблицы"""
+    columns = [row[1] for row in con.execute("PRAGMA table_info(organizations)")]
+    coded = [c for c in columns if c in CODED_COLUMNS or c.endswith("_custom")]
+    expr = " + ".join(f"COALESCE(LENGTH(CAST({c} AS BLOB)), 0)" for c in coded)
+    enum_bytes = con.execute(f"SELECT AVG({expr}) FROM organizations").fetchone()[0]
+    pages, payload = con.execute(
+        "SELECT SUM(pgsize), SUM(payload) FROM dbstat WHERE name = 'organizations'"
+    ).fetchone()
+    return enum_bytes, payload / orgs, pages / 1024 / 1024
+
+
+def median_ms(con: sqlite3.Connection, sql: str, params: tuple, runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        con.execute(sql, params).fetchall()
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times)
+
+
+def compare(old: sqlite3.Connection, new: sqlite3.Connection, orgs: int, runs: int):
+    for con in (old, new):
+        con.execute("VACUUM")
+    (old_enum, old_payload, old_mb), (new_enum, new_payload, new_mb) = table_size(old, orgs), table_size(new, orgs)
+    print(f"байт перечислений на строку: {old_enum:.0f} -> {new_enum:.0f}")
+    print(f"полезная нагрузка строки: {old_payload:.0f} -> {new_payload:.0f} Б")
+    print(f"таблица organizations: {old_mb:.1f} -> {new_mb:.1f} МБ")
+
+    for name, old_sql, old_params, new_sql, new_params in QUERIES:
+        print(f"{name}: {median_ms(old, old_sql, old_params, runs):.1f} -> "
+              f"{median_ms(new, new_sql, new_params, runs):.1f} мс")
+
+    name, old_sql, old_params, new_sql, new_params = QUERIES[-1]
+    rows = old.execute(old_sql, old_params).fetchall()
+    started = time.perf_counter()
+    for row in rows:
+        org = dict(row)
+        org['can_give'] = json.loads(org['can_give'])
+        org['need'] = json.loads(org['need'])
+    old_build = (time.perf_counter() - started) * 1000
+    rows = new.execute(new_sql, new_params).fetchall()
+    started = time.perf_counter()
+    for row in rows:
+        OrganizationRecord(row)['name']
+    print(f"словари строк ({len(rows)} партнёров): {old_build:.1f} -> {(time.perf_counter() - started) * 1000:.1f} мс")
+
+    new.execute("DROP INDEX idx_organizations_status_turnover")
+    name, _, _, new_sql, new_params = QUERIES[0]
+    print(f"{name} без индекса (status, turnover): {median_ms(new, new_sql, new_params, runs):.1f} мс")
+
+
+def check_decoded(old: sqlite3.Connection, new: sqlite3.Connection) -> int:
+    """Сколько строк декодируется не в прежние значения.
+
+    Порядок опций не сравнивается: стандартные опции декодируются в порядке
+    списка настроек, а не в порядке нажатий.
+    """
+    mismatches = 0
+    legacy = old.execute("SELECT * FROM organizations ORDER BY id")
+    for before, row in zip(legacy, new.execute("SELECT * FROM organizations ORDER BY id")):
+        record = OrganizationRecord(row)
+        same = all(before[c] == record[c] for c in CODED_COLUMNS[:5]) and all(
+            sorted(json.loads(before[c])['options']) == sorted(record[c]['options']) for c in CODED_COLUMNS[5:]
+        )
+        mismatches += not same
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замер хранения перечислений организаций кодами")
+    parser.add_argument("--orgs", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=20, help="повторов каждого запроса")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        old_path = os.path.join(tmp, "old.db")
+        database.DATABASE_PATH = os.path.join(tmp, "bot.db")
+        seed_legacy(old_path, args.orgs)
+        shutil.copy(old_path, database.DATABASE_PATH)
+        print(f"перенос {args.orgs} организаций на коды: {asyncio.run(migrate()):.1f} с")
+
+        old, new = sqlite3.connect(old_path), sqlite3.connect(database.DATABASE_PATH)
+        old.row_factory = new.row_factory = sqlite3.Row
+        print(f"строк, декодированных не в прежние значения: {check_decoded(old, new)}")
+        compare(old, new, args.orgs, args.runs)
+        old.close()
+        new.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Замер клавиатур регистрации: переключение опций и размер callback_data.
+
+Переключение — случайная последовательность нажатий в «Что может дать»:
+старый путь (список выбранных + сборка клавиатуры с текстом опции в
+callback_data) против маски и кэша готовых клавиатур. Размер — байты
+callback_data всех кнопок выбора в старом и новом формате (лимит Telegram —
+64 байта).
+
+    python -m tests.bench_registration_keyboards --toggles 20000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+from bot.keyboards.registration import (
+    CHOICES, PARTNERSHIP_OPTIONS, _choice_keyboard, get_partnership_options_keyboard,
+    options_from_mask, options_mask,
+)
+
+
+def legacy_options_keyboard(option_type: str, selected: list):
+    """Клавиатура опций в том виде, как она строилась до кэша: текст опции в callback_data"""
+    builder = InlineKeyboardBuilder()
+    for option in PARTNERSHIP_OPTIONS[option_type]:
+        text = f"✅ {option}" if option in selected else option
+        builder.button(text=text, callback_data=f"{option_type}:{option}")
+    builder.button(text="Иное (ручной ввод)", callback_data=f"{option_type}:other")
+    builder.button(text="✔️ Готово", callback_data=f"{option_type}:done")
+    builder.adjust(2)
+    return builder.as_markup()
+
+
+def measure_toggles(toggles: int):
+    rng = random.Random(37)
+    presses = [rng.randrange(len(PARTNERSHIP_OPTIONS["can_give"])) for _ in range(toggles)]
+
+    selected = []
+    started = time.perf_counter()
+    for index in presses:
+        option = PARTNERSHIP_OPTIONS["can_give"][index]
+        if option in selected:
+            selected.remove(option)
+        else:
+            selected.append(option)
+        legacy_options_keyboard("can_give", selected)
+    legacy = toggles / (time.perf_counter() - started)
+
+    get_partnership_options_keyboard.cache_clear()
+    selected = []
+    started = time.perf_counter()
+    for index in presses:
+        mask = options_mask("can_give", selected) ^ (1 << index)
+        selected = options_from_mask("can_give", mask, selected)
+        get_partnership_options_keyboard("can_give", mask)
+    cached = toggles / (time.perf_counter() - started)
+
+    info = get_partnership_options_keyboard.cache_info()
+    print(f"переключение опций ({toggles} нажатий): было {legacy:.0f}/с, стало {cached:.0f}/с "
+          f"(клавиатур в кэше {info.currsize})")
+
+
+def print_sizes(name: str, legacy: list, current: list):
+    print(f"callback_data, {name}: в среднем {statistics.mean(legacy):.1f} -> {statistics.mean(current):.1f} байт, "
+          f"максимум {max(legacy)} -> {max(current)} байт")
+
+
+def callback_sizes():
+    """Байты callback_data: старый формат «поле:текст» и новый.
+
+    У кнопок опций новый формат худший, когда выбраны все опции — маска
+    длиннее всего.
+    """
+    legacy, current = [], []
+    for kind, options in PARTNERSHIP_OPTIONS.items():
+        legacy += [len(f"{kind}:{option}".encode()) for option in options]
+        markup = get_partnership_options_keyboard(kind, (1 << len(options)) - 1)
+        current += [len(button.callback_data.encode()) for row in markup.inline_keyboard for button in row]
+    print_sizes("опции партнёрства", legacy, current)
+
+    legacy, current = [], []
+    for field, values in CHOICES.items():
+        legacy += [len(f"{field}:{value}".encode()) for value in values]
+        current += [len(button.callback_data.encode()) for row in _choice_keyboard(field).inline_keyboard
+                    for button in row]
+    print_sizes("выбор одного значения", legacy, current)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замер клавиатур регистрации")
+    parser.add_argument("--toggles", type=int, default=20_000, help="нажатий в последовательности")
+    args = parser.parse_args()
+    measure_toggles(args.toggles)
+    callback_sizes()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Замер каталога ресурсов: прогрев, число страниц и скорость показа.
+
+В базу добавляются --competitions конкурсов и --courses курсов с текстами
+разной длины. Затем каталог прогревается, а показ «Конкурсов» сравнивается
+с прежним путём: запрос, разбор additional_data, сборка текста и нарезка
+по 4000 символов на каждое нажатие. В конце созданный конкурс должен сразу
+появиться в каталоге, а удалённый — исчезнуть.
+
+    python -m tests.bench_resource_catalog --competitions 60 --courses 40
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from config.config import settings
+from database import crud, database, init_db
+from bot.utils.resource_catalog import ResourceCatalog
+
+
+async def legacy_competitions() -> list:
+    """Показ «Конкурсов» до каталога: всё заново на каждое нажатие"""
+    competitions = await crud.get_resources_by_type('competition', is_active=True)
+    text = "<b>🏆 Активные конкурсы</b>\n\n"
+    for comp in competitions:
+        text += f"<b>{comp['title']}</b>\n"
+        text += f"{comp['content']}\n"
+        if comp['additional_data']:
+            if comp['additional_data'].get('deadline'):
+                text += f"📅 Дедлайн: {comp['additional_data']['deadline']}\n"
+            if comp['additional_data'].get('link'):
+                text += f"🔗 Ссылка: {comp['additional_data']['link']}\n"
+        text += "\n➖➖➖➖➖➖➖➖➖➖\n\n"
+    return [text[i:i + 4000] for i in range(0, len(text), 4000)]
+
+
+async def seed(rng: random.Random, competitions: int, courses: int):
+    for i in range(competitions):
+        await crud.create_resource(
+            'competition', f"Конкурс №{i} «Гранты & субсидии»",
+            "Условия участия <для НКО>. " * rng.randint(2, 40),
+            {'deadline': f"{rng.randint(1, 28)}.12.2026", 'link': f"https://example.ru/contest/{i}"}
+        )
+    for i in range(courses):
+        await crud.create_resource('course', f"Курс №{i}", "Программа курса. " * rng.randint(2, 40),
+                                   {'link': f"https://example.ru/course/{i}"})
+
+
+async def rate(call, seconds: float) -> float:
+    count, started = 0, time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        await call()
+        count += 1
+    return count / (time.perf_counter() - started)
+
+
+async def run(competitions: int, courses: int, seconds: float):
+    await init_db()
+    await seed(random.Random(44), competitions, courses)
+    catalog = ResourceCatalog(page_chars=settings.RESOURCE_PAGE_CHARS)
+
+    started = time.perf_counter()
+    await catalog.warm_up()
+    print(f"прогрев: {(time.perf_counter() - started) * 1000:.0f} мс")
+    pages = await catalog.pages('competition')
+    print(f"конкурсы: {len(pages)} стр., самая длинная {max(len(text) for text, _ in pages)} символов "
+          f"(лимит {settings.RESOURCE_PAGE_CHARS})")
+
+    print(f"прежний путь: {await rate(legacy_competitions, seconds):.0f} показов/с")
+    print(f"страница из каталога: {await rate(lambda: catalog.page('competition', 1), seconds):.0f} показов/с")
+
+    resource_id = await crud.create_resource('competition', "Новый конкурс", "Только что добавлен")
+    shown = any("Новый конкурс" in text for text, _ in await catalog.pages('competition'))
+    await crud.delete_resource(resource_id)
+    hidden = not any("Новый конкурс" in text for text, _ in await catalog.pages('competition'))
+    print(f"новый конкурс виден сразу: {'да' if shown else 'НЕТ'}, удалённый исчез: {'да' if hidden else 'НЕТ'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замер каталога ресурсов")
+    parser.add_argument("--competitions", type=int, default=60)
+    parser.add_argument("--courses", type=int, default=40)
+    parser.add_argument("--seconds", type=float, default=2.0, help="длительность каждого замера скорости")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DATABASE_PATH = os.path.join(tmp, "bot.db")
+        asyncio.run(run(args.competitions, args.courses, args.seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Замер проверки описаний на большом списке терминов.
+
+К терминам из настроек добавляются случайные (половина — префиксные «*»),
+автомат собирается заново, затем через него прогоняются описания корпуса
+tests/data/screening_corpus.txt и длинные склейки из них. Для сравнения
+тот же поиск выполняется перебором всех терминов по словам текста.
+
+    python -m tests.bench_screening --terms 5000 --texts 20000
+"""
+import argparse
+import random
+import time
+
+from config.config import settings
+from bot.utils.screening import Screener, tokenize
+from tests.test_screening import CORPUS
+
+LETTERS = "абвгдежзийклмнопрстуфхцчшщыэюя"
+
+
+def make_categories(terms: int, seed: int = 1):
+    """Категории из настроек, дополненные случайными терминами до terms штук"""
+    rng = random.Random(seed)
+    categories = {category: list(items) for category, items in settings.BLOCKED_CATEGORIES.items()}
+    names = list(categories)
+    total = sum(len(items) for items in categories.values())
+    while total < terms:
+        word = "".join(rng.choice(LETTERS) for _ in range(rng.randint(5, 10)))
+        categories[names[total % len(names)]].append(word + ("*" if total % 2 else ""))
+        total += 1
+    return categories
+
+
+def naive_categories(categories, text: str):
+    """Перебор: каждый термин против каждого слова (фразы терминов не поддерживаются)"""
+    words = tokenize(text)
+    found = set()
+    for category, terms in categories.items():
+        for term in terms:
+            stem = tokenize(term.rstrip("*"))
+            if len(stem) != 1:
+                continue
+            if any(word.startswith(stem[0]) if term.endswith("*") else word == stem[0] for word in words):
+                found.add(category)
+                break
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замер screening")
+    parser.add_argument("--terms", type=int, default=5000)
+    parser.add_argument("--texts", type=int, default=20000)
+    parser.add_argument("--naive-texts", type=int, default=200, help="текстов для перебора (он медленный)")
+    args = parser.parse_args()
+
+    categories = make_categories(args.terms)
+    started = time.perf_counter()
+    screener = Screener(categories)
+    print(f"Автомат на {args.terms} терминов собран за {(time.perf_counter() - started) * 1000:.1f} мс")
+
+    rng = random.Random(2)
+    texts = [text for text, _ in CORPUS]
+    texts += [" ".join(rng.choice(texts) for _ in range(30)) for _ in range(len(texts))]
+    sample = [rng.choice(texts) for _ in range(args.texts)]
+
+    started = time.perf_counter()
+    for text in sample:
+        screener.blocked_categories(text)
+    elapsed = time.perf_counter() - started
+    print(f"Автомат: {len(sample)} текстов за {elapsed:.2f} с, {elapsed / len(sample) * 1e6:.0f} мкс на текст")
+
+    sample = sample[:args.naive_texts]
+    started = time.perf_counter()
+    for text in sample:
+        naive_categories(categories, text)
+    elapsed = time.perf_counter() - started
+    print(f"Перебор: {len(sample)} текстов за {elapsed:.2f} с, {elapsed / len(sample) * 1e6:.0f} мкс на текст")
+
+
+if __name__ == "__main__":
+    main()
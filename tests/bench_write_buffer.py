@@ -0,0 +1,54 @@
+"""Замер лайков в секунду с буфером отложенной записи и без него.
+
+Каждый «лайк» — как в обработчике поиска: crud.create_like и crud.create_log.
+Без буфера create_log открывает соединение и делает commit на каждую строку,
+с буфером логи пишутся пачками. База — файл во временном каталоге.
+
+    python -m tests.bench_write_buffer --likes 1000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from database import crud, database, init_db
+from database.write_buffer import log_buffer
+
+
+async def like(n: int):
+    await crud.create_like(1, 2)
+    await crud.create_log(1, "like", {"to_org_id": 2, "n": n})
+
+
+async def measure(likes: int, buffered: bool) -> float:
+    if buffered:
+        log_buffer.start()
+    started = time.perf_counter()
+    for n in range(likes):
+        await like(n)
+    if buffered:
+        await log_buffer.stop()
+    return likes / (time.perf_counter() - started)
+
+
+async def run(likes: int):
+    await init_db()
+    direct = await measure(likes, buffered=False)
+    print(f"Без буфера: {direct:.0f} лайков/с")
+    buffered = await measure(likes, buffered=True)
+    print(f"С буфером:  {buffered:.0f} лайков/с ({buffered / direct:.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замер буфера отложенной записи")
+    parser.add_argument("--likes", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DATABASE_PATH = os.path.join(tmp, "bot.db")
+        asyncio.run(run(args.likes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Тесты запускаются из корня проекта: python -m pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database import database, init_db  # noqa: E402
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """Пустая база со схемой во временном каталоге"""
+    path = str(tmp_path / "bot.db")
+    monkeypatch.setattr(database, "DATABASE_PATH", path)
+    asyncio.run(init_db())
+    return path
@@ -0,0 +1,101 @@
+"""Локальная заглушка Bot API для ручной проверки и нагрузочных прогонов.
+
+Поддерживает методы, которые использует бот при пересылке и отправке файлов
+по file_id (getMe, sendMessage, copyMessage(s), sendMediaGroup, sendDocument, ...),
+отвечает с задержкой latency и на каждый flood_every-й вызов в один чат
+возвращает 429 с retry_after. Доставленное по чатам лежит в
+app['delivered']: chat_id -> [(from_chat_id, message_id) или (тип, текст / file_id)].
+
+    python -m tests.fakes.fake_bot_api --port 8081 --latency-ms 50 --flood-every 20
+
+и бот с AiohttpSession(api=TelegramAPIServer.from_base("http://127.0.0.1:8081")).
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import defaultdict
+
+from aiohttp import web
+
+
+def make_app(latency_ms: int = 0, flood_every: int = 0, retry_after: int = 1) -> web.Application:
+    """Приложение-заглушка; число вызовов по методам в app['calls']"""
+    message_ids = defaultdict(int)
+    chat_calls = defaultdict(int)
+
+    def message(chat_id: int, **fields) -> dict:
+        message_ids[chat_id] += 1
+        return {
+            "message_id": message_ids[chat_id],
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            **fields,
+        }
+
+    async def call(request: web.Request) -> web.Response:
+        app = request.app
+        method = request.match_info["method"].lower()
+        params = dict(await request.post())
+        app['calls'][method] += 1
+
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+
+        chat_id = int(params["chat_id"]) if "chat_id" in params else None
+        if chat_id is not None and flood_every:
+            chat_calls[chat_id] += 1
+            if chat_calls[chat_id] % flood_every == 0:
+                app['calls']['429'] += 1
+                return web.json_response({
+                    "ok": False, "error_code": 429,
+                    "description": f"Too Many Requests: retry after {retry_after}",
+                    "parameters": {"retry_after": retry_after},
+                }, status=429)
+
+        delivered = app['delivered']
+        if method == "getme":
+            result = {"id": 1, "is_bot": True, "first_name": "Test", "username": "test_bot"}
+        elif method == "sendmessage":
+            delivered[chat_id].append(("text", params.get("text", "")))
+            result = message(chat_id, text=params.get("text", ""))
+        elif method == "copymessage":
+            delivered[chat_id].append((int(params["from_chat_id"]), int(params["message_id"])))
+            result = {"message_id": message(chat_id)["message_id"]}
+        elif method == "copymessages":
+            ids = json.loads(params["message_ids"])
+            from_chat_id = int(params["from_chat_id"])
+            delivered[chat_id].extend((from_chat_id, message_id) for message_id in ids)
+            result = [{"message_id": message(chat_id)["message_id"]} for _ in ids]
+        elif method == "sendmediagroup":
+            media = json.loads(params["media"])
+            delivered[chat_id].extend((item["type"], item["media"]) for item in media)
+            result = [message(chat_id) for _ in media]
+        elif method in ("senddocument", "sendphoto", "sendvideo"):
+            kind = method[len("send"):]
+            delivered[chat_id].append((kind, params.get(kind)))
+            result = message(chat_id)
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    app = web.Application()
+    app['calls'] = defaultdict(int)
+    app['delivered'] = defaultdict(list)
+    app.router.add_post("/bot{token}/{method}", call)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Заглушка Bot API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=int, default=0)
+    parser.add_argument("--flood-every", type=int, default=0, help="каждый N-й вызов в чат отвечает 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="retry_after в ответе 429, секунд")
+    args = parser.parse_args()
+    web.run_app(make_app(args.latency_ms, args.flood_every, args.retry_after), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
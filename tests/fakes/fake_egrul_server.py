@@ -0,0 +1,74 @@
+"""Локальная заглушка сервиса проверки ИНН для тестов и нагрузочных прогонов.
+
+Отвечает в формате findById/party. Данные детерминированы по ИНН:
+предпоследняя цифра 0 — ИНН не найден, 9 — организация ликвидирована.
+Задержку и долю ошибок тест может менять на ходу через app['latency_ms'],
+app['error_rate'] и app['timeout_rate'].
+
+    python -m tests.fakes.fake_egrul_server --port 8089 --latency-ms 300 --error-rate 0.2
+
+и EGRUL_API_URL = "http://127.0.0.1:8089/findById/party".
+"""
+import argparse
+import asyncio
+import random
+
+from aiohttp import web
+
+
+def make_app(latency_ms: int = 0, error_rate: float = 0.0, timeout_rate: float = 0.0) -> web.Application:
+    """Приложение-заглушка; статистика запросов в app['requests']"""
+
+    async def find_party(request: web.Request) -> web.Response:
+        app = request.app
+        app['requests'] += 1
+        body = await request.json()
+        inn = str(body.get("query", ""))
+
+        if app['timeout_rate'] and random.random() < app['timeout_rate']:
+            await asyncio.sleep(3600)
+        if app['latency_ms']:
+            await asyncio.sleep(app['latency_ms'] / 1000)
+        if app['error_rate'] and random.random() < app['error_rate']:
+            return web.json_response({"message": "internal error"}, status=500)
+
+        if len(inn) < 2 or inn[-2] == "0":
+            return web.json_response({"suggestions": []})
+
+        status = "LIQUIDATED" if inn[-2] == "9" else "ACTIVE"
+        return web.json_response({"suggestions": [{
+            "value": f"ООО «Тест {inn}»",
+            "data": {
+                "inn": inn,
+                "name": {"short_with_opf": f"ООО «Тест {inn}»"},
+                "opf": {"full": "Общество с ограниченной ответственностью"},
+                "okved": "62.01",
+                "state": {"status": status},
+            },
+        }]})
+
+    app = web.Application()
+    app['requests'] = 0
+    app['latency_ms'] = latency_ms
+    app['error_rate'] = error_rate
+    app['timeout_rate'] = timeout_rate
+    app.router.add_post("/findById/party", find_party)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Заглушка сервиса проверки ИНН")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=int, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля ответов 500")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="доля запросов без ответа")
+    args = parser.parse_args()
+    web.run_app(
+        make_app(args.latency_ms, args.error_rate, args.timeout_rate),
+        host=args.host, port=args.port
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Аналитика владельца: обновление окнами и этап «верифицирована» по таблице verifications"""
+import asyncio
+import sqlite3
+from datetime import datetime, timedelta
+
+from config.config import settings
+from database import analytics
+
+
+def seed_organizations(con: sqlite3.Connection, count: int, created_at: str = "2024-05-06 10:00:00") -> list:
+    """Организации с ожидающими верификациями; возвращает их id"""
+    start = con.execute("SELECT COALESCE(MAX(id), 0) FROM organizations").fetchone()[0] + 1
+    ids = list(range(start, start + count))
+    con.executemany("""
+        INSERT INTO organizations (id, user_id, name, inn, phone, email, telegram, description, created_at)
+        VALUES (?, ?, 'ООО «Ромашка»', ?, '+79990000000', 'info@example.ru', '@romashka', '-', ?)
+    """, [(org_id, org_id, f"{org_id:010d}", created_at) for org_id in ids])
+    con.executemany(
+        "INSERT INTO verifications (organization_id, status) VALUES (?, 'pending')", [(org_id,) for org_id in ids]
+    )
+    con.commit()
+    return ids
+
+
+def approve(con: sqlite3.Connection, org_ids: list, verified_at: datetime):
+    con.executemany(
+        "UPDATE verifications SET status = 'approved', verified_at = ? WHERE organization_id = ?",
+        [(verified_at.isoformat(), org_id) for org_id in org_ids]
+    )
+    con.commit()
+
+
+def test_refresh_in_windows(db_path, monkeypatch):
+    monkeypatch.setattr(settings, "ANALYTICS_REFRESH_BATCH", 3)
+    con = sqlite3.connect(db_path)
+    ids = seed_organizations(con, 10)
+    con.executemany("INSERT INTO likes (from_org_id, to_org_id) VALUES (?, ?)",
+                    [(ids[n], ids[n + 1]) for n in range(7)])
+    con.execute("INSERT INTO matches (org1_id, org2_id) VALUES (?, ?)", (ids[0], ids[1]))
+    con.commit()
+
+    processed = asyncio.run(analytics.refresh_analytics())
+    assert processed == {'organizations': 10, 'likes': 7, 'matches': 1}
+    watermarks = dict(con.execute("SELECT source, last_id FROM analytics_watermarks").fetchall())
+    assert watermarks == {'organizations': ids[-1], 'likes': 7, 'matches': 1}
+
+    funnel = asyncio.run(analytics.get_funnel())
+    assert funnel == {'registered': 10, 'verified': 0, 'liked': 7, 'matched': 2, 'contracted': 0}
+    assert asyncio.run(analytics.refresh_analytics()) == {}
+    con.close()
+
+
+def test_verified_stage_from_verifications(db_path, monkeypatch):
+    monkeypatch.setattr(settings, "ANALYTICS_REFRESH_BATCH", 2)
+    con = sqlite3.connect(db_path)
+    ids = seed_organizations(con, 6)
+    past = datetime.utcnow() - timedelta(hours=1)
+    # Одинаковое verified_at у нескольких строк не теряет их на границе окна
+    approve(con, ids[:3], past)
+    approve(con, ids[3:4], past + timedelta(minutes=1))
+
+    assert asyncio.run(analytics.refresh_analytics())['verifications'] == 4
+    assert asyncio.run(analytics.get_funnel())['verified'] == 4
+
+    # Одобрение старой заявки (id ниже водяного знака) попадает в следующее обновление
+    approve(con, ids[4:5], past + timedelta(minutes=2))
+    # Совсем свежее одобрение ждёт, пока не закоммитятся параллельные
+    approve(con, ids[5:6], datetime.utcnow())
+    assert asyncio.run(analytics.refresh_analytics()) == {'verifications': 1}
+    assert asyncio.run(analytics.get_funnel())['verified'] == 5
+
+    monkeypatch.setattr(analytics, "VERIFIED_LAG", timedelta(0))
+    assert asyncio.run(analytics.refresh_analytics()) == {'verifications': 1}
+    assert asyncio.run(analytics.get_funnel())['verified'] == 6
+
+    verified_at = con.execute(
+        "SELECT verified_at FROM analytics_org_funnel WHERE org_id = ?", (ids[0],)
+    ).fetchone()[0]
+    assert verified_at == past.strftime("%Y-%m-%d %H:%M:%S")
+    con.close()
@@ -0,0 +1,137 @@
+"""Переписка через бота от апдейта до Bot API: настоящий Dispatcher и заглушка Bot API"""
+import asyncio
+import sqlite3
+import time
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import Update
+
+from database.write_buffer import log_buffer
+from bot.handlers import start, registration, partner_search, admin, owner, user, broadcast, relay
+from bot.utils.chat_relay import ChatRelay
+from tests.fakes.fake_bot_api import make_app
+
+PAIRS = 50
+PER_USER = 12
+WAVE = 4  # сообщений каждого пользователя за одну волну апдейтов
+ALBUM = range(4, 7)  # один альбом из трёх фото, начинается в конце первой волны
+FLOOD_EVERY = 3
+
+
+def telegram_id(user_id: int) -> int:
+    return 1000 + user_id
+
+
+def partner_id(user_id: int) -> int:
+    return user_id + 1 if user_id % 2 else user_id - 1
+
+
+def seed(path: str):
+    """Пары организаций (1, 2), (3, 4), ... с активными матчами"""
+    con = sqlite3.connect(path)
+    for i in range(1, 2 * PAIRS + 1):
+        con.execute("INSERT INTO users (id, telegram_id, full_name) VALUES (?, ?, ?)", (i, telegram_id(i), f"User {i}"))
+        con.execute(
+            "INSERT INTO organizations (id, user_id, name, inn, phone, email, telegram, description) "
+            "VALUES (?, ?, ?, ?, '', '', '', '')",
+            (i, i, f"Организация <{i}>", str(i))
+        )
+    for p in range(PAIRS):
+        con.execute("INSERT INTO matches (org1_id, org2_id) VALUES (?, ?)", (2 * p + 1, 2 * p + 2))
+    con.commit()
+    con.close()
+
+
+def make_update(update_id: int, user_id: int, message_id: int) -> Update:
+    chat_id = telegram_id(user_id)
+    message = {
+        "message_id": message_id,
+        "date": int(time.time()),
+        "chat": {"id": chat_id, "type": "private"},
+        "from": {"id": chat_id, "is_bot": False, "first_name": f"User {user_id}"},
+    }
+    if message_id in ALBUM:
+        message["media_group_id"] = f"album-{user_id}"
+        message["photo"] = [{
+            "file_id": f"photo-{user_id}-{message_id}",
+            "file_unique_id": f"unique-{user_id}-{message_id}",
+            "width": 1, "height": 1,
+        }]
+    else:
+        message["text"] = f"сообщение {message_id} & <b>"
+    return Update(update_id=update_id, message=message)
+
+
+def make_dispatcher() -> Dispatcher:
+    dp = Dispatcher(storage=MemoryStorage())
+    for module in (start, owner, registration, partner_search, admin, broadcast, user, relay):
+        dp.include_router(module.router)
+    return dp
+
+
+async def run_conversations(chat_relay: ChatRelay):
+    app = make_app(flood_every=FLOOD_EVERY)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    bot = Bot(
+        "42:TEST",
+        session=AiohttpSession(api=TelegramAPIServer.from_base(f"http://127.0.0.1:{port}")),
+        default=DefaultBotProperties(parse_mode="HTML")
+    )
+    dp = make_dispatcher()
+    log_buffer.start()
+    try:
+        await chat_relay.load()
+        for i in range(1, 2 * PAIRS + 1):
+            assert await chat_relay.open(telegram_id(i), (i + 1) // 2)
+
+        # Сообщения всех пользователей вперемешку, каждый апдейт обрабатывается отдельной задачей,
+        # как при polling; между волнами обработчики успевают отправить, и 429 приходится на середину переписки
+        update_id = 0
+        for wave in range(1, PER_USER + 1, WAVE):
+            updates = []
+            for message_id in range(wave, wave + WAVE):
+                for i in range(1, 2 * PAIRS + 1):
+                    update_id += 1
+                    updates.append(make_update(update_id, i, message_id))
+            await asyncio.gather(*(dp.feed_update(bot, update) for update in updates))
+            await asyncio.sleep(0.1)
+        await chat_relay.stop(timeout=60)
+    finally:
+        await log_buffer.stop()
+        await bot.session.close()
+        await runner.cleanup()
+    return app
+
+
+def test_relay_keeps_order_through_flood_control(db_path, monkeypatch):
+    chat_relay = ChatRelay(rate=1000, route_cache_size=1000, idle_timeout=60,
+                           album_wait=0.05, header_gap=600, attempts=5)
+    monkeypatch.setattr(relay, "chat_relay", chat_relay)
+    seed(db_path)
+
+    app = asyncio.run(run_conversations(chat_relay))
+
+    assert app['calls']['429'] >= PAIRS
+    for i in range(1, 2 * PAIRS + 1):
+        delivered = app['delivered'][telegram_id(partner_id(i))]
+        received = [message_id for source, message_id in delivered if source == telegram_id(i)]
+        assert received == list(range(1, PER_USER + 1)), f"пользователь {i}"
+        # Отправитель не получал уведомлений о неотправленных сообщениях
+        assert not [item for item in app['delivered'][telegram_id(i)] if item[0] == "text" and "Не удалось" in item[1]]
+
+    con = sqlite3.connect(db_path)
+    rows = con.execute(
+        "SELECT COUNT(*), COUNT(DISTINCT sender_org_id || ':' || message_id), COUNT(relayed_message_id) "
+        "FROM match_messages"
+    ).fetchone()
+    con.close()
+    assert rows == (2 * PAIRS * PER_USER,) * 3
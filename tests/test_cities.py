@@ -0,0 +1,92 @@
+"""Справочник городов: время загрузки, поиск, подсказки и перенос старых записей на city_id"""
+import asyncio
+import sqlite3
+import time
+
+import pytest
+
+from config.config import settings
+from database import crud
+from bot.utils.cities import CityIndex, city_index, normalize_city
+
+
+def seed_organizations(con: sqlite3.Connection, cities: list):
+    """Организации с городами в том виде, как их когда-то ввели"""
+    start = con.execute("SELECT COALESCE(MAX(id), 0) FROM organizations").fetchone()[0] + 1
+    con.executemany("""
+        INSERT INTO organizations (id, user_id, name, inn, phone, email, telegram, description, city)
+        VALUES (?, ?, 'ООО «Ромашка»', ?, '+79990000000', 'info@example.ru', '@romashka', '-', ?)
+    """, [(org_id, org_id, f"{org_id:010d}", city) for org_id, city in enumerate(cities, start)])
+    con.commit()
+
+
+def test_load_within_budget():
+    CityIndex.load()  # прогрев: файл в кэше ОС
+    started = time.perf_counter()
+    index = CityIndex.load()
+    assert (time.perf_counter() - started) * 1000 < settings.CITIES_LOAD_BUDGET_MS
+    assert index.size == city_index.size > 200
+
+
+@pytest.mark.parametrize("text, name", [
+    ("Москва", "Москва"),
+    ("  г. Москва ", "Москва"),
+    ("город Москва", "Москва"),
+    ("г.Москва", "Москва"),
+    ("мск", "Москва"),
+    ("Moskva", "Москва"),
+    ("MSK", "Москва"),
+    ("питер", "Санкт-Петербург"),
+    ("Санкт Петербург", "Санкт-Петербург"),
+    ("нижний-новгород", "Нижний Новгород"),
+    ("ростов на дону", "Ростов-на-Дону"),
+    ("Орел", "Орёл"),
+    ("екб", "Екатеринбург"),
+])
+def test_lookup(text, name):
+    assert city_index.lookup(text).name == name
+
+
+@pytest.mark.parametrize("text", ["", "   ", "Моск", "Нью-Йорк", "г."])
+def test_lookup_unknown(text):
+    assert city_index.lookup(text) is None
+
+
+def test_normalize_city():
+    assert normalize_city("  Г. Ростов-на-Дону ") == "ростов на дону"
+    assert normalize_city("Ёлки") == "елки"
+
+
+def test_suggest():
+    # По началу названия — крупнейшие сначала, не больше лимита
+    names = [city.name for city in city_index.suggest("ново")]
+    assert names[:3] == ["Новосибирск", "Новокузнецк", "Новороссийск"]
+    assert len(names) == 6
+    assert [city.name for city in city_index.suggest("ново", limit=2)] == names[:2]
+    populations = [city.population for city in city_index.suggest("ново")]
+    assert populations == sorted(populations, reverse=True)
+
+    # Опечатка: подсказки по самому длинному совпавшему префиксу
+    assert city_index.suggest("Новосибирк")[0].name == "Новосибирск"
+    # Совпало меньше трёх символов — подсказок нет
+    assert city_index.suggest("Нюрнберг") == []
+    assert city_index.suggest("") == []
+
+
+def test_normalize_organization_cities(db_path):
+    con = sqlite3.connect(db_path)
+    seed_organizations(con, ["г. Москва", "мск", "Msk", "СПб", "Урюпинск-на-Марсе", "", None, "Казань"])
+    # Уже перенесённая запись не трогается
+    con.execute("UPDATE organizations SET city_id = 5, city = 'Казань' WHERE city = 'Казань'")
+    con.commit()
+
+    assert asyncio.run(crud.normalize_organization_cities(city_index.lookup)) == 4
+    rows = con.execute("SELECT city, city_id FROM organizations ORDER BY id").fetchall()
+    assert rows == [
+        ("Москва", 1), ("Москва", 1), ("Москва", 1), ("Санкт-Петербург", 2),
+        ("Урюпинск-на-Марсе", None), ("", None), (None, None), ("Казань", 5),
+    ]
+
+    # Повторный запуск: переносить нечего, нераспознанные остаются как есть
+    assert asyncio.run(crud.normalize_organization_cities(city_index.lookup)) == 0
+    con.close()
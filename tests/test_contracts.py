@@ -0,0 +1,92 @@
+"""PDF договоров: шрифт с кириллицей обязателен, неудачная вёрстка не сохраняет file_id"""
+import asyncio
+import os
+from types import SimpleNamespace
+
+import pytest
+import reportlab
+
+from database import crud
+from bot.utils import contracts
+from bot.utils.contracts import ContractFontError, ContractRenderer, find_fonts, render_contract_pdf, contract_context
+
+# Vera из поставки reportlab — TTF без кириллицы
+VERA = os.path.join(os.path.dirname(reportlab.__file__), "fonts", "Vera.ttf")
+
+
+def make_contract(contract_id: int = 1) -> dict:
+    party = {'name': "ООО «Ромашка»", 'legal_form': "ООО", 'inn': "7707083893",
+             'phone': "+7 900 000-00-00", 'email': "info@example.ru", 'city': "Москва"}
+    return {
+        'id': contract_id,
+        'created_at': "2024-05-01 12:00:00",
+        'file_id': None,
+        'contract_data': {'type': 'services', 'details': "Разработка сайта\nСрок — 30 дней",
+                          'creator': party, 'recipient': dict(party, name="ИП Иванов <И.И.>")},
+    }
+
+
+class FakeBot:
+    """Запоминает отправленные документы и выдаёт им file_id"""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send_document(self, chat_id, document, caption=None):
+        self.sent.append((chat_id, document))
+        return SimpleNamespace(document=SimpleNamespace(file_id=f"file-{len(self.sent)}"))
+
+
+def test_bundled_font_has_cyrillic(monkeypatch):
+    monkeypatch.setattr(contracts.settings, "CONTRACT_FONT_PATHS", [])
+    regular, bold = find_fonts()
+    assert regular.face.name.startswith(b"DejaVuSerif")
+
+    pdf = render_contract_pdf('services', contract_context(make_contract()))
+    assert pdf.startswith(b"%PDF") and b"DejaVuSerif" in pdf
+
+
+def test_font_without_cyrillic_is_skipped(monkeypatch):
+    monkeypatch.setattr(contracts.settings, "CONTRACT_FONT_PATHS", [(VERA, VERA)])
+    regular, _ = find_fonts()
+    assert regular.face.name.startswith(b"DejaVuSerif")
+
+    monkeypatch.setattr(contracts, "BUNDLED_FONTS", ("/nonexistent/regular.ttf", "/nonexistent/bold.ttf"))
+    with pytest.raises(ContractFontError):
+        find_fonts()
+
+
+def test_failed_render_does_not_store_file_id(monkeypatch):
+    stored = []
+
+    async def set_contract_file_id(contract_id, file_id):
+        stored.append((contract_id, file_id))
+
+    async def get_contract_by_id(contract_id):
+        return None
+
+    def no_font(*args):
+        raise ContractFontError("нет шрифта")
+
+    monkeypatch.setattr(crud, "set_contract_file_id", set_contract_file_id)
+    monkeypatch.setattr(crud, "get_contract_by_id", get_contract_by_id)
+    renderer = ContractRenderer(workers=1)
+    bot = FakeBot()
+
+    real_render = contracts.render_contract_pdf
+
+    async def run():
+        contract = make_contract()
+        monkeypatch.setattr(contracts, "render_contract_pdf", no_font)
+        with pytest.raises(ContractFontError):
+            await renderer.send(bot, 100, contract)
+        assert not bot.sent and not stored and contract['file_id'] is None
+
+        # Шрифт появился — договор верстается, загружается один раз, дальше идёт по file_id
+        monkeypatch.setattr(contracts, "render_contract_pdf", real_render)
+        await renderer.send(bot, 100, contract)
+        await renderer.send(bot, 200, contract)
+        assert stored == [(1, "file-1")]
+        assert bot.sent[1] == (200, "file-1")
+
+    asyncio.run(run())
@@ -0,0 +1,173 @@
+"""Онлайн-проверка ИНН против заглушки сервиса: кэш, таймаут, ошибки, предохранитель"""
+import asyncio
+import sqlite3
+import time
+from contextlib import asynccontextmanager
+
+from aiohttp import web
+
+from config.config import settings
+from database import crud
+from bot.utils.egrul_client import EgrulClient
+from tests.fakes.fake_egrul_server import make_app
+
+# Заглушка решает по предпоследней цифре: 0 — не найден, 9 — ликвидирован
+ACTIVE_INN = "7736207543"
+MISSING_INN = "7736050003"
+LIQUIDATED_INN = "7707083893"
+
+
+@asynccontextmanager
+async def egrul_service(monkeypatch, **options):
+    """Заглушка на свободном порту и клиент, настроенный на неё"""
+    app = make_app(**options)
+    runner = web.AppRunner(app, shutdown_timeout=0.1)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    monkeypatch.setattr(settings, "EGRUL_API_URL", f"http://127.0.0.1:{port}/findById/party")
+    client = EgrulClient()
+    await client.start()
+    try:
+        yield app, client
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+
+def age_cache(path: str, inn: str, hours: int):
+    """Сдвинуть время записи кэша в прошлое"""
+    con = sqlite3.connect(path)
+    con.execute("UPDATE egrul_cache SET fetched_at = datetime('now', ?) WHERE inn = ?", (f"-{hours} hours", inn))
+    con.commit()
+    con.close()
+
+
+def test_lookup_and_cache(db_path, monkeypatch):
+    async def run():
+        async with egrul_service(monkeypatch) as (app, client):
+            record = await client.lookup(ACTIVE_INN)
+            assert record.inn == ACTIVE_INN and not record.liquidated
+            assert (await client.lookup(LIQUIDATED_INN)).liquidated
+            assert await client.lookup(MISSING_INN) is None
+            assert app['requests'] == 3
+
+            # Повторы, в том числе «не найден», берутся из кэша
+            assert (await client.lookup(ACTIVE_INN)).name == record.name
+            assert await client.lookup(MISSING_INN) is None
+            assert app['requests'] == 3
+
+    asyncio.run(run())
+
+
+def test_negative_cache_expires_sooner(db_path, monkeypatch):
+    monkeypatch.setattr(settings, "EGRUL_CACHE_TTL_HOURS", 24 * 7)
+    monkeypatch.setattr(settings, "EGRUL_NEGATIVE_TTL_HOURS", 24)
+
+    async def run():
+        async with egrul_service(monkeypatch) as (app, client):
+            await client.lookup(ACTIVE_INN)
+            await client.lookup(MISSING_INN)
+            age_cache(db_path, ACTIVE_INN, 48)
+            age_cache(db_path, MISSING_INN, 48)
+
+            assert await client.lookup(ACTIVE_INN) is not None
+            assert app['requests'] == 2
+            assert await client.lookup(MISSING_INN) is None
+            assert app['requests'] == 3
+
+    asyncio.run(run())
+
+
+def test_timeout_is_skipped_and_not_cached(db_path, monkeypatch):
+    monkeypatch.setattr(settings, "EGRUL_API_TIMEOUT", 0.2)
+
+    async def run():
+        async with egrul_service(monkeypatch, timeout_rate=1.0) as (app, client):
+            started = time.perf_counter()
+            assert await client.lookup(ACTIVE_INN) is None
+            assert time.perf_counter() - started < 1
+            assert client.breaker.failures == 1
+
+            app['timeout_rate'] = 0
+            assert await client.lookup(ACTIVE_INN) is not None
+            assert app['requests'] == 2
+
+    asyncio.run(run())
+
+
+def test_server_error_is_skipped_and_not_cached(db_path, monkeypatch):
+    async def run():
+        async with egrul_service(monkeypatch, error_rate=1.0) as (app, client):
+            assert await client.lookup(ACTIVE_INN) is None
+            app['error_rate'] = 0
+            assert await client.lookup(ACTIVE_INN) is not None
+            assert app['requests'] == 2
+
+    asyncio.run(run())
+
+
+def test_breaker_opens_and_half_opens(db_path, monkeypatch):
+    monkeypatch.setattr(settings, "EGRUL_BREAKER_FAILURES", 3)
+    monkeypatch.setattr(settings, "EGRUL_BREAKER_RESET_SECONDS", 0.3)
+
+    async def run():
+        async with egrul_service(monkeypatch, error_rate=1.0) as (app, client):
+            for n in range(3):
+                assert await client.lookup(f"77362075{n}3") is None
+            assert client.breaker.state == "open"
+
+            # Открытый предохранитель не пускает запросы к сервису
+            assert await client.lookup(ACTIVE_INN) is None
+            assert app['requests'] == 3
+
+            # После паузы — один пробный запрос; неудача снова размыкает
+            await asyncio.sleep(0.35)
+            assert client.breaker.state == "half-open"
+            assert await client.lookup(ACTIVE_INN) is None
+            assert app['requests'] == 4
+            assert client.breaker.state == "open"
+
+            # Удачная проба замыкает предохранитель
+            app['error_rate'] = 0
+            await asyncio.sleep(0.35)
+            assert await client.lookup(ACTIVE_INN) is not None
+            assert client.breaker.state == "closed"
+            assert await client.lookup(LIQUIDATED_INN) is not None
+            assert app['requests'] == 6
+
+    asyncio.run(run())
+
+
+def test_concurrent_lookups_share_request(db_path, monkeypatch):
+    async def run():
+        async with egrul_service(monkeypatch, latency_ms=200) as (app, client):
+            records = await asyncio.gather(*(client.lookup(ACTIVE_INN) for _ in range(20)))
+            assert app['requests'] == 1
+            assert all(record == records[0] for record in records)
+
+            # Отмена одного ожидающего не отменяет запрос для остальных
+            waiters = [asyncio.ensure_future(client.lookup(LIQUIDATED_INN)) for _ in range(5)]
+            await asyncio.sleep(0.05)
+            waiters[0].cancel()
+            results = await asyncio.gather(*waiters[1:])
+            assert all(record.liquidated for record in results)
+            assert app['requests'] == 2
+
+    asyncio.run(run())
+
+
+def test_cache_write_failure_still_returns_data(db_path, monkeypatch):
+    async def locked(*args, **kwargs):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(crud, "set_egrul_cache", locked)
+
+    async def run():
+        async with egrul_service(monkeypatch) as (app, client):
+            assert (await client.lookup(ACTIVE_INN)).inn == ACTIVE_INN
+            monkeypatch.setattr(crud, "get_egrul_cache", locked)
+            assert (await client.lookup(LIQUIDATED_INN)).liquidated
+
+    asyncio.run(run())
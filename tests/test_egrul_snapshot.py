@@ -0,0 +1,151 @@
+"""Контрольные числа ИНН и снимок ЕГРЮЛ, собранный конвертером из маленькой выгрузки"""
+import csv
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+from bot.utils import egrul_snapshot, inn as inn_module
+from bot.utils.egrul_snapshot import EgrulSnapshot
+from bot.utils.inn import is_inn_format, is_valid_inn
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Реальные ИНН (Сбербанк, Газпром, Яндекс) и ИНН физлица из примеров ФНС
+VALID_INNS = ["7707083893", "7736050003", "7736207543", "500100732259"]
+INVALID_INNS = [
+    "7707083894",  # неверное контрольное число
+    "7736050013",
+    "500100732258",  # неверное второе контрольное число
+    "500100732249",  # неверное первое контрольное число
+    "77070838",  # длина
+    "77070838930",
+    "1027700132195",  # ОГРН, а не ИНН
+    "770708389a",
+    "",
+    "²" * 10,  # цифры Юникода: isdigit() их пропускает, int() — нет
+    "٠" * 10,  # арабско-индийские нули, контрольное число «сходится»
+    "７７０７０８３８９３",  # полноширинные цифры
+    "7707083893\n",
+]
+
+
+@pytest.mark.parametrize("inn", VALID_INNS)
+def test_valid_inn(inn):
+    assert is_valid_inn(inn)
+
+
+@pytest.mark.parametrize("inn", INVALID_INNS)
+def test_invalid_inn(inn):
+    assert not is_valid_inn(inn)
+
+
+@pytest.mark.parametrize("inn", ["²" * 10, "٠" * 10, "٠" * 12, "７７０７０８３８９３"])
+def test_unicode_digits_not_inn_format(inn):
+    assert inn.isdigit() and not is_inn_format(inn)
+
+
+def make_inn(rng: random.Random, length: int) -> str:
+    """Случайный ИНН с верными контрольными числами"""
+    if length == 10:
+        inn = "".join(str(rng.randint(0, 9)) for _ in range(9))
+        return inn + str(inn_module._control_digit(inn, inn_module._WEIGHTS_10))
+    inn = "".join(str(rng.randint(0, 9)) for _ in range(10))
+    inn += str(inn_module._control_digit(inn, inn_module._WEIGHTS_11))
+    return inn + str(inn_module._control_digit(inn, inn_module._WEIGHTS_12))
+
+
+@pytest.fixture
+def snapshot_source(tmp_path):
+    """Выгрузка в случайном порядке: (путь к CSV, ожидаемые записи по ИНН, повторённый ИНН)"""
+    rng = random.Random(33)
+    inns = sorted({make_inn(rng, rng.choice((10, 12))) for _ in range(300)})
+    rows = [
+        {"inn": inn, "name": f"ООО «Ромашка-{n}»", "legal_form": "ООО", "okved": "62.01",
+         "liquidated": "1" if n % 7 == 0 else "0"}
+        for n, inn in enumerate(inns)
+    ]
+    rng.shuffle(rows)
+
+    # Повтор ИНН в конце выгрузки: в снимке должна остаться последняя строка
+    duplicate = rows[0]["inn"]
+    rows.append({"inn": duplicate, "name": "ООО «Ромашка» (переименовано)", "legal_form": "ООО",
+                 "okved": "62.02", "liquidated": "1"})
+    # Строки с некорректным ИНН конвертер пропускает
+    rows.append({"inn": "12345", "name": "Мусор", "legal_form": "", "okved": "", "liquidated": ""})
+    rows.append({"inn": "٠" * 10, "name": "Мусор", "legal_form": "", "okved": "", "liquidated": ""})
+
+    path = tmp_path / "egrul.csv"
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["inn", "name", "legal_form", "okved", "liquidated"], delimiter=";")
+        writer.writeheader()
+        writer.writerows(rows)
+
+    expected = {row["inn"]: row for row in rows if is_inn_format(row["inn"])}
+    return str(path), expected, duplicate
+
+
+def convert_cli(source: str, target: str, chunk_size: int):
+    subprocess.run(
+        [sys.executable, "-m", "bot.utils.egrul_snapshot", source, target, "--chunk-size", str(chunk_size)],
+        cwd=ROOT, check=True, capture_output=True
+    )
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 10000])
+def test_snapshot_lookup(snapshot_source, tmp_path, chunk_size):
+    source, expected, duplicate = snapshot_source
+    target = str(tmp_path / "egrul.bin")
+    convert_cli(source, target, chunk_size)
+
+    snapshot = EgrulSnapshot(target)
+    try:
+        assert len(snapshot) == len(expected)
+        for inn, row in expected.items():
+            record = snapshot.find(inn)
+            assert record is not None, inn
+            assert record.inn == inn
+            assert record.name == row["name"]
+            assert record.okved == row["okved"]
+            assert record.liquidated == (row["liquidated"] == "1")
+
+        ordered = sorted(expected)
+        assert snapshot.find(ordered[0]).inn == ordered[0]
+        assert snapshot.find(ordered[-1]).inn == ordered[-1]
+
+        record = snapshot.find(duplicate)
+        assert record.name == "ООО «Ромашка» (переименовано)"
+        assert record.okved == "62.02" and record.liquidated
+
+        rng = random.Random(1)
+        misses = {make_inn(rng, length) for length in (10, 12) * 20} - set(expected)
+        misses |= {"0000000000", "999999999999", "12345"}
+        for inn in misses:
+            assert snapshot.find(inn) is None, inn
+    finally:
+        snapshot.close()
+
+
+def test_lookup_inn_uses_configured_snapshot(snapshot_source, tmp_path, monkeypatch):
+    source, expected, _ = snapshot_source
+    target = str(tmp_path / "egrul.bin")
+    convert_cli(source, target, 50)
+
+    monkeypatch.setattr(egrul_snapshot.settings, "EGRUL_SNAPSHOT_PATH", target)
+    monkeypatch.setattr(egrul_snapshot, "_snapshot", None)
+    monkeypatch.setattr(egrul_snapshot, "_snapshot_checked", False)
+    try:
+        inn = next(iter(expected))
+        assert egrul_snapshot.lookup_inn(inn).name == expected[inn]["name"]
+        assert egrul_snapshot.lookup_inn("0000000000") is None
+    finally:
+        egrul_snapshot.get_snapshot().close()
+
+
+def test_lookup_inn_without_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(egrul_snapshot.settings, "EGRUL_SNAPSHOT_PATH", str(tmp_path / "missing.bin"))
+    monkeypatch.setattr(egrul_snapshot, "_snapshot", None)
+    monkeypatch.setattr(egrul_snapshot, "_snapshot_checked", False)
+    assert egrul_snapshot.lookup_inn(VALID_INNS[0]) is None
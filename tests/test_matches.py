@@ -0,0 +1,37 @@
+"""Матчи: перенос на канонические пары (меньший id, больший id) и поиск партнёров"""
+import asyncio
+import sqlite3
+
+from database import crud, init_db
+from tests.test_cities import seed_organizations
+
+
+def test_normalize_matches(db_path):
+    con = sqlite3.connect(db_path)
+    # База до миграции: индексов по matches нет, пары в любом порядке и с повторами
+    con.execute("DROP INDEX idx_matches_pair")
+    con.execute("DROP INDEX idx_matches_org2")
+    seed_organizations(con, [None] * 5)
+    con.executemany("INSERT INTO matches (id, org1_id, org2_id, is_active) VALUES (?, ?, ?, ?)", [
+        (1, 2, 1, 0),  # перевёрнутая пара; активна копия 3 — пара остаётся активной
+        (2, 1, 3, 1),
+        (3, 1, 2, 1),
+        (4, 4, 4, 1),  # сам с собой
+        (5, 5, 4, 0),
+        (6, 4, 5, 0),  # обе копии неактивны
+    ])
+    con.commit()
+
+    asyncio.run(init_db())
+    rows = con.execute("SELECT id, org1_id, org2_id, is_active FROM matches ORDER BY id").fetchall()
+    assert rows == [(1, 1, 2, 1), (2, 1, 3, 1), (5, 4, 5, 0)]
+    con.close()
+
+    assert sorted(org['id'] for org in asyncio.run(crud.get_partner_orgs(1))) == [2, 3]
+    assert [org['id'] for org in asyncio.run(crud.get_partner_orgs(2))] == [1]
+    assert asyncio.run(crud.get_partner_orgs(4)) == []
+
+    # Повторный матч той же пары в любом порядке не создаёт строку
+    assert asyncio.run(crud.create_match(5, 4)) is True
+    assert asyncio.run(crud.create_match(4, 5)) is False
+    assert asyncio.run(crud.is_partner(5, 4))
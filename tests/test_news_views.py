@@ -0,0 +1,122 @@
+"""Учёт просмотров новостей: HyperLogLog-скетч и пакетная запись с возвратом несохранённого"""
+import asyncio
+import sqlite3
+
+import pytest
+
+from database import news_views
+from database.news_views import HyperLogLog, NewsViewCounter
+from tests.test_cities import seed_organizations
+
+
+def seed_news(con: sqlite3.Connection, count: int):
+    seed_organizations(con, [None])
+    con.executemany("INSERT INTO news (id, organization_id, title, content) VALUES (?, 1, ?, '-')",
+                    [(news_id, f"Новость {news_id}") for news_id in range(1, count + 1)])
+    con.commit()
+
+
+def sketch_of(viewers) -> HyperLogLog:
+    sketch = HyperLogLog()
+    for viewer_id in viewers:
+        sketch.add_hash(HyperLogLog.hash(viewer_id))
+    return sketch
+
+
+def test_sparse_switches_to_dense():
+    sketch = HyperLogLog()
+    viewer_id = 0
+    while sketch.dense is None:
+        viewer_id += 1
+        sketch.add_hash(HyperLogLog.hash(viewer_id))
+        if sketch.dense is None:
+            # Разреженная форма всегда меньше плотной
+            assert len(sketch.to_bytes()) <= HyperLogLog.M
+    assert sketch.sparse is None
+    assert len(sketch.to_bytes()) == HyperLogLog.M + 1
+    # Переход не теряет регистров: оценка та же, что у скетча, собранного заново
+    assert sketch.estimate() == sketch_of(range(1, viewer_id + 1)).estimate()
+
+
+@pytest.mark.parametrize("viewers", [0, 1, 10, 100, 1000, 10000])
+def test_round_trip(viewers):
+    sketch = sketch_of(range(viewers))
+    restored = HyperLogLog.from_bytes(sketch.to_bytes())
+    assert (restored.sparse, restored.dense) == (sketch.sparse, sketch.dense)
+    assert restored.to_bytes() == sketch.to_bytes()
+    assert restored.estimate() == sketch.estimate()
+    assert abs(sketch.estimate() - viewers) <= max(1, viewers * 0.1)
+
+
+def test_from_empty_bytes():
+    assert HyperLogLog.from_bytes(None).estimate() == 0
+    assert HyperLogLog.from_bytes(b"").sparse == {}
+
+
+def read_news(db_path: str) -> list:
+    con = sqlite3.connect(db_path)
+    rows = con.execute("SELECT id, views_count, unique_views FROM news ORDER BY id").fetchall()
+    con.close()
+    return rows
+
+
+def test_flush(db_path):
+    con = sqlite3.connect(db_path)
+    seed_news(con, 2)
+    con.close()
+    counter = NewsViewCounter(flush_interval_ms=1000)
+
+    counter.record([1, 2], viewer_id=10)
+    counter.record([1], viewer_id=10)  # повторный показ тому же зрителю не считается
+    counter.record([1], viewer_id=11)
+    assert asyncio.run(counter.flush()) == 2
+    assert read_news(db_path) == [(1, 2, 2), (2, 1, 1)]
+
+    # Следующий интервал: views_count растёт, уникальные зрители — по скетчу за всё время
+    counter.record([1], viewer_id=10)
+    counter.record([1], viewer_id=12)
+    asyncio.run(counter.flush())
+    assert read_news(db_path) == [(1, 4, 3), (2, 1, 1)]
+    assert asyncio.run(counter.flush()) == 0
+
+
+def test_flush_requeues_failed_chunks(db_path, monkeypatch):
+    monkeypatch.setattr(NewsViewCounter, "FLUSH_CHUNK", 2)
+    monkeypatch.setattr(NewsViewCounter, "CHUNK_PAUSE", 0)
+    con = sqlite3.connect(db_path)
+    seed_news(con, 4)
+    # Запись второй части (новости 3 и 4) падает
+    con.execute("""
+        CREATE TRIGGER fail_news_3 BEFORE UPDATE ON news WHEN NEW.id = 3
+        BEGIN SELECT RAISE(ABORT, 'сбой записи'); END
+    """)
+    con.commit()
+    counter = NewsViewCounter(flush_interval_ms=1000)
+
+    counter.record([1, 2, 3, 4], viewer_id=10)
+    asyncio.run(counter.flush())
+    assert read_news(db_path) == [(1, 1, 1), (2, 1, 1), (3, 0, 0), (4, 0, 0)]
+    assert counter._pending == {3: {HyperLogLog.hash(10)}, 4: {HyperLogLog.hash(10)}}
+
+    # Возвращённое объединяется с новыми показами и записывается следующим сбросом
+    counter.record([3], viewer_id=11)
+    con.execute("DROP TRIGGER fail_news_3")
+    con.commit()
+    asyncio.run(counter.flush())
+    assert read_news(db_path) == [(1, 1, 1), (2, 1, 1), (3, 2, 2), (4, 1, 1)]
+    assert counter._pending == {}
+    # Скетч упавшей части не записан наполовину: у новости 3 ровно два зрителя
+    sketch = con.execute("SELECT sketch FROM news_viewers WHERE news_id = 3").fetchone()[0]
+    assert HyperLogLog.from_bytes(sketch).estimate() == 2
+    con.close()
+
+
+def test_flush_keeps_batch_when_database_unavailable(db_path, monkeypatch):
+    async def unavailable():
+        raise sqlite3.OperationalError("unable to open database file")
+
+    monkeypatch.setattr(news_views, "get_db", unavailable)
+    counter = NewsViewCounter(flush_interval_ms=1000)
+    counter.record([1, 2], viewer_id=10)
+    asyncio.run(counter.flush())
+    assert counter._pending == {1: {HyperLogLog.hash(10)}, 2: {HyperLogLog.hash(10)}}
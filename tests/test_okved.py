@@ -0,0 +1,83 @@
+"""Справочник ОКВЭД 2: время загрузки, нормализация, запрещённые диапазоны, неизвестные коды"""
+import time
+
+import pytest
+
+from config.config import settings
+from bot.utils.okved import OkvedIndex, normalize_code, okved_index
+
+
+def test_load_within_budget():
+    OkvedIndex.load()  # прогрев: файл в кэше ОС
+    started = time.perf_counter()
+    index = OkvedIndex.load()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    assert elapsed_ms < settings.OKVED_LOAD_BUDGET_MS
+    # Полный классификатор: все 88 классов, подгруппы и национальные подвиды
+    assert index.size > 1000
+
+
+@pytest.mark.parametrize("text, code", [
+    ("62.01", "62.01"),
+    ("6201", "62.01"),
+    ("62,01", "62.01"),
+    ("  62.01 Разработка ПО", "62.01"),
+    ("62.01.", "62.01"),
+    ("011", "01.1"),
+    ("01111", "01.11.1"),
+    ("471911", "47.19.11"),
+    ("abc", None),
+    ("6", None),
+    ("6201234", None),
+    ("62..01", None),
+    ("", None),
+])
+def test_normalize_code(text, code):
+    assert normalize_code(text) == code
+
+
+@pytest.mark.parametrize("code, category", [
+    ("92", "gambling"),
+    ("92.1", "gambling"),
+    ("92.2", "gambling"),
+    ("11.01", "alcohol"),
+    ("11.02", "alcohol"),
+    ("11.03", "alcohol"),
+    ("11.04", "alcohol"),
+    ("11.05", "alcohol"),
+    ("46.34.2", "alcohol"),
+    ("47.25.1", "alcohol"),
+    ("12", "tobacco"),
+    ("12.0", "tobacco"),
+    ("12.00", "tobacco"),
+    ("46.35", "tobacco"),
+    ("47.26", "tobacco"),
+])
+def test_blocked_ranges(code, category):
+    assert okved_index.lookup(code).blocked == category
+
+
+@pytest.mark.parametrize("code", ["11", "11.0", "11.06", "11.07", "11.07.1", "46.34", "46.34.1", "47.25.2", "62.01"])
+def test_neighbours_of_blocked_ranges_allowed(code):
+    entry = okved_index.lookup(code)
+    assert entry is not None and entry.blocked is None
+
+
+@pytest.mark.parametrize("code", ["01.99.99", "99.99", "04", "62.1", "62.01.9", "92.99", "11.09", "00"])
+def test_unknown_codes_rejected(code):
+    assert okved_index.lookup(code) is None
+
+
+def test_registry_code_falls_back_to_parent():
+    # В ЕГРЮЛ встречаются подвиды, которых нет в справочнике: название берётся у подгруппы,
+    # запрещённый диапазон проверяется по префиксу
+    assert okved_index.lookup("11.01.1") is None
+    entry = okved_index.lookup("11.01.1", exact=False)
+    assert entry.name == okved_index.lookup("11.01").name and entry.blocked == "alcohol"
+    assert okved_index.lookup("04.10", exact=False) is None
+
+
+def test_describe():
+    assert okved_index.describe("62.01") == "62.01 — Разработка компьютерного программного обеспечения"
+    assert okved_index.describe("IT-консалтинг") == "IT-консалтинг"
+    assert okved_index.describe("01.99.99") == "01.99.99"
@@ -0,0 +1,77 @@
+import asyncio
+import sqlite3
+
+from database import crud
+
+INN = "7707083893"
+
+
+def registration_data(inn: str = INN) -> dict:
+    return {
+        'name': "ООО «Ромашка»",
+        'legal_form': "ООО",
+        'activity_field': "Разработка ПО",
+        'inn': inn,
+        'phone': "+79990000000",
+        'email': "info@example.ru",
+        'telegram_contact': "@romashka",
+        'description': "Разработка программного обеспечения",
+        'turnover': "До 3 млн",
+        'can_give_list': ["Информационное"],
+        'need_list': ["Финансирование"],
+        'interaction_format': "Дистанционно",
+        'city': "Москва",
+        'partnership_type': "Постоянное",
+    }
+
+
+def test_parallel_registrations_of_one_inn(db_path):
+    async def run():
+        return await asyncio.gather(*(
+            crud.register_organization(1000 + i, f"user{i}", f"User {i}", registration_data())
+            for i in range(30)
+        ))
+
+    results = asyncio.run(run())
+
+    created = [result for result in results if result is not None]
+    assert len(created) == 1
+    assert created[0]['created'] is True
+    assert results.count(None) == 29
+
+    con = sqlite3.connect(db_path)
+    try:
+        assert con.execute("SELECT COUNT(*) FROM organizations WHERE inn = ?", (INN,)).fetchone()[0] == 1
+        assert con.execute("SELECT COUNT(*) FROM verifications").fetchone()[0] == 1
+        # Проигравшие регистрации откатываются целиком — пользователей без организации нет
+        orphans = con.execute("""
+            SELECT COUNT(*) FROM users u
+            WHERE NOT EXISTS (SELECT 1 FROM organizations o WHERE o.user_id = u.id)
+        """).fetchone()[0]
+        assert orphans == 0
+    finally:
+        con.close()
+
+
+def test_repeated_submit_by_same_user(db_path):
+    async def run():
+        first = await crud.register_organization(42, "user", "User", registration_data())
+        again = await asyncio.gather(*(
+            crud.register_organization(42, "user", "User", registration_data()) for _ in range(5)
+        ))
+        return first, again
+
+    first, again = asyncio.run(run())
+
+    assert first['created'] is True
+    for result in again:
+        assert result['created'] is False
+        assert result['organization_id'] == first['organization_id']
+        assert result['verification_id'] == first['verification_id']
+
+    con = sqlite3.connect(db_path)
+    try:
+        assert con.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 1
+        assert con.execute("SELECT COUNT(*) FROM organizations").fetchone()[0] == 1
+    finally:
+        con.close()
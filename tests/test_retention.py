@@ -0,0 +1,141 @@
+"""Архивация логов: батчи, помесячные архивы, чтение периода вместе с архивом"""
+import asyncio
+import gzip
+import json
+import logging
+import os
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from config.config import settings
+from database import crud, database, init_db, retention
+from database.maintenance import enable_incremental_vacuum
+
+OLD_LOGS = [
+    # (user_id, action, created_at)
+    (1, "start", "2024-03-05 10:00:00"),
+    (2, "like", "2024-03-31 23:59:59"),
+    (1, "like", "2024-04-01 00:00:00"),
+    (2, "start", "2024-04-10 12:00:00"),
+    (1, "match", "2024-04-20 08:30:00"),
+    (1, "like", "2024-04-28 09:00:00"),
+    (2, "like", "2024-05-02 18:00:00"),
+]
+
+
+@pytest.fixture
+def logs_db(db_path, tmp_path, monkeypatch):
+    """База с двумя пользователями, старыми логами за три месяца и двумя свежими"""
+    monkeypatch.setattr(settings, "LOG_ARCHIVE_DIR", str(tmp_path / "logs_archive"))
+    monkeypatch.setattr(settings, "LOG_RETENTION_BATCH_SIZE", 3)
+    now = datetime.utcnow().strftime(retention.TIMESTAMP_FORMAT)
+    con = sqlite3.connect(db_path)
+    con.executemany("INSERT INTO users (id, telegram_id, username) VALUES (?, ?, ?)",
+                    [(1, 101, "first"), (2, 102, "second")])
+    con.executemany(
+        "INSERT INTO logs (user_id, action, details, created_at) VALUES (?, ?, ?, ?)",
+        [(user_id, action, json.dumps({'n': n}), created_at)
+         for n, (user_id, action, created_at) in enumerate(OLD_LOGS + [(1, "start", now), (2, "like", now)])]
+    )
+    con.commit()
+    con.close()
+    return db_path
+
+
+def read_archive(month: str) -> list:
+    with gzip.open(os.path.join(settings.LOG_ARCHIVE_DIR, f"logs-{month}.jsonl.gz"), "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_archive_in_batches_by_month(logs_db, monkeypatch):
+    batches = []
+    append = retention._append_archive
+    monkeypatch.setattr(retention, "_append_archive", lambda rows: batches.append(len(rows)) or append(rows))
+
+    assert asyncio.run(retention.archive_old_logs(retention_days=90)) == len(OLD_LOGS)
+    assert batches == [3, 3, 1]
+
+    con = sqlite3.connect(logs_db)
+    assert con.execute("SELECT COUNT(*) FROM logs").fetchone()[0] == 2
+    con.close()
+
+    assert sorted(os.listdir(settings.LOG_ARCHIVE_DIR)) == [
+        "logs-2024-03.jsonl.gz", "logs-2024-04.jsonl.gz", "logs-2024-05.jsonl.gz"
+    ]
+    # Апрель пришёл двумя батчами — два gzip-member в одном файле
+    april = read_archive("2024-04")
+    assert [log['created_at'] for log in april] == [created_at for _, _, created_at in OLD_LOGS[2:6]]
+    assert april[0]['username'] == "first"
+    assert [log['action'] for log in read_archive("2024-03")] == ["start", "like"]
+
+    # Повторный проход ничего не переносит
+    assert asyncio.run(retention.archive_old_logs(retention_days=90)) == 0
+
+
+def test_read_archived_logs(logs_db):
+    asyncio.run(retention.archive_old_logs(retention_days=90))
+
+    logs = asyncio.run(retention.read_archived_logs("2024-03-31 00:00:00", "2024-04-20 08:30:00"))
+    assert [log['created_at'] for log in logs] == [created_at for _, _, created_at in OLD_LOGS[1:4]]
+    assert logs[0]['details'] == {'n': 1}
+
+    logs = asyncio.run(retention.read_archived_logs("2024-01-01 00:00:00", user_id=2))
+    assert [log['action'] for log in logs] == ["like", "start", "like"]
+
+    # Батч, записанный в архив дважды (сбой до удаления из базы), читается один раз
+    retention._append_archive(read_archive("2024-03"))
+    assert len(asyncio.run(retention.read_archived_logs("2024-03-01 00:00:00", "2024-04-01 00:00:00"))) == 2
+
+
+def test_get_logs_merges_archive(logs_db, monkeypatch):
+    asyncio.run(retention.archive_old_logs(retention_days=90))
+
+    logs = asyncio.run(crud.get_logs(date_from="2024-04-15 00:00:00"))
+    assert [log['created_at'] for log in logs[2:]] == ["2024-05-02 18:00:00", "2024-04-28 09:00:00",
+                                                        "2024-04-20 08:30:00"]
+    assert len(logs) == 5 and all(isinstance(log['details'], dict) for log in logs)
+
+    logs = asyncio.run(crud.get_logs(date_from="2024-03-01 00:00:00", date_to="2024-04-05 00:00:00", user_id=1))
+    assert [(log['action'], log['created_at']) for log in logs] == [("like", "2024-04-01 00:00:00"),
+                                                                     ("start", "2024-03-05 10:00:00")]
+    assert len(asyncio.run(crud.get_logs(limit=3, date_from="2024-01-01 00:00:00"))) == 3
+
+    # Период внутри живых записей архив не читает
+    async def no_archive(*args, **kwargs):
+        raise AssertionError("архив не должен читаться")
+
+    monkeypatch.setattr(retention, "read_archived_logs", no_archive)
+    con = sqlite3.connect(logs_db)
+    oldest = con.execute("SELECT MIN(created_at) FROM logs").fetchone()[0]
+    con.close()
+    assert len(asyncio.run(crud.get_logs(date_from=oldest))) == 2
+
+
+def test_init_db_does_not_vacuum_existing_database(tmp_path, monkeypatch, caplog):
+    path = str(tmp_path / "old.db")
+    con = sqlite3.connect(path)
+    con.execute("CREATE TABLE legacy (x)")
+    con.commit()
+    con.close()
+    monkeypatch.setattr(database, "DATABASE_PATH", path)
+
+    with caplog.at_level(logging.WARNING, logger="database.database"):
+        asyncio.run(init_db())
+    assert "database.maintenance" in caplog.text
+    con = sqlite3.connect(path)
+    assert con.execute("PRAGMA auto_vacuum").fetchone()[0] == 0
+    con.close()
+
+    assert asyncio.run(enable_incremental_vacuum()) is True
+    assert asyncio.run(enable_incremental_vacuum()) is False
+    con = sqlite3.connect(path)
+    assert con.execute("PRAGMA auto_vacuum").fetchone()[0] == database.AUTO_VACUUM_INCREMENTAL
+    con.close()
+
+
+def test_new_database_is_incremental(db_path):
+    con = sqlite3.connect(db_path)
+    assert con.execute("PRAGMA auto_vacuum").fetchone()[0] == database.AUTO_VACUUM_INCREMENTAL
+    con.close()
@@ -0,0 +1,39 @@
+"""Проверка описаний на запрещённые категории по корпусу tests/data/screening_corpus.txt"""
+import os
+
+import pytest
+
+from bot.utils.screening import screener, tokenize
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "data", "screening_corpus.txt")
+
+
+def load_corpus():
+    """Пары (текст, ожидаемые категории)"""
+    cases = []
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line or line.startswith("#"):
+                continue
+            categories, text = line.split("\t", 1)
+            cases.append((text, set() if categories == "-" else set(categories.split(","))))
+    return cases
+
+
+CORPUS = load_corpus()
+
+
+@pytest.mark.parametrize("text,expected", CORPUS, ids=[text for text, _ in CORPUS])
+def test_corpus_categories(text, expected):
+    assert screener.blocked_categories(text) == expected
+
+
+def test_corpus_covers_clean_and_blocked():
+    assert sum(1 for _, expected in CORPUS if not expected) >= 20
+    assert {category for _, expected in CORPUS for category in expected} == {"gambling", "alcohol", "tobacco"}
+
+
+def test_homoglyphs_only_in_mixed_words():
+    # Слово целиком латиницей не переводится: «cop» не становится «сор»
+    assert tokenize("кaзинo cop") == ["казин", "cop"]
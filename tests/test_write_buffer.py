@@ -0,0 +1,99 @@
+"""Буфер отложенной записи: ошибки записи не теряют строки и не блокируют put()"""
+import asyncio
+import sqlite3
+
+from database import write_buffer
+from database.write_buffer import WriteBehindBuffer
+
+INSERT_LOG = "INSERT INTO logs (user_id, action, created_at) VALUES (?, ?, '2024-01-01 00:00:00')"
+
+
+def make_buffer(**kwargs) -> WriteBehindBuffer:
+    options = dict(flush_interval_ms=10, max_batch=20, max_size=5, retry_attempts=3, retry_delay_ms=10)
+    options.update(kwargs)
+    return WriteBehindBuffer(**options)
+
+
+def failing_get_db(monkeypatch, failures: int):
+    """get_db, который первые failures раз падает; возвращает счётчик вызовов"""
+    calls = {'count': 0}
+    real_get_db = write_buffer.get_db
+
+    async def get_db():
+        calls['count'] += 1
+        if calls['count'] <= failures:
+            raise sqlite3.OperationalError("database is locked")
+        return await real_get_db()
+
+    monkeypatch.setattr(write_buffer, "get_db", get_db)
+    return calls
+
+
+def logged_actions(path: str):
+    con = sqlite3.connect(path)
+    rows = [row[0] for row in con.execute("SELECT action FROM logs ORDER BY id")]
+    con.close()
+    return rows
+
+
+def test_failed_flush_is_retried(db_path, monkeypatch):
+    calls = failing_get_db(monkeypatch, failures=2)
+    buffer = make_buffer()
+
+    async def run():
+        buffer.start()
+        # Очередь на 5 строк: put() упирается в неё, пока сброс повторяет пачку
+        for n in range(50):
+            await buffer.put(INSERT_LOG, (1, f"action {n}"))
+        await buffer.stop()
+
+    asyncio.run(asyncio.wait_for(run(), 10))
+    assert calls['count'] > 2
+    assert sorted(logged_actions(db_path)) == sorted(f"action {n}" for n in range(50))
+
+
+def test_bad_row_does_not_drop_batch(db_path):
+    buffer = make_buffer(max_size=100)
+
+    async def run():
+        buffer.start()
+        await buffer.put(INSERT_LOG, (1, "before"))
+        await buffer.put(INSERT_LOG, (1, None))  # NOT NULL: эту строку записать нельзя
+        await buffer.put(INSERT_LOG, (1, "after"))
+        await buffer.stop()
+
+    asyncio.run(asyncio.wait_for(run(), 10))
+    assert logged_actions(db_path) == ["before", "after"]
+
+
+def test_put_writes_directly_after_task_died(db_path):
+    buffer = make_buffer()
+
+    async def run():
+        buffer.start()
+        buffer._task.cancel()
+        await asyncio.sleep(0)
+        assert not buffer.running
+        for n in range(20):
+            await buffer.put(INSERT_LOG, (1, f"action {n}"))
+        await buffer.stop()
+
+    asyncio.run(asyncio.wait_for(run(), 10))
+    assert logged_actions(db_path) == [f"action {n}" for n in range(20)]
+
+
+def test_full_queue_does_not_hang_when_task_dies(db_path):
+    buffer = make_buffer()
+
+    async def run():
+        buffer.start()
+        # Задача сброса ещё не успела забрать ни одной строки — очередь заполняется
+        for n in range(5):
+            await buffer.put(INSERT_LOG, (1, f"queued {n}"))
+        assert buffer._queue.full()
+        buffer._task.cancel()
+        await buffer.put(INSERT_LOG, (1, "blocked"))
+        await buffer.stop()
+
+    asyncio.run(asyncio.wait_for(run(), 10))
+    assert sorted(logged_actions(db_path)) == sorted([f"queued {n}" for n in range(5)] + ["blocked"])